@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 from supabase import Client
 
 from app.core.config import get_settings
-from app.core.dependencies import CurrentUser, AccessToken
+from app.core.dependencies import CurrentUser, AccessToken, forget_token
 from app.infrastructure.supabase_client import get_supabase_client, get_admin_supabase_client
 from app.repositories.auth_repository import AuthRepository
 from app.services.auth_service import AuthService
@@ -64,7 +64,9 @@ async def logout(
     access_token: AccessToken,
     service: AuthService = Depends(get_auth_service),
 ):
-    return service.logout(access_token=access_token)
+    result = service.logout(access_token=access_token)
+    forget_token(access_token)
+    return result
 
 @router.post(
     "/refresh",
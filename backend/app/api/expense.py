@@ -1,35 +1,69 @@
-from fastapi import APIRouter, Depends, status
+import tempfile
+from itertools import chain
+from typing import IO
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Request, Response, status
 from fastapi import Query   
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.core.container import get_container
 from app.core.dependencies import CurrentUser, AccessToken
-from app.infrastructure.supabase_client import get_user_client, get_admin_supabase_client
-from app.infrastructure.openai_client import get_openai_client
-from app.repositories.ai_repository import AIRepository
-from app.repositories.expense_repository import ExpenseRepository
-from app.services.expense_service import ExpenseService
-from app.services.embedding_services import EmbeddingService
+from app.core.etag import etag_matches, make_etag, make_version_etag, parse_if_match
+from app.core.exceptions import PayloadTooLargeError
+from app.services.expense_service import AsyncExpenseService
+from app.services.expense_export import EXPORT_FORMATS
 from app.models.expense import (
+    BulkCreateExpenseRequest,
+    BulkCreateExpenseResponse,
+    BulkExpenseMutationResponse,
     CreateExpenseRequest,
     UpdateExpenseRequest,
+    ExpenseImportResponse,
     ExpenseOut,
     ExpensesListOut,
     ExpenseSummaryResponse,
+    ExpenseSummaryByCategoryResponse,
+    ExpenseSummaryByPaymentMethodResponse,
+    ExpenseSummaryBySubcategoryResponse,
+    ExpenseSummaryByPeriodResponse,
 )
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
+# CSV import upload: hard size limit, and how much of it may sit in memory
+MAX_CSV_IMPORT_BYTES = 50 * 1024 * 1024
+IMPORT_SPOOL_MEMORY_BYTES = 1024 * 1024
 
-def get_expense_service(token: AccessToken) -> ExpenseService:
-    """Dependency to get an instance of ExpenseService."""
-    user_client = get_user_client(access_token=token)
-    admin_client = get_admin_supabase_client()
-    openai_client = get_openai_client()
 
-    ai_repo = AIRepository(client=admin_client)
-    embedding_service = EmbeddingService(openai_client=openai_client, ai_repo=ai_repo)
-    repo = ExpenseRepository(client=user_client)
-    return ExpenseService(expense_repo=repo, embedding_service=embedding_service)
+async def get_expense_service(token: AccessToken, background_tasks: BackgroundTasks) -> AsyncExpenseService:
+    """Dependency to get an instance of AsyncExpenseService."""
+    return get_container().expense_service(token, schedule_task=background_tasks.add_task)
+
+async def conditional_on_data_version(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+) -> None:
+    """
+    Conditional GET for list and summary endpoints.
+
+    The ETag is derived from the user's data version plus path and query, so
+    a poll with a still-valid If-None-Match gets 304 after one lookup of the
+    version row, without touching the expenses table. The version is read
+    before the response is computed: a write racing with this request can
+    only make the tag stale (one extra recompute), never serve stale data.
+    """
+    version = await expense_service.get_data_version(current_user.id)
+    etag = make_version_etag(
+        version, current_user.id, request.url.path, params=request.query_params.multi_items(),
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+
 
 @router.get(
     "/export/csv",
@@ -38,7 +72,7 @@ def get_expense_service(token: AccessToken) -> ExpenseService:
 )
 async def export_expenses_csv(
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
     expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
     category: str | None = Query(None),
     q: str | None = Query(None),
@@ -46,8 +80,9 @@ async def export_expenses_csv(
     date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
     sort_by: str = Query("created_at", pattern="^(created_at|transaction_date|amount)$"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
-) -> Response:
-    csv_content = expense_service.export_expenses_csv(
+) -> StreamingResponse:
+    """Stream the CSV page by page instead of building the whole file in memory."""
+    csv_chunks = expense_service.export_expenses_csv(
         user_id=current_user.id,
         expense_type=expense_type,
         category=category,
@@ -57,30 +92,75 @@ async def export_expenses_csv(
         sort_by=sort_by,
         sort_order=sort_order,
     )
+    # Pull the first page now so DB errors still map to a proper HTTP status.
+    # In a worker thread, like the rest of the stream: pages are fetched from there.
+    first_chunk = await run_in_threadpool(next, csv_chunks, "")
 
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        chain([first_chunk], csv_chunks),
         media_type="text/csv",
         headers={"Content-Disposition": 'attachment; filename="expenses_export.csv"'},
     )
 
 
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    summary="Export my expenses as CSV, NDJSON, Arrow IPC or Parquet",
+)
+async def export_expenses(
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|arrow|parquet)$"),
+    expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
+    category: str | None = Query(None),
+    q: str | None = Query(None),
+    date_from: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    sort_by: str = Query("created_at", pattern="^(created_at|transaction_date|amount)$"),
+    sort_order: str = Query("desc", pattern="^(asc|desc)$"),
+) -> StreamingResponse:
+    """Stream the export in the requested format; typed formats keep numeric and date columns."""
+    chunks = expense_service.export_expenses(
+        user_id=current_user.id,
+        export_format=export_format,
+        expense_type=expense_type,
+        category=category,
+        q=q,
+        date_from=date_from,
+        date_to=date_to,
+        sort_by=sort_by,
+        sort_order=sort_order,
+    )
+    # Pull the first chunk now so DB errors still map to a proper HTTP status
+    first_chunk = await run_in_threadpool(next, chunks, b"")
+    media_type, extension = EXPORT_FORMATS[export_format]
+
+    return StreamingResponse(
+        chain([first_chunk], chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="expenses_export.{extension}"'},
+    )
+
+
 @router.get(
     "/summary",
+    dependencies=[Depends(conditional_on_data_version)],
     response_model=ExpenseSummaryResponse,
     status_code=status.HTTP_200_OK,
     summary="All-time summary of my expenses",
 )
 async def get_expense_summary(
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
 ) -> ExpenseSummaryResponse:
     """Get all-time summary of total income, total expenses, and net balance."""
-    return expense_service.get_expense_summary_all_time(user_id=current_user.id)
+    return await expense_service.get_expense_summary_all_time(user_id=current_user.id)
 
 
 @router.get(
     "/summary/monthly",
+    dependencies=[Depends(conditional_on_data_version)],
     response_model=ExpenseSummaryResponse,
     status_code=status.HTTP_200_OK,
     summary="Monthly summary of my expenses",
@@ -89,10 +169,10 @@ async def get_expense_summary_by_month(
     current_user: CurrentUser,
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2000, le=2100),
-    expense_service: ExpenseService = Depends(get_expense_service),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
 ) -> ExpenseSummaryResponse:
     """Get summary of expenses for a specific month and year."""
-    return expense_service.get_expense_summary_by_month(
+    return await expense_service.get_expense_summary_by_month(
         user_id=current_user.id,
         month=month,
         year=year,
@@ -101,6 +181,7 @@ async def get_expense_summary_by_month(
 
 @router.get(
     "/summary/yearly",
+    dependencies=[Depends(conditional_on_data_version)],
     response_model=ExpenseSummaryResponse,
     status_code=status.HTTP_200_OK,
     summary="Yearly summary of my expenses",
@@ -108,24 +189,118 @@ async def get_expense_summary_by_month(
 async def get_expense_summary_by_year(
     current_user: CurrentUser,
     year: int = Query(..., ge=2000, le=2100),
-    expense_service: ExpenseService = Depends(get_expense_service),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
 ) -> ExpenseSummaryResponse:
     """Get summary of expenses for a specific year."""
-    return expense_service.get_expense_summary_by_year(
+    return await expense_service.get_expense_summary_by_year(
         user_id=current_user.id,
         year=year,
     )
 
 
+@router.get(
+    "/summary/timeseries",
+    dependencies=[Depends(conditional_on_data_version)],
+    response_model=list[ExpenseSummaryByPeriodResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Income/expense trend per day, week, month or year",
+)
+async def get_expense_timeseries(
+    current_user: CurrentUser,
+    date_from: str = Query(..., pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str = Query(..., pattern="^\d{4}-\d{2}-\d{2}$"),
+    granularity: str = Query("month", pattern="^(day|week|month|year)$"),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+) -> list[ExpenseSummaryByPeriodResponse]:
+    """Get one zero-filled bucket per period between date_from and date_to."""
+    return await expense_service.get_expense_timeseries(
+        user_id=current_user.id,
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get(
+    "/summary/categories",
+    dependencies=[Depends(conditional_on_data_version)],
+    response_model=list[ExpenseSummaryByCategoryResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Total per category",
+)
+async def get_expense_summary_by_category(
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
+    date_from: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+) -> list[ExpenseSummaryByCategoryResponse]:
+    """Get total amount per category (largest first) for an optional type and date range."""
+    return await expense_service.get_expense_summary_by_category(
+        user_id=current_user.id,
+        expense_type=expense_type,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get(
+    "/summary/subcategories",
+    dependencies=[Depends(conditional_on_data_version)],
+    response_model=list[ExpenseSummaryBySubcategoryResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Total per category and subcategory",
+)
+async def get_expense_summary_by_subcategory(
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
+    date_from: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+) -> list[ExpenseSummaryBySubcategoryResponse]:
+    """Get total amount per (category, subcategory) for an optional type and date range."""
+    return await expense_service.get_expense_summary_by_subcategory(
+        user_id=current_user.id,
+        expense_type=expense_type,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.get(
+    "/summary/payment-methods",
+    dependencies=[Depends(conditional_on_data_version)],
+    response_model=list[ExpenseSummaryByPaymentMethodResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Total per payment method",
+)
+async def get_expense_summary_by_payment_method(
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
+    date_from: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+) -> list[ExpenseSummaryByPaymentMethodResponse]:
+    """Get total amount per payment method for an optional type and date range."""
+    return await expense_service.get_expense_summary_by_payment_method(
+        user_id=current_user.id,
+        expense_type=expense_type,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
 @router.get(
     "",
+    dependencies=[Depends(conditional_on_data_version)],
     response_model=ExpensesListOut,
+    response_model_exclude_unset=True,  # sparse fieldsets only serialize the requested fields
     status_code=status.HTTP_200_OK,
     summary="See all my expenses",
 )
 async def get_all_expenses(
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
     limit: int = 100,
     offset: int = 0,
     expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
@@ -135,9 +310,30 @@ async def get_all_expenses(
     date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
     sort_by: str = Query("created_at", pattern="^(created_at|transaction_date|amount)$"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page; replaces offset."),
+    count_mode: str = Query(
+        "exact",
+        alias="count",
+        pattern="^(exact|planned|estimated|none)$",
+        description="How to compute total; 'none' skips counting and returns total=null.",
+    ),
+    search_mode: str = Query(
+        "ilike",
+        alias="search",
+        pattern="^(ranked|ilike)$",
+        description=(
+            "How q is matched: 'ilike' = substring match in sort order (keyset cursor paging), "
+            "'ranked' = full-text index ordered by relevance (offset paging only, no next_cursor)."
+        ),
+    ),
+    fields: str | None = Query(
+        None,
+        pattern="^[a-z_]+(,[a-z_]+)*$",
+        description="Comma-separated sparse fieldset, e.g. 'amount,category,transaction_date'. id is always included.",
+    ),
 ) -> ExpensesListOut:
     """Get all active expenses for the current user with pagination."""
-    return expense_service.get_all_expenses(
+    return await expense_service.get_all_expenses(
         user_id=current_user.id,
         limit=limit,
         offset=offset,
@@ -148,6 +344,70 @@ async def get_all_expenses(
         date_to=date_to,
         sort_by=sort_by,
         sort_order=sort_order,
+        cursor=cursor,
+        count_mode=count_mode,
+        search_mode=search_mode,
+        fields=fields.split(",") if fields else None,
+    )
+
+
+@router.patch(
+    "",
+    response_model=BulkExpenseMutationResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Update every expense matching a filter",
+)
+async def bulk_update_expenses(
+    request: UpdateExpenseRequest,
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
+    category: str | None = Query(None),
+    q: str | None = Query(None),
+    date_from: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+) -> BulkExpenseMutationResponse:
+    """
+    Apply the body to every active expense that GET /expenses would return
+    for the same filters. At least one filter is required.
+    """
+    return await expense_service.bulk_update_expenses(
+        user_id=current_user.id,
+        request=request,
+        expense_type=expense_type,
+        category=category,
+        q=q,
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+
+@router.delete(
+    "",
+    response_model=BulkExpenseMutationResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Delete every expense matching a filter",
+)
+async def bulk_delete_expenses(
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    expense_type: str | None = Query(None, alias="type", pattern="^(income|expense)$"),
+    category: str | None = Query(None),
+    q: str | None = Query(None),
+    date_from: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+    date_to: str | None = Query(None, pattern="^\d{4}-\d{2}-\d{2}$"),
+) -> BulkExpenseMutationResponse:
+    """
+    Soft-delete every active expense that GET /expenses would return for the
+    same filters. At least one filter is required.
+    """
+    return await expense_service.bulk_delete_expenses(
+        user_id=current_user.id,
+        expense_type=expense_type,
+        category=category,
+        q=q,
+        date_from=date_from,
+        date_to=date_to,
     )
 
 
@@ -160,13 +420,25 @@ async def get_all_expenses(
 async def get_expense_by_id(
     expense_id: str,
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    response: Response,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    if_none_match: str | None = Header(None),
 ) -> ExpenseOut:
-    """Get a single active expense by its ID."""
-    return expense_service.get_expense_by_id(
+    """
+    Get a single active expense by its ID.
+
+    The ETag header identifies this version of the expense: send it back as
+    If-Match on PATCH/DELETE to reject the write if someone changed it since.
+    """
+    expense = await expense_service.get_expense_by_id(
         user_id=current_user.id,
         expense_id=expense_id,
     )
+    etag = make_etag(expense.updated_at)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return expense
 
 
 @router.post(
@@ -178,13 +450,87 @@ async def get_expense_by_id(
 async def create_expense(
     request: CreateExpenseRequest,
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    response: Response,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
 ) -> ExpenseOut:
     """Create a new expense."""
-    return expense_service.create_expense(
+    expense = await expense_service.create_expense(
         user_id=current_user.id,
         request=request,
     )
+    response.headers["ETag"] = make_etag(expense.updated_at)
+    return expense
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkCreateExpenseResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Create many expenses at once",
+)
+async def create_expenses(
+    request: BulkCreateExpenseRequest,
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+) -> BulkCreateExpenseResponse:
+    """
+    Create up to 1000 expenses in one request.
+
+    Items are validated one by one, so an invalid item does not reject the
+    others; `results` reports success or the error for every item, in order.
+    """
+    return await expense_service.create_expenses(
+        user_id=current_user.id,
+        items=request.expenses,
+    )
+
+
+@router.post(
+    "/import/csv",
+    response_model=ExpenseImportResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Import expenses from a CSV file",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/csv": {"schema": {"type": "string", "format": "binary"}}},
+        }
+    },
+)
+async def import_expenses_csv(
+    request: Request,
+    current_user: CurrentUser,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+) -> ExpenseImportResponse:
+    """
+    Import a CSV file sent as the raw request body (Content-Type: text/csv).
+
+    The layout is the one written by GET /export/csv; id, created_at and
+    updated_at are ignored. Every rejected line is reported with its line
+    number, valid lines are imported.
+    """
+    csv_file = await _spool_request_body(request, MAX_CSV_IMPORT_BYTES)
+    try:
+        return await expense_service.import_expenses_csv(user_id=current_user.id, csv_file=csv_file)
+    finally:
+        csv_file.close()
+
+
+async def _spool_request_body(request: Request, max_bytes: int) -> IO[bytes]:
+    """Copy the request body to a temp file that only stays in memory while small."""
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise PayloadTooLargeError(f"File exceeds {max_bytes // (1024 * 1024)} MB")
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
 
 
 @router.patch(                             
@@ -197,14 +543,24 @@ async def update_expense(
     expense_id: str,
     request: UpdateExpenseRequest,
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    response: Response,
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    if_match: str | None = Header(None),
 ) -> ExpenseOut:
-    """Partially update an existing expense."""
-    return expense_service.update_expense(
+    """
+    Partially update an existing expense.
+
+    With If-Match the update is applied only if the expense still has that
+    ETag; otherwise 412 and nothing is written.
+    """
+    expense = await expense_service.update_expense(
         user_id=current_user.id,
         expense_id=expense_id,
         request=request,
+        expected_updated_at=parse_if_match(if_match),
     )
+    response.headers["ETag"] = make_etag(expense.updated_at)
+    return expense
 
 
 @router.delete(
@@ -215,10 +571,12 @@ async def update_expense(
 async def delete_expense(
     expense_id: str,
     current_user: CurrentUser,
-    expense_service: ExpenseService = Depends(get_expense_service),
+    expense_service: AsyncExpenseService = Depends(get_expense_service),
+    if_match: str | None = Header(None),
 ) -> None:
-    """Soft-delete an expense."""
-    expense_service.delete_expense(
+    """Soft-delete an expense (412 if If-Match no longer matches)."""
+    await expense_service.delete_expense(
         user_id=current_user.id,
         expense_id=expense_id,
+        expected_updated_at=parse_if_match(if_match),
     )
\ No newline at end of file
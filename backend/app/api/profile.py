@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, status
 from supabase import Client
  
+from app.core.container import get_container
 from app.core.dependencies import CurrentUser, AccessToken
-from app.infrastructure.supabase_client import get_user_client, get_admin_supabase_client
-from app.repositories.profile_repository import ProfileRepository
-from app.services.profile_service import ProfileService
+from app.services.profile_service import AsyncProfileService
 from app.models.profile import (
     ProfileOut, UpdateProfileRequest,
     LinkTelegramRequest, GenerateConnectCodeResponse,
@@ -13,17 +12,13 @@ from app.models.auth import MessageOut
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
-def get_profile_service_for_user(token: AccessToken) -> ProfileService:
+async def get_profile_service_for_user(token: AccessToken) -> AsyncProfileService:
     """Profile service with user-context client (RLS)"""
-    user_client = get_user_client(access_token=token)
-    repo = ProfileRepository(client=user_client)
-    return ProfileService(profile_repo=repo)
+    return get_container().profile_service_for_user(token)
 
-def get_profile_service_for_admin() -> ProfileService:
+async def get_profile_service_for_admin() -> AsyncProfileService:
     """Profile service with admin client (bypass RLS)"""
-    admin_client = get_admin_supabase_client()
-    repo = ProfileRepository(client=admin_client)
-    return ProfileService(profile_repo=repo)
+    return get_container().profile_service_for_admin()
 
 @router.get(
     "/me",
@@ -33,10 +28,10 @@ def get_profile_service_for_admin() -> ProfileService:
 )
 async def get_my_profile(
     current_user: CurrentUser,
-    service: ProfileService = Depends(get_profile_service_for_user),
+    service: AsyncProfileService = Depends(get_profile_service_for_user),
 ):
     """Get the profile of the currently authenticated user."""
-    return service.get_profile(user_id=current_user.id)
+    return await service.get_profile(user_id=current_user.id)
 
 @router.put(
     "/me",
@@ -47,7 +42,7 @@ async def get_my_profile(
 async def update_my_profile(
     body: UpdateProfileRequest,
     current_user: CurrentUser,
-    service: ProfileService = Depends(get_profile_service_for_user),
+    service: AsyncProfileService = Depends(get_profile_service_for_user),
 ):
     """
     update the profile of the currently authenticated user.
@@ -60,7 +55,7 @@ async def update_my_profile(
     }
     ```
     """
-    return service.update_profile(user_id=str(current_user.id), update_request=body)
+    return await service.update_profile(user_id=str(current_user.id), update_request=body)
 
 @router.post(
     "/me/telegram/connect-code",
@@ -71,9 +66,9 @@ async def update_my_profile(
 )
 async def generate_telegram_connect_code(
     current_user: CurrentUser,
-    service: ProfileService = Depends(get_profile_service_for_user),
+    service: AsyncProfileService = Depends(get_profile_service_for_user),
 ):
-    return service.generate_connect_code(user_id=str(current_user.id))
+    return await service.generate_connect_code(user_id=str(current_user.id))
 
 @router.post(
     "/me/telegram/link",
@@ -84,7 +79,7 @@ async def generate_telegram_connect_code(
 async def link_telegram_account(
     body: LinkTelegramRequest,
     current_user: CurrentUser,
-    service: ProfileService = Depends(get_profile_service_for_user),
+    service: AsyncProfileService = Depends(get_profile_service_for_user),
 ):
     """
     link Telegram account to the currently authenticated user's profile.
@@ -96,7 +91,7 @@ async def link_telegram_account(
     }
     ```
     """
-    return service.link_telegram(user_id=str(current_user.id), telegram_chat_id=body.telegram_chat_id)
+    return await service.link_telegram(user_id=str(current_user.id), telegram_chat_id=body.telegram_chat_id)
 
 @router.delete(
     "/me/telegram/unlink",
@@ -106,10 +101,10 @@ async def link_telegram_account(
 )
 async def unlink_telegram_account(
     current_user: CurrentUser,
-    service: ProfileService = Depends(get_profile_service_for_user),
+    service: AsyncProfileService = Depends(get_profile_service_for_user),
 ):
     """
     unlink Telegram account from the currently authenticated user's profile.
     """
-    return service.unlink_telegram(user_id=str(current_user.id))
+    return await service.unlink_telegram(user_id=str(current_user.id))
 
@@ -16,6 +16,7 @@
 #   ditangani oleh ConversationHandler yang sedang aktif.
 # =============================================================================
 
+import asyncio
 import logging
 
 from telegram import BotCommand, Update
@@ -32,6 +33,7 @@ from telegram.ext import (
 from app.bot import messages
 from app.bot.handlers import auth_handler, chat_handler, expense_handler, profile_handler, voice_handler
 from app.core.config import get_settings
+from app.core.container import stop_embedding_queue
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +96,11 @@ async def post_init(application: Application) -> None:
     )
 
 
+async def post_shutdown(application: Application) -> None:
+    """Embed expenses still waiting in the embedding queue before exiting."""
+    await asyncio.to_thread(stop_embedding_queue)
+
+
 def create_bot() -> Application:
     """Factory function that assembles and returns a configured Telegram bot."""
     settings = get_settings()
@@ -104,6 +111,7 @@ def create_bot() -> Application:
         # Required with ConversationHandler to avoid race conditions.
         .concurrent_updates(False)
         .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .build()
     )
 
@@ -29,6 +29,7 @@ from app.bot.keyboards import (
     expense_action_keyboard,
 )
 from app.bot.handlers.auth_handler import get_linked_profile
+from app.core.container import get_embedding_queue_if_enabled
 from app.infrastructure.supabase_client import get_admin_supabase_client
 from app.models.expense import CreateExpenseRequest
 from app.repositories.expense_repository import ExpenseRepository
@@ -52,7 +53,10 @@ def _escape_markdown_v2(text: str) -> str:
 def _make_expense_service_for_user() -> ExpenseService:
     """Use admin client and always enforce user_id filters at service/repository calls."""
     admin_client = get_admin_supabase_client()
-    return ExpenseService(expense_repo=ExpenseRepository(client=admin_client))
+    return ExpenseService(
+        expense_repo=ExpenseRepository(client=admin_client),
+        embedding_queue=get_embedding_queue_if_enabled(),
+    )
 
 
 async def require_linked_account(update: Update) -> Optional[dict]:
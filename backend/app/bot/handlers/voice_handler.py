@@ -5,6 +5,9 @@ from telegram.constants import ParseMode, ChatAction
  
 from app.bot import messages as msg_templates
 from app.bot.handlers.auth_handler import get_linked_profile
+from app.core.container import get_embedding_queue_if_enabled
+from app.core.embedding_cache import get_embedding_cache_if_enabled
+from app.core.query_embedding_cache import get_query_embedding_cache_if_enabled
 from app.infrastructure.openai_client import get_openai_client
 from app.infrastructure.supabase_client import get_admin_supabase_client
 from app.repositories.ai_repository import AIRepository
@@ -31,10 +34,16 @@ def _make_services() -> tuple[VoiceService, AIService]:
     admin_client = get_admin_supabase_client()
 
     ai_repo = AIRepository(client=admin_client)
-    embedding_service = EmbeddingService(openai_client=openai_client, ai_repo=ai_repo)
+    embedding_service = EmbeddingService(
+        openai_client=openai_client,
+        ai_repo=ai_repo,
+        embedding_cache=get_embedding_cache_if_enabled(),
+        query_cache=get_query_embedding_cache_if_enabled(),
+    )
     expense_service = ExpenseService(
         expense_repo=ExpenseRepository(client=admin_client), 
-        embedding_service=embedding_service
+        embedding_service=embedding_service,
+        embedding_queue=get_embedding_queue_if_enabled(),
     )
     voice_service = VoiceService(openai_client=openai_client)
     ai_service = AIService(
@@ -1,10 +1,16 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from supabase import Client
 
 from app.core.config import get_settings
-from app.infrastructure.supabase_client import get_supabase_client
+from app.core.container import get_embedding_queue_stats, stop_embedding_queue
+from app.core.embedding_cache import get_embedding_cache_stats
+from app.core.query_embedding_cache import get_query_embedding_cache_stats
+from app.infrastructure.supabase_client import get_pool_stats, get_supabase_client
 from app.core.exceptions import (
     AppError,
     AuthenticationError,
@@ -12,12 +18,20 @@ from app.core.exceptions import (
     EmailNotConfirmedError,
     InvalidTokenError,
     NotFoundError,
+    PayloadTooLargeError,
+    PreconditionFailedError,
     UserAlreadyExistsError,
     ValidationError,
 )
 
 from app.api import auth, expense, profile, ai
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    # Embed what is still queued before the worker exits
+    await run_in_threadpool(stop_embedding_queue)
+
 def create_app() -> FastAPI:
     settings = get_settings()
 
@@ -27,6 +41,7 @@ def create_app() -> FastAPI:
         description="J.A.R.V.I.S Project",
         docs_url="/docs" if not settings.is_production else None,
         redoc_url="/redoc" if not settings.is_production else None,
+        lifespan=_lifespan,
     )
 
     _register_middleware(app, settings)
@@ -79,6 +94,20 @@ def _register_exception_handlers(app: FastAPI):
             content={"detail": exc.message},
         )
 
+    @app.exception_handler(PreconditionFailedError)
+    async def precondition_failed_error_handler(request: Request, exc: AppError):
+        return JSONResponse(
+            status_code=412,
+            content={"detail": exc.message},
+        )
+
+    @app.exception_handler(PayloadTooLargeError)
+    async def payload_too_large_error_handler(request: Request, exc: AppError):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": exc.message},
+        )
+
     @app.exception_handler(ValidationError)
     async def validation_error_handler(request: Request, exc: AppError):
         return JSONResponse(
@@ -121,6 +150,14 @@ def _register_routers(app: FastAPI):
             health_status["status"] = "unhealthy"
             health_status["supabase"] = "disconnected"
             health_status["error"] = str(e)[:100]
+
+        # Usage of the shared Supabase HTTP pool
+        health_status["supabase_pool"] = get_pool_stats()
+        # Embedding backlog (null until the first write used the queue)
+        health_status["embedding_queue"] = get_embedding_queue_stats()
+        # Embedding cache hit rate (null until the first embedding)
+        health_status["embedding_cache"] = get_embedding_cache_stats()
+        health_status["query_embedding_cache"] = get_query_embedding_cache_stats()
         
         return health_status
     
@@ -38,18 +38,85 @@ class Settings(BaseSettings):
             raise ValueError("SUPABASE_JWT_SECRET seems too short")
         return value
 
+    # Shared HTTP transport of the Supabase clients (see supabase_client.py)
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 100
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 20
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP_TIMEOUT: float = 120.0
+
+    # Direct Postgres (REPOSITORY_BACKEND=postgres): expense and profile
+    # queries skip PostgREST and run on a pooled connection.
+    # Use a direct URL or the session pooler (port 5432), not the transaction pooler.
+    DATABASE_URL: str | None = None
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 5.0
+    REPOSITORY_BACKEND: str = "supabase"
+
+    @field_validator("REPOSITORY_BACKEND", mode='after')
+    @classmethod
+    def validate_repository_backend(cls, value: str, info: ValidationInfo) -> str:
+        if value not in ("supabase", "postgres"):
+            raise ValueError("REPOSITORY_BACKEND must be 'supabase' or 'postgres'")
+        if value == "postgres" and not info.data.get("DATABASE_URL"):
+            raise ValueError("DATABASE_URL is required when REPOSITORY_BACKEND=postgres")
+        return value
+
+    @property
+    def use_postgres_repositories(self) -> bool:
+        return self.REPOSITORY_BACKEND == "postgres"
+
     # Redis
     #REDIS_URL: str
 
     # JWT
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    # Access token verification (see app/core/token_cache.py)
+    # remote: ask Supabase Auth on every request
+    # local:  check the signature with SUPABASE_JWT_SECRET, cache the result
+    AUTH_VERIFICATION_MODE: str = "remote"
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000
+    AUTH_TOKEN_CACHE_TTL: float = 300.0
+    # local mode: re-ask Supabase about a cached token at most this often
+    # (seconds, in the background); 0 = never
+    AUTH_REVOCATION_CHECK_INTERVAL: float = 0.0
+
+    @field_validator("AUTH_VERIFICATION_MODE", mode='after')
+    @classmethod
+    def validate_auth_verification_mode(cls, value: str) -> str:
+        if value not in ("remote", "local"):
+            raise ValueError("AUTH_VERIFICATION_MODE must be 'remote' or 'local'")
+        return value
     
     # OpenAI
     OPENAI_API_KEY: str
     OPENAI_CHAT_MODEL: str = "gpt-4.1-mini"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
     OPENAI_EMBEDDING_DIMENSIONS: int = 1536
+
+    # Background embedding queue (see app/services/embedding_queue.py);
+    # disabled → expense writes embed inline as before
+    EMBEDDING_QUEUE_ENABLED: bool = True
+    EMBEDDING_QUEUE_BATCH_SIZE: int = 100
+    EMBEDDING_QUEUE_MAX_WAIT: float = 0.5
+    EMBEDDING_QUEUE_CONCURRENCY: int = 2
+    EMBEDDING_QUEUE_MAX_RETRIES: int = 3
+    EMBEDDING_QUEUE_MAX_BACKLOG: int = 10_000
+
+    # Content-hash cache of embedding vectors (see app/core/embedding_cache.py);
+    # empty EMBEDDING_CACHE_PATH → memory tier only
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_SIZE: int = 2000
+    EMBEDDING_CACHE_PATH: str = ".embedding_cache.sqlite3"
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 50_000
+
+    # Search query embeddings (see app/core/query_embedding_cache.py)
+    QUERY_EMBEDDING_CACHE_ENABLED: bool = True
+    QUERY_EMBEDDING_CACHE_SIZE: int = 1000
+    QUERY_EMBEDDING_CACHE_TTL: float = 3600.0
     
     # Telegram
     TELEGRAM_BOT_TOKEN: str
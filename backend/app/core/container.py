@@ -0,0 +1,212 @@
+"""
+Service container for the FastAPI dependencies.
+
+The route dependencies used to rebuild the whole object graph on every
+request: clients, AIRepository, EmbeddingService, repositories and services.
+Only the pieces that carry the caller's access token differ between
+requests. The container keeps everything else for the life of the process
+and builds just those pieces per request.
+
+  - process:    settings, OpenAI client, Postgres repositories, the
+                embedding queue (get_embedding_queue, shared with the bot),
+                the embedding caches (get_embedding_cache,
+                get_query_embedding_cache)
+  - event loop: services on the admin PostgREST client — AIRepository,
+                EmbeddingService, the admin profile service (async httpx
+                connections belong to the loop that opened them)
+  - request:    the user PostgREST client (RLS) and the services built on it
+
+Everything shared must stay stateless; per-request state (the user's
+token, BackgroundTasks) is only passed to the per-request objects.
+"""
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+from openai import AsyncOpenAI
+
+from app.core.config import Settings, get_settings
+from app.core.embedding_cache import EmbeddingCache, get_embedding_cache_if_enabled
+from app.core.query_embedding_cache import QueryEmbeddingCache, get_query_embedding_cache_if_enabled
+from app.infrastructure.openai_client import get_async_openai_client, get_openai_client
+from app.infrastructure.postgres_client import get_postgres_client
+from app.infrastructure.supabase_client import SupabaseClientManager, get_admin_supabase_client, get_client_manager
+from app.repositories.ai_repository import AIRepository, AsyncAIRepository
+from app.repositories.expense_repository import AsyncExpenseRepository, AsyncPostgresExpenseRepository
+from app.repositories.profile_repository import AsyncPostgresProfileRepository, AsyncProfileRepository
+from app.services.ai_services import AsyncAIService
+from app.services.embedding_queue import EmbeddingQueue
+from app.services.embedding_services import AsyncEmbeddingService, EmbeddingService
+from app.services.expense_service import AsyncExpenseService
+from app.services.profile_service import AsyncProfileService
+
+
+@dataclass
+class AdminScope:
+    """Admin-client objects of one event loop."""
+
+    ai_repo: AsyncAIRepository
+    embedding_service: AsyncEmbeddingService
+    profile_service: AsyncProfileService
+
+
+class ServiceContainer:
+    """Shared objects of the API process; see the module docstring."""
+
+    def __init__(
+        self,
+        settings: Settings,
+        clients: SupabaseClientManager,
+        openai_client: AsyncOpenAI,
+        embedding_queue: EmbeddingQueue | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        query_cache: QueryEmbeddingCache | None = None,
+    ):
+        self.settings = settings
+        self.clients = clients
+        self.openai_client = openai_client
+        self.embedding_queue = embedding_queue
+        self.embedding_cache = embedding_cache
+        self.query_cache = query_cache
+        self._lock = threading.Lock()
+        self._admin_scopes: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._postgres_expense_repo: AsyncPostgresExpenseRepository | None = None
+        self._postgres_profile_service: AsyncProfileService | None = None
+
+    # =========================================================================
+    # SHARED
+    # =========================================================================
+
+    def admin_scope(self) -> AdminScope:
+        """Admin-client objects of the running event loop (built on first use)."""
+        loop = asyncio.get_running_loop()
+        scope = self._admin_scopes.get(loop)
+        if scope is None:
+            admin_client = self.clients.async_admin_view()
+            ai_repo = AsyncAIRepository(client=admin_client)
+            scope = AdminScope(
+                ai_repo=ai_repo,
+                embedding_service=AsyncEmbeddingService(
+                    openai_client=self.openai_client,
+                    ai_repo=ai_repo,
+                    embedding_cache=self.embedding_cache,
+                    query_cache=self.query_cache,
+                ),
+                profile_service=AsyncProfileService(profile_repo=AsyncProfileRepository(client=admin_client)),
+            )
+            self._admin_scopes[loop] = scope
+        return scope
+
+    def postgres_expense_repo(self) -> AsyncPostgresExpenseRepository:
+        if self._postgres_expense_repo is None:
+            with self._lock:
+                if self._postgres_expense_repo is None:
+                    self._postgres_expense_repo = AsyncPostgresExpenseRepository(client=get_postgres_client())
+        return self._postgres_expense_repo
+
+    def postgres_profile_service(self) -> AsyncProfileService:
+        if self._postgres_profile_service is None:
+            with self._lock:
+                if self._postgres_profile_service is None:
+                    self._postgres_profile_service = AsyncProfileService(
+                        profile_repo=AsyncPostgresProfileRepository(client=get_postgres_client()),
+                    )
+        return self._postgres_profile_service
+
+    # =========================================================================
+    # PER REQUEST
+    # =========================================================================
+
+    def expense_repo(self, access_token: str) -> AsyncExpenseRepository:
+        """Expense repository acting as the token's user."""
+        if self.settings.use_postgres_repositories:
+            # Scoped by user_id in every query, no per-token state
+            return self.postgres_expense_repo()
+        return AsyncExpenseRepository(client=self.clients.async_user_view(access_token))
+
+    def expense_service(
+        self,
+        access_token: str,
+        schedule_task: Callable[..., None] | None = None,
+    ) -> AsyncExpenseService:
+        return AsyncExpenseService(
+            expense_repo=self.expense_repo(access_token),
+            embedding_service=self.admin_scope().embedding_service,
+            schedule_task=schedule_task,
+            embedding_queue=self.embedding_queue,
+        )
+
+    def ai_service(self, access_token: str) -> AsyncAIService:
+        scope = self.admin_scope()
+        return AsyncAIService(
+            openai_client=self.openai_client,
+            expense_service=AsyncExpenseService(
+                expense_repo=self.expense_repo(access_token),
+                embedding_queue=self.embedding_queue,
+            ),
+            embedding_service=scope.embedding_service,
+            ai_repo=scope.ai_repo,
+        )
+
+    def profile_service_for_user(self, access_token: str) -> AsyncProfileService:
+        """Profile service acting as the token's user (RLS)."""
+        if self.settings.use_postgres_repositories:
+            return self.postgres_profile_service()
+        return AsyncProfileService(profile_repo=AsyncProfileRepository(client=self.clients.async_user_view(access_token)))
+
+    def profile_service_for_admin(self) -> AsyncProfileService:
+        """Profile service with the admin client (bypasses RLS)."""
+        if self.settings.use_postgres_repositories:
+            return self.postgres_profile_service()
+        return self.admin_scope().profile_service
+
+
+@lru_cache
+def get_embedding_queue() -> EmbeddingQueue:
+    """Process-wide embedding queue; its workers use the sync clients."""
+    settings = get_settings()
+    embedding_service = EmbeddingService(
+        openai_client=get_openai_client(),
+        ai_repo=AIRepository(client=get_admin_supabase_client()),
+        embedding_cache=get_embedding_cache_if_enabled(),
+    )
+    return EmbeddingQueue(
+        embedding_service,
+        batch_size=settings.EMBEDDING_QUEUE_BATCH_SIZE,
+        max_wait=settings.EMBEDDING_QUEUE_MAX_WAIT,
+        concurrency=settings.EMBEDDING_QUEUE_CONCURRENCY,
+        max_retries=settings.EMBEDDING_QUEUE_MAX_RETRIES,
+        max_backlog=settings.EMBEDDING_QUEUE_MAX_BACKLOG,
+    )
+
+
+def get_embedding_queue_if_enabled() -> EmbeddingQueue | None:
+    return get_embedding_queue() if get_settings().EMBEDDING_QUEUE_ENABLED else None
+
+
+def get_embedding_queue_stats() -> dict | None:
+    """Queue counters and backlog, or None while no queue was started."""
+    if get_embedding_queue.cache_info().currsize == 0:
+        return None
+    return get_embedding_queue().snapshot()
+
+
+def stop_embedding_queue(timeout: float = 10.0) -> None:
+    """Drain and stop the queue on shutdown (no-op if it was never used)."""
+    if get_embedding_queue.cache_info().currsize:
+        get_embedding_queue().stop(timeout)
+
+
+@lru_cache
+def get_container() -> ServiceContainer:
+    return ServiceContainer(
+        settings=get_settings(),
+        clients=get_client_manager(),
+        openai_client=get_async_openai_client(),
+        embedding_queue=get_embedding_queue_if_enabled(),
+        embedding_cache=get_embedding_cache_if_enabled(),
+        query_cache=get_query_embedding_cache_if_enabled(),
+    )
@@ -1,12 +1,17 @@
 from typing import Annotated
+import asyncio
 import jwt
 import logging
+import time
+
+import anyio
 
 from fastapi import Depends, Header
 from supabase import Client, AuthApiError
 
 from app.core.config import get_settings, Settings
 from app.core.exceptions import AuthenticationError, InvalidTokenError
+from app.core.token_cache import get_token_cache
 from app.infrastructure.supabase_client import get_admin_supabase_client
 from app.models.auth import UserOut
 
@@ -25,18 +30,14 @@ def _extract_bearer_token(authorization: str | None) -> str:
         raise AuthenticationError("Token is missing")
     return token
 
-def _verify_jwt_locally(token: str, settings: Settings) -> UserOut:
+def _decode_jwt(token: str, settings: Settings) -> dict:
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token, 
             settings.SUPABASE_JWT_SECRET,
             algorithms=["HS256"],
             audience="authenticated",
-        )
-        return UserOut(
-            id=payload["sub"],
-            email=payload.get("email", ""),
-            created_at=payload.get("created_at", ""),
+            options={"require": ["exp", "sub"]},
         )
     except jwt.ExpiredSignatureError:
         raise InvalidTokenError("Token expired")
@@ -46,22 +47,23 @@ def _verify_jwt_locally(token: str, settings: Settings) -> UserOut:
         logger.error(f"JWT verification failed: {str(e)[:100]}")
         raise InvalidTokenError("Invalid token")
 
+def _user_from_claims(payload: dict) -> UserOut:
+    return UserOut(
+        id=payload["sub"],
+        email=payload.get("email", ""),
+        created_at=payload.get("created_at", ""),
+    )
 
-async def get_current_user(
-    authorization: Annotated[str, Header()] = None,
-    admin_supabase: Client = Depends(get_admin_supabase_client),
-) -> UserOut:
-    if not authorization:
-        raise AuthenticationError("authorization not found in header")
-    
-    if not authorization.startswith("Bearer "):
-        raise AuthenticationError("Invalid authorization header format")
-    
-    token = _extract_bearer_token(authorization)
-    
-    if not token:
-        raise AuthenticationError("Token is missing")
-    
+def _verify_jwt_locally(token: str, settings: Settings) -> UserOut:
+    return _user_from_claims(_decode_jwt(token, settings))
+
+def _get_user_remote(token: str, admin_supabase: Client):
+    """
+    Ask Supabase Auth about the token.
+
+    Returns:
+        The user, or None when Supabase cannot answer (network errors).
+    """
     try:
         response = admin_supabase.auth.get_user(token)
         return response.user
@@ -80,8 +82,61 @@ async def get_current_user(
         else:
             logger.error("Unexpected error during Supabase auth: %s - %s", error_type, str(e)[:100])
             raise
-    
+    return None
+
+# Background revocation checks in flight (a reference keeps each task alive)
+_revocation_checks: set[asyncio.Task] = set()
+
+async def _check_revocation(token: str, token_exp: float, admin_supabase: Client) -> None:
+    try:
+        await anyio.to_thread.run_sync(_get_user_remote, token, admin_supabase)
+    except InvalidTokenError:
+        get_token_cache().revoke(token, token_exp)
+    except Exception as e:
+        logger.warning("Token revocation check failed: %s", str(e)[:100])
+
+def _verify_cached(token: str, settings: Settings, admin_supabase: Client) -> UserOut:
+    """Local verification through the token cache (AUTH_VERIFICATION_MODE=local)."""
+    cache = get_token_cache()
+    entry = cache.get(token)
+    if entry is None:
+        payload = _decode_jwt(token, settings)
+        entry = cache.put(token, _user_from_claims(payload), payload["exp"])
+    if entry.revoked:
+        raise InvalidTokenError("Token has been revoked")
+
+    interval = settings.AUTH_REVOCATION_CHECK_INTERVAL
+    if interval > 0 and time.time() - entry.checked_at >= interval:
+        # Served from the cache meanwhile; a revoked token is rejected from the next request on
+        cache.mark_checked(token)
+        task = asyncio.create_task(_check_revocation(token, entry.token_exp, admin_supabase))
+        _revocation_checks.add(task)
+        task.add_done_callback(_revocation_checks.discard)
+    return entry.user
+
+def forget_token(token: str) -> None:
+    """Reject a logged-out token in this process until it expires (local mode keeps accepting its signature)."""
+    try:
+        token_exp = jwt.decode(token, options={"verify_signature": False})["exp"]
+    except (jwt.PyJWTError, KeyError):
+        return
+    get_token_cache().revoke(token, token_exp)
+
+
+async def get_current_user(
+    authorization: Annotated[str, Header()] = None,
+    admin_supabase: Client = Depends(get_admin_supabase_client),
+) -> UserOut:
+    token = _extract_bearer_token(authorization)
     settings = get_settings()
+
+    if settings.AUTH_VERIFICATION_MODE == "local":
+        return _verify_cached(token, settings, admin_supabase)
+
+    # Sync supabase client: one HTTP round trip, run off the event loop
+    user = await anyio.to_thread.run_sync(_get_user_remote, token, admin_supabase)
+    if user is not None:
+        return user
     return _verify_jwt_locally(token, settings)
            
 async def get_access_token(
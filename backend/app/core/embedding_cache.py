@@ -0,0 +1,249 @@
+"""
+Content-hash cache of embedding vectors (EMBEDDING_CACHE_ENABLED).
+
+The text of an expense ("expense 25000 makanan kopi") repeats a lot: the
+same coffee every morning, an edit that leaves the text fields as they
+were, a bulk update that touches only the date. EmbeddingService looks
+every text up here before calling OpenAI and only sends the misses.
+
+  - key: SHA-256 of model, dimensions and the normalized text (NFKC,
+    whitespace collapsed, case folded); the text itself is not stored
+  - memory tier: bounded LRU (EMBEDDING_CACHE_SIZE entries)
+  - disk tier: SQLite file (EMBEDDING_CACHE_PATH, empty = memory only),
+    shared by the API workers and the bot, kept across restarts, trimmed
+    to EMBEDDING_CACHE_DISK_MAX_ENTRIES (oldest written first)
+  - vectors are kept as float32, the precision pgvector stores anyway
+    (~6 KB per 1536-dimension vector)
+
+The disk tier is best effort: a locked or broken file is logged, counted in
+disk_errors and treated as a miss, never as a failed embedding.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Trim the disk tier once per this many stored vectors
+DISK_PRUNE_EVERY = 1000
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split()).casefold()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    disk_errors: int = 0
+
+
+class EmbeddingCache:
+    """Thread-safe two-tier (memory LRU + SQLite) vector cache; see the module docstring."""
+
+    def __init__(self, max_size: int = 2000, path: str | None = None, disk_max_entries: int = 50_000):
+        self.max_size = max_size
+        self.path = path or None
+        self.disk_max_entries = disk_max_entries
+        self.stats = EmbeddingCacheStats()
+        self._entries: OrderedDict[str, array] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._stores_since_prune = 0
+        if self.path:
+            self._open_disk()
+
+    @staticmethod
+    def key(text: str, model: str, dimensions: int) -> str:
+        return hashlib.sha256(f"{model}\n{dimensions}\n{normalize_text(text)}".encode()).hexdigest()
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    # =========================================================================
+    # LOOKUP
+    # =========================================================================
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Vectors of the cached keys (memory first, then disk); missing keys are left out."""
+        found = self.get_many_from_memory(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            found.update(self.get_many_from_disk(missing))
+        return found
+
+    def get_many_from_memory(self, keys: list[str]) -> dict[str, list[float]]:
+        """
+        Memory tier only; never blocks on I/O, so it is safe on the event loop.
+
+        Keys not found here are not counted as misses yet: pass them to
+        get_many_from_disk (which counts them) to finish the lookup.
+        """
+        found = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+            self.stats.memory_hits += len(found)
+        return {key: vector.tolist() for key, vector in found.items()}
+
+    def get_many_from_disk(self, keys: list[str]) -> dict[str, list[float]]:
+        """Disk tier lookup of keys the memory tier did not have; hits are kept in memory."""
+        from_disk = self._read_disk(keys) if self._db is not None else {}
+        self._remember(from_disk)
+        with self._lock:
+            self.stats.disk_hits += len(from_disk)
+            self.stats.misses += len(keys) - len(from_disk)
+        return {key: vector.tolist() for key, vector in from_disk.items()}
+
+    # =========================================================================
+    # STORE
+    # =========================================================================
+
+    def put_many(self, vectors: dict[str, list[float]]) -> None:
+        if not vectors:
+            return
+        packed = {key: array("f", vector) for key, vector in vectors.items()}
+        self._remember(packed)
+        with self._lock:
+            self.stats.stores += len(packed)
+        if self._db is not None:
+            self._write_disk(packed)
+
+    def _remember(self, vectors: dict[str, array]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for key, vector in vectors.items():
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Empty the memory tier (the disk tier is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """Counters, hit rate and sizes, for /health."""
+        with self._lock:
+            stats = asdict(self.stats)
+            size = len(self._entries)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0,
+            "memory_entries": size,
+            "persistent": self.persistent,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # =========================================================================
+    # DISK TIER
+    # =========================================================================
+
+    def _open_disk(self) -> None:
+        try:
+            db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache file %s unavailable, using memory only: %s", self.path, e)
+            self.stats.disk_errors += 1
+            return
+        self._db = db
+
+    def _read_disk(self, keys: list[str]) -> dict[str, array]:
+        found = {}
+        try:
+            with self._db_lock:
+                # SQLite's default limit on bound parameters is 999
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk,
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        found[key] = vector
+        except sqlite3.Error as e:
+            self._disk_failed("read", e)
+        return found
+
+    def _write_disk(self, vectors: dict[str, array]) -> None:
+        now = time.time()
+        try:
+            with self._db_lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    [(key, vector.tobytes(), now) for key, vector in vectors.items()],
+                )
+                self._stores_since_prune += len(vectors)
+                if self._stores_since_prune >= DISK_PRUNE_EVERY:
+                    self._stores_since_prune = 0
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE key IN ("
+                        " SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        (self.disk_max_entries,),
+                    )
+        except sqlite3.Error as e:
+            self._disk_failed("write", e)
+
+    def _disk_failed(self, action: str, error: sqlite3.Error) -> None:
+        with self._lock:
+            self.stats.disk_errors += 1
+        logger.warning("Embedding cache %s failed (%s): %s", action, self.path, error)
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+
+@lru_cache
+def get_embedding_cache() -> EmbeddingCache:
+    settings = get_settings()
+    return EmbeddingCache(
+        max_size=settings.EMBEDDING_CACHE_SIZE,
+        path=settings.EMBEDDING_CACHE_PATH,
+        disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES,
+    )
+
+
+def get_embedding_cache_if_enabled() -> EmbeddingCache | None:
+    return get_embedding_cache() if get_settings().EMBEDDING_CACHE_ENABLED else None
+
+
+def get_embedding_cache_stats() -> dict | None:
+    """Counters and hit rate, or None while no cache was created."""
+    if get_embedding_cache.cache_info().currsize == 0:
+        return None
+    return get_embedding_cache().snapshot()
@@ -0,0 +1,54 @@
+import base64
+import binascii
+import hashlib
+from typing import Iterable
+
+from app.core.exceptions import PreconditionFailedError
+
+
+def make_etag(version: str) -> str:
+    """Build a strong, opaque ETag from a version string (e.g. a row's updated_at)."""
+    encoded = base64.urlsafe_b64encode(version.encode()).decode().rstrip("=")
+    return f'"{encoded}"'
+
+
+def make_version_etag(version: int, *parts: str, params: Iterable[tuple[str, str]] = ()) -> str:
+    """
+    ETag for a response derived from a data version: the same version, parts
+    (e.g. user id, path) and query parameters give the same tag, in any
+    parameter order.
+    """
+    canonical = "\n".join([str(version), *parts, *(f"{key}={value}" for key, value in sorted(params))])
+    return f'"{hashlib.sha256(canonical.encode()).hexdigest()[:32]}"'
+
+
+def parse_if_match(header: str | None) -> str | None:
+    """
+    Turn an If-Match header back into the version it was built from.
+
+    Returns None when there is no precondition (no header or "*"). A list of
+    several ETags is not supported: writes are conditional on one version.
+
+    Raises:
+        PreconditionFailedError: If the header is not an ETag issued by make_etag.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    tag = header.strip()
+    if "," in tag or tag.startswith("W/") or len(tag) < 2 or tag[0] != '"' or tag[-1] != '"':
+        raise PreconditionFailedError("If-Match must be a single ETag from this API")
+    try:
+        padded = tag[1:-1] + "=" * (-len(tag[1:-1]) % 4)
+        return base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise PreconditionFailedError("If-Match must be a single ETag from this API")
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match check: weak comparison against a list of ETags or "*"."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
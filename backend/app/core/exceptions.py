@@ -32,6 +32,14 @@ class ValidationError(AppError):
     """Raised when input data fails validation."""
     pass
 
+class PreconditionFailedError(AppError):
+    """Raised when an If-Match precondition no longer holds (412)."""
+    pass
+
+class PayloadTooLargeError(AppError):
+    """Raised when an uploaded body exceeds the accepted size (413)."""
+    pass
+
 class UnauthorizedError(AppError):
     """Raised when user is not authorized (401)."""
     pass
@@ -0,0 +1,181 @@
+"""
+Cache of search query embeddings (QUERY_EMBEDDING_CACHE_ENABLED).
+
+/api/ai/search and the chat's search tool embed the user's query on every
+call, and the same short queries ("makan", "bensin", "gaji") come back all
+day. EmbeddingService.generate_for_query looks them up here first.
+
+  - key: SHA-256 of model, dimensions and the normalized query (same
+    normalization as the expense embedding cache)
+  - bounded LRU (QUERY_EMBEDDING_CACHE_SIZE) with a TTL per entry
+    (QUERY_EMBEDDING_CACHE_TTL seconds)
+  - single flight: while a query is being embedded, identical lookups wait
+    for that call instead of sending their own; if it fails they all fail
+    and nothing is cached
+  - vectors are kept as float32 (~6 KB per entry)
+
+Thread callers (bot, sync services) use get_or_create; coroutines use
+aget_or_create, which coalesces per event loop.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable
+
+from app.core.config import get_settings
+from app.core.embedding_cache import EmbeddingCache
+
+
+@dataclass
+class QueryEmbeddingCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class QueryEmbeddingCache:
+    """Thread-safe TTL + LRU cache with single-flight loading; see the module docstring."""
+
+    def __init__(self, max_size: int = 1000, ttl: float = 3600.0, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self.stats = QueryEmbeddingCacheStats()
+        # key → (vector, expires at)
+        self._entries: OrderedDict[str, tuple[array, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        # asyncio tasks belong to the loop that created them
+        self._async_in_flight: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    key = staticmethod(EmbeddingCache.key)
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            return self._get_locked(key)
+
+    def put(self, key: str, vector: list[float]) -> None:
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (array("f", vector), self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def get_or_create(self, key: str, create: Callable[[], list[float]]) -> list[float]:
+        """Cached vector, or create() once for all threads asking for the key at the same time."""
+        with self._lock:
+            vector = self._get_locked(key)
+            if vector is not None:
+                return vector
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            vector = create()
+        except BaseException as e:
+            self._finish(key, future)
+            future.set_exception(e)
+            raise
+        self.put(key, vector)
+        self._finish(key, future)
+        future.set_result(vector)
+        return vector
+
+    async def aget_or_create(self, key: str, create: Callable[[], Awaitable[list[float]]]) -> list[float]:
+        """Async get_or_create; identical lookups on this event loop share one create() task."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            vector = self._get_locked(key)
+            if vector is not None:
+                return vector
+            in_flight = self._async_in_flight.setdefault(loop, {})
+            task = in_flight.get(key)
+            if task is None:
+                task = in_flight[key] = loop.create_task(create())
+                task.add_done_callback(lambda done: self._finish_task(key, in_flight, done))
+                self.stats.misses += 1
+            else:
+                self.stats.coalesced += 1
+        # Shielded: a caller that gives up (client disconnect) does not cancel the others
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        """Counters, hit rate and size, for /health."""
+        with self._lock:
+            stats = asdict(self.stats)
+            size = len(self._entries)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        return {
+            **stats,
+            "hit_rate": round((stats["hits"] + stats["coalesced"]) / lookups, 4) if lookups else 0.0,
+            "entries": size,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get_locked(self, key: str) -> list[float] | None:
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() >= entry[1]:
+            del self._entries[key]
+            self.stats.expirations += 1
+            entry = None
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[0].tolist()
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _finish_task(self, key: str, in_flight: dict, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
+        with self._lock:
+            if in_flight.get(key) is task:
+                del in_flight[key]
+
+
+@lru_cache
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    settings = get_settings()
+    return QueryEmbeddingCache(
+        max_size=settings.QUERY_EMBEDDING_CACHE_SIZE,
+        ttl=settings.QUERY_EMBEDDING_CACHE_TTL,
+    )
+
+
+def get_query_embedding_cache_if_enabled() -> QueryEmbeddingCache | None:
+    return get_query_embedding_cache() if get_settings().QUERY_EMBEDDING_CACHE_ENABLED else None
+
+
+def get_query_embedding_cache_stats() -> dict | None:
+    """Counters and hit rate, or None while no cache was created."""
+    if get_query_embedding_cache.cache_info().currsize == 0:
+        return None
+    return get_query_embedding_cache().snapshot()
@@ -0,0 +1,135 @@
+"""
+Cache of locally verified access tokens (AUTH_VERIFICATION_MODE=local).
+
+Remote verification asks Supabase Auth about the token on every request: one
+network round trip before any endpoint logic runs. In local mode the JWT
+signature is checked with SUPABASE_JWT_SECRET and the verified user is kept
+here, so repeated requests with the same token skip even the decode.
+
+  - keyed by the SHA-256 of the token; the raw token is never stored
+  - an entry lives for AUTH_TOKEN_CACHE_TTL seconds, never past the token's exp
+  - bounded LRU (AUTH_TOKEN_CACHE_SIZE entries)
+  - revoke() keeps a tombstone until exp, so a token logged out in this
+    process is rejected even though its signature is still valid
+
+A signature stays valid after the session is revoked elsewhere (logout from
+another worker, user deleted in the dashboard). With
+AUTH_REVOCATION_CHECK_INTERVAL > 0 each cached token is also checked with
+Supabase in the background, once after it enters the cache and then at most
+once per interval; see app.core.dependencies.get_current_user.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.models.auth import UserOut
+
+
+@dataclass
+class CachedToken:
+    user: UserOut | None
+    token_exp: float
+    cached_until: float
+    checked_at: float
+    revoked: bool = False
+
+
+@dataclass
+class TokenCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    revoked_rejections: int = 0
+
+
+class TokenCache:
+    """Bounded, thread-safe TTL + LRU cache of verified tokens; see the module docstring."""
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 300.0, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, CachedToken] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = TokenCacheStats()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> CachedToken | None:
+        """Live entry of the token (revoked ones included), or None."""
+        key = self.key(token)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now >= (entry.token_exp if entry.revoked else entry.cached_until):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.revoked:
+                self.stats.revoked_rejections += 1
+            else:
+                self.stats.hits += 1
+            return entry
+
+    def put(self, token: str, user: UserOut, token_exp: float) -> CachedToken:
+        now = self._clock()
+        entry = CachedToken(
+            user=user,
+            token_exp=token_exp,
+            cached_until=min(now + self.ttl, token_exp),
+            # Only verified locally so far; see mark_checked()
+            checked_at=0.0,
+        )
+        if self.ttl > 0 and self.max_size > 0:
+            self._store(self.key(token), entry)
+        return entry
+
+    def mark_checked(self, token: str) -> None:
+        """Record that a revocation check of the token has been started."""
+        with self._lock:
+            entry = self._entries.get(self.key(token))
+            if entry is not None:
+                entry.checked_at = self._clock()
+
+    def revoke(self, token: str, token_exp: float) -> None:
+        """Reject the token in this process until it expires."""
+        now = self._clock()
+        if token_exp > now:
+            self._store(
+                self.key(token),
+                CachedToken(user=None, token_exp=token_exp, cached_until=token_exp, checked_at=now, revoked=True),
+            )
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self.key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _store(self, key: str, entry: CachedToken) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+
+@lru_cache
+def get_token_cache() -> TokenCache:
+    settings = get_settings()
+    return TokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL)
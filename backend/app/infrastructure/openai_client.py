@@ -1,9 +1,15 @@
 from functools import lru_cache
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from app.core.config import get_settings
 
 @lru_cache
 def get_openai_client() -> OpenAI:
     """Initialize and return an OpenAI client instance."""
     settings = get_settings()
-    return OpenAI(api_key=settings.OPENAI_API_KEY)
\ No newline at end of file
+    return OpenAI(api_key=settings.OPENAI_API_KEY)
+
+@lru_cache
+def get_async_openai_client() -> AsyncOpenAI:
+    """Initialize and return an AsyncOpenAI client instance (for the event loop)."""
+    settings = get_settings()
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
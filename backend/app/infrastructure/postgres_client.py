@@ -0,0 +1,147 @@
+"""
+Direct Postgres access for REPOSITORY_BACKEND=postgres.
+
+PostgREST adds an HTTPS round trip (plus TLS, JSON encoding and JWT checks)
+in front of every query. With a pooled connection straight to the database
+a request pays only for the query itself.
+
+Needs a session-level connection: a direct database URL or the Supabase
+session pooler (port 5432). The transaction pooler (port 6543) does not
+keep prepared statements between transactions.
+"""
+import hashlib
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+
+
+def normalize_database_url(url: str) -> str:
+    """Supabase/libpq style URL → SQLAlchemy URL with the psycopg2 driver."""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+psycopg2://" + url[len("postgresql://"):]
+    return url
+
+
+def _json_value(value):
+    """Same representation PostgREST sends as JSON, so rows look identical to the app."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+class PostgresSession:
+    """One transaction on a pooled connection; see PostgresClient.session()."""
+
+    def __init__(self, cursor, prepared: set[str]):
+        self.cursor = cursor
+        self._prepared = prepared
+
+    def execute(self, sql: str, params: Sequence = (), prepared: bool = False) -> list[dict]:
+        """
+        Run one statement with $1..$n placeholders.
+
+        Returns:
+            The result rows as dicts ([] for statements without a result).
+        """
+        name = self._prepare(sql) if prepared else None
+        if name:
+            args = "(" + ", ".join(["%s"] * len(params)) + ")" if params else ""
+            self.cursor.execute(f"EXECUTE {name}{args}", tuple(params))
+        else:
+            self.cursor.execute(*self._unprepared(sql, params))
+        return self._rows()
+
+    def _prepare(self, sql: str) -> str | None:
+        name = "jarvis_" + hashlib.sha1(sql.encode()).hexdigest()[:16]
+        if name in self._prepared:
+            return name
+        if len(self._prepared) >= PostgresClient.MAX_PREPARED_PER_CONNECTION:
+            return None
+        self.cursor.execute(f"PREPARE {name} AS {sql}")
+        self._prepared.add(name)
+        return name
+
+    @staticmethod
+    def _unprepared(sql: str, params: Sequence) -> tuple[str, dict]:
+        """$1..$n → named psycopg2 placeholders, for a statement that is not prepared."""
+        sql = sql.replace("%", "%%")
+        # Highest number first, so $1 does not eat the prefix of $10
+        for index in range(len(params), 0, -1):
+            sql = sql.replace(f"${index}", f"%(p{index})s")
+        return sql, {f"p{index}": value for index, value in enumerate(params, start=1)}
+
+    def _rows(self) -> list[dict]:
+        if self.cursor.description is None:
+            return []
+        columns = [column.name for column in self.cursor.description]
+        return [
+            {column: _json_value(value) for column, value in zip(columns, row)}
+            for row in self.cursor.fetchall()
+        ]
+
+
+class PostgresClient:
+    """
+    Pooled connections plus a per-connection prepared statement cache.
+
+    prepared=True runs the statement through PREPARE/EXECUTE: Postgres parses
+    and plans it once per pooled connection and reuses the plan afterwards.
+    Statements are named after a hash of their SQL, so every query shape
+    (e.g. each filter combination of a list query) gets its own statement.
+    SQL always uses $1, $2, ... placeholders, prepared or not.
+    """
+
+    # Upper bound per connection; further shapes run unprepared
+    MAX_PREPARED_PER_CONNECTION = 256
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    @contextmanager
+    def session(self) -> Iterator[PostgresSession]:
+        """Several statements in one transaction on one pooled connection."""
+        with self.engine.begin() as connection:
+            pooled = connection.connection
+            with pooled.dbapi_connection.cursor() as cursor:
+                yield PostgresSession(cursor, pooled.info.setdefault("prepared_statements", set()))
+
+    def fetch_all(self, sql: str, params: Sequence = (), prepared: bool = False) -> list[dict]:
+        with self.session() as session:
+            return session.execute(sql, params, prepared)
+
+    def fetch_one(self, sql: str, params: Sequence = (), prepared: bool = False) -> dict | None:
+        rows = self.fetch_all(sql, params, prepared)
+        return rows[0] if rows else None
+
+
+@lru_cache
+def get_postgres_client() -> PostgresClient:
+    """Process-wide connection pool (one per worker process)."""
+    settings = get_settings()
+    if not settings.DATABASE_URL:
+        raise RuntimeError("DATABASE_URL is required when REPOSITORY_BACKEND=postgres")
+
+    engine = create_engine(
+        normalize_database_url(settings.DATABASE_URL),
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        # Timestamps come back in UTC, like PostgREST returns them
+        connect_args={"options": "-c timezone=UTC", "application_name": settings.APP_NAME},
+    )
+    return PostgresClient(engine)
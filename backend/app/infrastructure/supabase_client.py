@@ -1,16 +1,303 @@
+"""
+Supabase clients on one pooled HTTP transport per process.
+
+create_client() builds new httpx sessions every time, so each request (and
+each bot message) used to pay a fresh TCP + TLS handshake, sometimes twice.
+SupabaseClientManager keeps one keep-alive, HTTP/2 connection pool per
+process (one per event loop for the async side) and hands out:
+
+  - admin:      one shared service-role Client (its auth calls are stateless)
+  - anon:       a new Client per call — sign-in/sign-up keep session state on
+                the client, so it must not be shared — on the shared transport
+  - user views: a PostgREST client carrying the user's JWT; only headers
+                differ per token, so building one costs no I/O
+
+get_pool_stats() reports request and connection counters for /health.
+"""
+import asyncio
+import threading
+import weakref
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+import httpx
+from postgrest import AsyncPostgrestClient, SyncPostgrestClient
 from supabase import Client, create_client
+from supabase.lib.client_options import SyncClientOptions
+
 from app.core.config import get_settings
 
+
+@dataclass
+class PoolMetrics:
+    """Counters shared by every transport of a manager."""
+
+    requests_total: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    connections_opened: int = 0
+    user_views: int = 0
+
+
+class _PoolMeter:
+    """Thread-safe PoolMetrics updates plus detection of newly opened connections."""
+
+    def __init__(self):
+        self.metrics = PoolMetrics()
+        self._lock = threading.Lock()
+        self._seen_connections = weakref.WeakSet()
+
+    def started(self) -> None:
+        with self._lock:
+            self.metrics.requests_total += 1
+            self.metrics.in_flight += 1
+            self.metrics.peak_in_flight = max(self.metrics.peak_in_flight, self.metrics.in_flight)
+
+    def finished(self, transport: httpx.BaseTransport) -> None:
+        with self._lock:
+            self.metrics.in_flight -= 1
+            for connection in _pool_connections(transport):
+                if connection not in self._seen_connections:
+                    self._seen_connections.add(connection)
+                    self.metrics.connections_opened += 1
+
+    def view_created(self) -> None:
+        with self._lock:
+            self.metrics.user_views += 1
+
+
+def _pool_connections(transport: httpx.BaseTransport | httpx.AsyncBaseTransport) -> list:
+    # httpcore pool behind httpx.HTTPTransport / AsyncHTTPTransport
+    pool = getattr(transport, "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+class _MeteredTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.BaseTransport, meter: _PoolMeter):
+        self.inner = inner
+        self._meter = meter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self._meter.started()
+        try:
+            return self.inner.handle_request(request)
+        finally:
+            self._meter.finished(self.inner)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class _AsyncMeteredTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncBaseTransport, meter: _PoolMeter):
+        self.inner = inner
+        self._meter = meter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._meter.started()
+        try:
+            return await self.inner.handle_async_request(request)
+        finally:
+            self._meter.finished(self.inner)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class SupabaseClientManager:
+    """Process-wide Supabase clients sharing one pooled transport; see the module docstring."""
+
+    def __init__(
+        self,
+        url: str,
+        anon_key: str,
+        service_role_key: str,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 120.0,
+        transport: httpx.BaseTransport | None = None,
+        async_transport_factory=None,
+    ):
+        self.url = url.rstrip("/")
+        self.rest_url = f"{self.url}/rest/v1"
+        self._anon_key = anon_key
+        self._service_role_key = service_role_key
+        self._http2 = http2
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._timeout = httpx.Timeout(timeout)
+        self._transport = transport
+        self._async_transport_factory = async_transport_factory
+
+        self._meter = _PoolMeter()
+        # admin() builds on http(); both take the lock
+        self._lock = threading.RLock()
+        self._http: httpx.Client | None = None
+        self._admin: Client | None = None
+        # httpcore connections belong to the event loop that opened them
+        self._async_http: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_settings(cls, settings) -> "SupabaseClientManager":
+        return cls(
+            url=settings.SUPABASE_URL,
+            anon_key=settings.SUPABASE_ANON_KEY,
+            service_role_key=settings.SUPABASE_SERVICE_ROLE_KEY,
+            http2=settings.SUPABASE_HTTP2,
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+            timeout=settings.SUPABASE_HTTP_TIMEOUT,
+        )
+
+    # =========================================================================
+    # TRANSPORTS
+    # =========================================================================
+
+    def http(self) -> httpx.Client:
+        """The shared sync httpx client (created on first use)."""
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    inner = self._transport or httpx.HTTPTransport(http2=self._http2, limits=self._limits)
+                    self._http = httpx.Client(
+                        transport=_MeteredTransport(inner, self._meter),
+                        timeout=self._timeout,
+                        follow_redirects=True,
+                    )
+        return self._http
+
+    def async_http(self) -> httpx.AsyncClient:
+        """The shared async httpx client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_http.get(loop)
+        if client is None:
+            if self._async_transport_factory:
+                inner = self._async_transport_factory()
+            else:
+                inner = httpx.AsyncHTTPTransport(http2=self._http2, limits=self._limits)
+            client = httpx.AsyncClient(
+                transport=_AsyncMeteredTransport(inner, self._meter),
+                timeout=self._timeout,
+                follow_redirects=True,
+            )
+            self._async_http[loop] = client
+        return client
+
+    # =========================================================================
+    # CLIENTS
+    # =========================================================================
+
+    def admin(self) -> Client:
+        """Shared service-role client (bypasses RLS)."""
+        if self._admin is None:
+            with self._lock:
+                if self._admin is None:
+                    self._admin = create_client(
+                        self.url,
+                        self._service_role_key,
+                        options=SyncClientOptions(
+                            httpx_client=self.http(),
+                            auto_refresh_token=False,
+                            persist_session=False,
+                        ),
+                    )
+        return self._admin
+
+    def anon(self) -> Client:
+        """New anon-key client for auth flows, on the shared transport."""
+        return create_client(self.url, self._anon_key, options=SyncClientOptions(httpx_client=self.http()))
+
+    def _view_headers(self, key: str, access_token: str) -> dict:
+        return {"apikey": key, "Authorization": f"Bearer {access_token}"}
+
+    def user_view(self, access_token: str) -> SyncPostgrestClient:
+        """PostgREST client acting as the user (RLS applies)."""
+        self._meter.view_created()
+        return SyncPostgrestClient(
+            self.rest_url,
+            headers=self._view_headers(self._anon_key, access_token),
+            http_client=self.http(),
+        )
+
+    def async_admin_view(self) -> AsyncPostgrestClient:
+        """Async PostgREST client with the service role (bypasses RLS)."""
+        return AsyncPostgrestClient(
+            self.rest_url,
+            headers=self._view_headers(self._service_role_key, self._service_role_key),
+            http_client=self.async_http(),
+        )
+
+    def async_user_view(self, access_token: str) -> AsyncPostgrestClient:
+        """Async PostgREST client acting as the user (RLS applies)."""
+        self._meter.view_created()
+        return AsyncPostgrestClient(
+            self.rest_url,
+            headers=self._view_headers(self._anon_key, access_token),
+            http_client=self.async_http(),
+        )
+
+    # =========================================================================
+    # METRICS
+    # =========================================================================
+
+    def pool_stats(self) -> dict:
+        """Request counters plus a snapshot of the open connections."""
+        transports = []
+        if self._http is not None:
+            transports.append(self._http._transport)
+        transports.extend(client._transport for client in list(self._async_http.values()))
+
+        connections = [
+            connection
+            for transport in transports
+            for connection in _pool_connections(transport.inner)
+        ]
+        return {
+            **asdict(self._meter.metrics),
+            "event_loops": len(self._async_http),
+            "connections_open": sum(not connection.is_closed() for connection in connections),
+            "connections_idle": sum(connection.is_idle() for connection in connections),
+            "connections_http2": sum("HTTP/2" in connection.info() for connection in connections),
+        }
+
+    def close(self) -> None:
+        """Close the sync transport (async ones close with their event loop)."""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+            self._admin = None
+
+
+@lru_cache
+def get_client_manager() -> SupabaseClientManager:
+    return SupabaseClientManager.from_settings(get_settings())
+
+
+def get_pool_stats() -> dict:
+    return get_client_manager().pool_stats()
+
+
 def get_supabase_client() -> Client:
-    settings = get_settings()
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+    return get_client_manager().anon()
 
 def get_admin_supabase_client() -> Client:
-    settings = get_settings()
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-
-def get_user_client(access_token: str) -> Client:
-    settings = get_settings()
-    client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
-    client.postgrest.auth(access_token)
-    return client
\ No newline at end of file
+    return get_client_manager().admin()
+
+def get_user_client(access_token: str) -> SyncPostgrestClient:
+    return get_client_manager().user_view(access_token)
+
+# Async variants for the FastAPI routes: queries are awaited on the event loop
+# instead of blocking it (the sync clients stay for the bot and scripts).
+# Both return PostgREST clients (table/rpc) — the routes never use auth there.
+
+async def get_async_admin_supabase_client() -> AsyncPostgrestClient:
+    return get_client_manager().async_admin_view()
+
+async def get_async_user_client(access_token: str) -> AsyncPostgrestClient:
+    return get_client_manager().async_user_view(access_token)
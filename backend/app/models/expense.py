@@ -1,5 +1,5 @@
 from typing import Optional, Literal
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
 
 class ExpenseBase(BaseModel):
@@ -118,14 +118,75 @@ class ExpenseOut(BaseModel):
             updated_at=str(data.get("updated_at", ""))
         )
 
+class ExpensePartialOut(BaseModel):
+    """Sparse-fieldset variant of ExpenseOut (?fields=...); only requested fields are set."""
+    id: str
+    amount: Optional[float] = None
+    type: Optional[Literal["income", "expense"]] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    subcategory: Optional[str] = None
+    payment_method: Optional[str] = None
+    transaction_date: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @classmethod
+    def from_db(cls, data: dict, fields: list[str]) -> "ExpensePartialOut":
+        """Build from a projected DB row, setting only the requested fields."""
+        values = {"id": str(data["id"])}
+        for field in fields:
+            if field == "id" or field not in cls.model_fields:
+                continue
+            value = data.get(field)
+            values[field] = value if value is None or field == "amount" else str(value)
+        return cls(**values)
+
+class BulkCreateExpenseRequest(BaseModel):
+    """Request model for creating many expenses at once (POST /expenses/bulk)."""
+    # Raw items: each one is validated as CreateExpenseRequest by the service so
+    # that one bad item is reported in its result instead of failing the request
+    expenses: list[dict] = Field(..., min_length=1, max_length=1000)
+
+class BulkCreateExpenseResult(BaseModel):
+    """Outcome of one item of a bulk create, in request order."""
+    index: int
+    success: bool
+    expense: Optional[ExpenseOut] = None
+    error: Optional[str] = None
+
+class BulkCreateExpenseResponse(BaseModel):
+    """Response model for a bulk create."""
+    created: int
+    failed: int
+    results: list[BulkCreateExpenseResult]
+
+class BulkExpenseMutationResponse(BaseModel):
+    """Response model for a bulk update / bulk delete by filter."""
+    affected: int
+    ids: list[str]
+
+class ExpenseImportError(BaseModel):
+    """One rejected line of a CSV import (line 1 is the header)."""
+    line: int
+    error: str
+
+class ExpenseImportResponse(BaseModel):
+    """Response model for a CSV import."""
+    imported: int
+    failed: int
+    errors: list[ExpenseImportError]
+    errors_truncated: bool = False  # True when more lines failed than are listed in errors
+
 class DeleteExpenseResponse(BaseModel):
     """Response model for deleting an expense."""
     message: str = "Expense deleted successfully"
 
 class ExpensesListOut(BaseModel):
     """Response model for listing expenses."""
-    expenses: list[ExpenseOut]
-    total: int
+    expenses: list[ExpenseOut | ExpensePartialOut]  # ExpensePartialOut when ?fields= is used
+    total: Optional[int]  # None when the caller asked for count_mode="none"
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page; None on the last page
 
 class ExpenseSummaryResponse(BaseModel):
     """Response model for expense summary."""
@@ -140,7 +201,7 @@ class ExpenseSummaryByCategoryResponse(BaseModel):
 
 class ExpenseSummaryByPaymentMethodResponse(BaseModel):
     """Response model for expense summary by payment method."""
-    payment_method: str
+    payment_method: Optional[str]  # None groups transactions without a payment method
     total_amount: float
 
 class ExpenseSummaryByMonthResponse(BaseModel):
@@ -150,6 +211,13 @@ class ExpenseSummaryByMonthResponse(BaseModel):
     total_expense: float
     net_balance: float
 
+class ExpenseSummaryByPeriodResponse(BaseModel):
+    """Response model for one bucket of the income/expense time series."""
+    period: str  # Bucket start date, YYYY-MM-DD (weeks start on Monday)
+    total_income: float
+    total_expense: float
+    net_balance: float
+
 class ExpenseSummaryByYearResponse(BaseModel):
     """Response model for expense summary by year."""
     year: str  # Format: YYYY
@@ -1,19 +1,79 @@
-from supabase import Client
+from supabase import AsyncClient, Client
+from postgrest import ReturnMethod
 
 class AIRepository:
     """Repository for AI-related database operations using Supabase."""
 
     EXPENSE_TABLE = "expenses"
 
+    # Columns build_expense_text needs
+    BACKLOG_COLUMNS = "id, amount, type, description, category, subcategory, payment_method"
+    BACKLOG_MODES = ("missing", "stale", "all")
+
     def __init__(self, client: Client):
         self.client = client
     
-    def save_embedding(self, expense_id: str, embedding: list[float]) -> None:
-        """Saves the embedding vector for a given expense ID."""
-        self.client.table(self.EXPENSE_TABLE).update(
-            {"embedding": embedding}
-        ).eq("id", expense_id).execute()
+    def save_embedding(self, expense_id: str, embedding: list[float], model: str | None = None) -> None:
+        """Saves the embedding vector for a given expense ID, and the model that produced it."""
+        self._save_embedding_query(expense_id, embedding, model).execute()
+
+    def _save_embedding_query(self, expense_id: str, embedding: list[float], model: str | None):
+        # return=minimal: don't echo the 1536-float vector back
+        return self.client.table(self.EXPENSE_TABLE).update(
+            {"embedding": embedding, "embedding_model": model}, returning=ReturnMethod.minimal
+        ).eq("id", expense_id)
     
+    def save_embeddings(self, embeddings: dict[str, list[float]], model: str | None = None) -> int:
+        """Saves many embedding vectors (expense ID → vector) in one UPDATE. Returns rows updated."""
+        if not embeddings:
+            return 0
+        response = self._save_embeddings_rpc(embeddings, model).execute()
+        return response.data or 0
+
+    def _save_embeddings_rpc(self, embeddings: dict[str, list[float]], model: str | None):
+        return self.client.rpc(
+            "save_expense_embeddings",
+            {
+                "embeddings_param": [
+                    {"id": expense_id, "embedding": embedding}
+                    for expense_id, embedding in embeddings.items()
+                ],
+                "model_param": model,
+            }
+        )
+
+    def find_embedding_backlog(
+        self,
+        mode: str,
+        model: str,
+        after_id: str | None = None,
+        limit: int = 500,
+    ) -> list[dict]:
+        """
+        Next page of active expenses that need an embedding, in ID order (keyset).
+
+        Modes:
+          - missing: no embedding yet
+          - stale:   missing, or embedded by another (or an unrecorded) model
+          - all:     every active expense
+        Pass the last ID of the previous page as after_id to continue.
+        """
+        if mode not in self.BACKLOG_MODES:
+            raise ValueError(f"Unknown backlog mode: {mode}")
+        query = (
+            self.client.table(self.EXPENSE_TABLE)
+            .select(self.BACKLOG_COLUMNS)
+            .is_("deleted_at", "null")
+        )
+        if mode == "missing":
+            query = query.is_("embedding", "null")
+        elif mode == "stale":
+            query = query.or_(f'embedding.is.null,embedding_model.is.null,embedding_model.neq."{model}"')
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        response = query.order("id").limit(limit).execute()
+        return response.data or []
+
     def semantic_search(
         self,
         query_embedding: list[float],
@@ -22,7 +82,20 @@ class AIRepository:
         match_count: int = 5,
     ) -> list[dict]:
         """ finds the most similar expenses based on cosine similarity of embeddings."""
-        response = self.client.rpc(
+        response = self._semantic_search_rpc(
+            query_embedding, user_id, match_threshold, match_count,
+        ).execute()
+        
+        return response.data or []
+
+    def _semantic_search_rpc(
+        self,
+        query_embedding: list[float],
+        user_id: str,
+        match_threshold: float,
+        match_count: int,
+    ):
+        return self.client.rpc(
             "match_expense",
             {
                 "query_embedding": query_embedding,
@@ -30,6 +103,35 @@ class AIRepository:
                 "match_threshold": match_threshold,
                 "match_count": match_count
             }
+        )
+
+
+class AsyncAIRepository(AIRepository):
+    """AIRepository on supabase's AsyncClient; same queries, awaited."""
+
+    def __init__(self, client: AsyncClient):
+        self.client = client
+
+    async def save_embedding(self, expense_id: str, embedding: list[float], model: str | None = None) -> None:
+        """Saves the embedding vector for a given expense ID, and the model that produced it."""
+        await self._save_embedding_query(expense_id, embedding, model).execute()
+
+    async def save_embeddings(self, embeddings: dict[str, list[float]], model: str | None = None) -> int:
+        """Saves many embedding vectors (expense ID → vector) in one UPDATE. Returns rows updated."""
+        if not embeddings:
+            return 0
+        response = await self._save_embeddings_rpc(embeddings, model).execute()
+        return response.data or 0
+
+    async def semantic_search(
+        self,
+        query_embedding: list[float],
+        user_id: str,
+        match_threshold: float = 0.5,
+        match_count: int = 5,
+    ) -> list[dict]:
+        """ finds the most similar expenses based on cosine similarity of embeddings."""
+        response = await self._semantic_search_rpc(
+            query_embedding, user_id, match_threshold, match_count,
         ).execute()
-        
-        return response.data or []
\ No newline at end of file
+        return response.data or []
@@ -13,11 +13,20 @@
 #     deleted_at       TIMESTAMPTZ    DEFAULT NULL
 # );
 
-from calendar import monthrange
-from supabase import Client
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime, timezone
+from functools import partial
+
+import anyio
+from psycopg2 import DataError
+from supabase import AsyncClient, Client
 from postgrest.exceptions import APIError
 
-from app.core.exceptions import NotFoundError
+from app.core.exceptions import NotFoundError, PreconditionFailedError, ValidationError
+from app.infrastructure.postgres_client import PostgresClient
 
 
 class ExpenseRepository:
@@ -29,10 +38,187 @@ class ExpenseRepository:
 
     TABLE = "expenses"
     VIEW = "active_expenses"  # filters deleted_at IS NULL
+    VERSION_TABLE = "expense_data_versions"  # per-user change counter
+
+    # Columns returned to the app. Never "*": the table also holds the
+    # 1536-float embedding and the search_vector, which no response uses.
+    COLUMNS = (
+        "id",
+        "amount",
+        "type",
+        "description",
+        "category",
+        "subcategory",
+        "payment_method",
+        "transaction_date",
+        "created_at",
+        "updated_at",
+    )
+
+    # Allowed sort columns for list queries. Every list query is ordered by
+    # (sort column, id) so keyset cursors always have a unique position.
+    SORT_COLUMNS = {
+        "created_at":       "created_at",
+        "transaction_date": "transaction_date",
+        "amount":           "amount",
+    }
+    NULLABLE_SORT_COLUMNS = {"transaction_date"}
+
+    # PostgREST count strategies for list queries ("none" skips counting).
+    # exact = COUNT(*), planned = planner estimate, estimated = exact up to
+    # db-max-rows then planner estimate.
+    COUNT_MODES = ("exact", "planned", "estimated", "none")
+
+    # Groupings supported by get_expense_breakdown (migration 0007)
+    BREAKDOWN_GROUPS = ("category", "subcategory", "payment_method")
+
+    # Bucket sizes supported by get_expense_timeseries (migration 0007)
+    TIMESERIES_GRANULARITIES = ("day", "week", "month", "year")
 
     def __init__(self, client: Client):
         self._client = client
 
+    # =========================================================================
+    # KEYSET CURSOR
+    #
+    # A cursor is the (sort value, id) of the last row on a page, encoded as
+    # url-safe base64 JSON. The next page seeks past that position instead of
+    # using OFFSET, so every page costs the same no matter how deep it is.
+    # =========================================================================
+
+    @classmethod
+    def _sort_column(cls, sort_by: str) -> str:
+        return cls.SORT_COLUMNS.get(sort_by, "created_at")
+
+    @classmethod
+    def encode_cursor(cls, row: dict, sort_by: str = "created_at", sort_order: str = "desc") -> str:
+        """
+        Build an opaque cursor pointing just after the given row.
+
+        Args:
+            row:        The last row of the current page (must include id and the sort column).
+            sort_by:    Sort column used for the page.
+            sort_order: "asc" or "desc".
+
+        Returns:
+            Opaque cursor string for the next page.
+        """
+        column = cls._sort_column(sort_by)
+        payload = {
+            "c":  column,
+            "o":  "asc" if sort_order == "asc" else "desc",
+            "v":  row.get(column),
+            "id": str(row["id"]),
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode_cursor(cls, cursor: str, sort_by: str = "created_at", sort_order: str = "desc") -> dict:
+        """
+        Decode and validate a cursor produced by encode_cursor().
+
+        Values end up inside a PostgREST filter, so they are type-checked
+        here rather than trusted.
+
+        Raises:
+            ValidationError: If the cursor is malformed or was issued for a different sort.
+        """
+        column = cls._sort_column(sort_by)
+        order = "asc" if sort_order == "asc" else "desc"
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if payload["c"] != column or payload["o"] != order:
+                raise ValidationError("Cursor does not match the requested sort")
+
+            expense_id = str(uuid.UUID(str(payload["id"])))
+            value = payload["v"]
+            if value is None:
+                if column not in cls.NULLABLE_SORT_COLUMNS:
+                    raise ValueError("null sort value")
+            elif column == "amount":
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError("amount must be a number")
+            elif column == "transaction_date":
+                date.fromisoformat(value)
+            else:
+                datetime.fromisoformat(value)
+        except ValidationError:
+            raise
+        except (KeyError, TypeError, ValueError, binascii.Error, UnicodeDecodeError) as e:
+            raise ValidationError("Invalid cursor") from e
+
+        return {"value": value, "id": expense_id}
+
+    @classmethod
+    def select_columns(cls, fields: list[str] | None = None, sort_by: str | None = None) -> str:
+        """
+        Build the PostgREST select list for a sparse fieldset.
+
+        Args:
+            fields:  Subset of COLUMNS to return, or None for all of them.
+            sort_by: Sort column of a list query; kept so cursors can be built.
+
+        Returns:
+            Comma-separated column list. id is always included.
+
+        Raises:
+            ValidationError: If fields names a column outside COLUMNS.
+        """
+        if not fields:
+            return ",".join(cls.COLUMNS)
+
+        unknown = sorted(set(fields) - set(cls.COLUMNS))
+        if unknown:
+            raise ValidationError(f"Unknown fields: {', '.join(unknown)}")
+
+        wanted = {"id", *fields}
+        if sort_by:
+            wanted.add(cls._sort_column(sort_by))
+        return ",".join(column for column in cls.COLUMNS if column in wanted)
+
+    def _returning(self, query, columns: str):
+        """Limit the representation returned by insert/update to the given columns."""
+        # postgrest-py has no select() after insert/update, but PostgREST
+        # honours ?select= on writes the same way as on reads
+        query.request.params = query.request.params.set("select", columns)
+        return query
+
+    def _order_and_seek(
+        self,
+        query,
+        sort_by: str,
+        sort_order: str,
+        cursor: str | None = None,
+    ):
+        """Apply (sort column, id) ordering and, if given, the keyset seek predicate."""
+        column = self._sort_column(sort_by)
+        is_desc = sort_order != "asc"
+
+        if cursor:
+            position = self.decode_cursor(cursor, sort_by, sort_order)
+            op = "lt" if is_desc else "gt"
+            value, last_id = position["value"], position["id"]
+
+            # NULL sort values rank below every value: last for desc, first for asc
+            if value is None:
+                seek = f"and({column}.is.null,id.{op}.{last_id})"
+                if not is_desc:
+                    seek += f",{column}.not.is.null"
+            else:
+                seek = f'{column}.{op}."{value}",and({column}.eq."{value}",id.{op}.{last_id})'
+                if is_desc and column in self.NULLABLE_SORT_COLUMNS:
+                    seek += f",{column}.is.null"
+            query = query.or_(seek)
+
+        # Nullable columns: DESC NULLS LAST / ASC NULLS FIRST, the exact reverse of
+        # each other, so one (user_id, column DESC NULLS LAST, id DESC) index serves
+        # both directions (scanned backwards for asc) without a Sort. NOT NULL
+        # columns keep the default null ordering for the same reason.
+        nullsfirst = not is_desc if column in self.NULLABLE_SORT_COLUMNS else None
+        return query.order(column, desc=is_desc, nullsfirst=nullsfirst).order("id", desc=is_desc)
+
     def _apply_list_filters(
         self,
         query,
@@ -71,6 +257,89 @@ class ExpenseRepository:
     # READ
     # =========================================================================
 
+    def find_page(
+        self,
+        user_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: str | None = None,
+        count_mode: str = "exact",
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], int | None]:
+        """
+        Find a page of active expenses and count the matching rows in one request.
+
+        The count is returned by PostgREST in the Content-Range header of the
+        same SELECT, so there is no second round trip.
+
+        Args:
+            user_id:    The authenticated user's ID.
+            limit:      Maximum number of records to return (default 100).
+            offset:     Number of records to skip (default 0). Ignored when cursor is set.
+            cursor:     Keyset cursor from encode_cursor(); returns the rows after it.
+            count_mode: "exact", "planned", "estimated" or "none" (skip counting).
+            fields:     Sparse fieldset (subset of COLUMNS); None returns every column.
+                        id and the sort column are always included.
+
+        Returns:
+            Tuple (rows ordered by (sort_by, id), count or None when count_mode is "none").
+            With a cursor the count only covers rows after the cursor position.
+        """
+        query = self._page_query(
+            user_id, limit, offset, expense_type, category, q, date_from, date_to,
+            sort_by, sort_order, cursor, count_mode, fields,
+        )
+        return self._page_result(query.execute(), count_mode)
+
+    def _page_query(
+        self,
+        user_id: str,
+        limit: int,
+        offset: int,
+        expense_type: str | None,
+        category: str | None,
+        q: str | None,
+        date_from: str | None,
+        date_to: str | None,
+        sort_by: str,
+        sort_order: str,
+        cursor: str | None,
+        count_mode: str,
+        fields: list[str] | None,
+    ):
+        if count_mode not in self.COUNT_MODES:
+            raise ValidationError(f"count_mode must be one of: {', '.join(self.COUNT_MODES)}")
+        count = None if count_mode == "none" else count_mode
+
+        query = self._client.table(self.VIEW).select(self.select_columns(fields, sort_by), count=count)
+        query = self._apply_list_filters(
+            query,
+            user_id=user_id,
+            expense_type=expense_type,
+            category=category,
+            q=q,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        query = self._order_and_seek(query, sort_by, sort_order, cursor)
+
+        if cursor:
+            return query.limit(limit)
+        return query.limit(limit).offset(offset)
+
+    @staticmethod
+    def _page_result(response, count_mode: str) -> tuple[list[dict], int | None]:
+        counted = count_mode != "none"
+        total = int(response.count) if counted and response.count is not None else None
+        return response.data, total
+
     def find_all(
         self,
         user_id: str,
@@ -83,39 +352,102 @@ class ExpenseRepository:
         date_to: str | None = None,
         sort_by: str = "created_at",
         sort_order: str = "desc",
+        cursor: str | None = None,
+        fields: list[str] | None = None,
     ) -> list[dict]:
         """
-        Find all active expenses for a user with pagination.
+        Find all active expenses for a user with pagination (no count).
 
         Args:
             user_id: The authenticated user's ID.
             limit:   Maximum number of records to return (default 100).
-            offset:  Number of records to skip (default 0).
+            offset:  Number of records to skip (default 0). Ignored when cursor is set.
+            cursor:  Keyset cursor from encode_cursor(); returns the rows after it.
 
         Returns:
-            List of expense dicts ordered by created_at descending.
+            List of expense dicts ordered by (sort_by, id).
         """
-        query = self._client.table(self.VIEW).select("*")
-        query = self._apply_list_filters(
-            query,
-            user_id=user_id,
+        rows, _ = self.find_page(
+            user_id,
+            limit=limit,
+            offset=offset,
             expense_type=expense_type,
             category=category,
             q=q,
             date_from=date_from,
             date_to=date_to,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            count_mode="none",
+            fields=fields,
         )
+        return rows
 
-        allowed_sort_columns = {
-            "created_at": "created_at",
-            "transaction_date": "transaction_date",
-            "amount": "amount",
-        }
-        order_column = allowed_sort_columns.get(sort_by, "created_at")
-        is_desc = sort_order != "asc"
+    def search(
+        self,
+        user_id: str,
+        q: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """
+        Keyword search over the search_vector GIN index, most relevant first.
 
-        response = query.order(order_column, desc=is_desc).limit(limit).offset(offset).execute()
-        return response.data
+        Every word of q must match as a prefix of a word in category,
+        subcategory or description. Unlike the ILIKE filter of find_page(),
+        this does not match inside words ("pi" does not find "kopi").
+
+        Args:
+            user_id: The authenticated user's ID.
+            q:       Free-text keywords.
+            limit:   Maximum number of records to return (default 100).
+            offset:  Number of records to skip (default 0).
+
+        Returns:
+            Tuple (rows ordered by rank, total number of matches).
+        """
+        response = self._search_rpc(
+            user_id, q, limit, offset, expense_type, category, date_from, date_to,
+        ).execute()
+        return self._search_result(response.data)
+
+    def _search_rpc(
+        self,
+        user_id: str,
+        q: str,
+        limit: int,
+        offset: int,
+        expense_type: str | None,
+        category: str | None,
+        date_from: str | None,
+        date_to: str | None,
+    ):
+        return self._client.rpc(
+            "search_expenses",
+            {
+                "user_id_param":   user_id,
+                "query_param":     q,
+                "type_param":      expense_type,
+                "category_param":  category.strip().lower() if category else None,
+                "date_from_param": date_from,
+                "date_to_param":   date_to,
+                "limit_param":     limit,
+                "offset_param":    offset,
+            },
+        )
+
+    @staticmethod
+    def _search_result(rows: list[dict] | None) -> tuple[list[dict], int]:
+        rows = rows or []
+        total = int(rows[0]["total_count"]) if rows else 0
+        for row in rows:
+            row.pop("total_count", None)
+        return rows, total
 
     def count_all(
         self,
@@ -135,8 +467,20 @@ class ExpenseRepository:
         Returns:
             Total number of active expense records for the user.
         """
+        query = self._count_query(user_id, expense_type, category, q, date_from, date_to)
+        return int(query.execute().count or 0)
+
+    def _count_query(
+        self,
+        user_id: str,
+        expense_type: str | None,
+        category: str | None,
+        q: str | None,
+        date_from: str | None,
+        date_to: str | None,
+    ):
         query = self._client.table(self.VIEW).select("id", count="exact", head=True)
-        query = self._apply_list_filters(
+        return self._apply_list_filters(
             query,
             user_id=user_id,
             expense_type=expense_type,
@@ -145,8 +489,6 @@ class ExpenseRepository:
             date_from=date_from,
             date_to=date_to,
         )
-        response = query.execute()
-        return int(response.count or 0)
 
     def find_by_id(self, expense_id: str, user_id: str) -> dict:
         """
@@ -163,23 +505,27 @@ class ExpenseRepository:
             NotFoundError: If the expense does not exist or belongs to another user.
         """
         try:
-            response = (
-                self._client
-                .table(self.VIEW)  # soft-delete filtered
-                .select("*")
-                .eq("id", expense_id)
-                .eq("user_id", user_id)
-                .maybe_single()
-                .execute()
-            )
-            if response is None or not getattr(response, "data", None):
-                raise NotFoundError(f"Expense with id '{expense_id}' not found")
-            return response.data
-        except NotFoundError:
-            raise
+            response = self._find_by_id_query(expense_id, user_id).execute()
         except APIError as e:
             # Only catch DB/network errors — not swallow everything
             raise NotFoundError(f"Expense with id '{expense_id}' not found") from e
+        return self._found_row(response, expense_id)
+
+    def _find_by_id_query(self, expense_id: str, user_id: str):
+        return (
+            self._client
+            .table(self.VIEW)  # soft-delete filtered
+            .select(self.select_columns())
+            .eq("id", expense_id)
+            .eq("user_id", user_id)
+            .maybe_single()
+        )
+
+    @staticmethod
+    def _found_row(response, expense_id: str) -> dict:
+        if response is None or not getattr(response, "data", None):
+            raise NotFoundError(f"Expense with id '{expense_id}' not found")
+        return response.data
 
     # =========================================================================
     # WRITE
@@ -198,187 +544,1306 @@ class ExpenseRepository:
         Raises:
             RuntimeError: If the DB returns no data after insert.
         """
-        response = (
-            self._client
-            .table(self.TABLE)
-            .insert(expense_data)
-            .execute()
-        )
+        return self._created_row(self._create_query(expense_data).execute())
+
+    def _create_query(self, expense_data: dict):
+        query = self._client.table(self.TABLE).insert(expense_data)
+        return self._returning(query, self.select_columns())
+
+    @staticmethod
+    def _created_row(response) -> dict:
         if not response.data:
             raise RuntimeError("Failed to create expense")
         return response.data[0]
 
-    def update(self, expense_id: str, user_id: str, update_data: dict) -> dict:
+    def create_many(self, expenses_data: list[dict]) -> list[dict]:
+        """
+        Insert many expense records in one multi-row INSERT.
+
+        Args:
+            expenses_data: List of column-value dicts. Keys may differ per row;
+                           a missing column gets its DB default, not NULL.
+
+        Returns:
+            The created expense dicts, in the same order as expenses_data.
+
+        Raises:
+            RuntimeError: If the DB does not return one row per input.
+        """
+        if not expenses_data:
+            return []
+        response = self._create_many_query(expenses_data).execute()
+        return self._created_rows(response, expenses_data)
+
+    def _create_many_query(self, expenses_data: list[dict]):
+        query = self._client.table(self.TABLE).insert(expenses_data, default_to_null=False)
+        return self._returning(query, self.select_columns())
+
+    @staticmethod
+    def _created_rows(response, expenses_data: list[dict]) -> list[dict]:
+        if not response.data or len(response.data) != len(expenses_data):
+            raise RuntimeError("Failed to create expenses")
+        return response.data
+
+    def update(
+        self,
+        expense_id: str,
+        user_id: str,
+        update_data: dict,
+        expected_updated_at: str | None = None,
+    ) -> dict:
         """
         Update an expense by its ID and owner.
 
         Args:
-            expense_id:  UUID of the expense.
-            user_id:     The authenticated user's ID.
-            update_data: Dict of fields to update.
+            expense_id:          UUID of the expense.
+            user_id:             The authenticated user's ID.
+            update_data:         Dict of fields to update.
+            expected_updated_at: If given, only update while updated_at still has
+                                 this value (optimistic concurrency, If-Match).
 
         Returns:
             The updated expense dict returned by the DB.
 
         Raises:
-            NotFoundError: If no matching record was updated.
+            NotFoundError:           If no matching record exists.
+            PreconditionFailedError: If the record changed since expected_updated_at.
         """
-        response = (
-            self._client
-            .table(self.TABLE)
-            .update(update_data)
-            .eq("id", expense_id)
-            .eq("user_id", user_id)
-            .is_("deleted_at", "null")
-            .execute()
-        )
+        query = self._update_query(expense_id, user_id, update_data, expected_updated_at)
+        response = self._returning(query, self.select_columns()).execute()
         if not response.data:
-            raise NotFoundError(f"Expense with id '{expense_id}' not found")
+            self._raise_missing_or_stale(expense_id, user_id, expected_updated_at)
         return response.data[0]
 
-    def delete(self, expense_id: str, user_id: str) -> None:
+    def delete(self, expense_id: str, user_id: str, expected_updated_at: str | None = None) -> None:
         """
         Soft-delete an expense by its ID and owner.
 
-        Calls the DB function soft_delete_expense which sets deleted_at = NOW().
-        Existence is verified AFTER the RPC call to avoid a race condition.
+        One conditional UPDATE ... RETURNING id: the row only changes while it is
+        still active (and, with expected_updated_at, unchanged), so there is no
+        separate existence check and no race between check and write.
 
         Args:
-            expense_id: UUID of the expense.
-            user_id:    The authenticated user's ID.
+            expense_id:          UUID of the expense.
+            user_id:             The authenticated user's ID.
+            expected_updated_at: If given, only delete while updated_at still has this value.
 
         Raises:
-            NotFoundError: If the expense does not exist or is already deleted.
+            NotFoundError:           If the expense does not exist or is already deleted.
+            PreconditionFailedError: If the record changed since expected_updated_at.
         """
-        # Verify existence first — raises NotFoundError if not found
-        self.find_by_id(expense_id, user_id)
-
-        from datetime import datetime, timezone
-        now_str = datetime.now(timezone.utc).isoformat()
+        query = self._update_query(expense_id, user_id, self._soft_delete_values(), expected_updated_at)
+        response = self._returning(query, "id").execute()
+        if not response.data:
+            self._raise_missing_or_stale(expense_id, user_id, expected_updated_at)
 
-        response = (
+    def _update_query(
+        self,
+        expense_id: str,
+        user_id: str,
+        update_data: dict,
+        expected_updated_at: str | None,
+    ):
+        """UPDATE of one active expense of the user, optionally conditional on updated_at."""
+        query = (
             self._client
             .table(self.TABLE)
-            .update({"deleted_at": now_str})
+            .update(update_data)
             .eq("id", expense_id)
             .eq("user_id", user_id)
             .is_("deleted_at", "null")
-            .execute()
         )
+        return self._if_unchanged(query, expected_updated_at)
 
-        if not response.data:
-            raise RuntimeError(f"Soft delete failed for expense '{expense_id}'")
+    @staticmethod
+    def _soft_delete_values() -> dict:
+        return {"deleted_at": datetime.now(timezone.utc).isoformat()}
 
-    # =========================================================================
-    # SUMMARY
-    # =========================================================================
-    def get_summary_all_time(self, user_id: str) -> dict:
-        """Get all-time income/expense summary for a user."""
-        response = (
-            self._client
-            .table(self.VIEW)
-            .select("amount, type")
-            .eq("user_id", user_id)
-            .execute()
-        )
-        income  = float(sum(e["amount"] for e in response.data if e["type"] == "income"))
-        expense = float(sum(e["amount"] for e in response.data if e["type"] == "expense"))
-        return {
-            "total_income":  income,
-            "total_expense": expense,
-            "net_balance":   income - expense,
-        }
+    @classmethod
+    def _if_unchanged(cls, query, expected_updated_at: str | None):
+        """Make a write conditional on updated_at (no-op without a precondition)."""
+        if expected_updated_at is None:
+            return query
+        cls._check_expected_updated_at(expected_updated_at)
+        return query.eq("updated_at", expected_updated_at)
 
-    def get_summary_by_date(self, user_id: str, transaction_date: str) -> dict:
+    @staticmethod
+    def _check_expected_updated_at(expected_updated_at: str) -> None:
+        # Comes from a client header and ends up in a query filter
+        try:
+            datetime.fromisoformat(expected_updated_at)
+        except ValueError:
+            raise PreconditionFailedError("If-Match does not match any version of this expense")
+
+    def _raise_missing_or_stale(self, expense_id: str, user_id: str, expected_updated_at: str | None) -> None:
+        """Explain a conditional write that matched no row (only runs on the failure path)."""
+        if expected_updated_at is None:
+            raise NotFoundError(f"Expense with id '{expense_id}' not found")
+        # Raises NotFoundError when the row is really gone
+        self.find_by_id(expense_id, user_id)
+        raise self._stale_error(expense_id)
+
+    @staticmethod
+    def _stale_error(expense_id: str) -> PreconditionFailedError:
+        return PreconditionFailedError(f"Expense with id '{expense_id}' was modified by another request")
+
+    def update_by_filter(
+        self,
+        user_id: str,
+        update_data: dict,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
         """
-        Get income/expense summary for a user on a specific date.
+        Update every active expense matching the list filters in one UPDATE.
 
         Args:
-            user_id:          The authenticated user's ID.
-            transaction_date: Date string in YYYY-MM-DD format.
+            user_id:     The authenticated user's ID.
+            update_data: Dict of fields to set on every matching row.
+            expense_type, category, q, date_from, date_to: Same semantics as find_page.
 
         Returns:
-            Dict with keys: total_income, total_expense, net_balance.
+            The updated expense dicts (empty if nothing matched).
+        """
+        query = self._update_by_filter_query(
+            user_id, update_data, expense_type, category, q, date_from, date_to,
+        )
+        response = self._returning(query, self.select_columns()).execute()
+        return response.data or []
+
+    def _update_by_filter_query(
+        self,
+        user_id: str,
+        update_data: dict,
+        expense_type: str | None,
+        category: str | None,
+        q: str | None,
+        date_from: str | None,
+        date_to: str | None,
+    ):
+        query = self._client.table(self.TABLE).update(update_data)
+        return self._apply_list_filters(
+            query, user_id, expense_type, category, q, date_from, date_to,
+        ).is_("deleted_at", "null")
+
+    def soft_delete_by_filter(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[str]:
         """
-        response = (
+        Soft-delete every active expense matching the list filters in one UPDATE.
+
+        Returns:
+            IDs of the expenses that were deleted (empty if nothing matched).
+        """
+        query = self._update_by_filter_query(
+            user_id, self._soft_delete_values(), expense_type, category, q, date_from, date_to,
+        )
+        response = self._returning(query, "id").execute()
+        return [str(row["id"]) for row in response.data or []]
+
+    # =========================================================================
+    # DATA VERSION
+    #
+    # expense_data_versions holds one counter per user, bumped by a statement
+    # trigger on expenses (migration 0005). Reading it is a primary-key lookup on
+    # a tiny table, so it can gate conditional GETs without touching expenses.
+    # =========================================================================
+
+    def get_data_version(self, user_id: str) -> int:
+        """Current data version of a user's expenses (0 if they never wrote one)."""
+        return self._data_version(self._data_version_query(user_id).execute())
+
+    def _data_version_query(self, user_id: str):
+        return (
             self._client
-            .table(self.VIEW)
-            .select("amount, type")
+            .table(self.VERSION_TABLE)
+            .select("version")
             .eq("user_id", user_id)
-            .eq("transaction_date", transaction_date)
-            .execute()
+            .maybe_single()
         )
+
+    @staticmethod
+    def _data_version(response) -> int:
+        if response is None or not getattr(response, "data", None):
+            return 0
+        return int(response.data["version"])
+
+    # =========================================================================
+    # SUMMARY
+    #
+    # Aggregation runs in Postgres, so at most one row per type comes back over
+    # PostgREST no matter how many transactions fall inside the range.
+    # Month-aligned ranges read the expense_monthly_rollups table (kept current
+    # by a trigger on expenses); arbitrary date ranges aggregate the raw rows.
+    # See migration 0007 for both functions.
+    # =========================================================================
+
+    @staticmethod
+    def _totals_from_rows(rows: list[dict] | None) -> dict:
+        """Turn [{type, total}, ...] rows into the summary dict."""
         # Cast to float — DB returns NUMERIC as Decimal which breaks JSON serialization
-        income  = float(sum(e["amount"] for e in response.data if e["type"] == "income"))
-        expense = float(sum(e["amount"] for e in response.data if e["type"] == "expense"))
+        totals = {row["type"]: float(row["total"] or 0) for row in rows or []}
+        income  = totals.get("income", 0.0)
+        expense = totals.get("expense", 0.0)
         return {
             "total_income":  income,
             "total_expense": expense,
             "net_balance":   income - expense,
         }
 
-    def get_summary_by_month(self, user_id: str, month: int, year: int) -> dict:
+    def _summarize(
+        self,
+        user_id: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict:
         """
-        Get income/expense summary for a user in a specific month and year.
+        Sum income/expense totals for a user inside an optional date range.
 
         Args:
-            user_id: The authenticated user's ID.
-            month:   Month as integer (1–12).
-            year:    Year as integer (e.g. 2024).
+            user_id:   The authenticated user's ID.
+            date_from: Inclusive start date (YYYY-MM-DD), or None for no bound.
+            date_to:   Inclusive end date (YYYY-MM-DD), or None for no bound.
 
         Returns:
             Dict with keys: total_income, total_expense, net_balance.
         """
-        last_day   = monthrange(year, month)[1]
-        start_date = f"{year}-{month:02d}-01"
-        end_date   = f"{year}-{month:02d}-{last_day}"
+        response = self._summary_rpc(user_id, date_from, date_to).execute()
+        return self._totals_from_rows(response.data)
 
-        response = (
-            self._client
-            .table(self.VIEW)
-            .select("amount, type")
-            .eq("user_id", user_id)
-            .gte("transaction_date", start_date)
-            .lte("transaction_date", end_date)
-            .execute()
+    def _summary_rpc(self, user_id: str, date_from: str | None, date_to: str | None):
+        return self._client.rpc(
+            "get_expense_summary",
+            {
+                "user_id_param":   user_id,
+                "date_from_param": date_from,
+                "date_to_param":   date_to,
+            },
         )
-        # Cast to float — DB returns NUMERIC as Decimal which breaks JSON serialization
-        income  = float(sum(e["amount"] for e in response.data if e["type"] == "income"))
-        expense = float(sum(e["amount"] for e in response.data if e["type"] == "expense"))
-        return {
-            "total_income":  income,
-            "total_expense": expense,
-            "net_balance":   income - expense,
-        }
 
-    def get_summary_by_year(self, user_id: str, year: int) -> dict:
+    def _summarize_months(
+        self,
+        user_id: str,
+        month_from: str | None = None,
+        month_to: str | None = None,
+    ) -> dict:
         """
-        Get income/expense summary for a user in a specific year.
+        Sum income/expense totals from the monthly rollups.
 
         Args:
-            user_id: The authenticated user's ID.
-            year:    Year as integer (e.g. 2024).
+            user_id:    The authenticated user's ID.
+            month_from: First day of the first month (YYYY-MM-01), or None.
+            month_to:   First day of the last month (YYYY-MM-01), or None.
 
         Returns:
             Dict with keys: total_income, total_expense, net_balance.
         """
-        start_date = f"{year}-01-01"
-        end_date   = f"{year}-12-31"
+        response = self._rollup_summary_rpc(user_id, month_from, month_to).execute()
+        return self._totals_from_rows(response.data)
 
-        response = (
-            self._client
-            .table(self.VIEW)
-            .select("amount, type")
-            .eq("user_id", user_id)
-            .gte("transaction_date", start_date)
-            .lte("transaction_date", end_date)
-            .execute()
+    def _rollup_summary_rpc(self, user_id: str, month_from: str | None, month_to: str | None):
+        return self._client.rpc(
+            "get_expense_summary_from_rollups",
+            {
+                "user_id_param":    user_id,
+                "month_from_param": month_from,
+                "month_to_param":   month_to,
+            },
         )
-        # Cast to float — DB returns NUMERIC as Decimal which breaks JSON serialization
-        income  = float(sum(e["amount"] for e in response.data if e["type"] == "income"))
-        expense = float(sum(e["amount"] for e in response.data if e["type"] == "expense"))
-        return {
-            "total_income":  income,
-            "total_expense": expense,
-            "net_balance":   income - expense,
-        }
\ No newline at end of file
+
+    def get_summary_all_time(self, user_id: str) -> dict:
+        """Get all-time income/expense summary for a user."""
+        return self._summarize_months(user_id)
+
+    def get_summary_by_date(self, user_id: str, transaction_date: str) -> dict:
+        """
+        Get income/expense summary for a user on a specific date.
+
+        Args:
+            user_id:          The authenticated user's ID.
+            transaction_date: Date string in YYYY-MM-DD format.
+
+        Returns:
+            Dict with keys: total_income, total_expense, net_balance.
+        """
+        return self._summarize(user_id, date_from=transaction_date, date_to=transaction_date)
+
+    def get_summary_by_month(self, user_id: str, month: int, year: int) -> dict:
+        """
+        Get income/expense summary for a user in a specific month and year.
+
+        Args:
+            user_id: The authenticated user's ID.
+            month:   Month as integer (1–12).
+            year:    Year as integer (e.g. 2024).
+
+        Returns:
+            Dict with keys: total_income, total_expense, net_balance.
+        """
+        month_start = f"{year}-{month:02d}-01"
+        return self._summarize_months(user_id, month_from=month_start, month_to=month_start)
+
+    def get_summary_by_year(self, user_id: str, year: int) -> dict:
+        """
+        Get income/expense summary for a user in a specific year.
+
+        Args:
+            user_id: The authenticated user's ID.
+            year:    Year as integer (e.g. 2024).
+
+        Returns:
+            Dict with keys: total_income, total_expense, net_balance.
+        """
+        return self._summarize_months(user_id, month_from=f"{year}-01-01", month_to=f"{year}-12-01")
+
+    def get_breakdown(
+        self,
+        user_id: str,
+        group_by: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """
+        Total amount per category, subcategory or payment method, grouped in Postgres.
+
+        Args:
+            user_id:      The authenticated user's ID.
+            group_by:     One of BREAKDOWN_GROUPS.
+            expense_type: "income" / "expense", or None for both.
+            date_from:    Inclusive start date (YYYY-MM-DD), or None for no bound.
+            date_to:      Inclusive end date (YYYY-MM-DD), or None for no bound.
+
+        Returns:
+            One dict per group (category, subcategory, payment_method, total, count),
+            largest total first. Columns not part of the grouping are None.
+        """
+        response = self._breakdown_rpc(user_id, group_by, expense_type, date_from, date_to).execute()
+        return self._breakdown_rows(response.data)
+
+    def _breakdown_rpc(
+        self,
+        user_id: str,
+        group_by: str,
+        expense_type: str | None,
+        date_from: str | None,
+        date_to: str | None,
+    ):
+        if group_by not in self.BREAKDOWN_GROUPS:
+            raise ValidationError(f"Invalid breakdown group: {group_by}")
+
+        return self._client.rpc(
+            "get_expense_breakdown",
+            {
+                "user_id_param":   user_id,
+                "group_by_param":  group_by,
+                "type_param":      expense_type,
+                "date_from_param": date_from,
+                "date_to_param":   date_to,
+            },
+        )
+
+    @staticmethod
+    def _breakdown_rows(rows: list[dict] | None) -> list[dict]:
+        return [
+            {**row, "total": float(row.get("total") or 0), "count": int(row.get("count") or 0)}
+            for row in rows or []
+        ]
+
+    def get_timeseries(
+        self,
+        user_id: str,
+        granularity: str,
+        date_from: str,
+        date_to: str,
+    ) -> list[dict]:
+        """
+        Income/expense totals per bucket, zero-filled, in one grouped query.
+
+        Args:
+            user_id:     The authenticated user's ID.
+            granularity: One of TIMESERIES_GRANULARITIES.
+            date_from:   Inclusive start date (YYYY-MM-DD); widened to the start of its bucket.
+            date_to:     Inclusive end date (YYYY-MM-DD); widened to the end of its bucket.
+
+        Returns:
+            One dict per bucket, oldest first, with keys: period, total_income,
+            total_expense, net_balance.
+        """
+        response = self._timeseries_rpc(user_id, granularity, date_from, date_to).execute()
+        return self._timeseries_buckets(response.data)
+
+    def _timeseries_rpc(self, user_id: str, granularity: str, date_from: str, date_to: str):
+        if granularity not in self.TIMESERIES_GRANULARITIES:
+            raise ValidationError(f"Invalid granularity: {granularity}")
+
+        return self._client.rpc(
+            "get_expense_timeseries",
+            {
+                "user_id_param":     user_id,
+                "granularity_param": granularity,
+                "date_from_param":   date_from,
+                "date_to_param":     date_to,
+            },
+        )
+
+    @staticmethod
+    def _timeseries_buckets(rows: list[dict] | None) -> list[dict]:
+        buckets = []
+        for row in rows or []:
+            income = float(row.get("total_income") or 0)
+            expense = float(row.get("total_expense") or 0)
+            buckets.append({
+                "period":        str(row["period"]),
+                "total_income":  income,
+                "total_expense": expense,
+                "net_balance":   income - expense,
+            })
+        return buckets
+
+    # =========================================================================
+    # ROLLUP MAINTENANCE (service role only — see manage_rollups.py)
+    # =========================================================================
+
+    def verify_rollups(self, user_id: str | None = None) -> list[dict]:
+        """
+        Compare expense_monthly_rollups against the raw expenses table.
+
+        Args:
+            user_id: Limit the check to one user, or None for every user.
+
+        Returns:
+            List of mismatching buckets; an empty list means the rollups are consistent.
+        """
+        response = self._client.rpc(
+            "verify_expense_monthly_rollups",
+            {"user_id_param": user_id},
+        ).execute()
+        return response.data or []
+
+    def rebuild_rollups(self, user_id: str | None = None) -> int:
+        """
+        Recompute expense_monthly_rollups from the raw expenses table.
+
+        Args:
+            user_id: Limit the rebuild to one user, or None for every user.
+
+        Returns:
+            Number of rollup buckets written.
+        """
+        response = self._client.rpc(
+            "rebuild_expense_monthly_rollups",
+            {"user_id_param": user_id},
+        ).execute()
+        return int(response.data or 0)
+
+
+class AsyncExpenseRepository(ExpenseRepository):
+    """
+    ExpenseRepository on supabase's AsyncClient.
+
+    Queries are built by the same helpers as the sync repository, so filters,
+    projection, ordering and cursors are identical; only execute() is awaited,
+    which keeps the event loop free while PostgREST answers.
+    """
+
+    def __init__(self, client: AsyncClient):
+        self._client = client
+
+    # =========================================================================
+    # READ
+    # =========================================================================
+
+    async def find_page(
+        self,
+        user_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: str | None = None,
+        count_mode: str = "exact",
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], int | None]:
+        """See ExpenseRepository.find_page."""
+        query = self._page_query(
+            user_id, limit, offset, expense_type, category, q, date_from, date_to,
+            sort_by, sort_order, cursor, count_mode, fields,
+        )
+        return self._page_result(await query.execute(), count_mode)
+
+    async def find_all(
+        self,
+        user_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> list[dict]:
+        """See ExpenseRepository.find_all."""
+        rows, _ = await self.find_page(
+            user_id,
+            limit=limit,
+            offset=offset,
+            expense_type=expense_type,
+            category=category,
+            q=q,
+            date_from=date_from,
+            date_to=date_to,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            count_mode="none",
+            fields=fields,
+        )
+        return rows
+
+    async def search(
+        self,
+        user_id: str,
+        q: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """See ExpenseRepository.search."""
+        response = await self._search_rpc(
+            user_id, q, limit, offset, expense_type, category, date_from, date_to,
+        ).execute()
+        return self._search_result(response.data)
+
+    async def count_all(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> int:
+        """See ExpenseRepository.count_all."""
+        query = self._count_query(user_id, expense_type, category, q, date_from, date_to)
+        return int((await query.execute()).count or 0)
+
+    async def find_by_id(self, expense_id: str, user_id: str) -> dict:
+        """See ExpenseRepository.find_by_id."""
+        try:
+            response = await self._find_by_id_query(expense_id, user_id).execute()
+        except APIError as e:
+            raise NotFoundError(f"Expense with id '{expense_id}' not found") from e
+        return self._found_row(response, expense_id)
+
+    # =========================================================================
+    # WRITE
+    # =========================================================================
+
+    async def create(self, expense_data: dict) -> dict:
+        """See ExpenseRepository.create."""
+        return self._created_row(await self._create_query(expense_data).execute())
+
+    async def create_many(self, expenses_data: list[dict]) -> list[dict]:
+        """See ExpenseRepository.create_many."""
+        if not expenses_data:
+            return []
+        response = await self._create_many_query(expenses_data).execute()
+        return self._created_rows(response, expenses_data)
+
+    async def update(
+        self,
+        expense_id: str,
+        user_id: str,
+        update_data: dict,
+        expected_updated_at: str | None = None,
+    ) -> dict:
+        """See ExpenseRepository.update."""
+        query = self._update_query(expense_id, user_id, update_data, expected_updated_at)
+        response = await self._returning(query, self.select_columns()).execute()
+        if not response.data:
+            await self._raise_missing_or_stale(expense_id, user_id, expected_updated_at)
+        return response.data[0]
+
+    async def delete(self, expense_id: str, user_id: str, expected_updated_at: str | None = None) -> None:
+        """See ExpenseRepository.delete."""
+        query = self._update_query(expense_id, user_id, self._soft_delete_values(), expected_updated_at)
+        response = await self._returning(query, "id").execute()
+        if not response.data:
+            await self._raise_missing_or_stale(expense_id, user_id, expected_updated_at)
+
+    async def _raise_missing_or_stale(self, expense_id: str, user_id: str, expected_updated_at: str | None) -> None:
+        if expected_updated_at is None:
+            raise NotFoundError(f"Expense with id '{expense_id}' not found")
+        await self.find_by_id(expense_id, user_id)
+        raise self._stale_error(expense_id)
+
+    async def update_by_filter(
+        self,
+        user_id: str,
+        update_data: dict,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """See ExpenseRepository.update_by_filter."""
+        query = self._update_by_filter_query(
+            user_id, update_data, expense_type, category, q, date_from, date_to,
+        )
+        response = await self._returning(query, self.select_columns()).execute()
+        return response.data or []
+
+    async def soft_delete_by_filter(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[str]:
+        """See ExpenseRepository.soft_delete_by_filter."""
+        query = self._update_by_filter_query(
+            user_id, self._soft_delete_values(), expense_type, category, q, date_from, date_to,
+        )
+        response = await self._returning(query, "id").execute()
+        return [str(row["id"]) for row in response.data or []]
+
+    # =========================================================================
+    # DATA VERSION / SUMMARY
+    # =========================================================================
+
+    async def get_data_version(self, user_id: str) -> int:
+        """See ExpenseRepository.get_data_version."""
+        return self._data_version(await self._data_version_query(user_id).execute())
+
+    async def _summarize(
+        self,
+        user_id: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict:
+        response = await self._summary_rpc(user_id, date_from, date_to).execute()
+        return self._totals_from_rows(response.data)
+
+    async def _summarize_months(
+        self,
+        user_id: str,
+        month_from: str | None = None,
+        month_to: str | None = None,
+    ) -> dict:
+        response = await self._rollup_summary_rpc(user_id, month_from, month_to).execute()
+        return self._totals_from_rows(response.data)
+
+    async def get_summary_all_time(self, user_id: str) -> dict:
+        """See ExpenseRepository.get_summary_all_time."""
+        return await self._summarize_months(user_id)
+
+    async def get_summary_by_date(self, user_id: str, transaction_date: str) -> dict:
+        """See ExpenseRepository.get_summary_by_date."""
+        return await self._summarize(user_id, date_from=transaction_date, date_to=transaction_date)
+
+    async def get_summary_by_month(self, user_id: str, month: int, year: int) -> dict:
+        """See ExpenseRepository.get_summary_by_month."""
+        month_start = f"{year}-{month:02d}-01"
+        return await self._summarize_months(user_id, month_from=month_start, month_to=month_start)
+
+    async def get_summary_by_year(self, user_id: str, year: int) -> dict:
+        """See ExpenseRepository.get_summary_by_year."""
+        return await self._summarize_months(user_id, month_from=f"{year}-01-01", month_to=f"{year}-12-01")
+
+    async def get_breakdown(
+        self,
+        user_id: str,
+        group_by: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """See ExpenseRepository.get_breakdown."""
+        response = await self._breakdown_rpc(user_id, group_by, expense_type, date_from, date_to).execute()
+        return self._breakdown_rows(response.data)
+
+    async def get_timeseries(
+        self,
+        user_id: str,
+        granularity: str,
+        date_from: str,
+        date_to: str,
+    ) -> list[dict]:
+        """See ExpenseRepository.get_timeseries."""
+        response = await self._timeseries_rpc(user_id, granularity, date_from, date_to).execute()
+        return self._timeseries_buckets(response.data)
+
+    # =========================================================================
+    # ROLLUP MAINTENANCE
+    # =========================================================================
+
+    async def verify_rollups(self, user_id: str | None = None) -> list[dict]:
+        """See ExpenseRepository.verify_rollups."""
+        response = await self._client.rpc(
+            "verify_expense_monthly_rollups",
+            {"user_id_param": user_id},
+        ).execute()
+        return response.data or []
+
+    async def rebuild_rollups(self, user_id: str | None = None) -> int:
+        """See ExpenseRepository.rebuild_rollups."""
+        response = await self._client.rpc(
+            "rebuild_expense_monthly_rollups",
+            {"user_id_param": user_id},
+        ).execute()
+        return int(response.data or 0)
+
+
+class PostgresExpenseRepository(ExpenseRepository):
+    """
+    ExpenseRepository on a pooled direct Postgres connection (REPOSITORY_BACKEND=postgres).
+
+    Each method runs the SQL equivalent of the PostgREST request or rpc call
+    above, so rows, ordering and errors are the same. The connection is not
+    subject to RLS: every statement carries the same explicit user_id
+    predicate the PostgREST queries send. Reads and single-row deletes are
+    prepared statements (see PostgresClient).
+    """
+
+    # Columns a write may set; they end up as identifiers in the SQL
+    WRITE_COLUMNS = (
+        "user_id",
+        "amount",
+        "type",
+        "description",
+        "category",
+        "subcategory",
+        "payment_method",
+        "transaction_date",
+        "updated_at",
+        "deleted_at",
+    )
+
+    # count_mode="estimated": exact count while the planner expects at most
+    # this many rows, the estimate above it (PostgREST does the same with db-max-rows)
+    ESTIMATED_COUNT_EXACT_LIMIT = 1000
+
+    def __init__(self, client: PostgresClient):
+        self._client = client
+
+    @staticmethod
+    def _bind(params: list, value) -> str:
+        """Append a parameter and return its $n placeholder."""
+        params.append(value)
+        return f"${len(params)}"
+
+    @classmethod
+    def _write_columns(cls, data: dict) -> list[str]:
+        unknown = sorted(set(data) - set(cls.WRITE_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown expense columns: {', '.join(unknown)}")
+        return [column for column in cls.WRITE_COLUMNS if column in data]
+
+    def _list_conditions(
+        self,
+        params: list,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[str]:
+        """SQL version of _apply_list_filters."""
+        conditions = [f"user_id = {self._bind(params, user_id)}"]
+
+        if expense_type:
+            conditions.append(f"type = {self._bind(params, expense_type)}")
+
+        if category:
+            conditions.append(f"category ILIKE {self._bind(params, f'%{category.strip().lower()}%')}")
+
+        if q:
+            keyword = q.strip().lower().replace(",", " ")
+            if keyword:
+                pattern = self._bind(params, f"%{keyword}%")
+                conditions.append(
+                    f"(description ILIKE {pattern} OR category ILIKE {pattern} OR subcategory ILIKE {pattern})"
+                )
+
+        if date_from:
+            conditions.append(f"transaction_date >= {self._bind(params, date_from)}")
+
+        if date_to:
+            conditions.append(f"transaction_date <= {self._bind(params, date_to)}")
+
+        return conditions
+
+    def _seek_and_order(
+        self,
+        params: list,
+        sort_by: str,
+        sort_order: str,
+        cursor: str | None,
+    ) -> tuple[list[str], str]:
+        """SQL version of _order_and_seek: (seek conditions, ORDER BY clause)."""
+        column = self._sort_column(sort_by)
+        is_desc = sort_order != "asc"
+        conditions = []
+
+        if cursor:
+            position = self.decode_cursor(cursor, sort_by, sort_order)
+            op = "<" if is_desc else ">"
+            last_id = self._bind(params, position["id"])
+
+            # NULL sort values rank below every value: last for desc, first for asc
+            if position["value"] is None:
+                seek = f"({column} IS NULL AND id {op} {last_id})"
+                if not is_desc:
+                    seek += f" OR {column} IS NOT NULL"
+                conditions.append(f"({seek})")
+            else:
+                value = self._bind(params, position["value"])
+                seek = f"{column} {op} {value} OR ({column} = {value} AND id {op} {last_id})"
+                if is_desc and column in self.NULLABLE_SORT_COLUMNS:
+                    seek += f" OR {column} IS NULL"
+                conditions.append(f"({seek})")
+
+        direction = "DESC" if is_desc else "ASC"
+        nulls = ""
+        if column in self.NULLABLE_SORT_COLUMNS:
+            nulls = " NULLS LAST" if is_desc else " NULLS FIRST"
+        return conditions, f"ORDER BY {column} {direction}{nulls}, id {direction}"
+
+    # =========================================================================
+    # READ
+    # =========================================================================
+
+    def find_page(
+        self,
+        user_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: str | None = None,
+        count_mode: str = "exact",
+        fields: list[str] | None = None,
+    ) -> tuple[list[dict], int | None]:
+        """See ExpenseRepository.find_page; the count runs on the same connection."""
+        if count_mode not in self.COUNT_MODES:
+            raise ValidationError(f"count_mode must be one of: {', '.join(self.COUNT_MODES)}")
+
+        params: list = []
+        conditions = self._list_conditions(params, user_id, expense_type, category, q, date_from, date_to)
+        seek, order_by = self._seek_and_order(params, sort_by, sort_order, cursor)
+        where = " AND ".join(conditions + seek)
+
+        page_params = list(params)
+        sql = (
+            f"SELECT {self.select_columns(fields, sort_by)} FROM {self.VIEW} "
+            f"WHERE {where} {order_by} LIMIT {self._bind(page_params, limit)}"
+        )
+        if not cursor:
+            sql += f" OFFSET {self._bind(page_params, offset)}"
+
+        with self._client.session() as session:
+            rows = session.execute(sql, page_params, prepared=True)
+            total = self._count(session, where, params, count_mode)
+        return rows, total
+
+    def _count(self, session, where: str, params: list, count_mode: str) -> int | None:
+        if count_mode == "none":
+            return None
+
+        if count_mode != "exact":
+            plan = session.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {self.VIEW} WHERE {where}", params)
+            planned = int(plan[0]["QUERY PLAN"][0]["Plan"]["Plan Rows"])
+            if count_mode == "planned" or planned > self.ESTIMATED_COUNT_EXACT_LIMIT:
+                return planned
+
+        sql = f"SELECT count(*) AS count FROM {self.VIEW} WHERE {where}"
+        return int(session.execute(sql, params, prepared=True)[0]["count"])
+
+    def search(
+        self,
+        user_id: str,
+        q: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> tuple[list[dict], int]:
+        """See ExpenseRepository.search."""
+        rows = self._client.fetch_all(
+            "SELECT * FROM search_expenses("
+            "$1::uuid, $2::text, $3::varchar, $4::text, $5::date, $6::date, $7::int, $8::int)",
+            [
+                user_id,
+                q,
+                expense_type,
+                category.strip().lower() if category else None,
+                date_from,
+                date_to,
+                limit,
+                offset,
+            ],
+            prepared=True,
+        )
+        return self._search_result(rows)
+
+    def count_all(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> int:
+        """See ExpenseRepository.count_all."""
+        params: list = []
+        conditions = self._list_conditions(params, user_id, expense_type, category, q, date_from, date_to)
+        with self._client.session() as session:
+            return self._count(session, " AND ".join(conditions), params, "exact")
+
+    def find_by_id(self, expense_id: str, user_id: str) -> dict:
+        """See ExpenseRepository.find_by_id."""
+        try:
+            row = self._client.fetch_one(
+                f"SELECT {self.select_columns()} FROM {self.VIEW} WHERE id = $1 AND user_id = $2",
+                [expense_id, user_id],
+                prepared=True,
+            )
+        except DataError as e:
+            # Malformed UUID — same answer as PostgREST's 400
+            raise NotFoundError(f"Expense with id '{expense_id}' not found") from e
+        if row is None:
+            raise NotFoundError(f"Expense with id '{expense_id}' not found")
+        return row
+
+    # =========================================================================
+    # WRITE
+    # =========================================================================
+
+    def create(self, expense_data: dict) -> dict:
+        """See ExpenseRepository.create."""
+        rows = self._insert([expense_data])
+        if not rows:
+            raise RuntimeError("Failed to create expense")
+        return rows[0]
+
+    def create_many(self, expenses_data: list[dict]) -> list[dict]:
+        """See ExpenseRepository.create_many."""
+        if not expenses_data:
+            return []
+        rows = self._insert(expenses_data)
+        if len(rows) != len(expenses_data):
+            raise RuntimeError("Failed to create expenses")
+        return rows
+
+    def _insert(self, expenses_data: list[dict]) -> list[dict]:
+        """One multi-row INSERT; a column missing from a row gets its DB default."""
+        columns = self._write_columns(dict.fromkeys(set().union(*expenses_data)))
+        params: list = []
+        values = ", ".join(
+            "(" + ", ".join(
+                self._bind(params, row[column]) if column in row else "DEFAULT"
+                for column in columns
+            ) + ")"
+            for row in expenses_data
+        )
+        sql = (
+            f"INSERT INTO {self.TABLE} ({', '.join(columns)}) VALUES {values} "
+            f"RETURNING {self.select_columns()}"
+        )
+        return self._client.fetch_all(sql, params)
+
+    def _update_active(
+        self,
+        params: list,
+        conditions: list[str],
+        update_data: dict,
+        returning: str,
+        prepared: bool = False,
+    ) -> list[dict]:
+        """UPDATE active expenses matching conditions (already bound into params)."""
+        assignments = ", ".join(
+            f"{column} = {self._bind(params, update_data[column])}"
+            for column in self._write_columns(update_data)
+        )
+        where = " AND ".join(conditions + ["deleted_at IS NULL"])
+        sql = f"UPDATE {self.TABLE} SET {assignments} WHERE {where} RETURNING {returning}"
+        return self._client.fetch_all(sql, params, prepared=prepared)
+
+    def _update_one(
+        self,
+        expense_id: str,
+        user_id: str,
+        update_data: dict,
+        expected_updated_at: str | None,
+        returning: str,
+        prepared: bool = False,
+    ) -> list[dict]:
+        """SQL version of _update_query: one active expense of the user."""
+        params: list = []
+        conditions = [f"id = {self._bind(params, expense_id)}", f"user_id = {self._bind(params, user_id)}"]
+        if expected_updated_at is not None:
+            self._check_expected_updated_at(expected_updated_at)
+            conditions.append(f"updated_at = {self._bind(params, expected_updated_at)}")
+        try:
+            return self._update_active(params, conditions, update_data, returning, prepared)
+        except DataError as e:
+            raise NotFoundError(f"Expense with id '{expense_id}' not found") from e
+
+    def update(
+        self,
+        expense_id: str,
+        user_id: str,
+        update_data: dict,
+        expected_updated_at: str | None = None,
+    ) -> dict:
+        """See ExpenseRepository.update."""
+        rows = self._update_one(expense_id, user_id, update_data, expected_updated_at, self.select_columns())
+        if not rows:
+            self._raise_missing_or_stale(expense_id, user_id, expected_updated_at)
+        return rows[0]
+
+    def delete(self, expense_id: str, user_id: str, expected_updated_at: str | None = None) -> None:
+        """See ExpenseRepository.delete."""
+        rows = self._update_one(
+            expense_id, user_id, self._soft_delete_values(), expected_updated_at, "id", prepared=True,
+        )
+        if not rows:
+            self._raise_missing_or_stale(expense_id, user_id, expected_updated_at)
+
+    def update_by_filter(
+        self,
+        user_id: str,
+        update_data: dict,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """See ExpenseRepository.update_by_filter."""
+        params: list = []
+        conditions = self._list_conditions(params, user_id, expense_type, category, q, date_from, date_to)
+        return self._update_active(params, conditions, update_data, self.select_columns())
+
+    def soft_delete_by_filter(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[str]:
+        """See ExpenseRepository.soft_delete_by_filter."""
+        params: list = []
+        conditions = self._list_conditions(params, user_id, expense_type, category, q, date_from, date_to)
+        rows = self._update_active(params, conditions, self._soft_delete_values(), "id")
+        return [row["id"] for row in rows]
+
+    # =========================================================================
+    # DATA VERSION, SUMMARY, BREAKDOWN, TIMESERIES
+    #
+    # Same SQL functions the rpc calls above use (migration 0007).
+    # =========================================================================
+
+    def get_data_version(self, user_id: str) -> int:
+        """See ExpenseRepository.get_data_version."""
+        row = self._client.fetch_one(
+            f"SELECT version FROM {self.VERSION_TABLE} WHERE user_id = $1", [user_id], prepared=True,
+        )
+        return int(row["version"]) if row else 0
+
+    def _summarize(
+        self,
+        user_id: str,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> dict:
+        """See ExpenseRepository._summarize."""
+        rows = self._client.fetch_all(
+            "SELECT type, total FROM get_expense_summary($1::uuid, $2::date, $3::date)",
+            [user_id, date_from, date_to],
+            prepared=True,
+        )
+        return self._totals_from_rows(rows)
+
+    def _summarize_months(
+        self,
+        user_id: str,
+        month_from: str | None = None,
+        month_to: str | None = None,
+    ) -> dict:
+        """See ExpenseRepository._summarize_months."""
+        rows = self._client.fetch_all(
+            "SELECT type, total FROM get_expense_summary_from_rollups($1::uuid, $2::date, $3::date)",
+            [user_id, month_from, month_to],
+            prepared=True,
+        )
+        return self._totals_from_rows(rows)
+
+    def get_breakdown(
+        self,
+        user_id: str,
+        group_by: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[dict]:
+        """See ExpenseRepository.get_breakdown."""
+        if group_by not in self.BREAKDOWN_GROUPS:
+            raise ValidationError(f"Invalid breakdown group: {group_by}")
+
+        rows = self._client.fetch_all(
+            "SELECT * FROM get_expense_breakdown($1::uuid, $2::text, $3::varchar, $4::date, $5::date)",
+            [user_id, group_by, expense_type, date_from, date_to],
+            prepared=True,
+        )
+        return self._breakdown_rows(rows)
+
+    def get_timeseries(
+        self,
+        user_id: str,
+        granularity: str,
+        date_from: str,
+        date_to: str,
+    ) -> list[dict]:
+        """See ExpenseRepository.get_timeseries."""
+        if granularity not in self.TIMESERIES_GRANULARITIES:
+            raise ValidationError(f"Invalid granularity: {granularity}")
+
+        rows = self._client.fetch_all(
+            "SELECT * FROM get_expense_timeseries($1::uuid, $2::text, $3::date, $4::date)",
+            [user_id, granularity, date_from, date_to],
+            prepared=True,
+        )
+        return self._timeseries_buckets(rows)
+
+    # =========================================================================
+    # ROLLUP MAINTENANCE
+    # =========================================================================
+
+    def verify_rollups(self, user_id: str | None = None) -> list[dict]:
+        """See ExpenseRepository.verify_rollups."""
+        return self._client.fetch_all("SELECT * FROM verify_expense_monthly_rollups($1::uuid)", [user_id])
+
+    def rebuild_rollups(self, user_id: str | None = None) -> int:
+        """See ExpenseRepository.rebuild_rollups."""
+        row = self._client.fetch_one("SELECT rebuild_expense_monthly_rollups($1::uuid) AS written", [user_id])
+        return int(row["written"] or 0)
+
+
+class AsyncPostgresExpenseRepository(AsyncExpenseRepository):
+    """
+    PostgresExpenseRepository for the async services.
+
+    psycopg2 blocks, so every call runs in a worker thread; the pool holds
+    the connections, so a thread only waits for its own query.
+    """
+
+    def __init__(self, client: PostgresClient):
+        self._client = client
+        self._repo = PostgresExpenseRepository(client)
+
+    @staticmethod
+    async def _in_thread(method, *args, **kwargs):
+        return await anyio.to_thread.run_sync(partial(method, *args, **kwargs))
+
+    async def find_page(self, *args, **kwargs) -> tuple[list[dict], int | None]:
+        """See ExpenseRepository.find_page."""
+        return await self._in_thread(self._repo.find_page, *args, **kwargs)
+
+    async def search(self, *args, **kwargs) -> tuple[list[dict], int]:
+        """See ExpenseRepository.search."""
+        return await self._in_thread(self._repo.search, *args, **kwargs)
+
+    async def count_all(self, *args, **kwargs) -> int:
+        """See ExpenseRepository.count_all."""
+        return await self._in_thread(self._repo.count_all, *args, **kwargs)
+
+    async def find_by_id(self, expense_id: str, user_id: str) -> dict:
+        """See ExpenseRepository.find_by_id."""
+        return await self._in_thread(self._repo.find_by_id, expense_id, user_id)
+
+    async def create(self, expense_data: dict) -> dict:
+        """See ExpenseRepository.create."""
+        return await self._in_thread(self._repo.create, expense_data)
+
+    async def create_many(self, expenses_data: list[dict]) -> list[dict]:
+        """See ExpenseRepository.create_many."""
+        return await self._in_thread(self._repo.create_many, expenses_data)
+
+    async def update(self, *args, **kwargs) -> dict:
+        """See ExpenseRepository.update."""
+        return await self._in_thread(self._repo.update, *args, **kwargs)
+
+    async def delete(self, *args, **kwargs) -> None:
+        """See ExpenseRepository.delete."""
+        return await self._in_thread(self._repo.delete, *args, **kwargs)
+
+    async def update_by_filter(self, *args, **kwargs) -> list[dict]:
+        """See ExpenseRepository.update_by_filter."""
+        return await self._in_thread(self._repo.update_by_filter, *args, **kwargs)
+
+    async def soft_delete_by_filter(self, *args, **kwargs) -> list[str]:
+        """See ExpenseRepository.soft_delete_by_filter."""
+        return await self._in_thread(self._repo.soft_delete_by_filter, *args, **kwargs)
+
+    async def get_data_version(self, user_id: str) -> int:
+        """See ExpenseRepository.get_data_version."""
+        return await self._in_thread(self._repo.get_data_version, user_id)
+
+    async def _summarize(self, *args, **kwargs) -> dict:
+        return await self._in_thread(self._repo._summarize, *args, **kwargs)
+
+    async def _summarize_months(self, *args, **kwargs) -> dict:
+        return await self._in_thread(self._repo._summarize_months, *args, **kwargs)
+
+    async def get_breakdown(self, *args, **kwargs) -> list[dict]:
+        """See ExpenseRepository.get_breakdown."""
+        return await self._in_thread(self._repo.get_breakdown, *args, **kwargs)
+
+    async def get_timeseries(self, *args, **kwargs) -> list[dict]:
+        """See ExpenseRepository.get_timeseries."""
+        return await self._in_thread(self._repo.get_timeseries, *args, **kwargs)
+
+    async def verify_rollups(self, user_id: str | None = None) -> list[dict]:
+        """See ExpenseRepository.verify_rollups."""
+        return await self._in_thread(self._repo.verify_rollups, user_id)
+
+    async def rebuild_rollups(self, user_id: str | None = None) -> int:
+        """See ExpenseRepository.rebuild_rollups."""
+        return await self._in_thread(self._repo.rebuild_rollups, user_id)
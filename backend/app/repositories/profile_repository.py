@@ -1,7 +1,12 @@
+from functools import partial
 from typing import Optional
+
+import anyio
+from psycopg2 import DataError
 from supabase import Client
 
 from app.core.exceptions import NotFoundError, TelegramAlreadyLinkedError
+from app.infrastructure.postgres_client import PostgresClient
 
 class ProfileRepository:
     """
@@ -23,21 +28,25 @@ class ProfileRepository:
             NotFoundError: if profile not found
         """
         try:
-            response = (
-                self._client
-                .table(self.TABLE)
-                .select("*")
-                .eq("id", user_id)
-                .single()
-                .execute()
-            )
-            if not response.data:
-                raise NotFoundError(f"Profile for user '{user_id}' not found")
-            return response.data
-        except Exception as e:
-            if "NotFoundError" in type(e).__name__:
-                raise
+            response = self._find_by_user_id_query(user_id).execute()
+        except Exception:
+            raise NotFoundError(f"Profile for user '{user_id}' not found")
+        return self._profile_row(response, user_id)
+
+    def _find_by_user_id_query(self, user_id: str):
+        return (
+            self._client
+            .table(self.TABLE)
+            .select("*")
+            .eq("id", user_id)
+            .single()
+        )
+
+    @staticmethod
+    def _profile_row(response, user_id: str) -> dict:
+        if not response.data:
             raise NotFoundError(f"Profile for user '{user_id}' not found")
+        return response.data
     
     def find_by_telegram_id(self, telegram_chat_id: int) -> Optional[dict]:
         """
@@ -47,27 +56,24 @@ class ProfileRepository:
         returns:
             dict: profile data if found None: if not found
         """
-        response = (
-            self._client
-            .table(self.TABLE)
-            .select("*")
-            .eq("telegram_chat_id", telegram_chat_id)
-            .execute()
-        )
+        response = self._find_by_query("telegram_chat_id", telegram_chat_id).execute()
         return response.data[0] if response.data else None
+
+    def _find_by_query(self, column: str, value):
+        return self._client.table(self.TABLE).select("*").eq(column, value)
     
     def update(self, user_id: str, update_data: dict) -> dict:
         """
         update profile data by user_id.
         """
-        response = (
-            self._client
-            .table(self.TABLE)
-            .update(update_data)
-            .eq("id", user_id)
-            .execute()
-        )
+        response = self._update_query(user_id, update_data).execute()
+        return self._updated_row(response, user_id)
 
+    def _update_query(self, user_id: str, update_data: dict):
+        return self._client.table(self.TABLE).update(update_data).eq("id", user_id)
+
+    @staticmethod
+    def _updated_row(response, user_id: str) -> dict:
         if not response.data:
             raise NotFoundError(f"Profile for user '{user_id}' not found")
         return response.data[0]
@@ -79,9 +85,14 @@ class ProfileRepository:
         try:
             return self.update(user_id, {"telegram_chat_id": telegram_chat_id})
         except Exception as e:
-            if "23505" in str(e) or "unique" in str(e).lower():
-                raise TelegramAlreadyLinkedError("This Telegram account is already linked to another profile")
+            self._raise_if_already_linked(e)
             raise 
+
+    @staticmethod
+    def _raise_if_already_linked(error: Exception) -> None:
+        """Map a unique violation on telegram_chat_id to TelegramAlreadyLinkedError."""
+        if "23505" in str(error) or "unique" in str(error).lower():
+            raise TelegramAlreadyLinkedError("This Telegram account is already linked to another profile")
     
     def unlink_telegram(self, user_id: str) -> dict:
         """
@@ -118,13 +129,7 @@ class ProfileRepository:
         returns:
             dict: profile data if found None: if not found
         """
-        response = (
-            self._client
-            .table(self.TABLE)
-            .select("*")
-            .eq("connect_code", code)
-            .execute()
-        )
+        response = self._find_by_query("connect_code", code).execute()
         return response.data[0] if response.data else None
     
     def consume_connect_code(self, user_id: str, telegram_chat_id: int) -> dict:
@@ -139,6 +144,167 @@ class ProfileRepository:
                 "connect_code_expires_at": None
             })
         except Exception as e:
-            if "23505" in str(e) or "unique" in str(e).lower():
-                raise TelegramAlreadyLinkedError("This Telegram account is already linked to another profile")
-            raise
\ No newline at end of file
+            self._raise_if_already_linked(e)
+            raise
+
+
+class AsyncProfileRepository(ProfileRepository):
+    """ProfileRepository on supabase's AsyncClient; same queries, awaited."""
+
+    async def find_by_user_id(self, user_id: str) -> dict:
+        """take profile data by user_id (UUID Supabase)."""
+        try:
+            response = await self._find_by_user_id_query(user_id).execute()
+        except Exception:
+            raise NotFoundError(f"Profile for user '{user_id}' not found")
+        return self._profile_row(response, user_id)
+
+    async def find_by_telegram_id(self, telegram_chat_id: int) -> Optional[dict]:
+        """find profile by telegram_chat_id, if not found return None."""
+        response = await self._find_by_query("telegram_chat_id", telegram_chat_id).execute()
+        return response.data[0] if response.data else None
+
+    async def update(self, user_id: str, update_data: dict) -> dict:
+        """update profile data by user_id."""
+        response = await self._update_query(user_id, update_data).execute()
+        return self._updated_row(response, user_id)
+
+    async def link_telegram(self, user_id: str, telegram_chat_id: int) -> dict:
+        """link Telegram account to user profile by updating telegram_chat_id field."""
+        try:
+            return await self.update(user_id, {"telegram_chat_id": telegram_chat_id})
+        except Exception as e:
+            self._raise_if_already_linked(e)
+            raise
+
+    async def unlink_telegram(self, user_id: str) -> dict:
+        """unlink Telegram account from user profile by setting telegram_chat_id to None."""
+        return await self.update(user_id, {"telegram_chat_id": None})
+
+    async def save_connect_code(self, user_id: str, code: str, expires_at: str) -> dict:
+        """save one time code to profile user, replacing the previous one."""
+        return await self.update(user_id, {
+            "connect_code": code,
+            "connect_code_expires_at": expires_at
+        })
+
+    async def find_by_connect_code(self, code: str) -> Optional[dict]:
+        """find profile by connect code, if not found return None."""
+        response = await self._find_by_query("connect_code", code).execute()
+        return response.data[0] if response.data else None
+
+    async def consume_connect_code(self, user_id: str, telegram_chat_id: int) -> dict:
+        """link the Telegram account and invalidate the connect code in one update."""
+        try:
+            return await self.update(user_id, {
+                "telegram_chat_id": telegram_chat_id,
+                "connect_code": None,
+                "connect_code_expires_at": None
+            })
+        except Exception as e:
+            self._raise_if_already_linked(e)
+            raise
+
+
+class PostgresProfileRepository(ProfileRepository):
+    """
+    ProfileRepository on a pooled direct Postgres connection (REPOSITORY_BACKEND=postgres).
+
+    Not subject to RLS: every statement is scoped by the profile id
+    (= user_id) or the lookup column, like the PostgREST queries above.
+    Lookups are prepared statements.
+    """
+
+    # Columns an update may set; they end up as identifiers in the SQL
+    WRITE_COLUMNS = (
+        "display_name",
+        "bio",
+        "avatar_url",
+        "telegram_chat_id",
+        "connect_code",
+        "connect_code_expires_at",
+        "updated_at",
+    )
+
+    # Lookup columns of find_by_telegram_id / find_by_connect_code
+    LOOKUP_COLUMNS = ("telegram_chat_id", "connect_code")
+
+    def __init__(self, client: PostgresClient):
+        self.client = client
+        self._client = client
+
+    def find_by_user_id(self, user_id: str) -> dict:
+        """take profile data by user_id (UUID Supabase)."""
+        try:
+            row = self._client.fetch_one(f"SELECT * FROM {self.TABLE} WHERE id = $1", [user_id], prepared=True)
+        except DataError:
+            raise NotFoundError(f"Profile for user '{user_id}' not found")
+        if row is None:
+            raise NotFoundError(f"Profile for user '{user_id}' not found")
+        return row
+
+    def _find_by(self, column: str, value) -> Optional[dict]:
+        if column not in self.LOOKUP_COLUMNS:
+            raise ValueError(f"Unknown profile lookup column: {column}")
+        return self._client.fetch_one(
+            f"SELECT * FROM {self.TABLE} WHERE {column} = $1 LIMIT 1", [value], prepared=True,
+        )
+
+    def find_by_telegram_id(self, telegram_chat_id: int) -> Optional[dict]:
+        """find profile by telegram_chat_id, if not found return None."""
+        return self._find_by("telegram_chat_id", telegram_chat_id)
+
+    def find_by_connect_code(self, code: str) -> Optional[dict]:
+        """find profile by connect code, if not found return None."""
+        return self._find_by("connect_code", code)
+
+    def update(self, user_id: str, update_data: dict) -> dict:
+        """update profile data by user_id."""
+        unknown = sorted(set(update_data) - set(self.WRITE_COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown profile columns: {', '.join(unknown)}")
+
+        params: list = [user_id]
+        assignments = []
+        for column in self.WRITE_COLUMNS:
+            if column in update_data:
+                params.append(update_data[column])
+                assignments.append(f"{column} = ${len(params)}")
+        try:
+            row = self._client.fetch_one(
+                f"UPDATE {self.TABLE} SET {', '.join(assignments)} WHERE id = $1 RETURNING *", params,
+            )
+        except DataError:
+            raise NotFoundError(f"Profile for user '{user_id}' not found")
+        if row is None:
+            raise NotFoundError(f"Profile for user '{user_id}' not found")
+        return row
+
+
+class AsyncPostgresProfileRepository(AsyncProfileRepository):
+    """PostgresProfileRepository for the async services; each call runs in a worker thread."""
+
+    def __init__(self, client: PostgresClient):
+        self.client = client
+        self._client = client
+        self._repo = PostgresProfileRepository(client)
+
+    @staticmethod
+    async def _in_thread(method, *args):
+        return await anyio.to_thread.run_sync(partial(method, *args))
+
+    async def find_by_user_id(self, user_id: str) -> dict:
+        """take profile data by user_id (UUID Supabase)."""
+        return await self._in_thread(self._repo.find_by_user_id, user_id)
+
+    async def find_by_telegram_id(self, telegram_chat_id: int) -> Optional[dict]:
+        """find profile by telegram_chat_id, if not found return None."""
+        return await self._in_thread(self._repo.find_by_telegram_id, telegram_chat_id)
+
+    async def find_by_connect_code(self, code: str) -> Optional[dict]:
+        """find profile by connect code, if not found return None."""
+        return await self._in_thread(self._repo.find_by_connect_code, code)
+
+    async def update(self, user_id: str, update_data: dict) -> dict:
+        """update profile data by user_id."""
+        return await self._in_thread(self._repo.update, user_id, update_data)
@@ -2,12 +2,12 @@ import json
 import logging
 from datetime import datetime, timezone
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from app.services.ai_tools import ToolDispatcher, TOOLS
-from app.services.embedding_services import EmbeddingService
-from app.repositories.ai_repository import AIRepository
-from app.services.expense_service import ExpenseService
+from app.services.ai_tools import AsyncToolDispatcher, ToolDispatcher, TOOLS
+from app.services.embedding_services import AsyncEmbeddingService, EmbeddingService
+from app.repositories.ai_repository import AIRepository, AsyncAIRepository
+from app.services.expense_service import AsyncExpenseService, ExpenseService
 from app.models.ai import (
     ChatResponse, ConversationMessage,
     SearchResultItem, SemanticSearchResponse,
@@ -47,6 +47,7 @@ Daftar tool yang tersedia dan kapan dipakai:
 - get_monthly_summary: saat user minta ringkasan bulan tertentu.
 - get_yearly_summary: saat user minta ringkasan tahun tertentu.
 - get_all_time_summary: saat user minta ringkasan seluruh waktu.
+- get_expense_breakdown: saat user tanya total per kategori/subkategori/metode pembayaran.
 
 Aturan data penting:
 - Format tanggal yang valid untuk input transaksi: YYYY-MM-DD.
@@ -70,6 +71,10 @@ Jika tidak perlu tool:
 
 class AIService:
     """Orchestrates AI-related operations, including chat interactions and semantic search."""
+
+    # Model round trips per chat message before giving up on a tool loop
+    MAX_TOOL_ITERATIONS = 10
+
     def __init__(
         self,
         openai_client: OpenAI,
@@ -98,6 +103,15 @@ class AIService:
             user_id=user_id
         )
         final_reply, actions_taken = self._run_chat_loop(messages, dispatcher)
+        return self._chat_response(conversation_history, message, final_reply, actions_taken)
+
+    @staticmethod
+    def _chat_response(
+        conversation_history: list[ConversationMessage],
+        message: str,
+        final_reply: str,
+        actions_taken: list[str],
+    ) -> ChatResponse:
         updated_history = list(conversation_history) + [
             ConversationMessage(role="user", content=message),
             ConversationMessage(role="assistant", content=final_reply),
@@ -227,56 +241,70 @@ class AIService:
             Tuple (final_reply_text, list_of_actions_taken)
         """
         actions_taken: list[str] = []
-        MAX_ITERATIONS = 10
-        tools = self._normalize_tools_for_responses(TOOLS)
+        tools = RESPONSES_TOOLS
 
-        response = self._openai_client.responses.create(
-            model=self.settings.OPENAI_CHAT_MODEL,
-            input=messages,
-            tools=tools,
-            tool_choice="auto",
-        )
+        response = self._openai_client.responses.create(**self._first_request(messages, tools))
 
-        for _ in range(MAX_ITERATIONS):
+        for _ in range(self.MAX_TOOL_ITERATIONS):
             tool_calls = self._extract_tool_calls_from_response(response)
 
             if not tool_calls:
-                final_reply = self._extract_text_from_response(response)
-                if final_reply:
-                    return final_reply, actions_taken
-
-                logger.warning("Responses API returned no tool call and no text output")
-                return "Maaf, saya belum bisa memproses permintaan ini.", actions_taken
+                return self._final_reply(response), actions_taken
 
             tool_outputs = []
             for tool_call in tool_calls:
                 func_name = tool_call["name"]
                 func_args = tool_call["arguments"]
-                call_id = tool_call["call_id"]
 
                 logger.info("AI calling tool: %s(%s...)", func_name, func_args[:100])
 
                 result = dispatcher.execute(func_name, func_args)
                 actions_taken.append(func_name)
-                tool_outputs.append(
-                    {
-                        "type": "function_call_output",
-                        "call_id": call_id,
-                        "output": json.dumps(result, ensure_ascii=False),
-                    }
-                )
+                tool_outputs.append(self._tool_output(tool_call["call_id"], result))
 
             response = self._openai_client.responses.create(
-                model=self.settings.OPENAI_CHAT_MODEL,
-                previous_response_id=response.id,
-                input=tool_outputs,
-                tools=tools,
-                tool_choice="auto",
+                **self._follow_up_request(response, tool_outputs, tools)
             )
 
         logger.error("Chat loop exceeded maximum iterations without finishing.")
         return "Sorry, there was an error processing your request.", actions_taken
 
+    def _first_request(self, messages: list[dict], tools: list[dict]) -> dict:
+        """Arguments of responses.create for the first turn."""
+        return dict(
+            model=self.settings.OPENAI_CHAT_MODEL,
+            input=messages,
+            tools=tools,
+            tool_choice="auto",
+        )
+
+    def _follow_up_request(self, response, tool_outputs: list[dict], tools: list[dict]) -> dict:
+        """Arguments of responses.create that send tool results back to the model."""
+        return dict(
+            model=self.settings.OPENAI_CHAT_MODEL,
+            previous_response_id=response.id,
+            input=tool_outputs,
+            tools=tools,
+            tool_choice="auto",
+        )
+
+    @staticmethod
+    def _tool_output(call_id: str, result: dict) -> dict:
+        return {
+            "type": "function_call_output",
+            "call_id": call_id,
+            "output": json.dumps(result, ensure_ascii=False),
+        }
+
+    def _final_reply(self, response) -> str:
+        """Assistant text of a response without tool calls, or a fallback message."""
+        final_reply = self._extract_text_from_response(response)
+        if final_reply:
+            return final_reply
+
+        logger.warning("Responses API returned no tool call and no text output")
+        return "Maaf, saya belum bisa memproses permintaan ini."
+
     # use case 2: semantic search
 
     def search(
@@ -298,7 +326,10 @@ class AIService:
             match_threshold=match_threshold,
             match_count=match_count,
         )
+        return self._search_response(query, raw_results)
 
+    @staticmethod
+    def _search_response(query: str, raw_results: list[dict]) -> SemanticSearchResponse:
         results = [
             SearchResultItem(
                 id=item["id"],
@@ -318,4 +349,99 @@ class AIService:
             query=query,
             results=results,
             total=len(results),
-        )
\ No newline at end of file
+        )
+
+
+# Tool schemas in Responses API form, converted once per process
+RESPONSES_TOOLS = AIService._normalize_tools_for_responses(TOOLS)
+
+
+class AsyncAIService(AIService):
+    """
+    AIService on AsyncOpenAI and the async services.
+
+    A chat message can take several model round trips plus tool calls;
+    awaiting them keeps one long conversation from holding the event loop.
+    """
+
+    def __init__(
+        self,
+        openai_client: AsyncOpenAI,
+        expense_service: AsyncExpenseService,
+        embedding_service: AsyncEmbeddingService,
+        ai_repo: AsyncAIRepository,
+    ):
+        super().__init__(
+            openai_client=openai_client,
+            expense_service=expense_service,
+            embedding_service=embedding_service,
+            ai_repo=ai_repo,
+        )
+
+    async def chat(
+        self,
+        user_id: str,
+        message: str,
+        conversation_history: list[ConversationMessage],
+    ) -> ChatResponse:
+        """See AIService.chat."""
+        messages = self._build_messages(conversation_history, message)
+        dispatcher = AsyncToolDispatcher(
+            expense_service=self._expense_service,
+            user_id=user_id
+        )
+        final_reply, actions_taken = await self._run_chat_loop(messages, dispatcher)
+        return self._chat_response(conversation_history, message, final_reply, actions_taken)
+
+    async def _run_chat_loop(
+        self,
+        messages: list[dict],
+        dispatcher: AsyncToolDispatcher,
+    ) -> tuple[str, list[str]]:
+        actions_taken: list[str] = []
+        tools = RESPONSES_TOOLS
+
+        response = await self._openai_client.responses.create(**self._first_request(messages, tools))
+
+        for _ in range(self.MAX_TOOL_ITERATIONS):
+            tool_calls = self._extract_tool_calls_from_response(response)
+
+            if not tool_calls:
+                return self._final_reply(response), actions_taken
+
+            # Calls of one turn run in order: a later one may depend on an earlier write
+            tool_outputs = []
+            for tool_call in tool_calls:
+                func_name = tool_call["name"]
+                func_args = tool_call["arguments"]
+
+                logger.info("AI calling tool: %s(%s...)", func_name, func_args[:100])
+
+                result = await dispatcher.execute(func_name, func_args)
+                actions_taken.append(func_name)
+                tool_outputs.append(self._tool_output(tool_call["call_id"], result))
+
+            response = await self._openai_client.responses.create(
+                **self._follow_up_request(response, tool_outputs, tools)
+            )
+
+        logger.error("Chat loop exceeded maximum iterations without finishing.")
+        return "Sorry, there was an error processing your request.", actions_taken
+
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        match_threshold: float = 0.5,
+        match_count: int = 5,
+    ) -> SemanticSearchResponse:
+        """See AIService.search."""
+        query_embedding = await self._embedding_service.generate_for_query(query)
+
+        raw_results = await self._ai_repo.semantic_search(
+            query_embedding=query_embedding,
+            user_id=user_id,
+            match_threshold=match_threshold,
+            match_count=match_count,
+        )
+        return self._search_response(query, raw_results)
@@ -1,9 +1,9 @@
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable
 
-from app.services.expense_service import ExpenseService
+from app.services.expense_service import AsyncExpenseService, ExpenseService
 from app.models.expense import CreateExpenseRequest, UpdateExpenseRequest
 
 logger = logging.getLogger(__name__)
@@ -265,6 +265,45 @@ TOOLS: list[dict] = [
             }
         }
     },
+
+    # Tools 8: Lihat breakdown per kategori / subkategori / metode pembayaran
+    {
+        "type": "function",
+        "function": {
+            "name": "get_expense_breakdown",
+            "description": (
+                "Lihat total per kategori, subkategori, atau metode pembayaran. "
+                "Gunakan untuk pertanyaan seperti 'paling banyak habis di mana' "
+                "daripada mengambil semua transaksi dengan list_expenses."
+            ),
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "group_by": {
+                        "type": "string",
+                        "enum": ["category", "subcategory", "payment_method"],
+                        "description": "Dasar pengelompokan total."
+                    },
+                    "type": {
+                        "type": ["string", "null"],
+                        "enum": ["income", "expense", None],
+                        "description": "Filter tipe transaksi. Kirim null jika tidak filter."
+                    },
+                    "date_from": {
+                        "type": ["string", "null"],
+                        "description": "Tanggal awal filter, format YYYY-MM-DD. Kirim null jika tidak filter."
+                    },
+                    "date_to": {
+                        "type": ["string", "null"],
+                        "description": "Tanggal akhir filter, format YYYY-MM-DD. Kirim null jika tidak filter."
+                    }
+                },
+                "required": ["group_by", "type", "date_from", "date_to"],
+                "additionalProperties": False
+            }
+        }
+    },
 ]
 
 
@@ -281,26 +320,27 @@ class ToolDispatcher:
             args = self._parse_arguments(arguments)
             logger.info("Executing tool '%s' with args keys: %s", function_name, sorted(args.keys()))
 
-            if function_name == "create_expense":
-                return self._create_expense(args)
-            if function_name == "list_expenses":
-                return self._list_expenses(args)
-            if function_name == "delete_expense":
-                return self._delete_expense(args)
-            if function_name == "update_expense":
-                return self._update_expense(args)
-            if function_name == "get_monthly_summary":
-                return self._get_monthly_summary(args)
-            if function_name == "get_yearly_summary":
-                return self._get_yearly_summary(args)
-            if function_name == "get_all_time_summary":
-                return self._get_all_time_summary()
-
-            return {"error": f"Unknown function: {function_name}"}
+            handler = self._handlers().get(function_name)
+            if handler is None:
+                return {"error": f"Unknown function: {function_name}"}
+            return handler(args)
         except Exception as exc:
             logger.error("Tool execution error [%s]: %s", function_name, exc)
             return {"error": str(exc)}
 
+    def _handlers(self) -> dict[str, Callable[[dict[str, Any]], Any]]:
+        """Tool name → handler taking the parsed arguments."""
+        return {
+            "create_expense": self._create_expense,
+            "list_expenses": self._list_expenses,
+            "delete_expense": self._delete_expense,
+            "update_expense": self._update_expense,
+            "get_monthly_summary": self._get_monthly_summary,
+            "get_yearly_summary": self._get_yearly_summary,
+            "get_all_time_summary": lambda args: self._get_all_time_summary(),
+            "get_expense_breakdown": self._get_expense_breakdown,
+        }
+
     def _parse_arguments(self, arguments_json: str) -> dict[str, Any]:
         """Parse argumen JSON tool menjadi dict."""
         if not arguments_json:
@@ -425,4 +465,175 @@ class ToolDispatcher:
             "status": "success",
             "tool": "get_all_time_summary",
             "data": summary.model_dump(),
-        }
\ No newline at end of file
+        }
+
+    def _get_expense_breakdown(self, args: dict[str, Any]) -> dict[str, Any]:
+        group_by = args.get("group_by")
+        breakdowns = {
+            "category": self._expense_service.get_expense_summary_by_category,
+            "subcategory": self._expense_service.get_expense_summary_by_subcategory,
+            "payment_method": self._expense_service.get_expense_summary_by_payment_method,
+        }
+        if group_by not in breakdowns:
+            raise ValueError("group_by must be category, subcategory or payment_method")
+
+        rows = breakdowns[group_by](
+            user_id=self._user_id,
+            expense_type=args.get("type"),
+            date_from=args.get("date_from"),
+            date_to=args.get("date_to"),
+        )
+        return {
+            "status": "success",
+            "tool": "get_expense_breakdown",
+            "data": [row.model_dump() for row in rows],
+        }
+
+
+class AsyncToolDispatcher(ToolDispatcher):
+    """ToolDispatcher for AsyncExpenseService; same tools and results, awaited."""
+
+    def __init__(self, expense_service: AsyncExpenseService, user_id: str):
+        super().__init__(expense_service=expense_service, user_id=user_id)
+
+    async def execute(self, function_name: str, arguments: str) -> dict[str, Any]:
+        """Executes the specified tool function with the given arguments."""
+        try:
+            args = self._parse_arguments(arguments)
+            logger.info("Executing tool '%s' with args keys: %s", function_name, sorted(args.keys()))
+
+            handler = self._handlers().get(function_name)
+            if handler is None:
+                return {"error": f"Unknown function: {function_name}"}
+            return await handler(args)
+        except Exception as exc:
+            logger.error("Tool execution error [%s]: %s", function_name, exc)
+            return {"error": str(exc)}
+
+    async def _create_expense(self, args: dict[str, Any]) -> dict[str, Any]:
+        args = self._strip_none(args)
+        if "transaction_date" not in args:
+            args["transaction_date"] = self._default_today()
+
+        created = await self._expense_service.create_expense(
+            user_id=self._user_id,
+            request=CreateExpenseRequest(**args),
+        )
+        return {
+            "status": "success",
+            "tool": "create_expense",
+            "message": "Transaksi berhasil dibuat.",
+            "data": created.model_dump(),
+        }
+
+    async def _list_expenses(self, args: dict[str, Any]) -> dict[str, Any]:
+        args = self._strip_none(args)
+        result = await self._expense_service.get_all_expenses(
+            user_id=self._user_id,
+            limit=int(args.get("limit", 20)),
+            offset=int(args.get("offset", 0)),
+            expense_type=args.get("type"),
+            category=args.get("category"),
+            q=args.get("q"),
+            date_from=args.get("date_from"),
+            date_to=args.get("date_to"),
+            sort_by=args.get("sort_by", "created_at"),
+            sort_order=args.get("sort_order", "desc"),
+        )
+        return {
+            "status": "success",
+            "tool": "list_expenses",
+            "data": result.model_dump(),
+        }
+
+    async def _delete_expense(self, args: dict[str, Any]) -> dict[str, Any]:
+        expense_id = args.get("expense_id")
+        if not expense_id:
+            raise ValueError("expense_id is required")
+
+        await self._expense_service.delete_expense(user_id=self._user_id, expense_id=expense_id)
+        return {
+            "status": "success",
+            "tool": "delete_expense",
+            "message": f"Transaksi {expense_id} berhasil dihapus.",
+        }
+
+    async def _update_expense(self, args: dict[str, Any]) -> dict[str, Any]:
+        expense_id = args.pop("expense_id", None)
+        if not expense_id:
+            raise ValueError("expense_id is required")
+
+        args = self._strip_none(args)
+        updated = await self._expense_service.update_expense(
+            user_id=self._user_id,
+            expense_id=expense_id,
+            request=UpdateExpenseRequest(**args),
+        )
+        return {
+            "status": "success",
+            "tool": "update_expense",
+            "message": "Transaksi berhasil diperbarui.",
+            "data": updated.model_dump(),
+        }
+
+    async def _get_monthly_summary(self, args: dict[str, Any]) -> dict[str, Any]:
+        month = args.get("month")
+        year = args.get("year")
+        if month is None or year is None:
+            raise ValueError("month and year are required")
+
+        summary = await self._expense_service.get_expense_summary_by_month(
+            user_id=self._user_id,
+            month=int(month),
+            year=int(year),
+        )
+        return {
+            "status": "success",
+            "tool": "get_monthly_summary",
+            "data": summary.model_dump(),
+        }
+
+    async def _get_yearly_summary(self, args: dict[str, Any]) -> dict[str, Any]:
+        year = args.get("year")
+        if year is None:
+            raise ValueError("year is required")
+
+        summary = await self._expense_service.get_expense_summary_by_year(
+            user_id=self._user_id,
+            year=int(year),
+        )
+        return {
+            "status": "success",
+            "tool": "get_yearly_summary",
+            "data": summary.model_dump(),
+        }
+
+    async def _get_all_time_summary(self) -> dict[str, Any]:
+        summary = await self._expense_service.get_expense_summary_all_time(user_id=self._user_id)
+        return {
+            "status": "success",
+            "tool": "get_all_time_summary",
+            "data": summary.model_dump(),
+        }
+
+    async def _get_expense_breakdown(self, args: dict[str, Any]) -> dict[str, Any]:
+        group_by = args.get("group_by")
+        breakdowns = {
+            "category": self._expense_service.get_expense_summary_by_category,
+            "subcategory": self._expense_service.get_expense_summary_by_subcategory,
+            "payment_method": self._expense_service.get_expense_summary_by_payment_method,
+        }
+        if group_by not in breakdowns:
+            raise ValueError("group_by must be category, subcategory or payment_method")
+
+        rows = await breakdowns[group_by](
+            user_id=self._user_id,
+            expense_type=args.get("type"),
+            date_from=args.get("date_from"),
+            date_to=args.get("date_to"),
+        )
+        return {
+            "status": "success",
+            "tool": "get_expense_breakdown",
+            "data": [row.model_dump() for row in rows],
+        }
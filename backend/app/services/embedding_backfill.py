@@ -0,0 +1,247 @@
+"""
+Resumable backfill / re-embed of expense embeddings (backfill_embeddings.py).
+
+Rows stay at embedding IS NULL when they predate embeddings, when an inline
+embedding failed (only logged), or when the embedding queue dropped or gave
+up on them; match_expense never finds those rows. After a change of
+OPENAI_EMBEDDING_MODEL every stored vector is from another embedding space.
+This job finds those rows and embeds them again:
+
+  - keyset scan: AIRepository.find_embedding_backlog pages through the
+    active expenses in ID order (missing / stale / all), never with OFFSET
+  - batching: one embeddings.create call and one UPDATE per page
+    (EmbeddingService.generate_for_expenses_batch, which records the model)
+  - bounded concurrency: `concurrency` batches in flight at once
+  - rate limit: at most `requests_per_minute` embedding requests, spread
+    evenly, shared by all workers (retries included)
+  - retries: a failed batch is retried max_retries times with exponential
+    backoff, then counted as failed
+  - checkpoint: the last ID before which every batch succeeded is written to
+    a JSON file after each batch, so a stopped run continues where it was.
+    A failed batch holds the checkpoint back; the next run retries it. A
+    finished run deletes the file; a checkpoint of another mode or model is
+    ignored.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from app.repositories.ai_repository import AIRepository
+from app.services.embedding_services import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls evenly at `per_minute` calls per minute (0 = unlimited)."""
+
+    def __init__(self, per_minute: float, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            self._sleep(slot - now)
+
+
+@dataclass
+class BackfillCheckpoint:
+    mode: str
+    model: str
+    last_id: str | None = None
+    embedded: int = 0
+
+
+@dataclass
+class BackfillResult:
+    mode: str
+    model: str
+    resumed_from: str | None = None
+    batches: int = 0
+    embedded: int = 0
+    failed: int = 0
+    retries: int = 0
+    last_id: str | None = None
+    completed: bool = False
+
+
+class CheckpointStore:
+    """JSON checkpoint file, replaced atomically on every save."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def load(self) -> BackfillCheckpoint | None:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", self.path, e)
+            return None
+        return BackfillCheckpoint(
+            mode=data.get("mode"),
+            model=data.get("model"),
+            last_id=data.get("last_id"),
+            embedded=data.get("embedded") or 0,
+        )
+
+    def save(self, checkpoint: BackfillCheckpoint) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(checkpoint)))
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class EmbeddingBackfill:
+    """Scan, embed and checkpoint; see the module docstring."""
+
+    def __init__(
+        self,
+        ai_repo: AIRepository,
+        embedding_service: EmbeddingService,
+        mode: str = "missing",
+        batch_size: int = 500,
+        concurrency: int = 4,
+        requests_per_minute: float = 0,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+        checkpoint: CheckpointStore | None = None,
+        max_rows: int | None = None,
+        sleep=time.sleep,
+    ):
+        if mode not in AIRepository.BACKLOG_MODES:
+            raise ValueError(f"Unknown backfill mode: {mode}")
+        self._repo = ai_repo
+        self._embedding_service = embedding_service
+        self.mode = mode
+        self.model = embedding_service.settings.OPENAI_EMBEDDING_MODEL
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_rows = max_rows
+        self._checkpoint_store = checkpoint
+        self._limiter = RateLimiter(requests_per_minute, sleep=sleep)
+        self._sleep = sleep
+        self._stats_lock = threading.Lock()
+
+    def run(self) -> BackfillResult:
+        checkpoint = self._resume()
+        result = BackfillResult(mode=self.mode, model=self.model, resumed_from=checkpoint.last_id)
+
+        after_id = checkpoint.last_id
+        scanned = 0
+        exhausted = False
+        # Batches finish out of order: the checkpoint moves past a batch only
+        # once it and every batch before it succeeded; a failed one stops it
+        last_ids: dict[int, str] = {}
+        succeeded: set[int] = set()
+        submitted = next_seq = 0
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="embedding-backfill") as pool:
+            in_flight: dict[Future, int] = {}
+            while True:
+                # Read ahead one page per worker, so no worker waits for the scan
+                while not exhausted and len(in_flight) < self.concurrency * 2:
+                    page = self._next_page(after_id, scanned)
+                    if not page:
+                        exhausted = True
+                        break
+                    scanned += len(page)
+                    after_id = str(page[-1]["id"])
+                    last_ids[submitted] = after_id
+                    in_flight[pool.submit(self._embed_with_retries, page, result)] = submitted
+                    submitted += 1
+
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seq = in_flight.pop(future)
+                    ok, rows = future.result()
+                    result.batches += 1
+                    if ok:
+                        result.embedded += rows
+                        checkpoint.embedded += rows
+                        succeeded.add(seq)
+                    else:
+                        result.failed += rows
+
+                while next_seq in succeeded:
+                    succeeded.remove(next_seq)
+                    checkpoint.last_id = last_ids.pop(next_seq)
+                    next_seq += 1
+                self._save(checkpoint)
+                logger.info(
+                    "Embedding backfill: %d embedded, %d failed, checkpoint after %s",
+                    result.embedded, result.failed, checkpoint.last_id,
+                )
+
+        result.last_id = checkpoint.last_id
+        result.completed = exhausted and not result.failed and not self._row_limit_reached(scanned)
+        if result.completed and self._checkpoint_store:
+            self._checkpoint_store.clear()
+        return result
+
+    def _row_limit_reached(self, scanned: int) -> bool:
+        return self.max_rows is not None and scanned >= self.max_rows
+
+    def _next_page(self, after_id: str | None, scanned: int) -> list[dict]:
+        limit = self.batch_size
+        if self.max_rows is not None:
+            limit = min(limit, self.max_rows - scanned)
+        if limit <= 0:
+            return []
+        return self._repo.find_embedding_backlog(mode=self.mode, model=self.model, after_id=after_id, limit=limit)
+
+    def _resume(self) -> BackfillCheckpoint:
+        saved = self._checkpoint_store.load() if self._checkpoint_store else None
+        if saved is None:
+            return BackfillCheckpoint(mode=self.mode, model=self.model)
+        if (saved.mode, saved.model) != (self.mode, self.model):
+            logger.warning(
+                "Checkpoint is for mode=%s model=%s, starting over for mode=%s model=%s",
+                saved.mode, saved.model, self.mode, self.model,
+            )
+            return BackfillCheckpoint(mode=self.mode, model=self.model)
+        logger.info("Resuming embedding backfill after %s", saved.last_id)
+        return saved
+
+    def _save(self, checkpoint: BackfillCheckpoint) -> None:
+        if self._checkpoint_store:
+            self._checkpoint_store.save(checkpoint)
+
+    def _embed_with_retries(self, batch: list[dict], result: BackfillResult) -> tuple[bool, int]:
+        for attempt in range(self.max_retries + 1):
+            self._limiter.acquire()
+            try:
+                self._embedding_service.generate_for_expenses_batch(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(
+                        "Failed to embed %d expenses (%s..%s) after %d attempts: %s",
+                        len(batch), batch[0]["id"], batch[-1]["id"], attempt + 1, str(e)[:200],
+                    )
+                    return False, len(batch)
+                with self._stats_lock:
+                    result.retries += 1
+                self._sleep(self.retry_backoff * 2 ** attempt)
+            else:
+                return True, len(batch)
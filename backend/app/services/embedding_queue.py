@@ -0,0 +1,215 @@
+"""
+Background embedding queue: keeps OpenAI and the embedding UPDATE off the write path.
+
+Creating or editing an expense used to wait for an embeddings round trip and
+a second UPDATE before answering. With the queue the write path only records
+the row; worker threads embed pending rows in batches:
+
+  - coalescing: pending rows are keyed by expense ID, so repeated edits of
+    one expense cost one embedding (of its latest text)
+  - batching: a worker waits up to max_wait seconds for batch_size rows,
+    then sends them in one embeddings.create(input=[...]) call and saves
+    the vectors in one UPDATE (EmbeddingService.generate_for_expenses_batch)
+  - bounded concurrency: `concurrency` worker threads; an expense is never in
+    two batches at once, so an older text cannot overwrite a newer embedding
+  - retries: a failed batch is retried max_retries times with exponential
+    backoff; after that it is logged and counted as failed
+  - backlog: at most max_backlog pending rows; beyond that new rows are
+    dropped and counted; they keep a NULL embedding until re-embedded
+
+In process and thread based, so it works the same for the API (called from
+the event loop; enqueue never blocks) and for the bot. Rows still pending
+when the process dies are lost, like BackgroundTasks; stop() drains them on
+a normal shutdown.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from app.services.embedding_services import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmbeddingQueueStats:
+    enqueued: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    batches: int = 0
+    embedded: int = 0
+    retries: int = 0
+    failed: int = 0
+
+
+class EmbeddingQueue:
+    """In-process batched embedding queue; see the module docstring."""
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        batch_size: int = 100,
+        max_wait: float = 0.5,
+        concurrency: int = 2,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        max_backlog: int = 10_000,
+    ):
+        self._embedding_service = embedding_service
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backlog = max_backlog
+
+        self.stats = EmbeddingQueueStats()
+        # expense ID → (row, time first queued); a re-queued ID keeps its place
+        self._pending: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._in_flight: set[str] = set()
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self._workers: list[threading.Thread] = []
+
+    # =========================================================================
+    # PRODUCER SIDE
+    # =========================================================================
+
+    def enqueue(self, expense: dict) -> None:
+        """Queue one expense row (needs id plus the fields of build_expense_text)."""
+        self.enqueue_many([expense])
+
+    def enqueue_many(self, expenses: list[dict]) -> None:
+        if not expenses:
+            return
+        with self._cond:
+            for expense in expenses:
+                self._add(expense)
+            self._ensure_workers()
+            self._cond.notify_all()
+
+    def _add(self, expense: dict) -> None:
+        expense_id = str(expense["id"])
+        self.stats.enqueued += 1
+        if expense_id in self._pending:
+            self._pending[expense_id] = (expense, self._pending[expense_id][1])
+            self.stats.coalesced += 1
+        elif len(self._pending) >= self.max_backlog:
+            self.stats.dropped += 1
+            logger.warning("Embedding queue full (%d pending), dropping expense %s", len(self._pending), expense_id)
+        else:
+            self._pending[expense_id] = (expense, time.monotonic())
+
+    # =========================================================================
+    # LIFECYCLE
+    # =========================================================================
+
+    def _ensure_workers(self) -> None:
+        # Called with the lock held
+        if self._workers:
+            return
+        self._stopping.clear()
+        self._workers = [
+            threading.Thread(target=self._run_worker, name=f"embedding-queue-{index}", daemon=True)
+            for index in range(self.concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until nothing is pending or in flight. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float | None = 10.0) -> bool:
+        """
+        Embed what is still pending, then stop the workers.
+
+        Workers stop waiting for full batches as soon as stop() is called.
+        Returns False if rows were still left when the timeout ran out.
+        """
+        with self._cond:
+            self._stopping.set()
+            workers, self._workers = self._workers, []
+            self._cond.notify_all()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in workers:
+            worker.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        with self._cond:
+            return not self._pending and not self._in_flight
+
+    def snapshot(self) -> dict:
+        """Counters plus the current backlog, for /health."""
+        with self._cond:
+            oldest = next(iter(self._pending.values()), (None, None))[1]
+            return {
+                **asdict(self.stats),
+                "backlog": len(self._pending) + len(self._in_flight),
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "oldest_pending_seconds": round(time.monotonic() - oldest, 3) if oldest else 0.0,
+                "workers": len(self._workers),
+            }
+
+    # =========================================================================
+    # WORKERS
+    # =========================================================================
+
+    def _run_worker(self) -> None:
+        while (batch := self._next_batch()) is not None:
+            try:
+                self._embed_with_retries(batch)
+            finally:
+                with self._cond:
+                    self._in_flight.difference_update(str(expense["id"]) for expense in batch)
+                    self._cond.notify_all()
+
+    def _next_batch(self) -> list[dict] | None:
+        """Up to batch_size ready rows; None once stopping with nothing left to do."""
+        with self._cond:
+            while True:
+                ready = [expense_id for expense_id in self._pending if expense_id not in self._in_flight]
+                if ready:
+                    oldest = self._pending[ready[0]][1]
+                    wait = oldest + self.max_wait - time.monotonic()
+                    if len(ready) < self.batch_size and wait > 0 and not self._stopping.is_set():
+                        self._cond.wait(wait)
+                        continue
+                    return self._take(ready[:self.batch_size])
+                if self._stopping.is_set() and not self._pending:
+                    return None
+                self._cond.wait()
+
+    def _take(self, expense_ids: list[str]) -> list[dict]:
+        # Called with the lock held
+        batch = [self._pending.pop(expense_id)[0] for expense_id in expense_ids]
+        self._in_flight.update(expense_ids)
+        return batch
+
+    def _embed_with_retries(self, batch: list[dict]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._embedding_service.generate_for_expenses_batch(batch)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    with self._cond:
+                        self.stats.failed += len(batch)
+                    logger.error("Failed to embed %d expenses after %d attempts: %s", len(batch), attempt + 1, str(e)[:200])
+                    return
+                with self._cond:
+                    self.stats.retries += 1
+                # Backoff also ends early on stop; the remaining attempts then run back to back
+                self._stopping.wait(self.retry_backoff * 2 ** attempt)
+            else:
+                with self._cond:
+                    self.stats.batches += 1
+                    self.stats.embedded += len(batch)
+                return
@@ -1,20 +1,38 @@
+import asyncio
 import logging
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from app.core.config import get_settings
-from app.repositories.ai_repository import AIRepository
+from app.core.embedding_cache import EmbeddingCache
+from app.core.query_embedding_cache import QueryEmbeddingCache
+from app.repositories.ai_repository import AIRepository, AsyncAIRepository
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
     """ Service for handling embedding generation and semantic search operations. """
 
-    def __init__(self, openai_client: OpenAI, ai_repo: AIRepository):
+    def __init__(
+        self,
+        openai_client: OpenAI,
+        ai_repo: AIRepository,
+        embedding_cache: EmbeddingCache | None = None,
+        query_cache: QueryEmbeddingCache | None = None,
+    ):
         self.openai_client = openai_client
         self._repo = ai_repo
         self.settings = get_settings()
+        # Expense texts seen before reuse their vector instead of calling OpenAI
+        self._cache = embedding_cache
+        # Repeated search queries, with concurrent identical ones sharing one call
+        self._query_cache = query_cache
 
     def generate_for_query(self, text: str) -> list[float]:
         """ generates an embedding vector for the given text using OpenAI's embedding model. """
+        if self._query_cache is None:
+            return self._embed_query(text)
+        return self._query_cache.get_or_create(self._cache_key(text), lambda: self._embed_query(text))
+
+    def _embed_query(self, text: str) -> list[float]:
         response = self.openai_client.embeddings.create(
             model=self.settings.OPENAI_EMBEDDING_MODEL,
             input=text
@@ -32,6 +50,29 @@ class EmbeddingService:
         payment_method: str = None,
     ) -> None:
         """ generates an embedding for the expense and saves it to the database. """
+        text_to_embed = self.build_expense_text(
+            amount=amount,
+            type=type,
+            description=description,
+            category=category,
+            subcategory=subcategory,
+            payment_method=payment_method,
+        )
+        embedding = self._embed_texts([text_to_embed])[0]
+        self._repo.save_embedding(
+            expense_id=expense_id, embedding=embedding, model=self.settings.OPENAI_EMBEDDING_MODEL,
+        )
+
+    @staticmethod
+    def build_expense_text(
+        amount: float,
+        type: str,
+        description: str = None,
+        category: str = None,
+        subcategory: str = None,
+        payment_method: str = None,
+    ) -> str:
+        """ builds the text that represents an expense in the embedding space. """
         text_to_embed = f"{type} {amount}"
         if category:
             text_to_embed += f" {category}"
@@ -41,8 +82,85 @@ class EmbeddingService:
             text_to_embed += f" {subcategory}"
         if payment_method:
             text_to_embed += f" {payment_method}"
-        embedding = self.generate_for_query(text_to_embed)
-        self._repo.save_embedding(expense_id=expense_id, embedding=embedding)
+        return text_to_embed
+
+    def generate_for_expenses_batch(self, expenses: list[dict]) -> int:
+        """
+        generates embeddings for many expense rows with a single embeddings.create call
+        and saves them with a single database update. returns the number of rows saved.
+        """
+        if not expenses:
+            return 0
+        vectors = self._embed_texts(self._batch_texts(expenses))
+        return self._repo.save_embeddings(
+            self._embeddings_by_id(expenses, vectors), model=self.settings.OPENAI_EMBEDDING_MODEL,
+        )
+
+    def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """ vectors for texts in order; cached texts are reused, the rest go in one embeddings.create call. """
+        if self._cache is None:
+            return self._create_embeddings(texts)
+        keys = self._cache_keys(texts)
+        found = self._cache.get_many(keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            self._store(missing, self._create_embeddings(list(missing.values())), found)
+        return [found[key] for key in keys]
+
+    def _create_embeddings(self, texts: list[str]) -> list[list[float]]:
+        response = self.openai_client.embeddings.create(
+            model=self.settings.OPENAI_EMBEDDING_MODEL,
+            input=texts
+        )
+        return self._vectors(response)
+
+    @staticmethod
+    def _vectors(response) -> list[list[float]]:
+        # response.data is in input order; index makes that explicit
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    def _cache_key(self, text: str) -> str:
+        return EmbeddingCache.key(text, self.settings.OPENAI_EMBEDDING_MODEL, self.settings.OPENAI_EMBEDDING_DIMENSIONS)
+
+    def _cache_keys(self, texts: list[str]) -> list[str]:
+        return [self._cache_key(text) for text in texts]
+
+    @staticmethod
+    def _missing(texts: list[str], keys: list[str], found: dict) -> dict[str, str]:
+        """ key → text of every uncached text, each text once. """
+        return {key: text for key, text in zip(keys, texts) if key not in found}
+
+    def _store(self, missing: dict[str, str], vectors: list[list[float]], found: dict) -> None:
+        fresh = dict(zip(missing, vectors))
+        self._cache.put_many(fresh)
+        found.update(fresh)
+
+    @classmethod
+    def _batch_texts(cls, expenses: list[dict]) -> list[str]:
+        return [
+            cls.build_expense_text(
+                amount=expense["amount"],
+                type=expense["type"],
+                description=expense.get("description"),
+                category=expense.get("category"),
+                subcategory=expense.get("subcategory"),
+                payment_method=expense.get("payment_method"),
+            )
+            for expense in expenses
+        ]
+
+    @staticmethod
+    def _embeddings_by_id(expenses: list[dict], vectors: list[list[float]]) -> dict[str, list[float]]:
+        return {str(expense["id"]): vector for expense, vector in zip(expenses, vectors)}
+
+    def generate_for_expenses_batch_safe(self, expenses: list[dict]) -> bool:
+        """ safe version of generate_for_expenses_batch, same contract as generate_for_expenses_safe. """
+        try:
+            self.generate_for_expenses_batch(expenses)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for {len(expenses)} expenses: {str(e)}")
+            return False
     
     def generate_for_expenses_safe(
         self,
@@ -71,4 +189,128 @@ class EmbeddingService:
             return True
         except Exception as e:
             logger.error(f"Failed to generate embedding for expense {expense_id}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+class AsyncEmbeddingService(EmbeddingService):
+    """ EmbeddingService on AsyncOpenAI and AsyncAIRepository; same texts and model, awaited. """
+
+    def __init__(
+        self,
+        openai_client: AsyncOpenAI,
+        ai_repo: AsyncAIRepository,
+        embedding_cache: EmbeddingCache | None = None,
+        query_cache: QueryEmbeddingCache | None = None,
+    ):
+        super().__init__(
+            openai_client=openai_client, ai_repo=ai_repo, embedding_cache=embedding_cache, query_cache=query_cache,
+        )
+
+    async def generate_for_query(self, text: str) -> list[float]:
+        """ generates an embedding vector for the given text using OpenAI's embedding model. """
+        if self._query_cache is None:
+            return await self._embed_query(text)
+        return await self._query_cache.aget_or_create(self._cache_key(text), lambda: self._embed_query(text))
+
+    async def _embed_query(self, text: str) -> list[float]:
+        response = await self.openai_client.embeddings.create(
+            model=self.settings.OPENAI_EMBEDDING_MODEL,
+            input=text
+        )
+        return response.data[0].embedding
+
+    async def generate_for_expense(
+        self,
+        expense_id: str,
+        amount: float,
+        type: str,
+        description: str = None,
+        category: str = None,
+        subcategory: str = None,
+        payment_method: str = None,
+    ) -> None:
+        """ generates an embedding for the expense and saves it to the database. """
+        text_to_embed = self.build_expense_text(
+            amount=amount,
+            type=type,
+            description=description,
+            category=category,
+            subcategory=subcategory,
+            payment_method=payment_method,
+        )
+        embedding = (await self._embed_texts([text_to_embed]))[0]
+        await self._repo.save_embedding(
+            expense_id=expense_id, embedding=embedding, model=self.settings.OPENAI_EMBEDDING_MODEL,
+        )
+
+    async def generate_for_expenses_batch(self, expenses: list[dict]) -> int:
+        """ one embeddings.create call and one database update for many expense rows. """
+        if not expenses:
+            return 0
+        vectors = await self._embed_texts(self._batch_texts(expenses))
+        return await self._repo.save_embeddings(
+            self._embeddings_by_id(expenses, vectors), model=self.settings.OPENAI_EMBEDDING_MODEL,
+        )
+
+    async def _embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """ same as EmbeddingService._embed_texts; the disk tier is read in a worker thread. """
+        if self._cache is None:
+            return await self._create_embeddings(texts)
+        keys = self._cache_keys(texts)
+        found = self._cache.get_many_from_memory(keys)
+        unseen = [key for key in dict.fromkeys(keys) if key not in found]
+        if unseen:
+            if self._cache.persistent:
+                found.update(await asyncio.to_thread(self._cache.get_many_from_disk, unseen))
+            else:
+                found.update(self._cache.get_many_from_disk(unseen))
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = await self._create_embeddings(list(missing.values()))
+            if self._cache.persistent:
+                await asyncio.to_thread(self._store, missing, vectors, found)
+            else:
+                self._store(missing, vectors, found)
+        return [found[key] for key in keys]
+
+    async def _create_embeddings(self, texts: list[str]) -> list[list[float]]:
+        response = await self.openai_client.embeddings.create(
+            model=self.settings.OPENAI_EMBEDDING_MODEL,
+            input=texts
+        )
+        return self._vectors(response)
+
+    async def generate_for_expenses_batch_safe(self, expenses: list[dict]) -> bool:
+        """ safe version of generate_for_expenses_batch. """
+        try:
+            await self.generate_for_expenses_batch(expenses)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings for {len(expenses)} expenses: {str(e)}")
+            return False
+
+    async def generate_for_expenses_safe(
+        self,
+        expense_id: str,
+        amount: float,
+        type: str,
+        description: str = None,
+        category: str = None,
+        subcategory: str = None,
+        payment_method: str = None,
+    ) -> bool:
+        """ safe version of generate_for_expense, embedding failures never block the main flow. """
+        try:
+            await self.generate_for_expense(
+                expense_id=expense_id,
+                amount=amount,
+                type=type,
+                description=description,
+                category=category,
+                subcategory=subcategory,
+                payment_method=payment_method,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to generate embedding for expense {expense_id}: {str(e)}")
+            return False
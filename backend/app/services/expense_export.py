@@ -0,0 +1,150 @@
+"""
+Typed export writers for expense rows (NDJSON, Arrow IPC stream, Parquet).
+
+Every writer takes an iterator of row pages (as produced by
+ExpenseService.iter_expense_pages) and yields bytes as soon as they are
+ready, so the full export is never held in memory. pyarrow is imported
+lazily; only the Arrow/Parquet formats need it.
+"""
+import json
+from typing import Iterable, Iterator, Sequence
+
+
+# format → (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Rows buffered per Parquet row group; a few DB pages keep compression effective
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+
+def _arrow_type(column: str):
+    """Map an expenses column to the Arrow type matching its Postgres type."""
+    import pyarrow as pa
+
+    if column == "amount":
+        return pa.decimal128(15, 2)                  # NUMERIC(15, 2)
+    if column == "transaction_date":
+        return pa.date32()                           # DATE
+    if column in ("created_at", "updated_at"):
+        return pa.timestamp("us", tz="UTC")          # TIMESTAMPTZ
+    return pa.string()
+
+
+def _source_type(column: str):
+    """Type of the value as PostgREST hands it over (JSON number or ISO string)."""
+    import pyarrow as pa
+
+    return pa.float64() if column == "amount" else pa.string()
+
+
+def arrow_schema(columns: Sequence[str]):
+    import pyarrow as pa
+
+    return pa.schema([pa.field(column, _arrow_type(column)) for column in columns])
+
+
+def rows_to_record_batch(rows: list[dict], columns: Sequence[str]):
+    """Build one typed RecordBatch from a page of PostgREST rows."""
+    import pyarrow as pa
+
+    schema = arrow_schema(columns)
+    # Build each column from the raw JSON values, then cast in Arrow (vectorised,
+    # handles ISO offsets, rounds amount to 2 decimals) instead of per-value parsing
+    arrays = [
+        pa.array([row.get(field.name) for row in rows], type=_source_type(field.name)).cast(field.type)
+        for field in schema
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """
+    Write-only file object that hands written bytes back in chunks.
+
+    Arrow/Parquet writers need tell() to keep growing (Parquet records
+    absolute offsets in its footer), so the position is tracked separately
+    from the buffer that gets drained.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_ndjson(pages: Iterable[list[dict]], columns: Sequence[str]) -> Iterator[bytes]:
+    """One JSON object per line; amount stays a JSON number, dates stay ISO strings."""
+    for rows in pages:
+        yield "".join(
+            json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def stream_arrow(pages: Iterable[list[dict]], columns: Sequence[str]) -> Iterator[bytes]:
+    """Arrow IPC stream format: schema message first, then one record batch per page."""
+    import pyarrow as pa
+
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), arrow_schema(columns)) as writer:
+        for rows in pages:
+            writer.write_batch(rows_to_record_batch(rows, columns))
+            yield sink.drain()
+    # End-of-stream marker (and the schema, for an empty export)
+    yield sink.drain()
+
+
+def stream_parquet(
+    pages: Iterable[list[dict]],
+    columns: Sequence[str],
+    row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+) -> Iterator[bytes]:
+    """Parquet file written row group by row group; the footer goes out last."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    schema = arrow_schema(columns)
+    pending = []
+    pending_rows = 0
+
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for rows in pages:
+            pending.append(rows_to_record_batch(rows, columns))
+            pending_rows += len(rows)
+            if pending_rows < row_group_size:
+                continue
+
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+            pending.clear()
+            pending_rows = 0
+            yield sink.drain()
+
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+    yield sink.drain()
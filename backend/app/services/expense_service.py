@@ -1,28 +1,526 @@
-from app.core.exceptions import ValidationError
+from app.core.exceptions import AppError, ValidationError
 import csv
 import io
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date
+from functools import partial
+from typing import IO, Callable, Iterator
+
+import anyio
+from pydantic import ValidationError as PydanticValidationError
 from app.models.expense import (
+    BulkCreateExpenseResponse,
+    BulkExpenseMutationResponse,
+    BulkCreateExpenseResult,
     CreateExpenseRequest,
     UpdateExpenseRequest,
+    ExpenseImportError,
+    ExpenseImportResponse,
     ExpenseOut,
+    ExpensePartialOut,
     ExpensesListOut,
     ExpenseSummaryResponse,
+    ExpenseSummaryByCategoryResponse,
+    ExpenseSummaryByPaymentMethodResponse,
+    ExpenseSummaryBySubcategoryResponse,
+    ExpenseSummaryByPeriodResponse,
 )
-from app.repositories.expense_repository import ExpenseRepository
+from app.repositories.expense_repository import AsyncExpenseRepository, ExpenseRepository
+from app.services import expense_export
 
+logger = logging.getLogger(__name__)
+
+# Column layout of the CSV export (and of anything that reads it back)
+CSV_COLUMNS = (
+    "id",
+    "amount",
+    "type",
+    "category",
+    "subcategory",
+    "payment_method",
+    "description",
+    "transaction_date",
+    "created_at",
+    "updated_at",
+)
+
+# CSV import: server-generated columns of the export are ignored
+CSV_IMPORT_COLUMNS = tuple(c for c in CSV_COLUMNS if c not in ("id", "created_at", "updated_at"))
+CSV_IMPORT_REQUIRED_COLUMNS = {"amount", "category"}
+
+# Rejected lines listed in an import report; the rest are only counted
+MAX_IMPORT_ERRORS = 1000
+
+EXPORT_PAGE_SIZE = 1000
+
+# Rows per multi-row INSERT (and per batched embeddings call) in bulk create
+BULK_INSERT_CHUNK_SIZE = 200
+
+# Reported for every row of a chunk the DB rejected; the raw DB error
+# (constraint names, SQL) is only logged
+CHUNK_INSERT_ERROR = "Could not save this batch of rows; none of them were created"
+
+# Rows per batched embeddings call when refreshing after a bulk update
+EMBEDDING_BATCH_SIZE = 200
+
+# Fields that make up the embedding text (EmbeddingService.build_expense_text)
+EMBEDDED_FIELDS = frozenset({"amount", "type", "description", "category", "subcategory", "payment_method"})
+
+# Upper bound on buckets per time series request (~2.7 years of days)
+MAX_TIMESERIES_BUCKETS = 1000
 
-class ExpenseService:
-    """Manage all use cases related to expenses."""
 
-    def __init__(self, expense_repo: ExpenseRepository, embedding_service=None,):
+@dataclass(frozen=True)
+class _ListQuery:
+    """get_all_expenses arguments, resolved into the repository calls they need."""
+
+    limit: int
+    offset: int
+    filters: dict
+    sort_by: str
+    sort_order: str
+    cursor: str | None
+    count_mode: str
+    search_mode: str
+    fields: list[str] | None
+
+    @property
+    def ranked(self) -> bool:
+        """Relevance-ordered full-text search; only for offset pages."""
+        return bool(self.filters["q"]) and self.search_mode == "ranked" and not self.cursor
+
+    def past_last_match(self, total: int) -> bool:
+        """
+        search() takes total from the rows it returns, so an offset past the
+        last match reads as "no match at all"; only a count can tell them apart.
+        """
+        return total == 0 and self.offset > 0
+
+    @property
+    def counts_separately(self) -> bool:
+        # With a cursor the inline count would only cover the remaining rows,
+        # so the total over all filters needs its own count query.
+        return bool(self.cursor) and self.count_mode != "none"
+
+    def search_args(self, limit: int | None = None, offset: int | None = None) -> dict:
+        """Keyword arguments of ExpenseRepository.search (besides user_id and q)."""
+        return dict(
+            limit=self.limit if limit is None else limit,
+            offset=self.offset if offset is None else offset,
+            expense_type=self.filters["expense_type"],
+            category=self.filters["category"],
+            date_from=self.filters["date_from"],
+            date_to=self.filters["date_to"],
+        )
+
+    def page_args(self) -> dict:
+        """Keyword arguments of ExpenseRepository.find_page (besides user_id)."""
+        return dict(
+            # One extra row tells whether another page exists
+            limit=self.limit + 1,
+            offset=self.offset,
+            sort_by=self.sort_by,
+            sort_order=self.sort_order,
+            cursor=self.cursor,
+            count_mode="none" if self.cursor else self.count_mode,
+            fields=self.fields,
+            **self.filters,
+        )
+
+
+class ExpenseServiceBase(ABC):
+    """
+    What ExpenseService and AsyncExpenseService have in common: validation,
+    insert rows, responses, embedding routing and the page-by-page export.
+    The two services add the repository and embedding round trips on top,
+    blocking or awaited, so neither overrides the other's methods.
+    """
+
+    def __init__(
+        self,
+        expense_repo: ExpenseRepository,
+        embedding_service=None,
+        schedule_task: Callable[..., None] | None = None,
+        embedding_queue=None,
+    ):
         self._expense_repo = expense_repo
         self._embedding_service = embedding_service
+        # Runs deferrable work (embedding refresh) after the response, e.g.
+        # BackgroundTasks.add_task; without it the work runs inline
+        self._schedule_task = schedule_task or (lambda func, *args, **kwargs: func(*args, **kwargs))
+        # EmbeddingQueue: when set, writes only queue their rows for embedding
+        # and the OpenAI call + UPDATE happen in its workers
+        self._embedding_queue = embedding_queue
 
-    def get_all_expenses(
+    def _list_query(
+        self,
+        limit: int,
+        offset: int,
+        expense_type: str | None,
+        category: str | None,
+        q: str | None,
+        date_from: str | None,
+        date_to: str | None,
+        sort_by: str,
+        sort_order: str,
+        cursor: str | None,
+        count_mode: str,
+        search_mode: str,
+        fields: list[str] | None,
+    ) -> _ListQuery:
+        if fields:
+            # Fail on unknown names before any query runs
+            self._expense_repo.select_columns(fields)
+        return _ListQuery(
+            limit=limit,
+            offset=offset,
+            filters=dict(
+                expense_type=expense_type,
+                category=category,
+                q=q,
+                date_from=date_from,
+                date_to=date_to,
+            ),
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            count_mode=count_mode,
+            search_mode=search_mode,
+            fields=fields,
+        )
+
+    def _page_out(self, rows: list[dict], total: int | None, query: _ListQuery) -> ExpensesListOut:
+        """Trim the limit + 1 probe row and turn it into next_cursor."""
+        has_more = len(rows) > query.limit
+        rows = rows[:query.limit]
+        next_cursor = (
+            self._expense_repo.encode_cursor(rows[-1], query.sort_by, query.sort_order)
+            if has_more and rows
+            else None
+        )
+        return ExpensesListOut(expenses=self._to_expense_out(rows, query.fields), total=total, next_cursor=next_cursor)
+
+    @classmethod
+    def _ranked_out(cls, rows: list[dict], total: int, query: _ListQuery) -> ExpensesListOut | None:
+        """Relevance-ordered page, or None when the search has no match at all."""
+        if total == 0:
+            return None
+        return ExpensesListOut(
+            expenses=cls._to_expense_out(rows, query.fields),
+            total=None if query.count_mode == "none" else total,
+            next_cursor=None,
+        )
+
+    @staticmethod
+    def _to_expense_out(rows: list[dict], fields: list[str] | None) -> list[ExpenseOut | ExpensePartialOut]:
+        if fields:
+            return [ExpensePartialOut.from_db(data, fields) for data in rows]
+        return [ExpenseOut.from_db(data) for data in rows]
+
+    @staticmethod
+    def _embedding_fields(expense_id: str, row: dict) -> dict:
+        """Arguments of _embed_task_if_available for a stored expense row."""
+        return dict(
+            expense_id=expense_id,
+            amount=row["amount"],
+            type=row["type"],
+            description=row["description"],
+            category=row["category"],
+            subcategory=row["subcategory"],
+            payment_method=row["payment_method"],
+        )
+
+    @classmethod
+    def _validate_bulk_items(
+        cls,
+        user_id: str,
+        items: list[dict],
+    ) -> tuple[list[BulkCreateExpenseResult | None], list[tuple[int, dict]]]:
+        """Per-item results (failures filled in) and the (index, insert row) pairs that passed."""
+        results: list[BulkCreateExpenseResult | None] = [None] * len(items)
+        valid: list[tuple[int, dict]] = []
+
+        for index, item in enumerate(items):
+            try:
+                request = CreateExpenseRequest.model_validate(item)
+            except PydanticValidationError as exc:
+                results[index] = BulkCreateExpenseResult(
+                    index=index, success=False, error=cls._format_validation_error(exc),
+                )
+                continue
+            valid.append((index, cls._to_insert_row(user_id, request)))
+        return results, valid
+
+    @staticmethod
+    def _chunks(items: list) -> Iterator[list]:
+        """items in slices of BULK_INSERT_CHUNK_SIZE, one multi-row INSERT each."""
+        for start in range(0, len(items), BULK_INSERT_CHUNK_SIZE):
+            yield items[start:start + BULK_INSERT_CHUNK_SIZE]
+
+    @staticmethod
+    def _record_chunk(
+        results: list[BulkCreateExpenseResult | None],
+        chunk: list[tuple[int, dict]],
+        created: list[dict] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Fill in the results of one inserted (created) or rejected (error) chunk."""
+        if created is None:
+            for index, _ in chunk:
+                results[index] = BulkCreateExpenseResult(index=index, success=False, error=error)
+            return
+        for (index, _), row in zip(chunk, created):
+            results[index] = BulkCreateExpenseResult(
+                index=index, success=True, expense=ExpenseOut.from_db(row),
+            )
+
+    @staticmethod
+    def _chunk_error(exc: Exception) -> str:
+        """Client-facing reason for a rejected insert chunk; the raw error is logged."""
+        if isinstance(exc, AppError):
+            return exc.message
+        logger.error("Bulk insert chunk failed: %s", exc, exc_info=exc)
+        return CHUNK_INSERT_ERROR
+
+    @staticmethod
+    def _bulk_create_out(results: list[BulkCreateExpenseResult]) -> BulkCreateExpenseResponse:
+        created_count = sum(1 for result in results if result.success)
+        return BulkCreateExpenseResponse(
+            created=created_count,
+            failed=len(results) - created_count,
+            results=results,
+        )
+
+    @classmethod
+    def _read_import_chunks(
+        cls,
+        user_id: str,
+        csv_file: IO[bytes],
+        report: ExpenseImportResponse,
+    ) -> Iterator[list[tuple[int, dict]]]:
+        """
+        Parse the CSV and yield (line, insert row) chunks of up to
+        BULK_INSERT_CHUNK_SIZE valid rows; invalid lines go into report.
+        The header is checked on the first next().
+        """
+        text = io.TextIOWrapper(csv_file, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text)
+        try:
+            header = reader.fieldnames or []
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ValidationError(f"Unreadable CSV file: {exc}")
+
+        missing = sorted(CSV_IMPORT_REQUIRED_COLUMNS - set(header))
+        if missing:
+            raise ValidationError(f"Missing CSV columns: {', '.join(missing)}")
+        unknown = [column for column in header if column not in CSV_COLUMNS]
+        if unknown:
+            raise ValidationError(f"Unknown CSV columns: {', '.join(unknown)}")
+
+        chunk: list[tuple[int, dict]] = []
+
+        def reject(line: int, error: str) -> None:
+            cls._reject_import_line(report, line, error)
+
+        rows = iter(reader)
+        while True:
+            try:
+                record = next(rows)
+            except StopIteration:
+                break
+            except (csv.Error, UnicodeDecodeError) as exc:
+                # The reader cannot resync after a broken record; stop here
+                reject(reader.line_num, f"Unreadable CSV: {exc}")
+                break
+
+            line = reader.line_num
+            if None in record:
+                reject(line, f"Expected {len(header)} values, got more")
+                continue
+            values = {
+                column: value
+                for column, value in record.items()
+                if column in CSV_IMPORT_COLUMNS and value not in (None, "")
+            }
+            try:
+                request = CreateExpenseRequest.model_validate(values)
+            except PydanticValidationError as exc:
+                reject(line, cls._format_validation_error(exc))
+                continue
+
+            chunk.append((line, cls._to_insert_row(user_id, request)))
+            if len(chunk) >= BULK_INSERT_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _reject_import_line(report: ExpenseImportResponse, line: int, error: str) -> None:
+        report.failed += 1
+        if len(report.errors) < MAX_IMPORT_ERRORS:
+            report.errors.append(ExpenseImportError(line=line, error=error))
+        else:
+            report.errors_truncated = True
+
+    @classmethod
+    def _reject_import_chunk(cls, report: ExpenseImportResponse, chunk: list[tuple[int, dict]], exc: Exception) -> None:
+        error = cls._chunk_error(exc)
+        for line, _ in chunk:
+            cls._reject_import_line(report, line, error)
+
+    def _queue_embedding(self, expense: dict) -> bool:
+        """Queue one expense (_embedding_fields) for embedding; False without an embedding queue."""
+        if self._embedding_queue is None:
+            return False
+        fields = dict(expense)
+        self._embedding_queue.enqueue({"id": fields.pop("expense_id"), **fields})
+        return True
+
+    def _queue_embeddings(self, rows: list[dict]) -> bool:
+        """Queue inserted/updated rows for embedding; False without an embedding queue."""
+        if self._embedding_queue is None:
+            return False
+        self._embedding_queue.enqueue_many(rows)
+        return True
+
+    @staticmethod
+    def _to_insert_row(user_id: str, request: CreateExpenseRequest) -> dict:
+        expense_data = {
+            "user_id":          user_id,
+            "amount":           request.amount,
+            "type":             request.type,
+            "description":      request.description,
+            "category":         request.category,
+            "subcategory":      request.subcategory,
+            "payment_method":   request.payment_method,
+        }
+
+        if request.transaction_date is not None:
+            expense_data["transaction_date"] = request.transaction_date
+        return expense_data
+
+    @staticmethod
+    def _format_validation_error(exc: PydanticValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+            for error in exc.errors()
+        )
+
+    @staticmethod
+    def _require_update_payload(request: UpdateExpenseRequest) -> dict:
+        update_payload = request.to_update_dict()
+        if not update_payload:
+            raise ValidationError("No field to update. Send at least one field.")
+        return update_payload
+
+    @staticmethod
+    def _changes_embedding(request: UpdateExpenseRequest) -> bool:
+        return bool(
+            request.amount or request.type or request.description
+            or request.category or request.subcategory or request.payment_method
+        )
+
+    def _embedding_batches(self, updated: list[dict], update_payload: dict) -> list[list[dict]]:
+        """
+        Rows whose embedding text changed, in batches of EMBEDDING_BATCH_SIZE.
+
+        With an embedding queue the rows are queued here instead (the queue
+        does its own batching) and no batch is returned.
+        """
+        if not updated or not EMBEDDED_FIELDS & update_payload.keys():
+            return []
+        if self._queue_embeddings(updated) or self._embedding_service is None:
+            return []
+        return [updated[start:start + EMBEDDING_BATCH_SIZE] for start in range(0, len(updated), EMBEDDING_BATCH_SIZE)]
+
+    @staticmethod
+    def _require_bulk_filters(
+        expense_type: str | None,
+        category: str | None,
+        q: str | None,
+        date_from: str | None,
+        date_to: str | None,
+    ) -> dict:
+        """Filters for a bulk operation; an empty filter would touch every expense, so it is refused."""
+        filters = {
+            "expense_type": expense_type,
+            "category": category,
+            "q": q,
+            "date_from": date_from,
+            "date_to": date_to,
+        }
+        if not any(value and str(value).strip() for value in filters.values()):
+            raise ValidationError("Bulk operations need at least one filter.")
+        return filters
+
+    @staticmethod
+    def _summary_out(summary_data: dict) -> ExpenseSummaryResponse:
+        return ExpenseSummaryResponse(
+            total_income=summary_data.get("total_income", 0.0),
+            total_expense=summary_data.get("total_expense", 0.0),
+            net_balance=summary_data.get("net_balance", 0.0),
+        )
+
+    @classmethod
+    def _check_timeseries_range(cls, granularity: str, date_from: str, date_to: str) -> None:
+        try:
+            start = date.fromisoformat(date_from)
+            end = date.fromisoformat(date_to)
+        except ValueError as e:
+            raise ValidationError("date_from and date_to must be valid YYYY-MM-DD dates") from e
+        if start > end:
+            raise ValidationError("date_from must be on or before date_to")
+        if cls._count_buckets(granularity, start, end) > MAX_TIMESERIES_BUCKETS:
+            raise ValidationError(
+                f"Range too large for '{granularity}' granularity (max {MAX_TIMESERIES_BUCKETS} buckets)"
+            )
+
+    @staticmethod
+    def _count_buckets(granularity: str, start: date, end: date) -> int:
+        if granularity == "day":
+            return (end - start).days + 1
+        if granularity == "week":
+            # Weeks start on Monday, matching date_trunc('week', ...)
+            return ((end - start).days + start.weekday()) // 7 + 1
+        if granularity == "month":
+            return (end.year - start.year) * 12 + end.month - start.month + 1
+        return end.year - start.year + 1
+
+    @staticmethod
+    def _by_category_out(rows: list[dict]) -> list[ExpenseSummaryByCategoryResponse]:
+        return [
+            ExpenseSummaryByCategoryResponse(category=row["category"], total_amount=row["total"])
+            for row in rows
+        ]
+
+    @staticmethod
+    def _by_subcategory_out(rows: list[dict]) -> list[ExpenseSummaryBySubcategoryResponse]:
+        return [
+            ExpenseSummaryBySubcategoryResponse(
+                category=row["category"],
+                subcategory=row.get("subcategory"),
+                total_amount=row["total"],
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _by_payment_method_out(rows: list[dict]) -> list[ExpenseSummaryByPaymentMethodResponse]:
+        return [
+            ExpenseSummaryByPaymentMethodResponse(
+                payment_method=row.get("payment_method"),
+                total_amount=row["total"],
+            )
+            for row in rows
+        ]
+
+    def iter_expense_pages(
         self,
         user_id: str,
-        limit: int = 100,
-        offset: int = 0,
         expense_type: str | None = None,
         category: str | None = None,
         q: str | None = None,
@@ -30,12 +528,59 @@ class ExpenseService:
         date_to: str | None = None,
         sort_by: str = "created_at",
         sort_order: str = "desc",
-    ) -> ExpensesListOut:
-        """Get all active expenses for a user with pagination."""
-        expenses_data = self._expense_repo.find_all(
-            user_id,
-            limit=limit,
-            offset=offset,
+        page_size: int = EXPORT_PAGE_SIZE,
+    ) -> Iterator[list[dict]]:
+        """Yield every matching row, one keyset page at a time, without holding earlier pages."""
+        cursor = None
+        while True:
+            batch = self._fetch_page(
+                user_id=user_id,
+                limit=page_size,
+                expense_type=expense_type,
+                category=category,
+                q=q,
+                date_from=date_from,
+                date_to=date_to,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                cursor=cursor,
+            )
+            if not batch:
+                return
+
+            yield batch
+            if len(batch) < page_size:
+                return
+            cursor = self._expense_repo.encode_cursor(batch[-1], sort_by, sort_order)
+
+    @abstractmethod
+    def _fetch_page(self, **query) -> list[dict]:
+        """One find_all page for the export writers, which always run synchronously."""
+
+    def export_expenses_csv(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+    ) -> Iterator[str]:
+        """
+        Stream active expenses for a user as CSV text.
+
+        Yields one chunk per DB page; the first chunk carries the header and the
+        first page, so DB errors surface before any byte is sent. Memory stays
+        bounded by the page size regardless of history length.
+        """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(CSV_COLUMNS)
+
+        for batch in self.iter_expense_pages(
+            user_id=user_id,
             expense_type=expense_type,
             category=category,
             q=q,
@@ -43,17 +588,123 @@ class ExpenseService:
             date_to=date_to,
             sort_by=sort_by,
             sort_order=sort_order,
-        )
-        total = self._expense_repo.count_all(
-            user_id,
+        ):
+            for item in batch:
+                writer.writerow([item.get(column, "") for column in CSV_COLUMNS])
+
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+
+        # Header only (no rows) or nothing left after the last page
+        if output.tell():
+            yield output.getvalue()
+
+    def export_expenses(
+        self,
+        user_id: str,
+        export_format: str = "csv",
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+    ) -> Iterator[bytes]:
+        """
+        Stream active expenses in one of expense_export.EXPORT_FORMATS.
+
+        Same filters, ordering and page-by-page behaviour as export_expenses_csv.
+        NDJSON/Arrow/Parquet keep the column types (NUMERIC amount, DATE,
+        TIMESTAMPTZ) instead of flattening everything to text.
+        """
+        if export_format not in expense_export.EXPORT_FORMATS:
+            raise ValidationError(f"Unsupported export format: {export_format}")
+
+        filters = dict(
+            user_id=user_id,
             expense_type=expense_type,
             category=category,
             q=q,
             date_from=date_from,
             date_to=date_to,
+            sort_by=sort_by,
+            sort_order=sort_order,
+        )
+        if export_format == "csv":
+            return (chunk.encode("utf-8") for chunk in self.export_expenses_csv(**filters))
+
+        writers = {
+            "ndjson": expense_export.stream_ndjson,
+            "arrow": expense_export.stream_arrow,
+            "parquet": expense_export.stream_parquet,
+        }
+        return writers[export_format](self.iter_expense_pages(**filters), CSV_COLUMNS)
+
+
+class ExpenseService(ExpenseServiceBase):
+    """Manage all use cases related to expenses."""
+
+    def get_all_expenses(
+        self,
+        user_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        cursor: str | None = None,
+        count_mode: str = "exact",
+        search_mode: str = "ilike",
+        fields: list[str] | None = None,
+    ) -> ExpensesListOut:
+        """
+        Get all active expenses for a user with pagination.
+
+        Rows and total come back from a single repository call. Pass the
+        returned next_cursor back as cursor to fetch the following page with
+        keyset pagination; offset is ignored when cursor is set. Use
+        count_mode="none" when the caller does not show a total (total is None).
+
+        With q and search_mode="ranked" the full-text index is used and rows
+        are ordered by relevance (offset pagination, no next_cursor). Only if
+        it has no match at all does the ILIKE filter run instead, so matches
+        inside words are still found; an offset past the last ranked match
+        gives an empty ranked page with the ranked total.
+
+        fields selects a sparse fieldset: only those columns are read from the
+        DB and returned (as ExpensePartialOut).
+        """
+        query = self._list_query(
+            limit, offset, expense_type, category, q, date_from, date_to,
+            sort_by, sort_order, cursor, count_mode, search_mode, fields,
         )
-        expenses = [ExpenseOut.from_db(data) for data in expenses_data]
-        return ExpensesListOut(expenses=expenses, total=total)
+        if query.ranked:
+            rows, total = self._expense_repo.search(user_id, q, **query.search_args())
+            if query.past_last_match(total):
+                _, total = self._expense_repo.search(user_id, q, **query.search_args(limit=1, offset=0))
+            ranked = self._ranked_out(rows, total, query)
+            if ranked is not None:
+                return ranked
+
+        expenses_data, total = self._expense_repo.find_page(user_id, **query.page_args())
+        if query.counts_separately:
+            total = self._expense_repo.count_all(user_id, **query.filters)
+
+        return self._page_out(expenses_data, total, query)
+
+    def get_data_version(self, user_id: str) -> int:
+        """
+        Version of the user's expense data; changes whenever any of their expenses
+        is created, updated or deleted (kept by a DB trigger, so bulk writes,
+        imports and the bot are covered too).
+        """
+        return self._expense_repo.get_data_version(user_id)
 
     def get_expense_by_id(self, user_id: str, expense_id: str) -> ExpenseOut:
         """Get a single active expense by its ID."""
@@ -62,61 +713,129 @@ class ExpenseService:
 
     def create_expense(self, user_id: str, request: CreateExpenseRequest) -> ExpenseOut:
         """Create a new expense."""
-        expense_data = {
-            "user_id":          user_id,
-            "amount":           request.amount,
-            "type":             request.type,
-            "description":      request.description,
-            "category":         request.category,
-            "subcategory":      request.subcategory,
-            "payment_method":   request.payment_method,
-        }
-
-        if request.transaction_date is not None:
-            expense_data["transaction_date"] = request.transaction_date
+        expense_data = self._to_insert_row(user_id, request)
 
         created_expense = self._expense_repo.create(expense_data)
 
-        self._embed_task_if_available(
-            expense_id=created_expense["id"],
-            amount=created_expense["amount"],
-            type=created_expense["type"],
-            description=created_expense["description"],
-            category=created_expense["category"],
-            subcategory=created_expense["subcategory"],
-            payment_method=created_expense["payment_method"],
-        )
+        self._embed_task_if_available(**self._embedding_fields(created_expense["id"], created_expense))
         return ExpenseOut.from_db(created_expense)
 
+    def create_expenses(self, user_id: str, items: list[dict]) -> BulkCreateExpenseResponse:
+        """
+        Create many expenses at once.
+
+        Every item is validated as CreateExpenseRequest on its own; valid items
+        are inserted BULK_INSERT_CHUNK_SIZE rows per INSERT and each inserted
+        chunk gets its embeddings from one batched API call. A chunk that the
+        DB rejects fails as a whole (one INSERT is one transaction).
+        """
+        results, valid = self._validate_bulk_items(user_id, items)
+
+        for chunk in self._chunks(valid):
+            try:
+                created = self._create_chunk([row for _, row in chunk])
+            except Exception as exc:
+                self._record_chunk(results, chunk, error=self._chunk_error(exc))
+                continue
+            self._record_chunk(results, chunk, created=created)
+
+        return self._bulk_create_out(results)
+
+    def import_expenses_csv(self, user_id: str, csv_file: IO[bytes]) -> ExpenseImportResponse:
+        """
+        Import expenses from a CSV file laid out like export_expenses_csv.
+
+        The file is read row by row; valid rows are inserted BULK_INSERT_CHUNK_SIZE
+        at a time, so memory is bounded by one chunk plus the error report
+        (capped at MAX_IMPORT_ERRORS lines). id, created_at and updated_at are
+        ignored so an export can be imported back as new rows.
+        """
+        report = ExpenseImportResponse(imported=0, failed=0, errors=[])
+        for chunk in self._read_import_chunks(user_id, csv_file, report):
+            try:
+                self._create_chunk([row for _, row in chunk])
+            except Exception as exc:
+                self._reject_import_chunk(report, chunk, exc)
+                continue
+            report.imported += len(chunk)
+        return report
+
+    def _create_chunk(self, rows: list[dict]) -> list[dict]:
+        """Insert one chunk with a single INSERT, then embed it with one batched call."""
+        created = self._expense_repo.create_many(rows)
+        if not self._queue_embeddings(created) and self._embedding_service is not None:
+            self._embedding_service.generate_for_expenses_batch_safe(created)
+        return created
+
     def update_expense(
         self,
         user_id: str,
         expense_id: str,
         request: UpdateExpenseRequest,
+        expected_updated_at: str | None = None,
     ) -> ExpenseOut:
-        """Partially update an existing expense."""
-        update_payload = request.to_update_dict()
+        """
+        Partially update an existing expense.
 
-        if not update_payload:
-            raise ValidationError("No field to update. Send at least one field.")
+        With expected_updated_at (from If-Match) the write only happens if the
+        row was not changed in the meantime; otherwise PreconditionFailedError.
+        """
+        update_payload = self._require_update_payload(request)
 
-        updated_expense = self._expense_repo.update(expense_id, user_id, update_payload)
+        updated_expense = self._expense_repo.update(
+            expense_id, user_id, update_payload, expected_updated_at=expected_updated_at,
+        )
         
-        if request.amount or request.type or request.description or request.category or request.subcategory or request.payment_method:
-            self._embed_task_if_available(
-                expense_id=expense_id,
-                amount=updated_expense["amount"],
-                type=updated_expense["type"],
-                description=updated_expense["description"],
-                category=updated_expense["category"],
-                subcategory=updated_expense["subcategory"],
-                payment_method=updated_expense["payment_method"],
-            )
+        if self._changes_embedding(request):
+            self._embed_task_if_available(**self._embedding_fields(expense_id, updated_expense))
         return ExpenseOut.from_db(updated_expense)
 
-    def delete_expense(self, user_id: str, expense_id: str) -> None: 
-        """Soft-delete an expense."""
-        self._expense_repo.delete(expense_id, user_id)
+    def delete_expense(self, user_id: str, expense_id: str, expected_updated_at: str | None = None) -> None:
+        """Soft-delete an expense, optionally only if it is unchanged since expected_updated_at."""
+        self._expense_repo.delete(expense_id, user_id, expected_updated_at=expected_updated_at)
+
+    def bulk_update_expenses(
+        self,
+        user_id: str,
+        request: UpdateExpenseRequest,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> BulkExpenseMutationResponse:
+        """
+        Apply the same partial update to every active expense matching the list filters.
+
+        Runs as one UPDATE; embeddings of the touched rows are refreshed
+        afterwards by the embedding queue, or without one in batches of
+        EMBEDDING_BATCH_SIZE via the task scheduler.
+        """
+        filters = self._require_bulk_filters(expense_type, category, q, date_from, date_to)
+        update_payload = self._require_update_payload(request)
+
+        updated = self._expense_repo.update_by_filter(user_id, update_payload, **filters)
+
+        for batch in self._embedding_batches(updated, update_payload):
+            self._schedule_task(self._embedding_service.generate_for_expenses_batch_safe, batch)
+        return BulkExpenseMutationResponse(
+            affected=len(updated),
+            ids=[str(row["id"]) for row in updated],
+        )
+
+    def bulk_delete_expenses(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> BulkExpenseMutationResponse:
+        """Soft-delete every active expense matching the list filters in one UPDATE."""
+        filters = self._require_bulk_filters(expense_type, category, q, date_from, date_to)
+        deleted_ids = self._expense_repo.soft_delete_by_filter(user_id, **filters)
+        return BulkExpenseMutationResponse(affected=len(deleted_ids), ids=deleted_ids)
 
     # =========================================================================
     # SUMMARY — 3 method terpisah sesuai yang dipanggil router
@@ -124,12 +843,7 @@ class ExpenseService:
 
     def get_expense_summary_all_time(self, user_id: str) -> ExpenseSummaryResponse:
         """Get all-time income/expense summary for a user."""
-        summary_data = self._expense_repo.get_summary_all_time(user_id)
-        return ExpenseSummaryResponse(
-            total_income=summary_data.get("total_income", 0.0),
-            total_expense=summary_data.get("total_expense", 0.0),
-            net_balance=summary_data.get("net_balance", 0.0),
-        )
+        return self._summary_out(self._expense_repo.get_summary_all_time(user_id))
 
     def get_expense_summary_by_month(
         self,
@@ -138,12 +852,7 @@ class ExpenseService:
         year: int,
     ) -> ExpenseSummaryResponse:
         """Get income/expense summary for a specific month and year."""
-        summary_data = self._expense_repo.get_summary_by_month(user_id, month, year)
-        return ExpenseSummaryResponse(
-            total_income=summary_data.get("total_income", 0.0),
-            total_expense=summary_data.get("total_expense", 0.0),
-            net_balance=summary_data.get("net_balance", 0.0),
-        )
+        return self._summary_out(self._expense_repo.get_summary_by_month(user_id, month, year))
 
     def get_expense_summary_by_year(
         self,
@@ -151,39 +860,106 @@ class ExpenseService:
         year: int,
     ) -> ExpenseSummaryResponse:
         """Get income/expense summary for a specific year."""
-        summary_data = self._expense_repo.get_summary_by_year(user_id, year)
-        return ExpenseSummaryResponse(
-            total_income=summary_data.get("total_income", 0.0),
-            total_expense=summary_data.get("total_expense", 0.0),
-            net_balance=summary_data.get("net_balance", 0.0),
-        )
-    
-    def _embed_task_if_available(
+        return self._summary_out(self._expense_repo.get_summary_by_year(user_id, year))
+
+    def get_expense_timeseries(
         self,
-        expense_id: str,
-        amount: float,
-        type: str,
-        description: str = None,
-        category: str = None,
-        subcategory: str = None,
-        payment_method: str = None
-    ) -> None:
-        """Helper method to trigger embedding generation if the embedding service is available."""
-        if self._embedding_service is None:
+        user_id: str,
+        granularity: str,
+        date_from: str,
+        date_to: str,
+    ) -> list[ExpenseSummaryByPeriodResponse]:
+        """
+        Get a dense income/expense series for a date range.
+
+        Every bucket between date_from and date_to is returned, empty ones as
+        zeros, so a trend chart needs a single call.
+        """
+        self._check_timeseries_range(granularity, date_from, date_to)
+        rows = self._expense_repo.get_timeseries(user_id, granularity, date_from, date_to)
+        return [ExpenseSummaryByPeriodResponse(**row) for row in rows]
+
+    # =========================================================================
+    # BREAKDOWN — GROUP BY di database, satu query per chart
+    # =========================================================================
+
+    def get_expense_summary_by_category(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[ExpenseSummaryByCategoryResponse]:
+        """Get total amount per category, largest first."""
+        rows = self._expense_repo.get_breakdown(user_id, "category", expense_type, date_from, date_to)
+        return self._by_category_out(rows)
+
+    def get_expense_summary_by_subcategory(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[ExpenseSummaryBySubcategoryResponse]:
+        """Get total amount per (category, subcategory), largest first."""
+        rows = self._expense_repo.get_breakdown(user_id, "subcategory", expense_type, date_from, date_to)
+        return self._by_subcategory_out(rows)
+
+    def get_expense_summary_by_payment_method(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[ExpenseSummaryByPaymentMethodResponse]:
+        """Get total amount per payment method, largest first."""
+        rows = self._expense_repo.get_breakdown(user_id, "payment_method", expense_type, date_from, date_to)
+        return self._by_payment_method_out(rows)
+
+    def _embed_task_if_available(self, **expense) -> None:
+        """Queue the expense (_embedding_fields) for embedding, or embed it inline without a queue."""
+        if self._queue_embedding(expense) or self._embedding_service is None:
             return
-        self._embedding_service.generate_for_expenses_safe(
-            expense_id=expense_id,
-            amount=amount,
-            type=type,
-            description=description,
-            category=category,
-            subcategory=subcategory,
-            payment_method=payment_method,
-        )
+        self._embedding_service.generate_for_expenses_safe(**expense)
 
-    def export_expenses_csv(
+    def _fetch_page(self, **query) -> list[dict]:
+        return self._expense_repo.find_all(**query)
+
+
+class AsyncExpenseService(ExpenseServiceBase):
+    """
+    Async sibling of ExpenseService, on AsyncExpenseRepository (and AsyncEmbeddingService).
+
+    Same use cases, and the validation and responses of ExpenseServiceBase;
+    every DB and embedding round trip is awaited instead of blocking the
+    event loop. The streaming export
+    and CSV import keep their sync writers/parsers: export runs in the worker
+    thread that iterates the StreamingResponse and fetches each page back on
+    the loop; import parses in a worker thread one chunk at a time.
+    """
+
+    def __init__(
+        self,
+        expense_repo: AsyncExpenseRepository,
+        embedding_service=None,
+        schedule_task: Callable[..., None] | None = None,
+        embedding_queue=None,
+    ):
+        super().__init__(expense_repo, embedding_service, schedule_task, embedding_queue)
+        self._deferred = schedule_task
+
+    async def _run_deferred(self, func: Callable, *args) -> None:
+        """Hand func to the task scheduler, or await it inline without one."""
+        if self._deferred is None:
+            await func(*args)
+        else:
+            self._deferred(func, *args)
+
+    async def get_all_expenses(
         self,
         user_id: str,
+        limit: int = 100,
+        offset: int = 0,
         expense_type: str | None = None,
         category: str | None = None,
         q: str | None = None,
@@ -191,60 +967,201 @@ class ExpenseService:
         date_to: str | None = None,
         sort_by: str = "created_at",
         sort_order: str = "desc",
-    ) -> str:
-        """Export active expenses for a user as CSV text."""
-        rows: list[dict] = []
-        limit = 1000
-        offset = 0
+        cursor: str | None = None,
+        count_mode: str = "exact",
+        search_mode: str = "ilike",
+        fields: list[str] | None = None,
+    ) -> ExpensesListOut:
+        """See ExpenseService.get_all_expenses."""
+        query = self._list_query(
+            limit, offset, expense_type, category, q, date_from, date_to,
+            sort_by, sort_order, cursor, count_mode, search_mode, fields,
+        )
+        if query.ranked:
+            rows, total = await self._expense_repo.search(user_id, q, **query.search_args())
+            if query.past_last_match(total):
+                _, total = await self._expense_repo.search(user_id, q, **query.search_args(limit=1, offset=0))
+            ranked = self._ranked_out(rows, total, query)
+            if ranked is not None:
+                return ranked
 
-        while True:
-            batch = self._expense_repo.find_all(
-                user_id=user_id,
-                limit=limit,
-                offset=offset,
-                expense_type=expense_type,
-                category=category,
-                q=q,
-                date_from=date_from,
-                date_to=date_to,
-                sort_by=sort_by,
-                sort_order=sort_order,
-            )
-            if not batch:
-                break
+        expenses_data, total = await self._expense_repo.find_page(user_id, **query.page_args())
+        if query.counts_separately:
+            total = await self._expense_repo.count_all(user_id, **query.filters)
 
-            rows.extend(batch)
-            if len(batch) < limit:
-                break
-            offset += limit
+        return self._page_out(expenses_data, total, query)
 
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([
-            "id",
-            "amount",
-            "type",
-            "category",
-            "subcategory",
-            "payment_method",
-            "description",
-            "transaction_date",
-            "created_at",
-            "updated_at",
-        ])
-
-        for item in rows:
-            writer.writerow([
-                item.get("id", ""),
-                item.get("amount", ""),
-                item.get("type", ""),
-                item.get("category", ""),
-                item.get("subcategory", ""),
-                item.get("payment_method", ""),
-                item.get("description", ""),
-                item.get("transaction_date", ""),
-                item.get("created_at", ""),
-                item.get("updated_at", ""),
-            ])
-
-        return output.getvalue()
+    async def get_data_version(self, user_id: str) -> int:
+        """See ExpenseService.get_data_version."""
+        return await self._expense_repo.get_data_version(user_id)
+
+    async def get_expense_by_id(self, user_id: str, expense_id: str) -> ExpenseOut:
+        """Get a single active expense by its ID."""
+        return ExpenseOut.from_db(await self._expense_repo.find_by_id(expense_id, user_id))
+
+    async def create_expense(self, user_id: str, request: CreateExpenseRequest) -> ExpenseOut:
+        """Create a new expense."""
+        created_expense = await self._expense_repo.create(self._to_insert_row(user_id, request))
+        await self._embed_task_if_available(**self._embedding_fields(created_expense["id"], created_expense))
+        return ExpenseOut.from_db(created_expense)
+
+    async def create_expenses(self, user_id: str, items: list[dict]) -> BulkCreateExpenseResponse:
+        """See ExpenseService.create_expenses."""
+        results, valid = self._validate_bulk_items(user_id, items)
+
+        for chunk in self._chunks(valid):
+            try:
+                created = await self._create_chunk([row for _, row in chunk])
+            except Exception as exc:
+                self._record_chunk(results, chunk, error=self._chunk_error(exc))
+                continue
+            self._record_chunk(results, chunk, created=created)
+
+        return self._bulk_create_out(results)
+
+    async def import_expenses_csv(self, user_id: str, csv_file: IO[bytes]) -> ExpenseImportResponse:
+        """
+        See ExpenseService.import_expenses_csv. Parsing (file reads and row
+        validation) runs in a worker thread, one chunk per hop; each chunk is
+        then inserted from the event loop.
+        """
+        report = ExpenseImportResponse(imported=0, failed=0, errors=[])
+        chunks = self._read_import_chunks(user_id, csv_file, report)
+        while (chunk := await anyio.to_thread.run_sync(next, chunks, None)) is not None:
+            try:
+                await self._create_chunk([row for _, row in chunk])
+            except Exception as exc:
+                self._reject_import_chunk(report, chunk, exc)
+                continue
+            report.imported += len(chunk)
+        return report
+
+    async def _create_chunk(self, rows: list[dict]) -> list[dict]:
+        created = await self._expense_repo.create_many(rows)
+        if not self._queue_embeddings(created) and self._embedding_service is not None:
+            await self._embedding_service.generate_for_expenses_batch_safe(created)
+        return created
+
+    async def update_expense(
+        self,
+        user_id: str,
+        expense_id: str,
+        request: UpdateExpenseRequest,
+        expected_updated_at: str | None = None,
+    ) -> ExpenseOut:
+        """See ExpenseService.update_expense."""
+        update_payload = self._require_update_payload(request)
+        updated_expense = await self._expense_repo.update(
+            expense_id, user_id, update_payload, expected_updated_at=expected_updated_at,
+        )
+        if self._changes_embedding(request):
+            await self._embed_task_if_available(**self._embedding_fields(expense_id, updated_expense))
+        return ExpenseOut.from_db(updated_expense)
+
+    async def delete_expense(self, user_id: str, expense_id: str, expected_updated_at: str | None = None) -> None:
+        """See ExpenseService.delete_expense."""
+        await self._expense_repo.delete(expense_id, user_id, expected_updated_at=expected_updated_at)
+
+    async def bulk_update_expenses(
+        self,
+        user_id: str,
+        request: UpdateExpenseRequest,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> BulkExpenseMutationResponse:
+        """See ExpenseService.bulk_update_expenses."""
+        filters = self._require_bulk_filters(expense_type, category, q, date_from, date_to)
+        update_payload = self._require_update_payload(request)
+
+        updated = await self._expense_repo.update_by_filter(user_id, update_payload, **filters)
+
+        for batch in self._embedding_batches(updated, update_payload):
+            await self._run_deferred(self._embedding_service.generate_for_expenses_batch_safe, batch)
+        return BulkExpenseMutationResponse(
+            affected=len(updated),
+            ids=[str(row["id"]) for row in updated],
+        )
+
+    async def bulk_delete_expenses(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        category: str | None = None,
+        q: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> BulkExpenseMutationResponse:
+        """See ExpenseService.bulk_delete_expenses."""
+        filters = self._require_bulk_filters(expense_type, category, q, date_from, date_to)
+        deleted_ids = await self._expense_repo.soft_delete_by_filter(user_id, **filters)
+        return BulkExpenseMutationResponse(affected=len(deleted_ids), ids=deleted_ids)
+
+    async def get_expense_summary_all_time(self, user_id: str) -> ExpenseSummaryResponse:
+        """Get all-time income/expense summary for a user."""
+        return self._summary_out(await self._expense_repo.get_summary_all_time(user_id))
+
+    async def get_expense_summary_by_month(self, user_id: str, month: int, year: int) -> ExpenseSummaryResponse:
+        """Get income/expense summary for a specific month and year."""
+        return self._summary_out(await self._expense_repo.get_summary_by_month(user_id, month, year))
+
+    async def get_expense_summary_by_year(self, user_id: str, year: int) -> ExpenseSummaryResponse:
+        """Get income/expense summary for a specific year."""
+        return self._summary_out(await self._expense_repo.get_summary_by_year(user_id, year))
+
+    async def get_expense_timeseries(
+        self,
+        user_id: str,
+        granularity: str,
+        date_from: str,
+        date_to: str,
+    ) -> list[ExpenseSummaryByPeriodResponse]:
+        """See ExpenseService.get_expense_timeseries."""
+        self._check_timeseries_range(granularity, date_from, date_to)
+        rows = await self._expense_repo.get_timeseries(user_id, granularity, date_from, date_to)
+        return [ExpenseSummaryByPeriodResponse(**row) for row in rows]
+
+    async def get_expense_summary_by_category(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[ExpenseSummaryByCategoryResponse]:
+        """Get total amount per category, largest first."""
+        rows = await self._expense_repo.get_breakdown(user_id, "category", expense_type, date_from, date_to)
+        return self._by_category_out(rows)
+
+    async def get_expense_summary_by_subcategory(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[ExpenseSummaryBySubcategoryResponse]:
+        """Get total amount per (category, subcategory), largest first."""
+        rows = await self._expense_repo.get_breakdown(user_id, "subcategory", expense_type, date_from, date_to)
+        return self._by_subcategory_out(rows)
+
+    async def get_expense_summary_by_payment_method(
+        self,
+        user_id: str,
+        expense_type: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+    ) -> list[ExpenseSummaryByPaymentMethodResponse]:
+        """Get total amount per payment method, largest first."""
+        rows = await self._expense_repo.get_breakdown(user_id, "payment_method", expense_type, date_from, date_to)
+        return self._by_payment_method_out(rows)
+
+    async def _embed_task_if_available(self, **expense) -> None:
+        # Queueing never blocks the event loop
+        if self._queue_embedding(expense) or self._embedding_service is None:
+            return
+        await self._embedding_service.generate_for_expenses_safe(**expense)
+
+    def _fetch_page(self, **query) -> list[dict]:
+        # Called from the worker thread driving the sync export writers
+        return anyio.from_thread.run(partial(self._expense_repo.find_all, **query))
@@ -2,7 +2,7 @@ import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from app.repositories.profile_repository import ProfileRepository
+from app.repositories.profile_repository import AsyncProfileRepository, ProfileRepository
 from app.models.profile import GenerateConnectCodeResponse, ProfileOut, UpdateProfileRequest
 from app.models.auth import MessageOut
 from app.core.exceptions import AuthenticationError, NotFoundError, ValidationError
@@ -47,17 +47,7 @@ class ProfileService:
         try:
             # check if profile exist
             self._profile_repo.find_by_user_id(user_id)
-            # validate update data
-            try:
-                update_request_dict = update_request.to_update_dict()
-            except ValueError as e:
-                raise ValidationError(str(e))
-            
-            if not update_request_dict:
-                raise ValidationError("No valid fields to update")
-            
-            # add updated_at field
-            update_request_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+            update_request_dict = self._update_values(update_request)
             
             # update profile data
             updated_profile_data = self._profile_repo.update(user_id, update_request_dict)
@@ -65,6 +55,21 @@ class ProfileService:
         except NotFoundError:
             raise
 
+    @staticmethod
+    def _update_values(update_request: UpdateProfileRequest) -> dict:
+        """validated update dict plus updated_at."""
+        try:
+            update_request_dict = update_request.to_update_dict()
+        except ValueError as e:
+            raise ValidationError(str(e))
+        
+        if not update_request_dict:
+            raise ValidationError("No valid fields to update")
+        
+        # add updated_at field
+        update_request_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
+        return update_request_dict
+
     def link_telegram(self, user_id: str, telegram_chat_id: str) -> MessageOut:
         """
         use case: connect telegram account with account
@@ -74,9 +79,7 @@ class ProfileService:
         2. Bot handler (when user link from bot)
         """
         profile = self._profile_repo.find_by_user_id(user_id)
-
-        if profile.get("telegram_chat_id") == telegram_chat_id:
-            raise ValidationError("Telegram account is already linked to this profile")
+        self._check_not_linked_yet(profile, telegram_chat_id)
         
         self._profile_repo.link_telegram(user_id, telegram_chat_id)
 
@@ -84,6 +87,11 @@ class ProfileService:
             message="Telegram account linked successfully"
         )
     
+    @staticmethod
+    def _check_not_linked_yet(profile: dict, telegram_chat_id: str) -> None:
+        if profile.get("telegram_chat_id") == telegram_chat_id:
+            raise ValidationError("Telegram account is already linked to this profile")
+
     def unlink_telegram(self, user_id: str) -> MessageOut:
         """ use case: disconnect telegram account from account"""
         self._profile_repo.unlink_telegram(user_id)
@@ -114,8 +122,7 @@ class ProfileService:
         2. code must have expiry time (after expiry time, the code is invalid)
         3. format of code is "MYJARVIS-" + 6 random uppercase letters or digits
         """
-        code = _generate_code()
-        expires_at = (datetime.now(timezone.utc) + timedelta(minutes=CODE_EXPIRY_MINUTES)).isoformat()
+        code, expires_at = self._new_connect_code()
 
         self._profile_repo.save_connect_code(
             user_id=user_id,
@@ -128,6 +135,12 @@ class ProfileService:
             expires_in_minutes=CODE_EXPIRY_MINUTES
         )
     
+    @staticmethod
+    def _new_connect_code() -> tuple[str, str]:
+        """fresh code and its expiry time (ISO format)."""
+        expires_at = (datetime.now(timezone.utc) + timedelta(minutes=CODE_EXPIRY_MINUTES)).isoformat()
+        return _generate_code(), expires_at
+
     def verify_and_link_telegram(
         self,
         code: str,
@@ -148,7 +161,19 @@ class ProfileService:
         """
         normalized_code = code.strip().upper()
         profile = self._profile_repo.find_by_connect_code(normalized_code)
+        self._check_connect_code(profile)
+
+        # link telegram account and invalidate the code
+        self._profile_repo.consume_connect_code(
+            user_id=str(profile["id"]),
+            telegram_chat_id=telegram_chat_id
+        )
 
+        return self._linked_message(profile)
+
+    @staticmethod
+    def _check_connect_code(profile: Optional[dict]) -> None:
+        """raise AuthenticationError unless a profile was found for the code and the code is not expired."""
         if not profile:
             raise AuthenticationError("Invalid or expired connect code")
         
@@ -165,14 +190,70 @@ class ProfileService:
             except ValueError:
                 raise AuthenticationError("Invalid or expired connect code")
 
-        # link telegram account and invalidate the code
-        self._profile_repo.consume_connect_code(
-            user_id=str(profile["id"]),
-            telegram_chat_id=telegram_chat_id
-        )
-
+    @staticmethod
+    def _linked_message(profile: dict) -> MessageOut:
         display_name = profile.get("display_name") or "User"
 
         return MessageOut(
             message=f"Telegram account linked successfully for {display_name}"
-        )
\ No newline at end of file
+        )
+
+
+class AsyncProfileService(ProfileService):
+    """ProfileService on AsyncProfileRepository; same use cases, awaited."""
+
+    def __init__(self, profile_repo: AsyncProfileRepository):
+        super().__init__(profile_repo=profile_repo)
+
+    async def get_profile(self, user_id: str) -> ProfileOut:
+        """get profile data by user_id."""
+        return ProfileOut.from_db(await self._profile_repo.find_by_user_id(user_id))
+
+    async def update_profile(self, user_id: str, update_request: UpdateProfileRequest) -> ProfileOut:
+        """update profile data by user_id and update_request."""
+        await self._profile_repo.find_by_user_id(user_id)
+        update_request_dict = self._update_values(update_request)
+        return ProfileOut.from_db(await self._profile_repo.update(user_id, update_request_dict))
+
+    async def link_telegram(self, user_id: str, telegram_chat_id: str) -> MessageOut:
+        """use case: connect telegram account with account"""
+        profile = await self._profile_repo.find_by_user_id(user_id)
+        self._check_not_linked_yet(profile, telegram_chat_id)
+        await self._profile_repo.link_telegram(user_id, telegram_chat_id)
+        return MessageOut(
+            message="Telegram account linked successfully"
+        )
+
+    async def unlink_telegram(self, user_id: str) -> MessageOut:
+        """use case: disconnect telegram account from account"""
+        await self._profile_repo.unlink_telegram(user_id)
+        return MessageOut(
+            message="Telegram account unlinked successfully"
+        )
+
+    async def get_user_by_telegram_id(self, telegram_chat_id: int) -> Optional[str]:
+        """find user id by telegram_chat_id, if not found return None."""
+        return await self._profile_repo.find_by_telegram_id(telegram_chat_id)
+
+    async def generate_connect_code(self, user_id: str) -> GenerateConnectCodeResponse:
+        """Use case: generate and save a connect code for linking telegram account."""
+        code, expires_at = self._new_connect_code()
+        await self._profile_repo.save_connect_code(
+            user_id=user_id,
+            code=code,
+            expires_at=expires_at
+        )
+        return GenerateConnectCodeResponse(
+            code=code,
+            expires_in_minutes=CODE_EXPIRY_MINUTES
+        )
+
+    async def verify_and_link_telegram(self, code: str, telegram_chat_id: int) -> MessageOut:
+        """Use case: verify code and link telegram account."""
+        profile = await self._profile_repo.find_by_connect_code(code.strip().upper())
+        self._check_connect_code(profile)
+        await self._profile_repo.consume_connect_code(
+            user_id=str(profile["id"]),
+            telegram_chat_id=telegram_chat_id
+        )
+        return self._linked_message(profile)
@@ -0,0 +1,114 @@
+"""
+Script untuk mengisi / membuat ulang embedding transaksi.
+
+Transaksi tanpa embedding (dibuat sebelum ada embedding, atau embedding-nya
+gagal dan hanya di-log) tidak pernah ditemukan match_expense. Script ini
+memindai transaksi aktif urut ID, membuat embedding per batch besar, dan
+menyimpan checkpoint supaya bisa dilanjutkan kalau dihentikan.
+
+Mode:
+    missing  transaksi yang embedding-nya masih NULL (default)
+    stale    missing + embedding dari model lain / model tidak tercatat
+             → jalankan setelah OPENAI_EMBEDDING_MODEL diganti. Embedding
+               yang dibuat sebelum migrasi 0006 tidak punya nama model,
+               jadi ikut dibuat ulang sekali.
+    all      semua transaksi aktif
+
+Jalankan:
+    python backfill_embeddings.py                                 # isi yang kosong
+    python backfill_embeddings.py --mode stale --rpm 500          # re-embed setelah ganti model
+    python backfill_embeddings.py --batch-size 1000 --concurrency 8
+    python backfill_embeddings.py --restart                       # abaikan checkpoint
+
+Checkpoint default: .embedding_backfill.json (dihapus setelah selesai).
+Exit code 1 jika ada batch yang tetap gagal setelah retry — jalankan lagi
+untuk melanjutkan dari checkpoint.
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Pastikan folder backend ada di Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.embedding_cache import get_embedding_cache_if_enabled
+from app.infrastructure.openai_client import get_openai_client
+from app.infrastructure.supabase_client import get_admin_supabase_client
+from app.repositories.ai_repository import AIRepository
+from app.services.embedding_backfill import CheckpointStore, EmbeddingBackfill
+from app.services.embedding_services import EmbeddingService
+
+# Batas input per request embeddings OpenAI
+MAX_BATCH_SIZE = 2048
+
+
+def _batch_size(value: str) -> int:
+    size = int(value)
+    if not 1 <= size <= MAX_BATCH_SIZE:
+        raise argparse.ArgumentTypeError(f"must be between 1 and {MAX_BATCH_SIZE}")
+    return size
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def main(
+    argv: list[str] | None = None,
+    repo: AIRepository | None = None,
+    embedding_service: EmbeddingService | None = None,
+) -> int:
+    parser = argparse.ArgumentParser(description="Backfill or re-embed expense embeddings.")
+    parser.add_argument("--mode", choices=AIRepository.BACKLOG_MODES, default="missing")
+    parser.add_argument("--batch-size", type=_batch_size, default=500, help="Expenses per embeddings request.")
+    parser.add_argument("--concurrency", type=_positive_int, default=4, help="Batches in flight at once.")
+    parser.add_argument("--rpm", type=float, default=0, help="Max embeddings requests per minute (0 = no limit).")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries per failed batch.")
+    parser.add_argument("--limit", type=_positive_int, default=None, help="Stop after this many expenses.")
+    parser.add_argument("--checkpoint", default=str(backend_dir / ".embedding_backfill.json"))
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Service role wajib — save_expense_embeddings hanya bisa dipanggil service_role
+    repo = repo or AIRepository(client=get_admin_supabase_client())
+    embedding_service = embedding_service or EmbeddingService(
+        openai_client=get_openai_client(), ai_repo=repo, embedding_cache=get_embedding_cache_if_enabled(),
+    )
+
+    checkpoint = CheckpointStore(args.checkpoint)
+    if args.restart:
+        checkpoint.clear()
+
+    result = EmbeddingBackfill(
+        ai_repo=repo,
+        embedding_service=embedding_service,
+        mode=args.mode,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        max_retries=args.max_retries,
+        checkpoint=checkpoint,
+        max_rows=args.limit,
+    ).run()
+
+    print(
+        f"mode={result.mode} model={result.model}: embedded {result.embedded} expense(s) "
+        f"in {result.batches} batch(es), {result.failed} failed, {result.retries} retried."
+    )
+    if result.failed:
+        print(f"Checkpoint kept at {checkpoint.path} (after {result.last_id}); run again to retry the failed batches.")
+        return 1
+    if not result.completed:
+        print(f"Stopped at --limit; checkpoint at {checkpoint.path} (after {result.last_id}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
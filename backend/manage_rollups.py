@@ -0,0 +1,71 @@
+"""
+Script untuk memeriksa / membangun ulang tabel expense_monthly_rollups.
+
+Rollup dijaga otomatis oleh trigger di tabel expenses. Script ini dipakai
+setelah migrasi, restore data, atau jika curiga ada selisih.
+
+Jalankan:
+    python manage_rollups.py verify                 # cek semua user
+    python manage_rollups.py verify --user-id <id>  # cek satu user
+    python manage_rollups.py rebuild                # hitung ulang semua user
+    python manage_rollups.py rebuild --verify       # rebuild lalu cek ulang
+
+Exit code 1 jika verify menemukan selisih.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Pastikan folder backend ada di Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.infrastructure.supabase_client import get_admin_supabase_client
+from app.repositories.expense_repository import ExpenseRepository
+
+
+def _print_mismatches(mismatches: list[dict]) -> None:
+    for row in mismatches:
+        print(
+            f"  user={row['user_id']} month={row['month']} type={row['type']} "
+            f"category={row['category']} rollup={row['rollup_total']} ({row['rollup_count']}) "
+            f"actual={row['actual_total']} ({row['actual_count']})"
+        )
+
+
+def verify(repo: ExpenseRepository, user_id: str | None) -> int:
+    mismatches = repo.verify_rollups(user_id=user_id)
+    if not mismatches:
+        print("Rollups OK — no mismatches found.")
+        return 0
+
+    print(f"Found {len(mismatches)} mismatching rollup bucket(s):")
+    _print_mismatches(mismatches)
+    return 1
+
+
+def rebuild(repo: ExpenseRepository, user_id: str | None, then_verify: bool) -> int:
+    written = repo.rebuild_rollups(user_id=user_id)
+    print(f"Rebuilt {written} rollup bucket(s).")
+    if then_verify:
+        return verify(repo, user_id)
+    return 0
+
+
+def main(argv: list[str] | None = None, repo: ExpenseRepository | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify or rebuild expense_monthly_rollups.")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--user-id", default=None, help="Limit to a single user (UUID).")
+    parser.add_argument("--verify", action="store_true", help="Run verify after rebuild.")
+    args = parser.parse_args(argv)
+
+    # Service role wajib — fungsi verify/rebuild tidak bisa dipanggil user biasa
+    repo = repo or ExpenseRepository(client=get_admin_supabase_client())
+
+    if args.command == "verify":
+        return verify(repo, args.user_id)
+    return rebuild(repo, args.user_id, args.verify)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""Baseline: schema.sql
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+schema.sql dijalankan manual di SQL editor Supabase, jadi revisi ini
+tidak menjalankan apa-apa. Database yang sudah berisi schema.sql cukup
+ditandai dengan:
+
+    alembic stamp 0001
+
+lalu `alembic upgrade head` untuk revisi berikutnya. Database baru:
+jalankan schema.sql dulu, kemudian `alembic upgrade head`.
+
+Objek SQL yang ditambahkan setelah baseline (index, rpc, rollup, versi
+data, search) hanya ada di revisi 0002 dst.; schema.sql tinggal berisi
+pointer ke revisinya. Jadi kedua jalur di atas berakhir di skema yang
+sama, dan schema.sql tidak perlu (dan tidak bisa: CREATE POLICY gagal
+jika sudah ada) dijalankan ulang di database yang sudah ada.
+"""
+from typing import Sequence, Union
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,56 @@
+"""Partial composite indexes for active_expenses queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Semua query aplikasi lewat active_expenses (deleted_at IS NULL) dengan
+user_id = ?, lalu filter/urut berdasarkan created_at, transaction_date
+atau amount, dengan id sebagai tie-breaker keyset cursor. Index di bawah
+persis mengikuti bentuk itu sehingga:
+
+  - find_page / find_all: index scan berurutan, berhenti setelah LIMIT
+    (tanpa sort), termasuk halaman keyset berikutnya
+  - count_all: index-only scan pada index created_at
+  - get_expense_summary / breakdown / timeseries (day, week): range scan
+    transaction_date; type dan amount ikut di INCLUDE
+
+Index dibuat CONCURRENTLY agar tabel tetap bisa ditulis selama migrasi.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# name → (columns, INCLUDE columns)
+INDEXES = {
+    # ORDER BY created_at DESC, id DESC (default list, export, count); ASC = backward scan
+    "idx_expenses_active_user_created": ("user_id, created_at DESC, id DESC", None),
+    # ORDER BY transaction_date DESC NULLS LAST, id DESC + rentang tanggal summary;
+    # ASC NULLS FIRST = backward scan
+    "idx_expenses_active_user_txdate": ("user_id, transaction_date DESC NULLS LAST, id DESC", "type, amount"),
+    # ORDER BY amount DESC, id DESC; ASC = backward scan
+    "idx_expenses_active_user_amount": ("user_id, amount DESC, id DESC", None),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, (columns, include) in INDEXES.items():
+            include_sql = f" INCLUDE ({include})" if include else ""
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON public.expenses ({columns}){include_sql} "
+                f"WHERE deleted_at IS NULL"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS public.{name}")
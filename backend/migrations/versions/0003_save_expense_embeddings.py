@@ -0,0 +1,49 @@
+"""save_expense_embeddings rpc for batched embedding writes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+POST /expenses/bulk dan import CSV menyimpan embedding satu chunk sekaligus
+lewat AIRepository.save_embeddings → rpc save_expense_embeddings:
+
+  - embeddings_param: [{"id": "<uuid>", "embedding": [0.1, ...]}, ...]
+  - satu UPDATE ... FROM untuk semua row, bukan satu request per expense
+  - dipanggil dengan admin client → EXECUTE hanya untuk service_role
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SAVE_EMBEDDINGS = """
+CREATE OR REPLACE FUNCTION save_expense_embeddings(embeddings_param jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.expenses t
+    SET embedding = e.embedding
+    FROM jsonb_to_recordset(embeddings_param) AS e(id uuid, embedding vector(1536))
+    WHERE t.id = e.id
+    RETURNING t.id
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+REVOKE EXECUTE ON FUNCTION save_expense_embeddings(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT  EXECUTE ON FUNCTION save_expense_embeddings(jsonb) TO service_role;
+"""
+
+
+def upgrade() -> None:
+    op.execute(SAVE_EMBEDDINGS)
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS save_expense_embeddings(jsonb)")
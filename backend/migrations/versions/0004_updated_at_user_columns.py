@@ -0,0 +1,46 @@
+"""Bump updated_at only when a user-editable column changes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+ETag /expenses/{id} dibuat dari updated_at (app/core/etag.py), dan PATCH /
+DELETE dengan If-Match hanya jalan kalau updated_at masih sama. Trigger
+baseline menaikkan updated_at di SETIAP UPDATE, termasuk saat embedding
+disimpan tepat setelah create/patch → ETag yang baru dikembalikan langsung
+basi dan If-Match berikutnya 412.
+
+Trigger set_updated_at sekarang BEFORE UPDATE OF kolom yang diedit user
+saja. Menyimpan embedding tidak lagi mengubah updated_at.
+Kolom baru yang bisa diedit user harus ditambahkan ke UPDATED_AT_COLUMNS.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UPDATED_AT_COLUMNS = (
+    "user_id, amount, type, description, category, subcategory, "
+    "payment_method, transaction_date, deleted_at"
+)
+
+
+def upgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS set_updated_at ON public.expenses")
+    op.execute(
+        f"CREATE TRIGGER set_updated_at BEFORE UPDATE OF {UPDATED_AT_COLUMNS} ON public.expenses "
+        f"FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS set_updated_at ON public.expenses")
+    op.execute(
+        "CREATE TRIGGER set_updated_at BEFORE UPDATE ON public.expenses "
+        "FOR EACH ROW EXECUTE FUNCTION update_updated_at_column()"
+    )
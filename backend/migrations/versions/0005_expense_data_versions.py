@@ -0,0 +1,121 @@
+"""Per-user data version for list and summary ETags
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+expense_data_versions: versi data per user, naik setiap kali transaksi user
+berubah (insert / update kolom yang terlihat / soft delete / delete). API
+memakai versi ini + query params sebagai ETag list & summary: If-None-Match
+yang masih cocok dijawab 304 hanya dengan membaca satu row di sini, tanpa
+menyentuh tabel expenses.
+
+  - RLS: user hanya bisa membaca versinya sendiri; semua write lewat trigger
+    (SECURITY DEFINER)
+  - trigger per statement → bulk update 1000 row = 1 kenaikan; update yang
+    tidak mengubah kolom yang terlihat (misal: simpan embedding) dilewati
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DATA_VERSIONS = """
+CREATE TABLE IF NOT EXISTS public.expense_data_versions (
+    user_id    UUID        PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+    version    BIGINT      NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE public.expense_data_versions ENABLE ROW LEVEL SECURITY;
+
+-- User hanya bisa membaca; semua write lewat trigger (SECURITY DEFINER)
+DROP POLICY IF EXISTS "Users can view own data version" ON public.expense_data_versions;
+CREATE POLICY "Users can view own data version"
+    ON public.expense_data_versions
+    FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION public.bump_expense_data_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_user_ids uuid[];
+BEGIN
+    -- Transition table yang ada tergantung event → satu query per TG_OP
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT n.user_id) INTO v_user_ids FROM new_rows n;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT o.user_id) INTO v_user_ids FROM old_rows o;
+    ELSE
+        -- Update yang tidak mengubah kolom yang terlihat (misal: simpan embedding) dilewati
+        SELECT array_agg(DISTINCT u.user_id) INTO v_user_ids
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        CROSS JOIN LATERAL (VALUES (n.user_id), (o.user_id)) AS u(user_id)
+        WHERE (n.user_id, n.amount, n.type, n.description, n.category, n.subcategory,
+               n.payment_method, n.transaction_date, n.deleted_at)
+              IS DISTINCT FROM
+              (o.user_id, o.amount, o.type, o.description, o.category, o.subcategory,
+               o.payment_method, o.transaction_date, o.deleted_at);
+    END IF;
+
+    IF v_user_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO expense_data_versions AS v (user_id, version)
+    SELECT user_id, 1
+    FROM unnest(v_user_ids) AS user_id
+    ORDER BY user_id  -- urutan lock tetap → tidak deadlock antar bulk write
+    ON CONFLICT (user_id) DO UPDATE
+        SET version = v.version + 1,
+            updated_at = NOW();
+    RETURN NULL;
+END;
+$$;
+
+-- Transition table hanya boleh satu event per trigger → tiga trigger
+CREATE OR REPLACE TRIGGER bump_expense_data_version_insert
+    AFTER INSERT ON expenses
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_expense_data_version();
+
+CREATE OR REPLACE TRIGGER bump_expense_data_version_update
+    AFTER UPDATE ON expenses
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_expense_data_version();
+
+CREATE OR REPLACE TRIGGER bump_expense_data_version_delete
+    AFTER DELETE ON expenses
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_expense_data_version();
+"""
+
+TRIGGERS = (
+    "bump_expense_data_version_insert",
+    "bump_expense_data_version_update",
+    "bump_expense_data_version_delete",
+)
+
+
+def upgrade() -> None:
+    op.execute(DATA_VERSIONS)
+
+
+def downgrade() -> None:
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON public.expenses")
+    op.execute("DROP FUNCTION IF EXISTS public.bump_expense_data_version()")
+    op.execute("DROP TABLE IF EXISTS public.expense_data_versions")
@@ -0,0 +1,89 @@
+"""Track the embedding model per expense
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Untuk backfill / re-embed (backfill_embeddings.py):
+
+  - expenses.embedding_model: model OpenAI yang membuat embedding row ini.
+    NULL = belum ada embedding, atau dibuat sebelum kolom ini ada. Setelah
+    OPENAI_EMBEDDING_MODEL diganti, `--mode stale` menemukan row dengan
+    model lain dan membuat ulang embedding-nya.
+  - save_expense_embeddings(embeddings_param, model_param): menyimpan
+    vector sekaligus nama modelnya (fungsi lama 1 argumen di-drop supaya
+    panggilan RPC tidak ambigu).
+  - index partial untuk row aktif tanpa embedding: scan keyset backfill
+    (ORDER BY id) berhenti setelah LIMIT tanpa membaca row yang sudah beres.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SAVE_EMBEDDINGS_WITH_MODEL = """
+CREATE OR REPLACE FUNCTION save_expense_embeddings(embeddings_param jsonb, model_param text DEFAULT NULL)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.expenses t
+    SET embedding = e.embedding,
+        embedding_model = model_param
+    FROM jsonb_to_recordset(embeddings_param) AS e(id uuid, embedding vector(1536))
+    WHERE t.id = e.id
+    RETURNING t.id
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+REVOKE EXECUTE ON FUNCTION save_expense_embeddings(jsonb, text) FROM PUBLIC, anon, authenticated;
+GRANT  EXECUTE ON FUNCTION save_expense_embeddings(jsonb, text) TO service_role;
+"""
+
+# Versi migrasi 0003 (dipakai downgrade)
+SAVE_EMBEDDINGS = """
+CREATE OR REPLACE FUNCTION save_expense_embeddings(embeddings_param jsonb)
+RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.expenses t
+    SET embedding = e.embedding
+    FROM jsonb_to_recordset(embeddings_param) AS e(id uuid, embedding vector(1536))
+    WHERE t.id = e.id
+    RETURNING t.id
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
+
+REVOKE EXECUTE ON FUNCTION save_expense_embeddings(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT  EXECUTE ON FUNCTION save_expense_embeddings(jsonb) TO service_role;
+"""
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE public.expenses ADD COLUMN IF NOT EXISTS embedding_model text")
+
+    op.execute("DROP FUNCTION IF EXISTS save_expense_embeddings(jsonb)")
+    op.execute(SAVE_EMBEDDINGS_WITH_MODEL)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expenses_embedding_missing "
+            "ON public.expenses (id) WHERE embedding IS NULL AND deleted_at IS NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS public.idx_expenses_embedding_missing")
+
+    op.execute("DROP FUNCTION IF EXISTS save_expense_embeddings(jsonb, text)")
+    op.execute(SAVE_EMBEDDINGS)
+    op.execute("ALTER TABLE public.expenses DROP COLUMN IF EXISTS embedding_model")
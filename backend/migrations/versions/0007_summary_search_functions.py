@@ -0,0 +1,514 @@
+"""Summary, breakdown, time series, monthly rollups and ranked search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+Objek SQL yang dipakai endpoint summary, breakdown, timeseries dan
+pencarian ranked. Sebelumnya hanya ada di schema.sql, jadi database yang
+mengikuti jalur `alembic stamp 0001` → `alembic upgrade head` tidak pernah
+mendapatkannya:
+
+  - search_vector (kolom generated) + index GIN + search_expenses
+  - get_expense_summary / get_expense_breakdown (rentang tanggal bebas)
+  - expense_monthly_rollups + trigger + get_expense_summary_from_rollups,
+    get_expense_timeseries, verify/rebuild (hanya service role)
+
+Semua statement idempotent (IF NOT EXISTS / OR REPLACE), jadi aman untuk
+database yang sudah menjalankan bagian ini dari schema.sql versi lama.
+
+Trigger rollup hanya mencatat perubahan sejak dibuat, jadi upgrade
+langsung mengisi rollup dari transaksi yang sudah ada
+(rebuild_expense_monthly_rollups) — summary tidak pernah membaca rollup
+yang kosong. Rebuild memegang SHARE lock di expenses sampai migrasi
+selesai: write ke expenses menunggu, read tetap jalan.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH = """
+-- =============================================
+-- FULL-TEXT SEARCH (filter q)
+-- search_vector = category/subcategory (bobot A) + description (B),
+-- config 'simple' (Postgres tidak punya kamus bahasa Indonesia;
+-- tanpa stemming, cukup lowercase + tokenisasi).
+-- Kolom generated → selalu sinkron tanpa trigger.
+-- =============================================
+ALTER TABLE public.expenses ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(category, '') || ' ' || coalesce(subcategory, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_expenses_search_vector
+    ON public.expenses USING gin (search_vector);
+
+-- Cari transaksi dengan keyword, urut relevansi (ts_rank_cd).
+-- Setiap kata dicocokkan sebagai prefix ("kop" → "kopi"), semua kata wajib ada.
+-- total_count = jumlah seluruh hasil (sebelum limit/offset) dalam satu query.
+-- Contoh: SELECT * FROM search_expenses('uuid-user', 'kopi susu');
+CREATE OR REPLACE FUNCTION search_expenses(
+  user_id_param     uuid,
+  query_param       text,
+  type_param        varchar(10) DEFAULT NULL,
+  category_param    text DEFAULT NULL,
+  date_from_param   date DEFAULT NULL,
+  date_to_param     date DEFAULT NULL,
+  limit_param       int  DEFAULT 100,
+  offset_param      int  DEFAULT 0
+)
+RETURNS TABLE (
+  id               uuid,
+  amount           numeric(15, 2),
+  type             varchar(10),
+  description      text,
+  category         varchar(50),
+  subcategory      varchar(50),
+  payment_method   varchar(50),
+  transaction_date date,
+  created_at       timestamptz,
+  updated_at       timestamptz,
+  rank             real,
+  total_count      bigint
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH query AS (
+    -- Hanya huruf/angka yang dipakai, jadi input user tidak bisa
+    -- menyisipkan operator tsquery (&, |, !, :)
+    SELECT to_tsquery('simple', string_agg(quote_literal(word) || ':*', ' & ')) AS tsq
+    FROM regexp_split_to_table(lower(query_param), '[^[:alnum:]]+') AS word
+    WHERE word <> ''
+  )
+  SELECT
+    t.id,
+    t.amount,
+    t.type,
+    t.description,
+    t.category,
+    t.subcategory,
+    t.payment_method,
+    t.transaction_date,
+    t.created_at,
+    t.updated_at,
+    ts_rank_cd(t.search_vector, q.tsq) AS rank,
+    COUNT(*) OVER () AS total_count
+  FROM public.expenses t, query q
+  WHERE t.user_id = user_id_param
+    AND t.deleted_at IS NULL
+    AND t.search_vector @@ q.tsq
+    AND (type_param      IS NULL OR t.type = type_param)
+    AND (category_param  IS NULL OR t.category ILIKE '%' || category_param || '%')
+    AND (date_from_param IS NULL OR t.transaction_date >= date_from_param)
+    AND (date_to_param   IS NULL OR t.transaction_date <= date_to_param)
+  ORDER BY rank DESC, t.created_at DESC, t.id DESC
+  LIMIT limit_param
+  OFFSET offset_param;
+$$;
+"""
+
+AGGREGATES = """
+-- =============================================
+-- FUNCTION: summary aggregation
+-- SUM dihitung di Postgres, bukan di Python — PostgREST
+-- hanya mengirim maksimal satu row per type.
+-- Rentang tanggal inklusif; NULL = tanpa batas.
+-- Contoh: SELECT * FROM get_expense_summary('uuid-user', '2024-01-01', '2024-12-31');
+-- =============================================
+CREATE OR REPLACE FUNCTION get_expense_summary(
+  user_id_param     uuid,
+  date_from_param   date DEFAULT NULL,
+  date_to_param     date DEFAULT NULL
+)
+RETURNS TABLE (
+  type   varchar(10),
+  total  numeric(15, 2)
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    t.type,
+    COALESCE(SUM(t.amount), 0) AS total
+  FROM public.expenses t
+  WHERE t.user_id = user_id_param
+    AND t.deleted_at IS NULL
+    AND (date_from_param IS NULL OR t.transaction_date >= date_from_param)
+    AND (date_to_param   IS NULL OR t.transaction_date <= date_to_param)
+  GROUP BY t.type;
+$$;
+
+-- =============================================
+-- FUNCTION: breakdown per category / subcategory / payment method
+-- GROUP BY di Postgres; satu row per grup, urut total terbesar.
+-- group_by_param: 'category' | 'subcategory' | 'payment_method'.
+-- Kolom yang tidak dipakai grup selalu NULL.
+-- type_param / rentang tanggal NULL = tanpa filter.
+-- Contoh: SELECT * FROM get_expense_breakdown('uuid-user', 'category', 'expense', '2024-06-01', '2024-06-30');
+-- =============================================
+CREATE OR REPLACE FUNCTION get_expense_breakdown(
+  user_id_param     uuid,
+  group_by_param    text,
+  type_param        varchar(10) DEFAULT NULL,
+  date_from_param   date DEFAULT NULL,
+  date_to_param     date DEFAULT NULL
+)
+RETURNS TABLE (
+  category        varchar(50),
+  subcategory     varchar(50),
+  payment_method  varchar(50),
+  total           numeric(15, 2),
+  count           integer
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    CASE WHEN group_by_param IN ('category', 'subcategory') THEN t.category END,
+    CASE WHEN group_by_param = 'subcategory'                THEN t.subcategory END,
+    CASE WHEN group_by_param = 'payment_method'             THEN t.payment_method END,
+    COALESCE(SUM(t.amount), 0),
+    COUNT(*)::integer
+  FROM public.expenses t
+  WHERE t.user_id = user_id_param
+    AND t.deleted_at IS NULL
+    AND group_by_param IN ('category', 'subcategory', 'payment_method')
+    AND (type_param      IS NULL OR t.type = type_param)
+    AND (date_from_param IS NULL OR t.transaction_date >= date_from_param)
+    AND (date_to_param   IS NULL OR t.transaction_date <= date_to_param)
+  GROUP BY 1, 2, 3
+  ORDER BY 4 DESC, 1, 2, 3;
+$$;
+"""
+
+ROLLUPS = """
+-- =============================================
+-- TABLE: expense_monthly_rollups
+-- Total per (user, bulan, type, category), dijaga oleh trigger
+-- di tabel expenses. Summary bulanan/tahunan/all-time cukup
+-- menjumlah row di sini (maks. 12 bulan per tahun) tanpa scan
+-- seluruh transaksi user.
+-- month = tanggal 1 pada bulan transaksi.
+-- =============================================
+CREATE TABLE IF NOT EXISTS public.expense_monthly_rollups (
+    user_id   UUID           REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+    month     DATE           NOT NULL,
+    type      VARCHAR(10)    NOT NULL,
+    category  VARCHAR(50)    NOT NULL,
+    total     NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    count     INTEGER        NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, month, type, category)
+);
+
+ALTER TABLE public.expense_monthly_rollups ENABLE ROW LEVEL SECURITY;
+
+-- User hanya bisa membaca; semua write lewat trigger (SECURITY DEFINER)
+DROP POLICY IF EXISTS "Users can view own rollups" ON public.expense_monthly_rollups;
+CREATE POLICY "Users can view own rollups"
+    ON public.expense_monthly_rollups
+    FOR SELECT
+    USING (auth.uid() = user_id);
+
+-- Bucket bulan yang dipakai trigger, rebuild, dan verify.
+-- transaction_date NULL jatuh ke bulan created_at (tanggal UTC, tidak
+-- tergantung TimeZone session yang menulis row).
+CREATE OR REPLACE FUNCTION public.expense_rollup_month(
+  transaction_date_param date,
+  created_at_param       timestamptz
+)
+RETURNS date
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT date_trunc('month', COALESCE(transaction_date_param, (created_at_param AT TIME ZONE 'UTC')::date))::date;
+$$;
+
+CREATE OR REPLACE FUNCTION public.apply_expense_rollup_delta()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    -- Update yang tidak mengubah kolom rollup (misal: simpan embedding) dilewati
+    IF TG_OP = 'UPDATE'
+       AND OLD.amount           IS NOT DISTINCT FROM NEW.amount
+       AND OLD.type             IS NOT DISTINCT FROM NEW.type
+       AND OLD.category         IS NOT DISTINCT FROM NEW.category
+       AND OLD.transaction_date IS NOT DISTINCT FROM NEW.transaction_date
+       AND OLD.deleted_at       IS NOT DISTINCT FROM NEW.deleted_at THEN
+        RETURN NULL;
+    END IF;
+
+    -- Keluarkan versi lama (jika sebelumnya masih aktif)
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+        INSERT INTO expense_monthly_rollups (user_id, month, type, category, total, count)
+        VALUES (OLD.user_id, expense_rollup_month(OLD.transaction_date, OLD.created_at),
+                OLD.type, OLD.category, -OLD.amount, -1)
+        ON CONFLICT (user_id, month, type, category) DO UPDATE
+            SET total = expense_monthly_rollups.total + EXCLUDED.total,
+                count = expense_monthly_rollups.count + EXCLUDED.count;
+    END IF;
+
+    -- Masukkan versi baru (jika masih aktif)
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL THEN
+        INSERT INTO expense_monthly_rollups (user_id, month, type, category, total, count)
+        VALUES (NEW.user_id, expense_rollup_month(NEW.transaction_date, NEW.created_at),
+                NEW.type, NEW.category, NEW.amount, 1)
+        ON CONFLICT (user_id, month, type, category) DO UPDATE
+            SET total = expense_monthly_rollups.total + EXCLUDED.total,
+                count = expense_monthly_rollups.count + EXCLUDED.count;
+    END IF;
+
+    -- Bersihkan bucket yang sudah kosong
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM expense_monthly_rollups
+        WHERE user_id  = OLD.user_id
+          AND month    = expense_rollup_month(OLD.transaction_date, OLD.created_at)
+          AND type     = OLD.type
+          AND category = OLD.category
+          AND count    = 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER maintain_expense_monthly_rollups
+    AFTER INSERT OR DELETE OR UPDATE OF amount, type, category, transaction_date, deleted_at
+    ON expenses
+    FOR EACH ROW
+    EXECUTE FUNCTION public.apply_expense_rollup_delta();
+
+-- Summary dari rollup. Batas bulan inklusif (tanggal 1), NULL = tanpa batas.
+-- Contoh: SELECT * FROM get_expense_summary_from_rollups('uuid-user', '2024-01-01', '2024-12-01');
+CREATE OR REPLACE FUNCTION get_expense_summary_from_rollups(
+  user_id_param     uuid,
+  month_from_param  date DEFAULT NULL,
+  month_to_param    date DEFAULT NULL
+)
+RETURNS TABLE (
+  type   varchar(10),
+  total  numeric(15, 2)
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    r.type,
+    COALESCE(SUM(r.total), 0) AS total
+  FROM public.expense_monthly_rollups r
+  WHERE r.user_id = user_id_param
+    AND (month_from_param IS NULL OR r.month >= month_from_param)
+    AND (month_to_param   IS NULL OR r.month <= month_to_param)
+  GROUP BY r.type;
+$$;
+
+-- =============================================
+-- FUNCTION: time series income/expense
+-- Satu row per bucket (day | week | month | year), termasuk bucket
+-- kosong (0) — rentang diperluas ke bucket penuh: week mulai Senin,
+-- month/year mulai tanggal 1. month/year dibaca dari rollup,
+-- day/week dari tabel expenses. Tanggal transaksi NULL memakai
+-- tanggal created_at (UTC), sama seperti rollup.
+-- Contoh: SELECT * FROM get_expense_timeseries('uuid-user', 'month', '2024-01-01', '2024-12-31');
+-- =============================================
+CREATE OR REPLACE FUNCTION get_expense_timeseries(
+  user_id_param      uuid,
+  granularity_param  text,
+  date_from_param    date,
+  date_to_param      date
+)
+RETURNS TABLE (
+  period         date,
+  total_income   numeric(15, 2),
+  total_expense  numeric(15, 2)
+)
+LANGUAGE sql
+STABLE
+AS $$
+  WITH bounds AS (
+    SELECT date_trunc(granularity_param, date_from_param)::date AS first_bucket,
+           date_trunc(granularity_param, date_to_param)::date   AS last_bucket,
+           ('1 ' || granularity_param)::interval                AS step
+    WHERE granularity_param IN ('day', 'week', 'month', 'year')
+  ),
+  buckets AS (
+    SELECT generate_series(b.first_bucket, b.last_bucket, b.step)::date AS period
+    FROM bounds b
+  ),
+  raw_totals AS (
+    SELECT date_trunc(granularity_param, COALESCE(t.transaction_date, (t.created_at AT TIME ZONE 'UTC')::date))::date AS period,
+           t.type,
+           SUM(t.amount) AS total
+    FROM public.expenses t, bounds b
+    WHERE granularity_param IN ('day', 'week')
+      AND t.user_id = user_id_param
+      AND t.deleted_at IS NULL
+      AND (
+        (t.transaction_date >= b.first_bucket AND t.transaction_date < b.last_bucket + b.step)
+        OR (t.transaction_date IS NULL
+            AND (t.created_at AT TIME ZONE 'UTC')::date >= b.first_bucket
+            AND (t.created_at AT TIME ZONE 'UTC')::date < b.last_bucket + b.step)
+      )
+    GROUP BY 1, 2
+  ),
+  rollup_totals AS (
+    SELECT date_trunc(granularity_param, r.month)::date AS period,
+           r.type,
+           SUM(r.total) AS total
+    FROM public.expense_monthly_rollups r, bounds b
+    WHERE granularity_param IN ('month', 'year')
+      AND r.user_id = user_id_param
+      AND r.month >= b.first_bucket
+      AND r.month <  b.last_bucket + b.step
+    GROUP BY 1, 2
+  ),
+  totals AS (
+    SELECT * FROM raw_totals
+    UNION ALL
+    SELECT * FROM rollup_totals
+  )
+  SELECT
+    bk.period,
+    COALESCE(SUM(tt.total) FILTER (WHERE tt.type = 'income'), 0),
+    COALESCE(SUM(tt.total) FILTER (WHERE tt.type = 'expense'), 0)
+  FROM buckets bk
+  LEFT JOIN totals tt ON tt.period = bk.period
+  GROUP BY bk.period
+  ORDER BY bk.period;
+$$;
+
+-- Bandingkan rollup dengan tabel expenses. Mengembalikan bucket yang
+-- berbeda saja — hasil kosong berarti rollup konsisten.
+CREATE OR REPLACE FUNCTION verify_expense_monthly_rollups(user_id_param uuid DEFAULT NULL)
+RETURNS TABLE (
+  user_id        uuid,
+  month          date,
+  type           varchar(10),
+  category       varchar(50),
+  rollup_total   numeric(15, 2),
+  actual_total   numeric(15, 2),
+  rollup_count   integer,
+  actual_count   integer
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  WITH actual AS (
+    SELECT e.user_id,
+           expense_rollup_month(e.transaction_date, e.created_at) AS month,
+           e.type,
+           e.category,
+           SUM(e.amount)       AS total,
+           COUNT(*)::integer   AS count
+    FROM expenses e
+    WHERE e.deleted_at IS NULL
+      AND (user_id_param IS NULL OR e.user_id = user_id_param)
+    GROUP BY 1, 2, 3, 4
+  ),
+  stored AS (
+    SELECT r.user_id, r.month, r.type, r.category, r.total, r.count
+    FROM expense_monthly_rollups r
+    WHERE user_id_param IS NULL OR r.user_id = user_id_param
+  )
+  SELECT
+    COALESCE(s.user_id, a.user_id),
+    COALESCE(s.month, a.month),
+    COALESCE(s.type, a.type),
+    COALESCE(s.category, a.category),
+    COALESCE(s.total, 0),
+    COALESCE(a.total, 0),
+    COALESCE(s.count, 0),
+    COALESCE(a.count, 0)
+  FROM stored s
+  FULL OUTER JOIN actual a
+    ON  s.user_id  = a.user_id
+    AND s.month    = a.month
+    AND s.type     = a.type
+    AND s.category = a.category
+  WHERE COALESCE(s.total, 0) <> COALESCE(a.total, 0)
+     OR COALESCE(s.count, 0) <> COALESCE(a.count, 0);
+$$;
+
+-- Hitung ulang rollup dari tabel expenses. Mengembalikan jumlah bucket
+-- yang ditulis. Write ke expenses diblok selama rebuild agar tidak ada
+-- delta trigger yang hilang.
+CREATE OR REPLACE FUNCTION rebuild_expense_monthly_rollups(user_id_param uuid DEFAULT NULL)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_rows integer;
+BEGIN
+    LOCK TABLE expenses IN SHARE MODE;
+
+    DELETE FROM expense_monthly_rollups
+    WHERE user_id_param IS NULL OR user_id = user_id_param;
+
+    INSERT INTO expense_monthly_rollups (user_id, month, type, category, total, count)
+    SELECT e.user_id,
+           expense_rollup_month(e.transaction_date, e.created_at),
+           e.type,
+           e.category,
+           SUM(e.amount),
+           COUNT(*)
+    FROM expenses e
+    WHERE e.deleted_at IS NULL
+      AND (user_id_param IS NULL OR e.user_id = user_id_param)
+    GROUP BY 1, 2, 3, 4;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$;
+
+-- Verify/rebuild hanya untuk service role (lihat manage_rollups.py)
+REVOKE EXECUTE ON FUNCTION verify_expense_monthly_rollups(uuid)  FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_expense_monthly_rollups(uuid) FROM PUBLIC, anon, authenticated;
+GRANT  EXECUTE ON FUNCTION verify_expense_monthly_rollups(uuid)  TO service_role;
+GRANT  EXECUTE ON FUNCTION rebuild_expense_monthly_rollups(uuid) TO service_role;
+"""
+
+SEED_ROLLUPS = "SELECT rebuild_expense_monthly_rollups()"
+
+# Urutan drop: trigger → function yang membaca tabel/kolom → tabel/kolom
+FUNCTIONS = (
+    "public.get_expense_timeseries(uuid, text, date, date)",
+    "public.get_expense_summary_from_rollups(uuid, date, date)",
+    "public.verify_expense_monthly_rollups(uuid)",
+    "public.rebuild_expense_monthly_rollups(uuid)",
+    "public.apply_expense_rollup_delta()",
+    "public.expense_rollup_month(date, timestamptz)",
+    "public.get_expense_breakdown(uuid, text, varchar, date, date)",
+    "public.get_expense_summary(uuid, date, date)",
+    "public.search_expenses(uuid, text, varchar, text, date, date, int, int)",
+)
+
+
+def upgrade() -> None:
+    op.execute(SEARCH)
+    op.execute(AGGREGATES)
+    op.execute(ROLLUPS)
+    op.execute(SEED_ROLLUPS)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS maintain_expense_monthly_rollups ON public.expenses")
+    for signature in FUNCTIONS:
+        op.execute(f"DROP FUNCTION IF EXISTS {signature}")
+    op.execute("DROP TABLE IF EXISTS public.expense_monthly_rollups")
+    op.execute("DROP INDEX IF EXISTS public.idx_expenses_search_vector")
+    op.execute("ALTER TABLE public.expenses DROP COLUMN IF EXISTS search_vector")
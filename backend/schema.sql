@@ -54,6 +54,8 @@ CREATE OR REPLACE VIEW active_expenses AS
 
 -- =============================================
 -- INDEXES
+-- Index partial untuk query active_expenses dikelola lewat Alembic
+-- (backend/migrations/versions) → jalankan: alembic upgrade head
 -- =============================================
 CREATE INDEX idx_expenses_user_id          ON expenses(user_id);
 CREATE INDEX idx_expenses_transaction_date ON expenses(transaction_date);
@@ -61,6 +63,8 @@ CREATE INDEX idx_expenses_deleted_at       ON expenses(deleted_at);
 
 -- =============================================
 -- TRIGGER: auto update updated_at
+-- Migrasi 0004 membatasinya ke kolom yang diedit user (simpan embedding
+-- tidak mengubah updated_at / ETag) → jalankan: alembic upgrade head
 -- =============================================
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -156,6 +160,24 @@ AS $$
     t.embedding <=> query_embedding
   LIMIT match_count;
 $$;
+
+-- save_expense_embeddings (simpan banyak embedding sekaligus, hanya
+-- service role) dikelola lewat Alembic: migrasi 0003, lalu 0006 menambah
+-- model_param → jalankan: alembic upgrade head
+
+-- =============================================
+-- FULL-TEXT SEARCH (search_vector + search_expenses), SUMMARY
+-- (get_expense_summary, get_expense_breakdown), ROLLUP BULANAN
+-- (expense_monthly_rollups + trigger, get_expense_summary_from_rollups,
+-- get_expense_timeseries, verify/rebuild) dikelola lewat Alembic:
+-- migrasi 0007 (sekaligus mengisi rollup dari transaksi yang sudah ada)
+-- → jalankan: alembic upgrade head
+-- =============================================
+
+-- =============================================
+-- TABLE: expense_data_versions (versi data per user untuk ETag list &
+-- summary) dikelola lewat Alembic: migrasi 0005 → jalankan: alembic upgrade head
+-- =============================================
 -- ======================================================================
 -- ========================================================================
 -- ======================================================================
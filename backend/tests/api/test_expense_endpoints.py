@@ -0,0 +1,504 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+
+from app.core.application import create_app
+from app.services.expense_service import AsyncExpenseService
+
+pytestmark = pytest.mark.api
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fixtures untuk API Test
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.fixture
+def mock_expense_service():
+    # spec: method async di AsyncExpenseService otomatis jadi AsyncMock,
+    # export_* (iterator sync) tetap MagicMock biasa
+    return MagicMock(spec=AsyncExpenseService)
+
+
+@pytest.fixture
+def app(mock_expense_service):
+    from app.api.expense import get_expense_service
+    from app.core.dependencies import get_current_user, get_access_token
+
+    app = create_app()
+    mock_user = MagicMock()
+    mock_user.id = "user-uuid-123"
+
+    app.dependency_overrides[get_current_user] = lambda: mock_user
+    app.dependency_overrides[get_access_token] = lambda: "fake.jwt.token"
+    app.dependency_overrides[get_expense_service] = lambda: mock_expense_service
+    return app
+
+
+@pytest.fixture
+def client(app):
+    with TestClient(app) as c:
+        yield c
+
+
+# =============================================================================
+# GET /api/expenses/export/csv
+# =============================================================================
+
+class TestExportCsvEndpoint:
+
+    def test_export_csv_dikirim_sebagai_stream_per_chunk(self, client, mock_expense_service):
+        mock_expense_service.export_expenses_csv.return_value = iter([
+            "id,amount\r\na,1\r\n",
+            "b,2\r\n",
+            "c,3\r\n",
+        ])
+
+        response = client.get("/api/expenses/export/csv?type=expense&sort_by=amount")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        assert response.text == "id,amount\r\na,1\r\nb,2\r\nc,3\r\n"
+        kwargs = mock_expense_service.export_expenses_csv.call_args.kwargs
+        assert kwargs["expense_type"] == "expense"
+        assert kwargs["sort_by"] == "amount"
+
+    def test_error_di_halaman_pertama_tetap_jadi_status_http(self, client, mock_expense_service):
+        """Halaman pertama ditarik sebelum response dimulai → error bukan CSV terpotong."""
+        from app.core.exceptions import ValidationError
+
+        def failing_stream():
+            raise ValidationError("Invalid cursor")
+            yield  # pragma: no cover
+
+        mock_expense_service.export_expenses_csv.return_value = failing_stream()
+
+        response = client.get("/api/expenses/export/csv")
+
+        assert response.status_code == 422
+
+
+# =============================================================================
+# GET /api/expenses/export?format=...
+# =============================================================================
+
+class TestExportFormatEndpoint:
+
+    @pytest.mark.parametrize("export_format,media_type,extension", [
+        ("ndjson", "application/x-ndjson", "ndjson"),
+        ("arrow", "application/vnd.apache.arrow.stream", "arrow"),
+        ("parquet", "application/vnd.apache.parquet", "parquet"),
+    ])
+    def test_media_type_dan_nama_file_sesuai_format(
+        self, client, mock_expense_service, export_format, media_type, extension
+    ):
+        mock_expense_service.export_expenses.return_value = iter([b"chunk-1", b"chunk-2"])
+
+        response = client.get(f"/api/expenses/export?format={export_format}&category=makanan")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(media_type)
+        assert f'expenses_export.{extension}"' in response.headers["content-disposition"]
+        assert response.content == b"chunk-1chunk-2"
+        kwargs = mock_expense_service.export_expenses.call_args.kwargs
+        assert kwargs["export_format"] == export_format
+        assert kwargs["category"] == "makanan"
+
+    def test_format_tidak_dikenal_ditolak_422(self, client, mock_expense_service):
+        response = client.get("/api/expenses/export?format=xlsx")
+
+        assert response.status_code == 422
+        mock_expense_service.export_expenses.assert_not_called()
+
+
+# =============================================================================
+# GET /api/expenses/summary/{categories,subcategories,payment-methods}
+# =============================================================================
+
+class TestBreakdownEndpoints:
+
+    def test_summary_categories_meneruskan_filter_dan_mengembalikan_list(self, client, mock_expense_service):
+        from app.models.expense import ExpenseSummaryByCategoryResponse
+
+        mock_expense_service.get_expense_summary_by_category.return_value = [
+            ExpenseSummaryByCategoryResponse(category="makanan", total_amount=150.0),
+        ]
+
+        response = client.get("/api/expenses/summary/categories?type=expense&date_from=2024-06-01&date_to=2024-06-30")
+
+        assert response.status_code == 200
+        assert response.json() == [{"category": "makanan", "total_amount": 150.0}]
+        mock_expense_service.get_expense_summary_by_category.assert_called_once_with(
+            user_id="user-uuid-123", expense_type="expense", date_from="2024-06-01", date_to="2024-06-30"
+        )
+
+    def test_summary_payment_methods_tanpa_filter(self, client, mock_expense_service):
+        from app.models.expense import ExpenseSummaryByPaymentMethodResponse
+
+        mock_expense_service.get_expense_summary_by_payment_method.return_value = [
+            ExpenseSummaryByPaymentMethodResponse(payment_method=None, total_amount=50.0),
+        ]
+
+        response = client.get("/api/expenses/summary/payment-methods")
+
+        assert response.status_code == 200
+        assert response.json() == [{"payment_method": None, "total_amount": 50.0}]
+
+    def test_summary_subcategories_tanggal_salah_format_422(self, client, mock_expense_service):
+        response = client.get("/api/expenses/summary/subcategories?date_from=06-2024")
+
+        assert response.status_code == 422
+        mock_expense_service.get_expense_summary_by_subcategory.assert_not_called()
+
+
+# =============================================================================
+# GET /api/expenses/summary/timeseries
+# =============================================================================
+
+class TestTimeseriesEndpoint:
+
+    def test_timeseries_default_granularity_month(self, client, mock_expense_service):
+        from app.models.expense import ExpenseSummaryByPeriodResponse
+
+        mock_expense_service.get_expense_timeseries.return_value = [
+            ExpenseSummaryByPeriodResponse(period="2024-01-01", total_income=0, total_expense=150, net_balance=-150),
+        ]
+
+        response = client.get("/api/expenses/summary/timeseries?date_from=2024-01-01&date_to=2024-01-31")
+
+        assert response.status_code == 200
+        assert response.json()[0]["period"] == "2024-01-01"
+        mock_expense_service.get_expense_timeseries.assert_called_once_with(
+            user_id="user-uuid-123", granularity="month", date_from="2024-01-01", date_to="2024-01-31"
+        )
+
+    @pytest.mark.parametrize("query", [
+        "date_from=2024-01-01",                                     # date_to wajib
+        "date_from=2024-01-01&date_to=2024-02-01&granularity=hour",
+    ])
+    def test_parameter_tidak_valid_422(self, client, mock_expense_service, query):
+        response = client.get(f"/api/expenses/summary/timeseries?{query}")
+
+        assert response.status_code == 422
+        mock_expense_service.get_expense_timeseries.assert_not_called()
+
+
+# =============================================================================
+# GET /api/expenses?q=...&search=...
+# =============================================================================
+
+class TestListSearchMode:
+
+    def test_default_search_mode_ilike(self, client, mock_expense_service):
+        """Caller ?q= lama tetap dapat sort_by / sort_order dan next_cursor."""
+        from app.models.expense import ExpensesListOut
+
+        mock_expense_service.get_all_expenses.return_value = ExpensesListOut(expenses=[], total=0)
+
+        response = client.get("/api/expenses?q=kopi&sort_by=amount")
+
+        assert response.status_code == 200
+        assert mock_expense_service.get_all_expenses.call_args.kwargs["search_mode"] == "ilike"
+        assert mock_expense_service.get_all_expenses.call_args.kwargs["sort_by"] == "amount"
+
+    def test_ranked_harus_diminta(self, client, mock_expense_service):
+        from app.models.expense import ExpensesListOut
+
+        mock_expense_service.get_all_expenses.return_value = ExpensesListOut(expenses=[], total=0)
+
+        response = client.get("/api/expenses?q=kopi&search=ranked")
+
+        assert response.status_code == 200
+        assert mock_expense_service.get_all_expenses.call_args.kwargs["search_mode"] == "ranked"
+
+    def test_search_mode_tidak_dikenal_422(self, client, mock_expense_service):
+        response = client.get("/api/expenses?q=kopi&search=regex")
+
+        assert response.status_code == 422
+
+
+# =============================================================================
+# GET /api/expenses?fields=... (sparse fieldset)
+# =============================================================================
+
+class TestListFields:
+
+    def test_fields_hanya_mengirim_field_yang_diminta(self, client, mock_expense_service):
+        from app.models.expense import ExpensePartialOut, ExpensesListOut
+
+        mock_expense_service.get_all_expenses.return_value = ExpensesListOut(
+            expenses=[ExpensePartialOut.from_db({"id": "e-1", "amount": 50.0, "created_at": "x"}, ["amount"])],
+            total=1,
+            next_cursor=None,
+        )
+
+        response = client.get("/api/expenses?fields=amount")
+
+        assert response.status_code == 200
+        assert response.json() == {"expenses": [{"id": "e-1", "amount": 50.0}], "total": 1, "next_cursor": None}
+        assert mock_expense_service.get_all_expenses.call_args.kwargs["fields"] == ["amount"]
+
+    def test_tanpa_fields_semua_kolom_tetap_terkirim(self, client, mock_expense_service):
+        from app.models.expense import ExpenseOut, ExpensesListOut
+
+        mock_expense_service.get_all_expenses.return_value = ExpensesListOut(
+            expenses=[ExpenseOut.from_db({
+                "id": "e-1", "amount": 50.0, "type": "expense", "description": None,
+                "category": "makanan", "subcategory": None, "payment_method": None,
+                "transaction_date": "2024-06-15", "created_at": "c", "updated_at": "u",
+            })],
+            total=1,
+            next_cursor=None,
+        )
+
+        response = client.get("/api/expenses")
+
+        item = response.json()["expenses"][0]
+        assert item["description"] is None
+        assert set(item) == {
+            "id", "amount", "type", "description", "category", "subcategory",
+            "payment_method", "transaction_date", "created_at", "updated_at",
+        }
+        assert mock_expense_service.get_all_expenses.call_args.kwargs["fields"] is None
+
+    def test_format_fields_tidak_valid_422(self, client, mock_expense_service):
+        response = client.get("/api/expenses?fields=amount;drop")
+
+        assert response.status_code == 422
+
+
+# =============================================================================
+# POST /api/expenses/bulk
+# =============================================================================
+
+class TestBulkCreateEndpoint:
+
+    def test_bulk_create_meneruskan_item_mentah_ke_service(self, client, mock_expense_service):
+        from app.models.expense import BulkCreateExpenseResponse, BulkCreateExpenseResult
+
+        mock_expense_service.create_expenses.return_value = BulkCreateExpenseResponse(
+            created=0,
+            failed=1,
+            results=[BulkCreateExpenseResult(index=0, success=False, error="amount: invalid")],
+        )
+        items = [{"amount": -1, "category": "makanan"}]
+
+        response = client.post("/api/expenses/bulk", json={"expenses": items})
+
+        assert response.status_code == 200
+        assert response.json()["results"][0] == {
+            "index": 0, "success": False, "expense": None, "error": "amount: invalid",
+        }
+        kwargs = mock_expense_service.create_expenses.call_args.kwargs
+        assert kwargs == {"user_id": "user-uuid-123", "items": items}
+
+    @pytest.mark.parametrize("count", [0, 1001])
+    def test_jumlah_item_di_luar_batas_422(self, client, mock_expense_service, count):
+        response = client.post(
+            "/api/expenses/bulk",
+            json={"expenses": [{"amount": 1, "category": "x"}] * count},
+        )
+
+        assert response.status_code == 422
+        mock_expense_service.create_expenses.assert_not_called()
+
+
+# =============================================================================
+# POST /api/expenses/import/csv
+# =============================================================================
+
+class TestImportCsvEndpoint:
+
+    def test_body_csv_diteruskan_ke_service_sebagai_file(self, client, mock_expense_service):
+        from app.models.expense import ExpenseImportResponse
+
+        received = {}
+
+        def fake_import(user_id, csv_file):
+            received["user_id"] = user_id
+            received["body"] = csv_file.read()
+            return ExpenseImportResponse(imported=1, failed=0, errors=[])
+
+        mock_expense_service.import_expenses_csv.side_effect = fake_import
+        body = b"amount,category\n10,makanan\n"
+
+        response = client.post(
+            "/api/expenses/import/csv", content=body, headers={"Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"imported": 1, "failed": 0, "errors": [], "errors_truncated": False}
+        assert received == {"user_id": "user-uuid-123", "body": body}
+
+    def test_file_terlalu_besar_413(self, client, mock_expense_service, monkeypatch):
+        from app.api import expense
+
+        monkeypatch.setattr(expense, "MAX_CSV_IMPORT_BYTES", 10)
+
+        response = client.post(
+            "/api/expenses/import/csv", content=b"amount,category\n10,makanan\n",
+            headers={"Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 413
+        mock_expense_service.import_expenses_csv.assert_not_called()
+
+
+# =============================================================================
+# PATCH / DELETE /api/expenses?<filter>
+# =============================================================================
+
+class TestBulkByFilterEndpoints:
+
+    def test_bulk_update_filter_dari_query_dan_body_dari_json(self, client, mock_expense_service):
+        from app.models.expense import BulkExpenseMutationResponse
+
+        mock_expense_service.bulk_update_expenses.return_value = BulkExpenseMutationResponse(
+            affected=2, ids=["a", "b"],
+        )
+
+        response = client.patch("/api/expenses?category=gojek&type=expense", json={"category": "transport"})
+
+        assert response.status_code == 200
+        assert response.json() == {"affected": 2, "ids": ["a", "b"]}
+        kwargs = mock_expense_service.bulk_update_expenses.call_args.kwargs
+        assert kwargs["category"] == "gojek"
+        assert kwargs["expense_type"] == "expense"
+        assert kwargs["request"].category == "transport"
+
+    def test_bulk_delete_filter_dari_query(self, client, mock_expense_service):
+        from app.models.expense import BulkExpenseMutationResponse
+
+        mock_expense_service.bulk_delete_expenses.return_value = BulkExpenseMutationResponse(
+            affected=1, ids=["a"],
+        )
+
+        response = client.delete("/api/expenses?date_from=2024-06-01&date_to=2024-06-01")
+
+        assert response.status_code == 200
+        assert response.json()["ids"] == ["a"]
+        kwargs = mock_expense_service.bulk_delete_expenses.call_args.kwargs
+        assert (kwargs["date_from"], kwargs["date_to"]) == ("2024-06-01", "2024-06-01")
+
+    def test_format_tanggal_tidak_valid_422(self, client, mock_expense_service):
+        response = client.delete("/api/expenses?date_from=01-06-2024")
+
+        assert response.status_code == 422
+        mock_expense_service.bulk_delete_expenses.assert_not_called()
+
+
+# =============================================================================
+# ETag / If-Match di /api/expenses/{id}
+# =============================================================================
+
+class TestExpenseEtag:
+
+    UPDATED_AT = "2024-06-15T10:00:00.123456+00:00"
+
+    def expense(self):
+        from app.models.expense import ExpenseOut
+
+        return ExpenseOut.from_db({
+            "id": "e-1", "amount": 50.0, "type": "expense", "category": "makanan",
+            "transaction_date": "2024-06-15", "created_at": "c", "updated_at": self.UPDATED_AT,
+        })
+
+    def test_get_mengirim_etag_dan_304_jika_sama(self, client, mock_expense_service):
+        mock_expense_service.get_expense_by_id.return_value = self.expense()
+
+        first = client.get("/api/expenses/e-1")
+        second = client.get("/api/expenses/e-1", headers={"If-None-Match": first.headers["ETag"]})
+
+        assert first.status_code == 200
+        assert first.headers["ETag"].startswith('"')
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_patch_if_match_diteruskan_sebagai_updated_at(self, client, mock_expense_service):
+        from app.core.etag import make_etag
+
+        mock_expense_service.update_expense.return_value = self.expense()
+
+        response = client.patch(
+            "/api/expenses/e-1", json={"amount": 10},
+            headers={"If-Match": make_etag(self.UPDATED_AT)},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] == make_etag(self.UPDATED_AT)
+        assert mock_expense_service.update_expense.call_args.kwargs["expected_updated_at"] == self.UPDATED_AT
+
+    def test_patch_tanpa_if_match_tidak_bersyarat(self, client, mock_expense_service):
+        mock_expense_service.update_expense.return_value = self.expense()
+
+        client.patch("/api/expenses/e-1", json={"amount": 10})
+
+        assert mock_expense_service.update_expense.call_args.kwargs["expected_updated_at"] is None
+
+    def test_write_basi_412(self, client, mock_expense_service):
+        from app.core.etag import make_etag
+        from app.core.exceptions import PreconditionFailedError
+
+        mock_expense_service.delete_expense.side_effect = PreconditionFailedError("modified")
+
+        response = client.delete("/api/expenses/e-1", headers={"If-Match": make_etag(self.UPDATED_AT)})
+
+        assert response.status_code == 412
+        assert mock_expense_service.delete_expense.call_args.kwargs["expected_updated_at"] == self.UPDATED_AT
+
+    @pytest.mark.parametrize("header", ['W/"abc"', '"a", "b"', "tanpa-kutip"])
+    def test_if_match_tidak_valid_412(self, client, mock_expense_service, header):
+        response = client.delete("/api/expenses/e-1", headers={"If-Match": header})
+
+        assert response.status_code == 412
+        mock_expense_service.delete_expense.assert_not_called()
+
+
+# =============================================================================
+# Conditional GET (ETag dari data version) untuk list & summary
+# =============================================================================
+
+class TestDataVersionEtag:
+
+    @pytest.fixture(autouse=True)
+    def setup_service(self, mock_expense_service):
+        from app.models.expense import ExpenseSummaryResponse, ExpensesListOut
+
+        mock_expense_service.get_data_version.return_value = 3
+        mock_expense_service.get_all_expenses.return_value = ExpensesListOut(expenses=[], total=0)
+        mock_expense_service.get_expense_summary_all_time.return_value = ExpenseSummaryResponse(
+            total_income=0, total_expense=0, net_balance=0,
+        )
+
+    @pytest.mark.parametrize("path, method", [
+        ("/api/expenses?limit=20", "get_all_expenses"),
+        ("/api/expenses/summary", "get_expense_summary_all_time"),
+    ])
+    def test_if_none_match_cocok_304_tanpa_query_data(self, client, mock_expense_service, path, method):
+        first = client.get(path)
+        getattr(mock_expense_service, method).reset_mock()
+
+        second = client.get(path, headers={"If-None-Match": first.headers["ETag"]})
+
+        assert first.status_code == 200
+        assert "private" in first.headers["Cache-Control"]
+        assert second.status_code == 304
+        assert second.headers["ETag"] == first.headers["ETag"]
+        getattr(mock_expense_service, method).assert_not_called()
+
+    def test_versi_berubah_etag_berubah(self, client, mock_expense_service):
+        etag = client.get("/api/expenses/summary").headers["ETag"]
+        mock_expense_service.get_data_version.return_value = 4
+
+        response = client.get("/api/expenses/summary", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_etag_tergantung_query_bukan_urutan_param(self, client):
+        a = client.get("/api/expenses?limit=20&type=expense").headers["ETag"]
+        b = client.get("/api/expenses?type=expense&limit=20").headers["ETag"]
+        c = client.get("/api/expenses?limit=50&type=expense").headers["ETag"]
+
+        assert a == b
+        assert a != c
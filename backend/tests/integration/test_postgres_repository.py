@@ -0,0 +1,305 @@
+# =============================================================================
+# tests/integration/test_postgres_repository.py — Direct Postgres Repository
+#
+# TIPE TEST: Integration (butuh Postgres — docker compose up postgres)
+# YANG DIUJI: PostgresExpenseRepository / PostgresProfileRepository
+#             (REPOSITORY_BACKEND=postgres) terhadap database asli:
+#             scoping user_id, keyset paging, count, If-Match, summary,
+#             prepared statement per koneksi pool.
+#
+# Cara kerja:
+#   Database sementara dibuat dengan bootstrap yang sama seperti
+#   test_query_plans.py (stub auth → schema.sql → alembic → seed 100 user x
+#   500 transaksi). Koneksi TIDAK kena RLS, jadi setiap test memeriksa bahwa
+#   data user lain tidak pernah terlihat.
+#
+# Jalankan:
+#   docker compose up -d postgres
+#   pytest tests/integration/test_postgres_repository.py -v
+# =============================================================================
+
+import json
+
+import pytest
+
+from app.core.exceptions import NotFoundError, PreconditionFailedError, TelegramAlreadyLinkedError
+from app.infrastructure.postgres_client import PostgresClient
+from app.repositories.expense_repository import ExpenseRepository, PostgresExpenseRepository
+from app.repositories.profile_repository import PostgresProfileRepository
+
+from .test_query_plans import _admin_url, _bootstrap
+
+pytestmark = pytest.mark.integration
+
+CHECK_DATABASE = "jarvis_postgres_repository_check"
+USER = "00000000-0000-0000-0000-000000000007"
+OTHER_USER = "00000000-0000-0000-0000-000000000008"
+NULL_DATE_USER = "00000000-0000-0000-0000-000000000009"
+
+
+@pytest.fixture(scope="module")
+def pg_client():
+    """PostgresClient (pool kecil) pada database sementara yang sudah di-seed."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.exc import OperationalError
+
+    admin = create_engine(_admin_url(), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {CHECK_DATABASE} WITH (FORCE)"))
+            conn.execute(text(f"CREATE DATABASE {CHECK_DATABASE}"))
+    except OperationalError:
+        pytest.skip("Postgres tidak tersedia. Jalankan `docker compose up -d postgres` atau set DATABASE_URL.")
+
+    url = make_url(_admin_url()).set(database=CHECK_DATABASE)
+    engine = create_engine(url, pool_size=2, max_overflow=0, connect_args={"options": "-c timezone=UTC"})
+    try:
+        _bootstrap(engine)
+        yield PostgresClient(engine)
+    finally:
+        engine.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {CHECK_DATABASE} WITH (FORCE)"))
+        admin.dispose()
+
+
+@pytest.fixture
+def repo(pg_client):
+    return PostgresExpenseRepository(pg_client)
+
+
+def active_count(pg_client, user_id: str) -> int:
+    row = pg_client.fetch_one("SELECT count(*) AS n FROM active_expenses WHERE user_id = $1", [user_id])
+    return row["n"]
+
+
+def new_expense(**overrides) -> dict:
+    return {
+        "user_id": USER,
+        "amount": 12500.5,
+        "type": "expense",
+        "description": "kopi susu gula aren",
+        "category": "minuman",
+        "transaction_date": "2024-06-15",
+        **overrides,
+    }
+
+
+class TestPostgresExpenseRepositoryRead:
+
+    def test_find_page_hanya_row_milik_user_dan_bentuk_row_sama_dengan_postgrest(self, repo, pg_client):
+        rows, total = repo.find_page(USER, limit=20)
+
+        assert total == active_count(pg_client, USER)
+        assert len(rows) == 20
+        assert list(rows[0]) == list(ExpenseRepository.COLUMNS)
+        # JSON seperti PostgREST: uuid & tanggal string, numeric float
+        assert isinstance(rows[0]["id"], str) and isinstance(rows[0]["amount"], float)
+        assert rows[0]["created_at"].endswith("+00:00")
+        created = [row["created_at"] for row in rows]
+        assert created == sorted(created, reverse=True)
+
+        ids = {row["id"] for row in rows}
+        owners = pg_client.fetch_all("SELECT DISTINCT user_id FROM expenses WHERE id = ANY($1::uuid[])", [list(ids)])
+        assert owners == [{"user_id": USER}]
+
+    @pytest.mark.parametrize("sort_by, sort_order", [
+        ("created_at", "desc"), ("transaction_date", "desc"), ("transaction_date", "asc"), ("amount", "asc"),
+    ])
+    def test_keyset_cursor_melanjutkan_tanpa_duplikat_atau_lompat(self, repo, sort_by, sort_order):
+        first, _ = repo.find_page(USER, limit=50, sort_by=sort_by, sort_order=sort_order, count_mode="none")
+        cursor = ExpenseRepository.encode_cursor(first[-1], sort_by, sort_order)
+        second, _ = repo.find_page(
+            USER, limit=50, sort_by=sort_by, sort_order=sort_order, cursor=cursor, count_mode="none",
+        )
+        by_offset, _ = repo.find_page(
+            USER, limit=50, offset=50, sort_by=sort_by, sort_order=sort_order, count_mode="none",
+        )
+
+        assert [row["id"] for row in second] == [row["id"] for row in by_offset]
+
+    @pytest.mark.parametrize("sort_order", ["desc", "asc"])
+    def test_keyset_transaction_date_null_di_ujung_terendah(self, repo, pg_client, sort_order):
+        """NULL = tanggal terendah: terakhir untuk desc, pertama untuk asc (urutan index, tanpa Sort)."""
+        pg_client.fetch_all(
+            "UPDATE expenses SET transaction_date = NULL WHERE user_id = $1 AND amount < 100000 RETURNING id",
+            [NULL_DATE_USER],
+        )
+        everything, _ = repo.find_page(
+            NULL_DATE_USER, limit=1000, sort_by="transaction_date", sort_order=sort_order, count_mode="none",
+        )
+
+        walked, cursor = [], None
+        while True:
+            page, _ = repo.find_page(
+                NULL_DATE_USER, limit=40, sort_by="transaction_date", sort_order=sort_order,
+                cursor=cursor, count_mode="none",
+            )
+            walked.extend(page)
+            if len(page) < 40:
+                break
+            cursor = ExpenseRepository.encode_cursor(page[-1], "transaction_date", sort_order)
+
+        assert [row["id"] for row in walked] == [row["id"] for row in everything]
+        dated = [row["transaction_date"] is not None for row in everything]
+        assert 0 < sum(dated) < len(dated)
+        assert dated == sorted(dated, reverse=sort_order == "desc")
+
+    def test_filter_dan_count_sama_dengan_count_all(self, repo):
+        filters = {"expense_type": "income", "q": "nomor 1", "date_from": "2023-03-01", "date_to": "2024-06-30"}
+
+        rows, total = repo.find_page(USER, limit=500, **filters)
+
+        assert total == len(rows) == repo.count_all(USER, **filters)
+        assert all(row["type"] == "income" and "nomor 1" in row["description"] for row in rows)
+
+    def test_count_planned_memakai_estimasi_planner(self, repo):
+        _, planned = repo.find_page(USER, limit=1, count_mode="planned")
+        _, none = repo.find_page(USER, limit=1, count_mode="none")
+
+        assert planned > 0
+        assert none is None
+
+    def test_find_by_id_user_lain_dan_uuid_rusak_not_found(self, repo):
+        (row,), _ = repo.find_page(OTHER_USER, limit=1)
+
+        assert repo.find_by_id(row["id"], OTHER_USER)["id"] == row["id"]
+        with pytest.raises(NotFoundError):
+            repo.find_by_id(row["id"], USER)
+        with pytest.raises(NotFoundError):
+            repo.find_by_id("bukan-uuid", USER)
+
+    def test_summary_breakdown_timeseries_search(self, repo, pg_client):
+        expected = pg_client.fetch_all(
+            "SELECT type, sum(amount) AS total FROM active_expenses WHERE user_id = $1 GROUP BY type", [USER],
+        )
+        summary = repo.get_summary_all_time(USER)
+
+        totals = {row["type"]: row["total"] for row in expected}
+        assert summary["total_income"] == pytest.approx(totals["income"])
+        assert summary["total_expense"] == pytest.approx(totals["expense"])
+        assert repo.get_summary_by_year(USER, 2024)["total_expense"] > 0
+
+        breakdown = repo.get_breakdown(USER, "category", expense_type="expense")
+        assert sum(row["count"] for row in breakdown) == repo.count_all(USER, expense_type="expense")
+
+        buckets = repo.get_timeseries(USER, "month", "2024-01-01", "2024-03-31")
+        assert [bucket["period"] for bucket in buckets] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+
+        rows, total = repo.search(USER, "nomor 42")
+        assert total >= 1 and "nomor 42" in rows[0]["description"]
+
+    def test_query_panas_menjadi_prepared_statement_di_koneksi_pool(self, repo, pg_client):
+        for _ in range(3):
+            repo.find_page(USER, limit=10)
+            repo.get_data_version(USER)
+
+        with pg_client.session() as session:
+            names = session.execute("SELECT name FROM pg_prepared_statements")
+        assert any(row["name"].startswith("jarvis_") for row in names)
+
+
+class TestPostgresExpenseRepositoryWrite:
+
+    def test_create_update_if_match_delete(self, repo):
+        version = repo.get_data_version(USER)
+
+        created = repo.create(new_expense())
+        assert created["amount"] == 12500.5 and created["subcategory"] is None
+        assert repo.get_data_version(USER) > version
+
+        updated = repo.update(created["id"], USER, {"amount": 15000}, expected_updated_at=created["updated_at"])
+        assert updated["amount"] == 15000.0
+
+        # ETag lama → 412, row tidak berubah
+        with pytest.raises(PreconditionFailedError):
+            repo.update(created["id"], USER, {"amount": 1}, expected_updated_at=created["updated_at"])
+        with pytest.raises(PreconditionFailedError):
+            repo.delete(created["id"], USER, expected_updated_at=created["updated_at"])
+
+        repo.delete(created["id"], USER, expected_updated_at=updated["updated_at"])
+        with pytest.raises(NotFoundError):
+            repo.find_by_id(created["id"], USER)
+        with pytest.raises(NotFoundError):
+            repo.delete(created["id"], USER)
+
+    def test_if_match_tetap_berlaku_setelah_embedding_disimpan(self, repo, pg_client):
+        created = repo.create(new_expense())
+
+        # Sama seperti embedding queue tepat setelah POST / PATCH
+        saved = pg_client.fetch_one(
+            "SELECT save_expense_embeddings($1::jsonb) AS n",
+            [json.dumps([{"id": created["id"], "embedding": [0.1] * 1536}])],
+        )
+        assert saved["n"] == 1
+        assert repo.find_by_id(created["id"], USER)["updated_at"] == created["updated_at"]
+
+        # ETag dari response POST masih cocok → bukan 412
+        updated = repo.update(created["id"], USER, {"amount": 20000}, expected_updated_at=created["updated_at"])
+        assert updated["amount"] == 20000.0
+        assert updated["updated_at"] != created["updated_at"]
+
+    def test_user_lain_tidak_bisa_update_atau_delete(self, repo):
+        created = repo.create(new_expense())
+
+        with pytest.raises(NotFoundError):
+            repo.update(created["id"], OTHER_USER, {"amount": 1})
+        with pytest.raises(NotFoundError):
+            repo.delete(created["id"], OTHER_USER)
+        assert repo.find_by_id(created["id"], USER)["amount"] == 12500.5
+
+    def test_create_many_kolom_hilang_pakai_default_db(self, repo):
+        rows = repo.create_many([
+            new_expense(description="bulk satu"),
+            {key: value for key, value in new_expense(description="bulk dua").items() if key != "transaction_date"},
+        ])
+
+        assert [row["description"] for row in rows] == ["bulk satu", "bulk dua"]
+        assert rows[0]["transaction_date"] == "2024-06-15"
+        assert rows[1]["transaction_date"] is not None  # DEFAULT CURRENT_DATE, bukan NULL
+
+    def test_bulk_update_dan_delete_per_filter_hanya_milik_user(self, repo, pg_client):
+        repo.create_many([new_expense(category="bulkfilter"), new_expense(category="bulkfilter")])
+        repo.create(new_expense(user_id=OTHER_USER, category="bulkfilter"))
+
+        updated = repo.update_by_filter(USER, {"payment_method": "cash"}, category="bulkfilter")
+        deleted = repo.soft_delete_by_filter(USER, category="bulkfilter")
+
+        assert len(updated) == 2 and {row["payment_method"] for row in updated} == {"cash"}
+        assert sorted(deleted) == sorted(row["id"] for row in updated)
+        assert repo.count_all(OTHER_USER, category="bulkfilter") == 1
+
+    def test_kolom_di_luar_whitelist_ditolak(self, repo):
+        with pytest.raises(ValueError):
+            repo.create(new_expense(**{"user_id = user_id; --": 1}))
+
+
+class TestPostgresProfileRepository:
+
+    def test_update_lalu_cari_berdasarkan_telegram_dan_connect_code(self, pg_client):
+        repo = PostgresProfileRepository(pg_client)
+
+        repo.save_connect_code(USER, "TASKLY-PGTEST", "2030-01-01T00:00:00+00:00")
+        assert repo.find_by_connect_code("TASKLY-PGTEST")["id"] == USER
+
+        profile = repo.consume_connect_code(USER, 777000111)
+        assert profile["telegram_chat_id"] == 777000111 and profile["connect_code"] is None
+        assert repo.find_by_telegram_id(777000111)["id"] == USER
+        assert repo.find_by_user_id(USER)["telegram_chat_id"] == 777000111
+
+    def test_telegram_sudah_dipakai_profil_lain(self, pg_client):
+        repo = PostgresProfileRepository(pg_client)
+        repo.link_telegram(USER, 777000222)
+
+        with pytest.raises(TelegramAlreadyLinkedError):
+            repo.link_telegram(OTHER_USER, 777000222)
+
+    def test_profil_tidak_ada(self, pg_client):
+        repo = PostgresProfileRepository(pg_client)
+
+        with pytest.raises(NotFoundError):
+            repo.find_by_user_id("00000000-0000-0000-0000-999999999999")
+        with pytest.raises(NotFoundError):
+            repo.update("00000000-0000-0000-0000-999999999999", {"bio": "x"})
+        assert repo.find_by_telegram_id(1) is None
@@ -0,0 +1,119 @@
+# =============================================================================
+# tests/integration/test_repository_latency.py — PostgREST vs Direct Postgres
+#
+# TIPE TEST: Integration + Performance (butuh Postgres — docker compose up postgres)
+# YANG DIUKUR: Latency satu "request list" (versi data + halaman 50 row +
+#              summary bulan) per backend repository:
+#
+#   - postgres (prepared)  : PostgresExpenseRepository, pool + PREPARE/EXECUTE
+#   - postgres (unprepared): pool yang sama, setiap statement di-parse ulang
+#   - postgrest            : ExpenseRepository lewat HTTPS ke project Supabase
+#                            test — hanya jika BENCHMARK_POSTGREST_USER_ID diisi
+#                            (user di project test yang punya transaksi)
+#
+# Jalankan:
+#   docker compose up -d postgres
+#   pytest tests/integration/test_repository_latency.py -s
+#   BENCHMARK_POSTGREST_USER_ID=<uuid> pytest tests/integration/test_repository_latency.py -s
+# =============================================================================
+
+import os
+import statistics
+import time
+
+import pytest
+
+from app.infrastructure.postgres_client import PostgresClient
+from app.repositories.expense_repository import ExpenseRepository, PostgresExpenseRepository
+
+from .test_query_plans import _admin_url, _bootstrap
+
+pytestmark = [pytest.mark.integration, pytest.mark.performance, pytest.mark.slow]
+
+CHECK_DATABASE = "jarvis_repository_latency_check"
+USER = "00000000-0000-0000-0000-000000000042"
+ROUNDS = 200
+WARMUP = 20
+
+
+@pytest.fixture(scope="module")
+def engine():
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.exc import OperationalError
+
+    admin = create_engine(_admin_url(), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {CHECK_DATABASE} WITH (FORCE)"))
+            conn.execute(text(f"CREATE DATABASE {CHECK_DATABASE}"))
+    except OperationalError:
+        pytest.skip("Postgres tidak tersedia. Jalankan `docker compose up -d postgres` atau set DATABASE_URL.")
+
+    url = make_url(_admin_url()).set(database=CHECK_DATABASE)
+    engine = create_engine(url, pool_size=1, max_overflow=0, connect_args={"options": "-c timezone=UTC"})
+    try:
+        _bootstrap(engine)
+        yield engine
+    finally:
+        engine.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {CHECK_DATABASE} WITH (FORCE)"))
+        admin.dispose()
+
+
+def list_request(repo: ExpenseRepository, user_id: str) -> None:
+    """Query yang dijalankan GET /expenses?limit=50 + dashboard summary bulan ini."""
+    repo.get_data_version(user_id)
+    repo.find_page(user_id, limit=50, count_mode="exact")
+    repo.get_summary_by_month(user_id, 6, 2024)
+
+
+def latencies_ms(repo: ExpenseRepository, user_id: str, rounds: int = ROUNDS) -> list[float]:
+    for _ in range(WARMUP):
+        list_request(repo, user_id)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        list_request(repo, user_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def describe(name: str, samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return f"  {name:<22} p50 {cuts[49]:7.2f} ms   p95 {cuts[94]:7.2f} ms"
+
+
+def test_latency_postgres_langsung_vs_postgrest(engine, monkeypatch):
+    prepared = latencies_ms(PostgresExpenseRepository(PostgresClient(engine)), USER)
+
+    # Tanpa prepared statement: pool sama, setiap statement di-parse & di-plan ulang
+    monkeypatch.setattr(PostgresClient, "MAX_PREPARED_PER_CONNECTION", 0)
+    engine.dispose()
+    unprepared = latencies_ms(PostgresExpenseRepository(PostgresClient(engine)), USER)
+    monkeypatch.undo()
+
+    lines = [
+        f"\n1 request list = 3 panggilan repository ({ROUNDS} kali)",
+        describe("postgres (prepared)", prepared),
+        describe("postgres (unprepared)", unprepared),
+    ]
+
+    postgrest_user = os.getenv("BENCHMARK_POSTGREST_USER_ID")
+    if postgrest_user:
+        from supabase import create_client
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        client = create_client(settings.SUPABASE_TEST_URL, settings.SUPABASE_TEST_SERVICE_ROLE_KEY)
+        postgrest = latencies_ms(ExpenseRepository(client), postgrest_user, rounds=50)
+        lines.append(describe("postgrest (https)", postgrest))
+    else:
+        lines.append("  postgrest (https)      dilewati — set BENCHMARK_POSTGREST_USER_ID")
+    print("\n".join(lines))
+
+    # Plan dipakai ulang → tidak lebih lambat dari parse + plan setiap kali
+    assert statistics.median(prepared) <= statistics.median(unprepared) * 1.1
+    if postgrest_user:
+        assert statistics.median(prepared) < statistics.median(postgrest)
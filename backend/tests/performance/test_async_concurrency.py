@@ -0,0 +1,157 @@
+# =============================================================================
+# tests/performance/test_async_concurrency.py — Async I/O Concurrency Benchmark
+#
+# TIPE TEST: Performance (load)
+# YANG DIUKUR: Throughput GET /api/expenses saat N request berjalan bersamaan
+#              di satu event loop, dengan client PostgREST async vs blocking.
+#
+# Cara kerja:
+#   App FastAPI asli lewat httpx.ASGITransport; AsyncExpenseService dan
+#   AsyncExpenseRepository asli. Hanya client Supabase yang diganti
+#   FakePostgrestClient: setiap execute() = satu round trip ROUND_TRIP_SECONDS.
+#
+#   - async   : execute() → await asyncio.sleep  (client async, route async)
+#   - blocking: execute() → time.sleep           (client sync dipanggil di
+#               route async — event loop ikut tertahan selama round trip)
+#
+#   Setiap request list = 2 round trip (versi data + halaman).
+#
+#   Auth remote (test kedua): get_current_user asli, FakeAdminClient dengan
+#   auth.get_user sync (seperti supabase-py) yang tidur AUTH_ROUND_TRIP_SECONDS.
+#   Kalau panggilan itu menahan event loop, throughput berhenti di ~1 request
+#   per round trip auth berapapun jumlah request bersamaan.
+#
+# Jalankan:
+#   pytest tests/performance/test_async_concurrency.py -s
+# =============================================================================
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.application import create_app
+from app.core.config import get_settings
+from app.infrastructure.supabase_client import get_admin_supabase_client
+from app.models.auth import UserOut
+from app.repositories.expense_repository import AsyncExpenseRepository
+from app.services.expense_service import AsyncExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+ROUND_TRIP_SECONDS = 0.010
+IN_FLIGHT = (1, 4, 16, 64)
+REQUESTS_PER_WORKER = 4
+AUTH_ROUND_TRIP_SECONDS = 0.030
+
+
+class FakeResponse:
+    data: list = []
+    count = 0
+
+
+class FakeQuery:
+    """Menerima chain PostgREST (.eq, .order, ...); execute() meniru satu round trip."""
+
+    def __init__(self, blocking: bool):
+        self._blocking = blocking
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        if self._blocking:
+            time.sleep(ROUND_TRIP_SECONDS)
+        else:
+            await asyncio.sleep(ROUND_TRIP_SECONDS)
+        return FakeResponse()
+
+
+class FakePostgrestClient:
+    def __init__(self, blocking: bool):
+        self._blocking = blocking
+
+    def table(self, name):
+        return FakeQuery(self._blocking)
+
+
+class FakeAuth:
+    response = SimpleNamespace(user=UserOut(id="user-uuid-123", email="budi@test.com", created_at=""))
+
+    def get_user(self, token):
+        time.sleep(AUTH_ROUND_TRIP_SECONDS)
+        return self.response
+
+
+class FakeAdminClient:
+    auth = FakeAuth()
+
+
+async def measure_throughput(blocking: bool, in_flight: int, remote_auth: bool = False) -> float:
+    from app.api.expense import get_expense_service
+    from app.core.dependencies import get_access_token, get_current_user
+
+    repo = AsyncExpenseRepository(client=FakePostgrestClient(blocking))
+    app = create_app()
+    if remote_auth:
+        app.dependency_overrides[get_admin_supabase_client] = FakeAdminClient
+    else:
+        user = MagicMock()
+        user.id = "user-uuid-123"
+        app.dependency_overrides[get_current_user] = lambda: user
+        app.dependency_overrides[get_access_token] = lambda: "fake.jwt.token"
+    app.dependency_overrides[get_expense_service] = lambda: AsyncExpenseService(expense_repo=repo)
+
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": "Bearer fake.jwt.token"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        async def worker():
+            for _ in range(REQUESTS_PER_WORKER):
+                response = await client.get("/api/expenses?limit=20")
+                assert response.status_code == 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(in_flight)))
+        elapsed = time.perf_counter() - started
+
+    return in_flight * REQUESTS_PER_WORKER / elapsed
+
+
+async def test_throughput_async_naik_seiring_request_bersamaan():
+    results = {
+        mode: {n: await measure_throughput(mode == "blocking", n) for n in IN_FLIGHT}
+        for mode in ("async", "blocking")
+    }
+
+    print(f"\nrequest/detik (round trip {ROUND_TRIP_SECONDS * 1000:.0f} ms, 2 per request)")
+    print("  in-flight " + "".join(f"{n:>9}" for n in IN_FLIGHT))
+    for mode, by_n in results.items():
+        print(f"  {mode:<9} " + "".join(f"{by_n[n]:>9.0f}" for n in IN_FLIGHT))
+
+    async_rps, blocking_rps = results["async"], results["blocking"]
+    # Round trip async saling tumpang tindih → throughput ikut jumlah in-flight
+    # (di atas ~16 in-flight batasnya CPU routing/serialisasi, bukan round trip)
+    assert async_rps[4] > async_rps[1] * 2.5
+    assert async_rps[16] > async_rps[1] * 5
+    assert async_rps[64] >= async_rps[16] * 0.9
+    # Round trip blocking menahan event loop → throughput tetap ~1 request per 2 round trip
+    assert blocking_rps[64] < blocking_rps[1] * 1.5
+    assert async_rps[64] > blocking_rps[64] * 5
+
+
+async def test_auth_remote_tidak_menahan_event_loop(monkeypatch):
+    monkeypatch.setattr(get_settings(), "AUTH_VERIFICATION_MODE", "remote")
+
+    by_n = {n: await measure_throughput(False, n, remote_auth=True) for n in (1, 16)}
+
+    print(f"\nrequest/detik dengan auth remote ({AUTH_ROUND_TRIP_SECONDS * 1000:.0f} ms, client sync)")
+    print("  in-flight " + "".join(f"{n:>9}" for n in by_n))
+    print("  async     " + "".join(f"{rps:>9.0f}" for rps in by_n.values()))
+
+    # Di worker thread round trip auth saling tumpang tindih; di event loop
+    # throughput 16 in-flight tertahan di ~1 / AUTH_ROUND_TRIP_SECONDS
+    assert by_n[16] > by_n[1] * 4
+    assert by_n[16] > 2 / AUTH_ROUND_TRIP_SECONDS
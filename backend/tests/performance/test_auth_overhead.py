@@ -0,0 +1,112 @@
+# =============================================================================
+# tests/performance/test_auth_overhead.py — Auth Overhead per Request
+#
+# TIPE TEST: Performance
+# YANG DIUKUR: Latency GET /api/auth/verify (route paling tipis yang hanya
+#              butuh CurrentUser) per mode verifikasi token:
+#
+#   - remote        : AUTH_VERIFICATION_MODE=remote — auth.get_user() ke
+#                     Supabase setiap request (round trip ROUND_TRIP_SECONDS)
+#   - local (decode): AUTH_VERIFICATION_MODE=local, token baru setiap request
+#                     → selalu cache miss, HS256 decode setiap kali
+#   - local (cache) : AUTH_VERIFICATION_MODE=local, token yang sama → cache hit
+#
+# Cara kerja:
+#   App FastAPI asli lewat httpx.ASGITransport. Hanya admin client Supabase
+#   yang diganti: get_user() tidur ROUND_TRIP_SECONDS (angka realistis untuk
+#   Supabase Auth dari region yang sama).
+#
+# Jalankan:
+#   pytest tests/performance/test_auth_overhead.py -s
+# =============================================================================
+
+import statistics
+import time
+
+import httpx
+import jwt
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.application import create_app
+from app.core.config import get_settings
+from app.core.token_cache import get_token_cache
+from app.infrastructure.supabase_client import get_admin_supabase_client
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+ROUND_TRIP_SECONDS = 0.020
+ROUNDS = 200
+WARMUP = 20
+
+
+def make_token(index: int = 0) -> str:
+    payload = {
+        "sub": "00000000-0000-0000-0000-000000000001",
+        "email": "budi@test.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + 3600,
+        "session_id": str(index),
+    }
+    return jwt.encode(payload, get_settings().SUPABASE_JWT_SECRET, algorithm="HS256")
+
+
+class FakeAdminAuth:
+    def get_user(self, token):
+        time.sleep(ROUND_TRIP_SECONDS)
+        response = MagicMock()
+        response.user.id = "00000000-0000-0000-0000-000000000001"
+        response.user.email = "budi@test.com"
+        return response
+
+
+async def measure_ms(fresh_token: bool) -> list[float]:
+    app = create_app()
+    admin = MagicMock()
+    admin.auth = FakeAdminAuth()
+    app.dependency_overrides[get_admin_supabase_client] = lambda: admin
+
+    tokens = [make_token(index if fresh_token else 0) for index in range(WARMUP + ROUNDS)]
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for index, token in enumerate(tokens):
+            started = time.perf_counter()
+            response = await client.get("/api/auth/verify", headers={"Authorization": f"Bearer {token}"})
+            elapsed = (time.perf_counter() - started) * 1000
+            assert response.status_code == 200
+            if index >= WARMUP:
+                samples.append(elapsed)
+    return samples
+
+
+def describe(name: str, samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return f"  {name:<16} p50 {cuts[49]:7.3f} ms   p95 {cuts[94]:7.3f} ms"
+
+
+async def test_overhead_auth_per_request(monkeypatch):
+    settings = get_settings()
+    get_token_cache.cache_clear()
+
+    remote = await measure_ms(fresh_token=False)
+    monkeypatch.setattr(settings, "AUTH_VERIFICATION_MODE", "local")
+    decoded = await measure_ms(fresh_token=True)
+    cached = await measure_ms(fresh_token=False)
+    stats = get_token_cache().stats
+    get_token_cache.cache_clear()
+
+    print(
+        f"\nGET /api/auth/verify, {ROUNDS} request (round trip Supabase Auth {ROUND_TRIP_SECONDS * 1000:.0f} ms)\n"
+        + "\n".join([
+            describe("remote", remote),
+            describe("local (decode)", decoded),
+            describe("local (cache)", cached),
+        ])
+    )
+
+    assert stats.hits >= ROUNDS
+    # Tanpa round trip ke Supabase Auth
+    assert statistics.median(decoded) < statistics.median(remote) / 4
+    # Cache hit melewati decode + validasi claim
+    assert statistics.median(cached) <= statistics.median(decoded) * 1.1
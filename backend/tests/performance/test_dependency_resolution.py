@@ -0,0 +1,98 @@
+# =============================================================================
+# tests/performance/test_dependency_resolution.py — Dependency Resolution Cost
+#
+# TIPE TEST: Performance (micro-benchmark)
+# YANG DIUKUR: Waktu membangun service untuk satu request (get_expense_service
+#              dan get_ai_services), tanpa I/O:
+#
+#   - rebuild   : seperti sebelum ServiceContainer — client admin, AIRepository,
+#                 EmbeddingService, repository dan service dibuat ulang setiap
+#                 request
+#   - container : ServiceContainer — hanya client user + service yang membawa
+#                 token dibuat per request
+#
+# Cara kerja:
+#   Client Supabase memakai SupabaseClientManager asli dengan transport palsu
+#   (tidak ada request yang dikirim); OpenAI client MagicMock.
+#
+# Jalankan:
+#   pytest tests/performance/test_dependency_resolution.py -s
+# =============================================================================
+
+import statistics
+import time
+
+import httpx
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.container import ServiceContainer
+from app.infrastructure.supabase_client import SupabaseClientManager
+from app.repositories.ai_repository import AsyncAIRepository
+from app.repositories.expense_repository import AsyncExpenseRepository
+from app.services.ai_services import AsyncAIService
+from app.services.embedding_services import AsyncEmbeddingService
+from app.services.expense_service import AsyncExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+ROUNDS = 20
+CALLS_PER_ROUND = 500
+
+
+def rebuild_expense_service(clients, openai, token, schedule_task):
+    ai_repo = AsyncAIRepository(client=clients.async_admin_view())
+    embedding_service = AsyncEmbeddingService(openai_client=openai, ai_repo=ai_repo)
+    repo = AsyncExpenseRepository(client=clients.async_user_view(token))
+    return AsyncExpenseService(expense_repo=repo, embedding_service=embedding_service, schedule_task=schedule_task)
+
+
+def rebuild_ai_service(clients, openai, token):
+    expense_service = AsyncExpenseService(expense_repo=AsyncExpenseRepository(client=clients.async_user_view(token)))
+    ai_repo = AsyncAIRepository(client=clients.async_admin_view())
+    embedding_service = AsyncEmbeddingService(openai_client=openai, ai_repo=ai_repo)
+    return AsyncAIService(
+        openai_client=openai, expense_service=expense_service, embedding_service=embedding_service, ai_repo=ai_repo,
+    )
+
+
+def per_call_us(build) -> list[float]:
+    build()
+    samples = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(CALLS_PER_ROUND):
+            build()
+        samples.append((time.perf_counter() - started) / CALLS_PER_ROUND * 1e6)
+    return samples
+
+
+async def test_resolusi_dependency_per_request():
+    clients = SupabaseClientManager(
+        url="https://project.supabase.co",
+        anon_key="anon-key",
+        service_role_key="service-key",
+        async_transport_factory=lambda: httpx.MockTransport(lambda request: httpx.Response(200, json=[])),
+    )
+    openai = MagicMock()
+    settings = MagicMock()
+    settings.use_postgres_repositories = False
+    container = ServiceContainer(settings=settings, clients=clients, openai_client=openai)
+    # Fungsi biasa seperti BackgroundTasks.add_task (bool(MagicMock) sendiri lambat)
+    schedule_task = lambda func, *args: None
+
+    results = {
+        "expense rebuild": per_call_us(lambda: rebuild_expense_service(clients, openai, "token", schedule_task)),
+        "expense container": per_call_us(lambda: container.expense_service("token", schedule_task)),
+        "ai rebuild": per_call_us(lambda: rebuild_ai_service(clients, openai, "token")),
+        "ai container": per_call_us(lambda: container.ai_service("token")),
+    }
+    medians = {name: statistics.median(samples) for name, samples in results.items()}
+
+    print(f"\nwaktu membangun service per request (median {ROUNDS} x {CALLS_PER_ROUND} panggilan)")
+    for name, median in medians.items():
+        print(f"  {name:<18} {median:8.1f} µs")
+
+    # Client admin + AIRepository + EmbeddingService tidak lagi dibuat per request
+    assert medians["expense container"] < medians["expense rebuild"] * 0.75
+    assert medians["ai container"] < medians["ai rebuild"] * 0.75
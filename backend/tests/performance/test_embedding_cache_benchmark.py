@@ -0,0 +1,94 @@
+# =============================================================================
+# tests/performance/test_embedding_cache_benchmark.py — Repeated Expense Texts
+#
+# TIPE TEST: Performance
+# YANG DIUKUR: Jumlah panggilan OpenAI dan latency create_expense (embedding
+#              inline) untuk N transaksi yang teksnya sering berulang
+#              (kopi yang sama setiap pagi, edit tanpa mengubah teks):
+#
+#   - tanpa cache : setiap write memanggil embeddings.create
+#   - dengan cache: EmbeddingCache (memory + SQLite) — teks yang pernah
+#                   di-embed memakai vector tersimpan
+#
+# Cara kerja:
+#   EmbeddingService asli, OpenAI client palsu yang tidur OPENAI_SECONDS per
+#   panggilan. N write dengan DISTINCT_TEXTS teks berbeda. Lalu cache dibuat
+#   ulang dari file SQLite yang sama (restart) → tidak ada panggilan sama sekali.
+#
+# Jalankan:
+#   pytest tests/performance/test_embedding_cache_benchmark.py -s
+# =============================================================================
+
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.embedding_cache import EmbeddingCache
+from app.models.expense import CreateExpenseRequest
+from app.services.embedding_services import EmbeddingService
+from app.services.expense_service import ExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+OPENAI_SECONDS = 0.030
+WRITES = 200
+DISTINCT_TEXTS = 20
+DIMENSIONS = 1536
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, input):
+        self.calls += 1
+        time.sleep(OPENAI_SECONDS)
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.5] * DIMENSIONS) for i in range(len(texts))])
+
+
+def write_latencies_ms(cache: EmbeddingCache | None) -> tuple[list[float], int]:
+    openai = SimpleNamespace(embeddings=FakeEmbeddings())
+    repo = MagicMock()
+    repo.create.side_effect = lambda row: {
+        **row, "id": "expense-1", "subcategory": None, "payment_method": None,
+        "transaction_date": "2024-06-15", "created_at": "2024-06-15T10:00:00+00:00",
+        "updated_at": "2024-06-15T10:00:00+00:00",
+    }
+    service = ExpenseService(
+        expense_repo=repo,
+        embedding_service=EmbeddingService(openai_client=openai, ai_repo=MagicMock(), embedding_cache=cache),
+    )
+    samples = []
+    for i in range(WRITES):
+        request = CreateExpenseRequest(amount=25000, category="makanan", description=f"menu {i % DISTINCT_TEXTS}")
+        started = time.perf_counter()
+        service.create_expense("user-1", request)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples, openai.embeddings.calls
+
+
+def test_embedding_cache_vs_tanpa_cache(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    uncached, uncached_calls = write_latencies_ms(None)
+    cache = EmbeddingCache(path=path)
+    cached, cached_calls = write_latencies_ms(cache)
+    restarted = EmbeddingCache(path=path)
+    warm, warm_calls = write_latencies_ms(restarted)
+
+    print(
+        f"\n{WRITES} create_expense, {DISTINCT_TEXTS} teks berbeda (embeddings {OPENAI_SECONDS * 1000:.0f} ms)"
+        f"\n  tanpa cache      p50 {statistics.median(uncached):7.3f} ms   openai {uncached_calls:3d}x"
+        f"\n  cache            p50 {statistics.median(cached):7.3f} ms   openai {cached_calls:3d}x"
+        f"   hit rate {cache.snapshot()['hit_rate']:.2f}"
+        f"\n  setelah restart  p50 {statistics.median(warm):7.3f} ms   openai {warm_calls:3d}x"
+        f"   disk hits {restarted.stats.disk_hits}"
+    )
+
+    assert uncached_calls == WRITES
+    assert cached_calls == DISTINCT_TEXTS
+    assert warm_calls == 0
+    assert statistics.median(cached) < OPENAI_SECONDS * 1000 / 10
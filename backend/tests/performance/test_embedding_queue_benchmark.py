@@ -0,0 +1,116 @@
+# =============================================================================
+# tests/performance/test_embedding_queue_benchmark.py — Embedding Off the Write Path
+#
+# TIPE TEST: Performance
+# YANG DIUKUR: Latency create_expense dan jumlah panggilan OpenAI / UPDATE
+#              untuk N expense berturut-turut:
+#
+#   - inline : embedding dibuat di dalam request (perilaku lama) — setiap
+#              write menunggu embeddings.create + UPDATE embedding
+#   - queue  : EmbeddingQueue — write hanya mengantrikan row; worker
+#              mengirim batch embeddings.create(input=[...]) + satu UPDATE
+#
+# Cara kerja:
+#   EmbeddingService asli. OpenAI client dan AIRepository palsu: setiap
+#   embeddings.create tidur OPENAI_SECONDS, setiap UPDATE tidur DB_SECONDS.
+#   Repository expense palsu (INSERT instan) supaya yang terukur hanya
+#   biaya embedding.
+#
+# Jalankan:
+#   pytest tests/performance/test_embedding_queue_benchmark.py -s
+# =============================================================================
+
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.models.expense import CreateExpenseRequest
+from app.services.embedding_queue import EmbeddingQueue
+from app.services.embedding_services import EmbeddingService
+from app.services.expense_service import ExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+OPENAI_SECONDS = 0.030
+DB_SECONDS = 0.005
+WRITES = 100
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, model, input):
+        self.calls += 1
+        time.sleep(OPENAI_SECONDS)
+        texts = input if isinstance(input, list) else [input]
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[0.0] * 8) for i in range(len(texts))])
+
+
+class FakeAIRepository:
+    def __init__(self):
+        self.updates = 0
+        self.saved: set[str] = set()
+
+    def save_embedding(self, expense_id, embedding, model=None):
+        self.updates += 1
+        time.sleep(DB_SECONDS)
+        self.saved.add(expense_id)
+
+    def save_embeddings(self, embeddings, model=None):
+        self.updates += 1
+        time.sleep(DB_SECONDS)
+        self.saved.update(embeddings)
+        return len(embeddings)
+
+
+def make_stack():
+    openai = SimpleNamespace(embeddings=FakeEmbeddings())
+    ai_repo = FakeAIRepository()
+    repo = MagicMock()
+    counter = iter(range(10**6))
+    repo.create.side_effect = lambda row: {
+        **row, "id": f"expense-{next(counter)}", "description": None, "subcategory": None,
+        "payment_method": None, "transaction_date": "2024-06-15",
+        "created_at": "2024-06-15T10:00:00+00:00", "updated_at": "2024-06-15T10:00:00+00:00",
+    }
+    return openai, ai_repo, repo, EmbeddingService(openai_client=openai, ai_repo=ai_repo)
+
+
+def write_latencies_ms(service: ExpenseService) -> list[float]:
+    samples = []
+    for i in range(WRITES):
+        started = time.perf_counter()
+        service.create_expense("user-1", CreateExpenseRequest(amount=1000 + i, category="makanan"))
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def test_embedding_lewat_queue_vs_inline():
+    openai, ai_repo, repo, embedding_service = make_stack()
+    inline = write_latencies_ms(ExpenseService(expense_repo=repo, embedding_service=embedding_service))
+    inline_calls, inline_updates = openai.embeddings.calls, ai_repo.updates
+
+    openai, ai_repo, repo, embedding_service = make_stack()
+    queue = EmbeddingQueue(embedding_service, batch_size=100, max_wait=0.2, concurrency=2)
+    started = time.perf_counter()
+    queued = write_latencies_ms(ExpenseService(expense_repo=repo, embedding_queue=queue))
+    assert queue.flush(timeout=10)
+    drained_s = time.perf_counter() - started
+    queue.stop()
+
+    print(
+        f"\n{WRITES} create_expense (embeddings {OPENAI_SECONDS * 1000:.0f} ms, UPDATE {DB_SECONDS * 1000:.0f} ms)"
+        f"\n  inline  p50 {statistics.median(inline):7.3f} ms   openai {inline_calls:3d}x   update {inline_updates:3d}x"
+        f"\n  queue   p50 {statistics.median(queued):7.3f} ms   openai {openai.embeddings.calls:3d}x"
+        f"   update {ai_repo.updates:3d}x   semua ter-embed dalam {drained_s:.2f} s"
+    )
+
+    assert len(ai_repo.saved) == WRITES
+    assert inline_calls == WRITES
+    # Write tidak lagi menunggu OpenAI
+    assert statistics.median(queued) < OPENAI_SECONDS * 1000 / 10
+    assert openai.embeddings.calls <= WRITES / 10
@@ -0,0 +1,100 @@
+# =============================================================================
+# tests/performance/test_export_formats_benchmark.py — Export Format Benchmark
+#
+# TIPE TEST: Performance (pytest-benchmark)
+# YANG DIUKUR: Waktu export dan ukuran file CSV vs NDJSON vs Arrow vs Parquet
+#              untuk riwayat transaksi yang sama.
+#
+# Cara kerja:
+#   PagedExpenseRepository mengembalikan halaman keyset dari list row yang
+#   sudah dibuat di depan, jadi yang diukur hanya serialisasi di
+#   ExpenseService.export_expenses (bukan pembuatan data atau network).
+#
+# Jalankan:
+#   pytest tests/performance/test_export_formats_benchmark.py --benchmark-only -s
+# =============================================================================
+
+import io
+import random
+
+import pytest
+
+from app.services.expense_service import ExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+ROW_COUNT = 50_000
+FORMATS = ["csv", "ndjson", "arrow", "parquet"]
+
+CATEGORIES = {
+    "makanan": ["makan siang", "kopi", "groceries"],
+    "transportasi": ["bensin", "ojek online", "parkir"],
+    "tagihan": ["listrik", "internet", "air"],
+    "gaji": [None],
+}
+PAYMENT_METHODS = ["cash", "e-wallet", "debit", "credit card"]
+
+
+def make_rows(n: int) -> list[dict]:
+    rng = random.Random(n)
+    rows = []
+    for i in range(n):
+        category = rng.choice(list(CATEGORIES))
+        day = 1 + i % 28
+        rows.append({
+            "_index": i,
+            "id": f"{rng.getrandbits(128):032x}",
+            "amount": round(rng.uniform(1_000, 2_000_000), 2),
+            "type": "income" if category == "gaji" else "expense",
+            "category": category,
+            "subcategory": rng.choice(CATEGORIES[category]),
+            "payment_method": rng.choice(PAYMENT_METHODS),
+            "description": f"{category} #{rng.randint(1, 500)}",
+            "transaction_date": f"2024-{1 + i % 12:02d}-{day:02d}",
+            "created_at": f"2024-{1 + i % 12:02d}-{day:02d}T{i % 24:02d}:{i % 60:02d}:00.{i % 1_000_000:06d}+00:00",
+            "updated_at": f"2024-{1 + i % 12:02d}-{day:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00",
+        })
+    return rows
+
+
+class PagedExpenseRepository:
+    """Stand-in ExpenseRepository: cursor = index row berikutnya."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+
+    def encode_cursor(self, row: dict, sort_by: str = "created_at", sort_order: str = "desc") -> str:
+        return str(row["_index"] + 1)
+
+    def find_all(self, user_id: str, limit: int = 100, cursor: str | None = None, **filters) -> list[dict]:
+        start = int(cursor) if cursor else 0
+        return self.rows[start:start + limit]
+
+
+def export_bytes(service: ExpenseService, export_format: str) -> bytes:
+    return b"".join(service.export_expenses(user_id="user-1", export_format=export_format))
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ExpenseService(expense_repo=PagedExpenseRepository(make_rows(ROW_COUNT)))
+
+
+@pytest.mark.parametrize("export_format", FORMATS)
+def test_benchmark_export_format(benchmark, service, export_format):
+    data = benchmark(export_bytes, service, export_format)
+    benchmark.extra_info["size_bytes"] = len(data)
+    assert data
+
+
+def test_ukuran_file_per_format(service):
+    """Parquet (kolumnar + terkompresi) harus jauh lebih kecil dari CSV untuk data yang sama."""
+    import pyarrow.parquet as pq
+
+    sizes = {fmt: len(export_bytes(service, fmt)) for fmt in FORMATS}
+    print("\n" + "  ".join(f"{fmt}={size / 1024:.0f}KB" for fmt, size in sizes.items()))
+
+    assert sizes["parquet"] < sizes["csv"]
+    assert sizes["csv"] < sizes["ndjson"]
+    parquet_table = pq.read_table(io.BytesIO(export_bytes(service, "parquet")))
+    assert parquet_table.num_rows == ROW_COUNT
@@ -0,0 +1,85 @@
+# =============================================================================
+# tests/performance/test_export_memory.py — Streaming CSV Export Memory Test
+#
+# TIPE TEST: Performance (memory)
+# YANG DIUKUR: Peak RSS saat export 500.000 transaksi sintetis.
+#
+# SyntheticExpenseRepository membuat row secara lazy per halaman (keyset),
+# sehingga satu-satunya yang bisa menahan memori adalah ExpenseService.
+# Export yang menumpuk semua row di list akan naik ratusan MB; versi streaming
+# hanya menahan satu halaman.
+# =============================================================================
+
+import gc
+
+import psutil
+import pytest
+
+from app.services.expense_service import ExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+TOTAL_ROWS = 500_000
+MAX_RSS_GROWTH_MB = 40
+
+
+class SyntheticExpenseRepository:
+    """Stand-in ExpenseRepository: cursor = index row berikutnya."""
+
+    def __init__(self, total_rows: int):
+        self.total_rows = total_rows
+        self.pages_served = 0
+
+    def encode_cursor(self, row: dict, sort_by: str = "created_at", sort_order: str = "desc") -> str:
+        return str(row["_index"] + 1)
+
+    def find_all(self, user_id: str, limit: int = 100, cursor: str | None = None, **filters) -> list[dict]:
+        start = int(cursor) if cursor else 0
+        end = min(start + limit, self.total_rows)
+        self.pages_served += 1
+        return [
+            {
+                "_index": i,
+                "id": f"00000000-0000-0000-0000-{i:012d}",
+                "amount": 1000 + (i % 997) * 250.5,
+                "type": "expense" if i % 5 else "income",
+                "category": "makanan",
+                "subcategory": "makan siang",
+                "payment_method": "e-wallet",
+                "description": f"transaksi sintetis nomor {i}",
+                "transaction_date": "2024-06-15",
+                "created_at": "2024-06-15T10:00:00+00:00",
+                "updated_at": "2024-06-15T10:00:00+00:00",
+            }
+            for i in range(start, end)
+        ]
+
+
+def test_export_csv_500k_rows_peak_rss_tetap_terbatas():
+    repo = SyntheticExpenseRepository(TOTAL_ROWS)
+    service = ExpenseService(expense_repo=repo)
+    process = psutil.Process()
+
+    gc.collect()
+    baseline_rss = process.memory_info().rss
+    peak_rss = baseline_rss
+    total_bytes = 0
+    line_count = 0
+
+    for i, chunk in enumerate(service.export_expenses_csv(user_id="user-1")):
+        total_bytes += len(chunk)
+        line_count += chunk.count("\n")
+        if i % 25 == 0:
+            peak_rss = max(peak_rss, process.memory_info().rss)
+    peak_rss = max(peak_rss, process.memory_info().rss)
+
+    growth_mb = (peak_rss - baseline_rss) / (1024 * 1024)
+    output_mb = total_bytes / (1024 * 1024)
+    print(f"\nCSV output: {output_mb:.1f} MB, peak RSS growth: {growth_mb:.1f} MB")
+
+    # Header + semua row terkirim, dihitung per halaman keyset
+    assert line_count == TOTAL_ROWS + 1
+    assert repo.pages_served == TOTAL_ROWS // 1000 + 1
+    # Output jauh lebih besar dari batas memori → tidak mungkin ditahan seluruhnya
+    assert output_mb > MAX_RSS_GROWTH_MB
+    assert growth_mb < MAX_RSS_GROWTH_MB
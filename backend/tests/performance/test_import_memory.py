@@ -0,0 +1,88 @@
+# =============================================================================
+# tests/performance/test_import_memory.py — Streaming CSV Import Memory Test
+#
+# TIPE TEST: Performance (memory)
+# YANG DIUKUR: Peak RSS saat import file CSV 400.000 baris (layout export).
+#
+# File ditulis ke disk dulu, lalu dibaca ExpenseService.import_expenses_csv
+# sebagai stream. CountingExpenseRepository tidak menyimpan row yang diinsert,
+# sehingga satu-satunya yang bisa menahan memori adalah service. Import yang
+# membaca seluruh file / semua row ke list akan naik ratusan MB; versi
+# streaming hanya menahan satu chunk insert.
+# =============================================================================
+
+import csv
+import gc
+
+import psutil
+import pytest
+
+from app.services.expense_service import BULK_INSERT_CHUNK_SIZE, CSV_COLUMNS, ExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+TOTAL_ROWS = 400_000
+MAX_RSS_GROWTH_MB = 40
+
+
+class CountingExpenseRepository:
+    """Stand-in ExpenseRepository: hanya menghitung, sambil mencatat peak RSS."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.chunks = 0
+        self.process = psutil.Process()
+        self.peak_rss = self.process.memory_info().rss
+
+    def create_many(self, expenses_data: list[dict]) -> list[dict]:
+        self.inserted += len(expenses_data)
+        self.chunks += 1
+        if self.chunks % 50 == 0:
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+        return expenses_data
+
+
+@pytest.fixture(scope="module")
+def large_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("import") / "expenses.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for i in range(TOTAL_ROWS):
+            writer.writerow([
+                f"00000000-0000-0000-0000-{i:012d}",
+                1000 + (i % 997) * 250.5,
+                "expense" if i % 5 else "income",
+                "makanan",
+                "makan siang",
+                "e-wallet",
+                f"transaksi sintetis nomor {i}",
+                "2024-06-15",
+                "2024-06-15T10:00:00+00:00",
+                "2024-06-15T10:00:00+00:00",
+            ])
+    return path
+
+
+def test_import_csv_400k_rows_peak_rss_tetap_terbatas(large_csv):
+    repo = CountingExpenseRepository()
+    service = ExpenseService(expense_repo=repo)
+    file_mb = large_csv.stat().st_size / (1024 * 1024)
+
+    gc.collect()
+    baseline_rss = repo.process.memory_info().rss
+    repo.peak_rss = baseline_rss
+
+    with open(large_csv, "rb") as f:
+        report = service.import_expenses_csv(user_id="user-1", csv_file=f)
+    peak_rss = max(repo.peak_rss, repo.process.memory_info().rss)
+
+    growth_mb = (peak_rss - baseline_rss) / (1024 * 1024)
+    print(f"\nCSV input: {file_mb:.1f} MB, peak RSS growth: {growth_mb:.1f} MB")
+
+    assert report.imported == TOTAL_ROWS
+    assert report.failed == 0
+    assert repo.chunks == -(-TOTAL_ROWS // BULK_INSERT_CHUNK_SIZE)
+    # File jauh lebih besar dari batas memori → tidak mungkin ditahan seluruhnya
+    assert file_mb > MAX_RSS_GROWTH_MB
+    assert growth_mb < MAX_RSS_GROWTH_MB
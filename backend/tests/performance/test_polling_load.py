@@ -0,0 +1,151 @@
+# =============================================================================
+# tests/performance/test_polling_load.py — Dashboard Polling Load Test
+#
+# TIPE TEST: Performance (load)
+# YANG DIUKUR: Jumlah query data (list + summary) dan waktu total saat banyak
+#              tab dashboard mem-polling API, dengan dan tanpa If-None-Match.
+#
+# Cara kerja:
+#   App FastAPI asli (TestClient) dengan AsyncExpenseService asli; hanya repository
+#   yang diganti SimulatedExpenseRepository. Setiap query diberi biaya tetap
+#   (asyncio.sleep) seperti round trip ke PostgREST; lookup versi juga satu round
+#   trip, tapi hanya membaca satu row primary key. Setiap WRITE_EVERY ronde
+#   ada satu write yang menaikkan versi data user.
+#
+#   - tanpa ETag : setiap poll menghitung ulang list + summary
+#   - dengan ETag: poll mengirim ETag terakhir → 304 selama versi sama
+#
+# Jalankan:
+#   pytest tests/performance/test_polling_load.py -s
+# =============================================================================
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from app.core.application import create_app
+from app.repositories.expense_repository import ExpenseRepository
+from app.services.expense_service import AsyncExpenseService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+CLIENTS = 5
+ROUNDS = 20
+WRITE_EVERY = 5
+PAGE_SIZE = 50
+DATA_QUERY_SECONDS = 0.010  # satu round trip PostgREST
+VERSION_QUERY_SECONDS = 0.003  # juga satu round trip, tapi lookup primary key
+ENDPOINTS = (
+    "/api/expenses?limit=50",
+    "/api/expenses/summary",
+    "/api/expenses/summary/monthly?month=6&year=2024",
+)
+
+
+class SimulatedExpenseRepository:
+    """Repository palsu dengan biaya per query; menghitung query data yang dijalankan."""
+
+    encode_cursor = staticmethod(ExpenseRepository.encode_cursor)
+    select_columns = staticmethod(ExpenseRepository.select_columns)
+
+    def __init__(self):
+        self.version = 1
+        self.data_queries = 0
+
+    async def get_data_version(self, user_id: str) -> int:
+        await asyncio.sleep(VERSION_QUERY_SECONDS)
+        return self.version
+
+    async def find_page(self, user_id: str, limit: int = 100, **kwargs):
+        await asyncio.sleep(DATA_QUERY_SECONDS)
+        self.data_queries += 1
+        rows = [
+            {
+                "id": f"00000000-0000-0000-0000-{i:012d}",
+                "amount": 1000 + i,
+                "type": "expense",
+                "description": f"transaksi nomor {i}",
+                "category": "makanan",
+                "subcategory": None,
+                "payment_method": "e-wallet",
+                "transaction_date": "2024-06-15",
+                "created_at": "2024-06-15T10:00:00+00:00",
+                "updated_at": "2024-06-15T10:00:00+00:00",
+            }
+            for i in range(min(limit, PAGE_SIZE))
+        ]
+        return rows, 1000
+
+    async def _summary(self, *args, **kwargs) -> dict:
+        await asyncio.sleep(DATA_QUERY_SECONDS)
+        self.data_queries += 1
+        return {"total_income": 5_000_000.0, "total_expense": 3_250_000.0, "net_balance": 1_750_000.0}
+
+    get_summary_all_time = _summary
+    get_summary_by_month = _summary
+
+
+def run_polling(use_etag: bool) -> dict:
+    from app.api.expense import get_expense_service
+    from app.core.dependencies import get_access_token, get_current_user
+
+    repo = SimulatedExpenseRepository()
+    app = create_app()
+    user = MagicMock()
+    user.id = "user-uuid-123"
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_access_token] = lambda: "fake.jwt.token"
+    app.dependency_overrides[get_expense_service] = lambda: AsyncExpenseService(expense_repo=repo)
+
+    etags: dict[tuple[int, str], str] = {}
+    statuses = {200: 0, 304: 0}
+    body_bytes = 0
+
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        for round_no in range(ROUNDS):
+            if round_no and round_no % WRITE_EVERY == 0:
+                repo.version += 1  # satu create/update/delete oleh user
+            for tab in range(CLIENTS):
+                for path in ENDPOINTS:
+                    headers = {}
+                    if use_etag and (tab, path) in etags:
+                        headers["If-None-Match"] = etags[(tab, path)]
+                    response = client.get(path, headers=headers)
+                    statuses[response.status_code] += 1
+                    body_bytes += len(response.content)
+                    etags[(tab, path)] = response.headers["ETag"]
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed": elapsed,
+        "data_queries": repo.data_queries,
+        "statuses": statuses,
+        "body_bytes": body_bytes,
+    }
+
+
+def test_polling_dengan_etag_jauh_lebih_murah():
+    without = run_polling(use_etag=False)
+    with_etag = run_polling(use_etag=True)
+    requests = CLIENTS * ROUNDS * len(ENDPOINTS)
+    versions = ROUNDS // WRITE_EVERY
+
+    print(
+        f"\n{requests} polls, {versions - 1} writes"
+        f"\n  tanpa ETag : {without['data_queries']} data queries, "
+        f"{without['body_bytes'] / 1024:.0f} KB, {without['elapsed']:.2f}s"
+        f"\n  dengan ETag: {with_etag['data_queries']} data queries, "
+        f"{with_etag['body_bytes'] / 1024:.0f} KB, {with_etag['elapsed']:.2f}s "
+        f"({with_etag['statuses'][304]} x 304)"
+    )
+
+    assert without["data_queries"] == requests
+    # Hanya poll pertama setelah setiap perubahan versi yang menghitung ulang
+    assert with_etag["data_queries"] == CLIENTS * len(ENDPOINTS) * versions
+    assert with_etag["statuses"][304] == requests - with_etag["data_queries"]
+    assert with_etag["body_bytes"] < without["body_bytes"] / 3
+    assert with_etag["elapsed"] < without["elapsed"] * 0.75
@@ -0,0 +1,149 @@
+# =============================================================================
+# tests/performance/test_projection_benchmark.py — Column Projection Benchmark
+#
+# TIPE TEST: Performance (pytest-benchmark)
+# YANG DIUKUR: Ukuran payload PostgREST dan waktu parsing + ExpenseOut untuk
+#              satu halaman 100 row, sebelum dan sesudah column projection.
+#
+# Cara kerja:
+#   ProjectingPostgrestClient menyimpan row lengkap (termasuk embedding 1536
+#   float dan search_vector, dalam format teks seperti yang dikirim PostgREST)
+#   dan melayani select() sesuai kolom yang diminta. Body JSON di-serialize
+#   sekali per daftar kolom; execute() hanya melakukan json.loads, sama
+#   seperti postgrest-py saat menerima response.
+#
+# Jalankan:
+#   pytest tests/performance/test_projection_benchmark.py --benchmark-only -s
+# =============================================================================
+
+import json
+import random
+
+import pytest
+
+from app.models.expense import ExpenseOut
+from app.repositories.expense_repository import ExpenseRepository
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+PAGE_SIZE = 100
+EMBEDDING_DIM = 1536
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, count=None):
+        self.body = body
+        self.data = json.loads(body)
+        self.count = count
+
+
+class FakeQuery:
+    """Menerima chain PostgREST (.eq, .order, ...) dan mengembalikan body untuk kolom yang dipilih."""
+
+    def __init__(self, client, columns: str):
+        self._client = client
+        self._columns = columns
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return FakeResponse(self._client.body_for(self._columns))
+
+
+class FakeTable:
+    def __init__(self, client):
+        self._client = client
+
+    def select(self, *columns, count=None):
+        return FakeQuery(self._client, ",".join(columns))
+
+
+class ProjectingPostgrestClient:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self._bodies: dict[str, bytes] = {}
+
+    def table(self, name):
+        return FakeTable(self)
+
+    def body_for(self, columns: str) -> bytes:
+        if columns not in self._bodies:
+            if columns == "*":
+                projected = self.rows
+            else:
+                names = columns.split(",")
+                projected = [{name: row[name] for name in names} for row in self.rows]
+            self._bodies[columns] = json.dumps(projected).encode()
+        return self._bodies[columns]
+
+
+def make_rows(n: int) -> list[dict]:
+    rng = random.Random(n)
+    rows = []
+    for i in range(n):
+        description = f"makan siang di warung nomor {i}"
+        rows.append({
+            "id": f"{rng.getrandbits(128):032x}",
+            "user_id": "00000000-0000-0000-0000-000000000001",
+            "amount": round(rng.uniform(1_000, 500_000), 2),
+            "type": "expense",
+            "description": description,
+            "category": "makanan",
+            "subcategory": "makan siang",
+            "payment_method": "e-wallet",
+            "transaction_date": "2024-06-15",
+            "created_at": f"2024-06-15T10:{i % 60:02d}:00+00:00",
+            "updated_at": f"2024-06-15T10:{i % 60:02d}:00+00:00",
+            "deleted_at": None,
+            # pgvector dikirim sebagai string "[...]"
+            "embedding": "[" + ",".join(f"{rng.uniform(-1, 1):.8f}" for _ in range(EMBEDDING_DIM)) + "]",
+            "search_vector": "'makanan':1A 'makan':3B 'siang':2A,4B 'warung':6B",
+        })
+    return rows
+
+
+def legacy_find_page(client, user_id: str, limit: int) -> list[ExpenseOut]:
+    """Implementasi lama: select("*") lalu ExpenseOut membuang kolom yang tidak dipakai."""
+    response = client.table("active_expenses").select("*").eq("user_id", user_id).limit(limit).execute()
+    return [ExpenseOut.from_db(row) for row in response.data]
+
+
+def projected_find_page(repo: ExpenseRepository, user_id: str, limit: int) -> list[ExpenseOut]:
+    rows, _ = repo.find_page(user_id, limit=limit, count_mode="none")
+    return [ExpenseOut.from_db(row) for row in rows]
+
+
+@pytest.fixture(scope="module")
+def fake_client():
+    return ProjectingPostgrestClient(make_rows(PAGE_SIZE))
+
+
+def test_benchmark_page_select_star(benchmark, fake_client):
+    """Sebelum: setiap row membawa embedding 1536 float."""
+    result = benchmark(legacy_find_page, fake_client, "user-1", PAGE_SIZE)
+    benchmark.extra_info["payload_bytes"] = len(fake_client.body_for("*"))
+    assert len(result) == PAGE_SIZE
+
+
+def test_benchmark_page_projected(benchmark, fake_client):
+    """Sesudah: hanya kolom ExpenseOut."""
+    repo = ExpenseRepository(client=fake_client)
+    result = benchmark(projected_find_page, repo, "user-1", PAGE_SIZE)
+    benchmark.extra_info["payload_bytes"] = len(fake_client.body_for(ExpenseRepository.select_columns()))
+    assert len(result) == PAGE_SIZE
+
+
+def test_payload_halaman_100_row_jauh_lebih_kecil(fake_client):
+    before = len(fake_client.body_for("*"))
+    after = len(fake_client.body_for(ExpenseRepository.select_columns()))
+    sparse = len(fake_client.body_for(ExpenseRepository.select_columns(["amount", "category"])))
+    print(f"\n100-row page: select * = {before / 1024:.0f} KB, projected = {after / 1024:.1f} KB, "
+          f"fields=amount,category = {sparse / 1024:.1f} KB")
+
+    # Embedding mendominasi payload lama
+    assert after * 20 < before
+    assert sparse < after
+    # Hasil akhir untuk client tetap sama
+    repo = ExpenseRepository(client=fake_client)
+    assert projected_find_page(repo, "user-1", PAGE_SIZE) == legacy_find_page(fake_client, "user-1", PAGE_SIZE)
@@ -0,0 +1,82 @@
+# =============================================================================
+# tests/performance/test_query_embedding_cache_benchmark.py — Repeated Search Queries
+#
+# TIPE TEST: Performance
+# YANG DIUKUR: Jumlah panggilan OpenAI dan latency generate_for_query untuk
+#              gelombang pencarian bersamaan dengan query yang sama berulang
+#              ("makan", "bensin", "gaji", ...):
+#
+#   - tanpa cache : setiap pencarian memanggil embeddings.create
+#   - dengan cache: QueryEmbeddingCache — query yang sama dalam satu gelombang
+#                   menunggu satu panggilan (single flight), gelombang
+#                   berikutnya langsung dari cache
+#
+# Cara kerja:
+#   AsyncEmbeddingService asli, AsyncOpenAI palsu yang tidur OPENAI_SECONDS.
+#   WAVES gelombang, masing-masing CONCURRENT pencarian via asyncio.gather.
+#
+# Jalankan:
+#   pytest tests/performance/test_query_embedding_cache_benchmark.py -s
+# =============================================================================
+
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.query_embedding_cache import QueryEmbeddingCache
+from app.services.embedding_services import AsyncEmbeddingService
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+OPENAI_SECONDS = 0.030
+QUERIES = ["makan", "bensin", "gaji", "kopi", "parkir"]
+CONCURRENT = 50
+WAVES = 4
+
+
+class FakeAsyncEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, model, input):
+        self.calls += 1
+        await asyncio.sleep(OPENAI_SECONDS)
+        return SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[0.5] * 1536)])
+
+
+async def search_latencies_ms(cache: QueryEmbeddingCache | None) -> tuple[list[float], int]:
+    openai = SimpleNamespace(embeddings=FakeAsyncEmbeddings())
+    service = AsyncEmbeddingService(openai_client=openai, ai_repo=MagicMock(), query_cache=cache)
+
+    async def timed(query: str) -> float:
+        started = time.perf_counter()
+        await service.generate_for_query(query)
+        return (time.perf_counter() - started) * 1000
+
+    samples = []
+    for _ in range(WAVES):
+        samples.extend(await asyncio.gather(*(timed(QUERIES[i % len(QUERIES)]) for i in range(CONCURRENT))))
+    return samples, openai.embeddings.calls
+
+
+async def test_query_embedding_cache_vs_tanpa_cache():
+    uncached, uncached_calls = await search_latencies_ms(None)
+    cache = QueryEmbeddingCache()
+    cached, cached_calls = await search_latencies_ms(cache)
+
+    print(
+        f"\n{WAVES} x {CONCURRENT} pencarian bersamaan, {len(QUERIES)} query berbeda"
+        f" (embeddings {OPENAI_SECONDS * 1000:.0f} ms)"
+        f"\n  tanpa cache  p50 {statistics.median(uncached):7.3f} ms   openai {uncached_calls:3d}x"
+        f"\n  cache        p50 {statistics.median(cached):7.3f} ms   openai {cached_calls:3d}x"
+        f"   coalesced {cache.stats.coalesced}   hit rate {cache.snapshot()['hit_rate']:.2f}"
+    )
+
+    assert uncached_calls == WAVES * CONCURRENT
+    # Satu panggilan per query berbeda, sisanya menunggu / dari cache
+    assert cached_calls == len(QUERIES)
+    assert statistics.median(cached) < OPENAI_SECONDS * 1000 / 10
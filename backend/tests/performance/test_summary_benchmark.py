@@ -0,0 +1,110 @@
+# =============================================================================
+# tests/performance/test_summary_benchmark.py — Summary Benchmark
+#
+# TIPE TEST: Performance (pytest-benchmark)
+# YANG DIUKUR: Biaya di sisi API untuk satu panggilan summary saat jumlah
+#              transaksi user bertambah.
+#
+# Cara kerja:
+#   FakePostgrestClient menyimpan body JSON yang sudah di-serialize, lalu
+#   execute() melakukan json.loads — sama seperti postgrest-py saat menerima
+#   response. Jadi yang diukur adalah transfer + parsing + penjumlahan di
+#   Python. Biaya SUM di dalam Postgres tidak ikut diukur (index scan, jauh
+#   lebih murah daripada mengirim row lewat HTTP).
+#
+# Jalankan:
+#   pytest tests/performance/test_summary_benchmark.py --benchmark-only
+# =============================================================================
+
+import json
+import random
+
+import pytest
+
+from app.repositories.expense_repository import ExpenseRepository
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+ROW_COUNTS = [1_000, 10_000, 50_000]
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.data = json.loads(body)
+
+
+class FakeQuery:
+    """Menerima semua chain method PostgREST (.select, .eq, ...) lalu mengembalikan payload."""
+
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return FakeResponse(self._body)
+
+
+class FakePostgrestClient:
+    def __init__(self, rows: list[dict]):
+        self.table_body = json.dumps(rows).encode()
+        income = sum(r["amount"] for r in rows if r["type"] == "income")
+        expense = sum(r["amount"] for r in rows if r["type"] == "expense")
+        self.rpc_body = json.dumps([
+            {"type": "income", "total": round(income, 2)},
+            {"type": "expense", "total": round(expense, 2)},
+        ]).encode()
+
+    def table(self, name):
+        return FakeQuery(self.table_body)
+
+    def rpc(self, name, params):
+        return FakeQuery(self.rpc_body)
+
+
+def make_rows(n: int) -> list[dict]:
+    rng = random.Random(n)
+    return [
+        {"amount": round(rng.uniform(1_000, 500_000), 2), "type": rng.choice(["income", "expense"])}
+        for _ in range(n)
+    ]
+
+
+def legacy_summary_all_time(client, user_id: str) -> dict:
+    """Implementasi lama: SELECT amount, type untuk semua row lalu SUM di Python."""
+    response = client.table("active_expenses").select("amount, type").eq("user_id", user_id).execute()
+    income  = float(sum(e["amount"] for e in response.data if e["type"] == "income"))
+    expense = float(sum(e["amount"] for e in response.data if e["type"] == "expense"))
+    return {"total_income": income, "total_expense": expense, "net_balance": income - expense}
+
+
+@pytest.fixture(scope="module", params=ROW_COUNTS, ids=lambda n: f"{n}_rows")
+def fake_client(request):
+    return FakePostgrestClient(make_rows(request.param))
+
+
+def test_benchmark_summary_rpc(benchmark, fake_client):
+    """Summary via rpc: biaya per panggilan harus datar, tidak tergantung jumlah row."""
+    repo = ExpenseRepository(client=fake_client)
+    result = benchmark(repo.get_summary_all_time, "user-1")
+    assert result["total_income"] > 0
+
+
+def test_benchmark_summary_legacy_python_sum(benchmark, fake_client):
+    """Pembanding: cara lama tumbuh linear terhadap jumlah row."""
+    result = benchmark(legacy_summary_all_time, fake_client, "user-1")
+    assert result["total_income"] > 0
+
+
+def test_payload_rpc_konstan_terhadap_jumlah_row():
+    """Payload rpc selalu dua row, berapapun jumlah transaksi user."""
+    sizes = {n: len(FakePostgrestClient(make_rows(n)).rpc_body) for n in ROW_COUNTS}
+    assert max(sizes.values()) < 200
+    # Hasil SUM tetap sama dengan cara lama
+    client = FakePostgrestClient(make_rows(ROW_COUNTS[0]))
+    new = ExpenseRepository(client=client).get_summary_all_time("user-1")
+    old = legacy_summary_all_time(client, "user-1")
+    assert new["total_income"] == pytest.approx(old["total_income"])
+    assert new["total_expense"] == pytest.approx(old["total_expense"])
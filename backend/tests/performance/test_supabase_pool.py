@@ -0,0 +1,116 @@
+# =============================================================================
+# tests/performance/test_supabase_pool.py — Pooled Supabase Transport Benchmark
+#
+# TIPE TEST: Performance
+# YANG DIUKUR: Jumlah koneksi TCP yang dibuka dan latency per request untuk
+#              N request PostgREST berturut-turut:
+#
+#   - client per request : client PostgREST baru setiap request (perilaku lama
+#                          create_client() per request) — session httpx baru,
+#                          handshake baru
+#   - manager            : SupabaseClientManager.user_view() — satu pool
+#                          keep-alive dibagi semua token
+#
+# Cara kerja:
+#   Server HTTP/1.1 lokal (keep-alive) menggantikan PostgREST dan menghitung
+#   koneksi yang di-accept. Selisih latency di sini = membuat httpx.Client
+#   (memuat SSL context, ~30-40 ms) + TCP connect. Di Supabase asli handshake
+#   TLS menambah 1-2 round trip lagi per koneksi baru.
+#
+# Jalankan:
+#   pytest tests/performance/test_supabase_pool.py -s
+# =============================================================================
+
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from postgrest import SyncPostgrestClient
+
+from app.infrastructure.supabase_client import SupabaseClientManager
+
+pytestmark = [pytest.mark.performance, pytest.mark.slow]
+
+REQUESTS = 200
+TOKENS = [f"token-user-{index}" for index in range(10)]
+
+
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Tanpa ini Nagle + delayed ACK menambah ~40 ms per response keep-alive
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FakePostgrestHandler.connections = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakePostgrestHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def run(make_client) -> list[float]:
+    samples = []
+    for index in range(REQUESTS):
+        started = time.perf_counter()
+        client = make_client(TOKENS[index % len(TOKENS)])
+        client.table("expenses").select("id").eq("user_id", "x").execute()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def test_satu_pool_untuk_semua_token_vs_client_per_request(server):
+    per_request_clients = []
+
+    def client_per_request(token):
+        client = SyncPostgrestClient(
+            f"{server}/rest/v1", headers={"apikey": "anon", "Authorization": f"Bearer {token}"},
+        )
+        per_request_clients.append(client)
+        return client
+
+    baseline = run(client_per_request)
+    baseline_connections = FakePostgrestHandler.connections
+    for client in per_request_clients:
+        client.session.close()
+
+    FakePostgrestHandler.connections = 0
+    manager = SupabaseClientManager(url=server, anon_key="anon", service_role_key="service", http2=False)
+    pooled = run(manager.user_view)
+    stats = manager.pool_stats()
+    manager.close()
+
+    print(
+        f"\n{REQUESTS} request, {len(TOKENS)} token berbeda"
+        f"\n  client per request  koneksi {baseline_connections:4d}   p50 {statistics.median(baseline):6.2f} ms"
+        f"\n  manager (pool)      koneksi {FakePostgrestHandler.connections:4d}   p50 {statistics.median(pooled):6.2f} ms"
+    )
+
+    assert baseline_connections == REQUESTS
+    # Request berurutan → satu koneksi keep-alive dipakai ulang
+    assert FakePostgrestHandler.connections == 1
+    assert stats["connections_opened"] == 1 and stats["requests_total"] == REQUESTS
+    assert statistics.median(pooled) < statistics.median(baseline)
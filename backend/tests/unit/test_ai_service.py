@@ -0,0 +1,97 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.models.expense import ExpenseSummaryResponse
+from app.services.ai_services import AsyncAIService
+from app.services.expense_service import AsyncExpenseService
+
+pytestmark = pytest.mark.unit
+
+
+def function_call(name: str, arguments: str, call_id: str = "call-1"):
+    """Helper: response Responses API yang meminta satu tool call."""
+    return MagicMock(id="resp-1", output=[{"type": "function_call", "name": name, "arguments": arguments, "call_id": call_id}])
+
+
+def text_reply(text: str):
+    """Helper: response Responses API berisi jawaban akhir."""
+    return MagicMock(id="resp-2", output=[], output_text=text)
+
+
+class TestAsyncAIService:
+    """
+    File referensi: app/services/ai_services.py → AsyncAIService
+    """
+
+    @pytest.fixture
+    def openai_client(self):
+        client = MagicMock()
+        client.responses.create = AsyncMock()
+        client.embeddings.create = AsyncMock()
+        return client
+
+    async def test_chat_menjalankan_tool_async_lalu_mengirim_hasilnya(self, openai_client):
+        openai_client.responses.create.side_effect = [
+            function_call("get_yearly_summary", '{"year": 2024}'),
+            text_reply("Tahun 2024 kamu surplus 50 ribu."),
+        ]
+        expense_service = MagicMock(spec=AsyncExpenseService)
+        expense_service.get_expense_summary_by_year.return_value = ExpenseSummaryResponse(
+            total_income=150000, total_expense=100000, net_balance=50000,
+        )
+        service = AsyncAIService(
+            openai_client=openai_client,
+            expense_service=expense_service,
+            embedding_service=MagicMock(),
+            ai_repo=MagicMock(),
+        )
+
+        result = await service.chat("user-1", "ringkasan 2024?", [])
+
+        assert result.reply == "Tahun 2024 kamu surplus 50 ribu."
+        assert result.action_taken == ["get_yearly_summary"]
+        expense_service.get_expense_summary_by_year.assert_awaited_once_with(user_id="user-1", year=2024)
+        follow_up = openai_client.responses.create.await_args_list[1].kwargs
+        assert follow_up["previous_response_id"] == "resp-1"
+        assert follow_up["input"][0]["call_id"] == "call-1"
+        assert '"net_balance": 50000.0' in follow_up["input"][0]["output"]
+
+    async def test_error_tool_dikirim_ke_model_bukan_menggagalkan_chat(self, openai_client):
+        openai_client.responses.create.side_effect = [
+            function_call("delete_expense", "{}"),
+            text_reply("ID transaksinya belum ada."),
+        ]
+        service = AsyncAIService(
+            openai_client=openai_client,
+            expense_service=MagicMock(spec=AsyncExpenseService),
+            embedding_service=MagicMock(),
+            ai_repo=MagicMock(),
+        )
+
+        result = await service.chat("user-1", "hapus transaksi", [])
+
+        assert result.reply == "ID transaksinya belum ada."
+        output = openai_client.responses.create.await_args_list[1].kwargs["input"][0]["output"]
+        assert "expense_id is required" in output
+
+    async def test_search_embedding_dan_rpc_di_await(self, openai_client):
+        embedding_service = MagicMock()
+        embedding_service.generate_for_query = AsyncMock(return_value=[0.1, 0.2])
+        ai_repo = MagicMock()
+        ai_repo.semantic_search = AsyncMock(return_value=[{
+            "id": "00000000-0000-0000-0000-000000000001", "amount": 25000, "type": "expense",
+            "category": "makanan", "similarity": 0.91,
+        }])
+        service = AsyncAIService(
+            openai_client=openai_client,
+            expense_service=MagicMock(spec=AsyncExpenseService),
+            embedding_service=embedding_service,
+            ai_repo=ai_repo,
+        )
+
+        result = await service.search("user-1", "makan siang", match_count=3)
+
+        assert result.total == 1 and result.results[0].similarity == 0.91
+        ai_repo.semantic_search.assert_awaited_once_with(
+            query_embedding=[0.1, 0.2], user_id="user-1", match_threshold=0.5, match_count=3,
+        )
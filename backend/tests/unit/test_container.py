@@ -0,0 +1,76 @@
+import asyncio
+
+import httpx
+import pytest
+from unittest.mock import MagicMock
+
+from app.core import container as container_module
+from app.core.container import ServiceContainer
+from app.infrastructure.supabase_client import SupabaseClientManager
+from app.repositories.expense_repository import AsyncPostgresExpenseRepository
+
+pytestmark = pytest.mark.unit
+
+
+def make_container(use_postgres: bool = False) -> ServiceContainer:
+    settings = MagicMock()
+    settings.use_postgres_repositories = use_postgres
+    clients = SupabaseClientManager(
+        url="https://project.supabase.co",
+        anon_key="anon-key",
+        service_role_key="service-key",
+        async_transport_factory=lambda: httpx.MockTransport(lambda request: httpx.Response(200, json=[])),
+    )
+    return ServiceContainer(settings=settings, clients=clients, openai_client=MagicMock())
+
+
+class TestServiceContainer:
+    """
+    Objek bersama dibuat sekali; hanya bagian yang membawa token dibuat per request.
+    File referensi: app/core/container.py
+    """
+
+    async def test_embedding_dan_ai_repo_dipakai_ulang_antar_request(self):
+        container = make_container()
+
+        first = container.expense_service("token-a", schedule_task=MagicMock())
+        second = container.expense_service("token-b", schedule_task=MagicMock())
+        ai = container.ai_service("token-a")
+
+        assert first is not second
+        assert first._embedding_service is second._embedding_service is ai._embedding_service
+        assert ai._ai_repo is container.admin_scope().ai_repo
+        assert container.profile_service_for_admin() is container.profile_service_for_admin()
+
+    async def test_client_user_membawa_token_request_itu_sendiri(self):
+        container = make_container()
+
+        first = container.expense_service("token-a")._expense_repo._client
+        second = container.ai_service("token-b")._expense_service._expense_repo._client
+
+        assert first.headers["authorization"] == "Bearer token-a"
+        assert second.headers["authorization"] == "Bearer token-b"
+        # Profil user tidak pernah dilayani dengan client admin
+        user_profile = container.profile_service_for_user("token-a")
+        assert user_profile is not container.profile_service_for_admin()
+        assert user_profile._profile_repo.client.headers["authorization"] == "Bearer token-a"
+
+    def test_admin_scope_per_event_loop(self):
+        container = make_container()
+
+        async def scope():
+            return container.admin_scope()
+
+        first, second = asyncio.run(scope()), asyncio.run(scope())
+
+        assert first is not second
+
+    async def test_backend_postgres_repository_satu_per_proses(self, monkeypatch):
+        monkeypatch.setattr(container_module, "get_postgres_client", MagicMock())
+        container = make_container(use_postgres=True)
+
+        repo = container.expense_service("token-a")._expense_repo
+
+        assert isinstance(repo, AsyncPostgresExpenseRepository)
+        assert container.expense_service("token-b")._expense_repo is repo
+        assert container.profile_service_for_user("token-a") is container.profile_service_for_admin()
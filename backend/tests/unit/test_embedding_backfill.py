@@ -0,0 +1,276 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.repositories.ai_repository import AIRepository
+from app.services.embedding_backfill import CheckpointStore, EmbeddingBackfill, RateLimiter
+
+pytestmark = pytest.mark.unit
+
+MODEL = "text-embedding-3-small"
+
+
+def expense_id(i: int) -> str:
+    return f"00000000-0000-0000-0000-{i:012d}"
+
+
+class FakeBacklogRepository:
+    """Tabel expenses di memori; find_embedding_backlog mengikuti keyset id."""
+
+    def __init__(self, rows: int):
+        self.embedded: dict[str, str | None] = {expense_id(i): None for i in range(1, rows + 1)}
+        self.queries: list[dict] = []
+
+    def find_embedding_backlog(self, mode, model, after_id=None, limit=500):
+        self.queries.append({"mode": mode, "after_id": after_id, "limit": limit})
+        rows = []
+        for row_id, row_model in sorted(self.embedded.items()):
+            if after_id is not None and row_id <= after_id:
+                continue
+            if mode == "missing" and row_model is not None:
+                continue
+            if mode == "stale" and row_model == model:
+                continue
+            rows.append({"id": row_id, "amount": 1000, "type": "expense", "category": "makanan"})
+            if len(rows) == limit:
+                break
+        return rows
+
+
+class FakeEmbeddingService:
+    """Menyimpan model ke repo palsu; batch berisi id di fail_ids selalu gagal."""
+
+    def __init__(self, repo: FakeBacklogRepository, fail_ids=(), fail_times: int = 0, delay: float = 0.0):
+        self.settings = SimpleNamespace(OPENAI_EMBEDDING_MODEL=MODEL)
+        self.repo = repo
+        self.fail_ids = set(fail_ids)
+        self.fail_times = fail_times
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def generate_for_expenses_batch(self, expenses):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            time.sleep(self.delay)
+            with self._lock:
+                if self.fail_times:
+                    self.fail_times -= 1
+                    raise RuntimeError("openai 429")
+            if self.fail_ids & {expense["id"] for expense in expenses}:
+                raise RuntimeError("openai 500")
+            for expense in expenses:
+                self.repo.embedded[expense["id"]] = self.settings.OPENAI_EMBEDDING_MODEL
+            return len(expenses)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_backfill(repo, service, **options):
+    options = {"batch_size": 10, "concurrency": 2, "retry_backoff": 0, "sleep": lambda seconds: None, **options}
+    return EmbeddingBackfill(ai_repo=repo, embedding_service=service, **options)
+
+
+class TestEmbeddingBackfill:
+    """
+    Backfill / re-embed: scan keyset, batch, concurrency, retry, checkpoint.
+    File referensi: app/services/embedding_backfill.py
+    """
+
+    def test_semua_row_tanpa_embedding_diisi_per_batch(self):
+        repo = FakeBacklogRepository(rows=95)
+        service = FakeEmbeddingService(repo)
+
+        result = make_backfill(repo, service, mode="missing").run()
+
+        assert result.completed and result.embedded == 95 and result.failed == 0
+        assert service.calls == 10
+        assert all(model == MODEL for model in repo.embedded.values())
+        # Keyset: setiap halaman dimulai setelah id terakhir halaman sebelumnya
+        after_ids = [query["after_id"] for query in repo.queries]
+        assert after_ids[:3] == [None, expense_id(10), expense_id(20)]
+
+    def test_concurrency_dibatasi(self):
+        repo = FakeBacklogRepository(rows=80)
+        service = FakeEmbeddingService(repo, delay=0.02)
+
+        make_backfill(repo, service, concurrency=3).run()
+
+        assert 1 < service.peak_active <= 3
+
+    def test_mode_stale_hanya_row_dengan_model_lain(self):
+        repo = FakeBacklogRepository(rows=30)
+        for i in range(1, 11):
+            repo.embedded[expense_id(i)] = MODEL
+        for i in range(11, 21):
+            repo.embedded[expense_id(i)] = "text-embedding-ada-002"
+        service = FakeEmbeddingService(repo)
+
+        result = make_backfill(repo, service, mode="stale").run()
+
+        assert result.embedded == 20
+        assert all(model == MODEL for model in repo.embedded.values())
+
+    def test_batch_gagal_sementara_diretry(self):
+        repo = FakeBacklogRepository(rows=10)
+        service = FakeEmbeddingService(repo, fail_times=2)
+
+        result = make_backfill(repo, service, max_retries=3).run()
+
+        assert result.completed and result.embedded == 10 and result.retries == 2
+
+    def test_batch_gagal_menahan_checkpoint_lalu_dilanjutkan(self, tmp_path):
+        repo = FakeBacklogRepository(rows=50)
+        store = CheckpointStore(tmp_path / "backfill.json")
+        service = FakeEmbeddingService(repo, fail_ids={expense_id(25)})
+
+        first = make_backfill(repo, service, mode="all", max_retries=1, checkpoint=store).run()
+
+        # Batch 21-30 gagal → checkpoint berhenti di 20 walau batch setelahnya berhasil
+        assert not first.completed and first.failed == 10 and first.embedded == 40
+        assert json.loads(store.path.read_text())["last_id"] == expense_id(20)
+
+        service.fail_ids.clear()
+        second = make_backfill(repo, service, mode="all", checkpoint=store).run()
+
+        assert second.resumed_from == expense_id(20)
+        assert second.completed and second.embedded == 30
+        assert not store.path.exists()
+
+    def test_checkpoint_model_lain_diabaikan(self, tmp_path):
+        repo = FakeBacklogRepository(rows=20)
+        store = CheckpointStore(tmp_path / "backfill.json")
+        store.path.write_text(json.dumps({"mode": "all", "model": "text-embedding-ada-002", "last_id": expense_id(15)}))
+
+        result = make_backfill(repo, FakeEmbeddingService(repo), mode="all", checkpoint=store).run()
+
+        assert result.resumed_from is None and result.embedded == 20
+
+    def test_limit_berhenti_dan_checkpoint_disimpan(self, tmp_path):
+        repo = FakeBacklogRepository(rows=50)
+        store = CheckpointStore(tmp_path / "backfill.json")
+
+        result = make_backfill(repo, FakeEmbeddingService(repo), mode="all", checkpoint=store, max_rows=25).run()
+
+        assert result.embedded == 25 and not result.completed
+        assert json.loads(store.path.read_text())["last_id"] == expense_id(25)
+
+    def test_rate_limiter_menjaga_jarak_antar_request(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+
+        limiter = RateLimiter(per_minute=120, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.acquire()
+
+        # 120/menit → satu request per 0,5 detik
+        assert sleeps == [0.5, 1.0]
+
+    def test_mode_tidak_dikenal_ditolak(self):
+        repo = FakeBacklogRepository(rows=1)
+        with pytest.raises(ValueError):
+            make_backfill(repo, FakeEmbeddingService(repo), mode="semua")
+
+
+class TestFindEmbeddingBacklog:
+    """
+    Query keyset untuk backfill.
+    File referensi: app/repositories/ai_repository.py → find_embedding_backlog()
+    """
+
+    def make_repo(self):
+        client = MagicMock()
+        query = client.table.return_value.select.return_value.is_.return_value
+        return AIRepository(client=client), client, query
+
+    def test_mode_missing_filter_embedding_null_urut_id(self):
+        repo, client, query = self.make_repo()
+        query.is_.return_value.gt.return_value.order.return_value.limit.return_value.execute.return_value.data = [{"id": "b"}]
+
+        rows = repo.find_embedding_backlog("missing", MODEL, after_id="a", limit=100)
+
+        client.table.assert_called_once_with("expenses")
+        client.table.return_value.select.return_value.is_.assert_called_once_with("deleted_at", "null")
+        query.is_.assert_called_once_with("embedding", "null")
+        query.is_.return_value.gt.assert_called_once_with("id", "a")
+        query.is_.return_value.gt.return_value.order.assert_called_once_with("id")
+        assert rows == [{"id": "b"}]
+
+    def test_mode_stale_termasuk_model_lain_dan_tidak_tercatat(self):
+        repo, _, query = self.make_repo()
+
+        repo.find_embedding_backlog("stale", MODEL)
+
+        query.or_.assert_called_once_with(
+            f'embedding.is.null,embedding_model.is.null,embedding_model.neq."{MODEL}"'
+        )
+        query.or_.return_value.gt.assert_not_called()
+
+    def test_save_embeddings_mengirim_model(self):
+        repo, client, _ = self.make_repo()
+        client.rpc.return_value.execute.return_value.data = 1
+
+        assert repo.save_embeddings({"id-1": [0.1]}, model=MODEL) == 1
+        client.rpc.assert_called_once_with(
+            "save_expense_embeddings",
+            {"embeddings_param": [{"id": "id-1", "embedding": [0.1]}], "model_param": MODEL},
+        )
+
+
+class TestBackfillCommand:
+    """
+    File referensi: backfill_embeddings.py
+    """
+
+    def test_exit_code_1_jika_ada_batch_gagal(self, tmp_path, capsys):
+        from backfill_embeddings import main
+
+        repo = FakeBacklogRepository(rows=20)
+        service = FakeEmbeddingService(repo, fail_ids={expense_id(5)})
+        checkpoint = tmp_path / "backfill.json"
+
+        code = main(
+            ["--batch-size", "10", "--max-retries", "0", "--checkpoint", str(checkpoint)],
+            repo=repo,
+            embedding_service=service,
+        )
+
+        assert code == 1
+        assert "10 failed" in capsys.readouterr().out
+        assert checkpoint.exists()
+
+    def test_restart_mengabaikan_checkpoint(self, tmp_path):
+        from backfill_embeddings import main
+
+        repo = FakeBacklogRepository(rows=20)
+        checkpoint = tmp_path / "backfill.json"
+        checkpoint.write_text(json.dumps({"mode": "all", "model": MODEL, "last_id": expense_id(20)}))
+
+        code = main(
+            ["--mode", "all", "--restart", "--checkpoint", str(checkpoint)],
+            repo=repo,
+            embedding_service=FakeEmbeddingService(repo),
+        )
+
+        assert code == 0
+        assert all(model == MODEL for model in repo.embedded.values())
+        assert not checkpoint.exists()
+
+    def test_batch_size_di_atas_batas_openai_ditolak(self):
+        from backfill_embeddings import main
+
+        with pytest.raises(SystemExit):
+            main(["--batch-size", "5000"], repo=MagicMock(), embedding_service=MagicMock())
@@ -0,0 +1,155 @@
+import sqlite3
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.embedding_cache import EmbeddingCache, normalize_text
+from app.services.embedding_services import AsyncEmbeddingService, EmbeddingService
+
+pytestmark = pytest.mark.unit
+
+MODEL = "text-embedding-3-small"
+
+
+def vector(seed: float) -> list[float]:
+    # Nilai yang pas di float32 → bisa dibandingkan persis setelah disimpan
+    return [seed, seed / 2, seed / 4]
+
+
+def embeddings_response(texts: list[str]):
+    return SimpleNamespace(data=[
+        SimpleNamespace(index=i, embedding=vector(float(len(text))))
+        for i, text in enumerate(texts)
+    ])
+
+
+def make_openai():
+    client = MagicMock()
+    client.embeddings.create.side_effect = lambda model, input: embeddings_response(input)
+    return client
+
+
+def expense(i: int, description: str = "kopi susu") -> dict:
+    return {"id": f"expense-{i}", "amount": 25000, "type": "expense", "category": "makanan", "description": description}
+
+
+class TestEmbeddingCache:
+    """
+    Cache vector embedding: memory LRU + SQLite, key = hash teks + model + dimensi.
+    File referensi: app/core/embedding_cache.py
+    """
+
+    def test_key_memakai_teks_ternormalisasi_model_dan_dimensi(self):
+        key = EmbeddingCache.key("expense 25000  Makanan\tKopi", MODEL, 1536)
+
+        assert key == EmbeddingCache.key(" expense 25000 makanan kopi ", MODEL, 1536)
+        assert key != EmbeddingCache.key("expense 25000 makanan kopi", "text-embedding-3-large", 1536)
+        assert key != EmbeddingCache.key("expense 25000 makanan kopi", MODEL, 512)
+        assert normalize_text("Ｋopi  SUSU") == "kopi susu"
+
+    def test_memory_lru_membuang_yang_paling_lama_tidak_dipakai(self):
+        cache = EmbeddingCache(max_size=2)
+        cache.put_many({"a": vector(1), "b": vector(2)})
+        cache.get_many(["a"])
+        cache.put_many({"c": vector(3)})
+
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        assert cache.stats.evictions == 1
+
+    def test_disk_tier_bertahan_setelah_restart(self, tmp_path):
+        path = str(tmp_path / "embeddings.sqlite3")
+        EmbeddingCache(path=path).put_many({"a": vector(1.5)})
+
+        restarted = EmbeddingCache(path=path)
+        assert restarted.get_many(["a", "b"]) == {"a": vector(1.5)}
+        # Hit dari disk disalin ke memory
+        assert restarted.get_many(["a"]) == {"a": vector(1.5)}
+
+        snapshot = restarted.snapshot()
+        assert (snapshot["disk_hits"], snapshot["memory_hits"], snapshot["misses"]) == (1, 1, 1)
+        assert snapshot["hit_rate"] == round(2 / 3, 4)
+        assert snapshot["persistent"] is True
+
+    def test_disk_tier_dipangkas_ke_batas(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("app.core.embedding_cache.DISK_PRUNE_EVERY", 1)
+        path = str(tmp_path / "embeddings.sqlite3")
+        cache = EmbeddingCache(path=path, disk_max_entries=3)
+        for i in range(5):
+            cache.put_many({f"key-{i}": vector(i)})
+
+        with sqlite3.connect(path) as db:
+            assert db.execute("SELECT count(*) FROM embeddings").fetchone()[0] == 3
+
+    def test_file_rusak_tetap_jalan_di_memory(self, tmp_path):
+        broken = tmp_path / "embeddings.sqlite3"
+        broken.write_bytes(b"bukan database sqlite" * 100)
+
+        cache = EmbeddingCache(path=str(broken))
+        cache.put_many({"a": vector(1)})
+
+        assert cache.persistent is False
+        assert cache.get_many(["a"]) == {"a": vector(1)}
+        assert cache.stats.disk_errors == 1
+
+
+class TestEmbeddingServiceCache:
+    """
+    EmbeddingService hanya memanggil OpenAI untuk teks yang belum ada di cache.
+    File referensi: app/services/embedding_services.py → _embed_texts()
+    """
+
+    def make_service(self, cache=None):
+        openai = make_openai()
+        ai_repo = MagicMock()
+        return EmbeddingService(openai_client=openai, ai_repo=ai_repo, embedding_cache=cache or EmbeddingCache()), openai, ai_repo
+
+    def test_teks_sama_tidak_memanggil_openai_lagi(self):
+        service, openai, ai_repo = self.make_service()
+
+        for expense_id in ("expense-1", "expense-2"):
+            service.generate_for_expense(expense_id, amount=25000, type="expense", category="makanan", description="kopi")
+
+        assert openai.embeddings.create.call_count == 1
+        assert ai_repo.save_embedding.call_count == 2
+        assert ai_repo.save_embedding.call_args.kwargs["embedding"] == ai_repo.save_embedding.call_args_list[0].kwargs["embedding"]
+
+    def test_batch_hanya_mengirim_teks_yang_belum_ada_sekali_saja(self):
+        service, openai, ai_repo = self.make_service()
+        service.generate_for_expenses_batch([expense(1, "kopi susu")])
+
+        service.generate_for_expenses_batch([expense(2, "kopi susu"), expense(3, "nasi goreng"), expense(4, "nasi goreng")])
+
+        sent = openai.embeddings.create.call_args.kwargs["input"]
+        assert sent == ["expense 25000 makanan nasi goreng"]
+        saved = ai_repo.save_embeddings.call_args.args[0]
+        assert set(saved) == {"expense-2", "expense-3", "expense-4"}
+        assert saved["expense-3"] == saved["expense-4"]
+
+    def test_tanpa_cache_tetap_satu_panggilan_per_batch(self):
+        openai = make_openai()
+        service = EmbeddingService(openai_client=openai, ai_repo=MagicMock())
+
+        service.generate_for_expenses_batch([expense(1), expense(2)])
+        service.generate_for_expenses_batch([expense(1), expense(2)])
+
+        assert openai.embeddings.create.call_count == 2
+
+    async def test_async_service_memakai_cache_yang_sama(self, tmp_path):
+        cache = EmbeddingCache(path=str(tmp_path / "embeddings.sqlite3"))
+        EmbeddingService(openai_client=make_openai(), ai_repo=MagicMock(), embedding_cache=cache).generate_for_expenses_batch(
+            [expense(1, "bensin")]
+        )
+        cache.clear()
+
+        openai = MagicMock()
+        openai.embeddings.create = AsyncMock(side_effect=lambda model, input: embeddings_response(input))
+        ai_repo = MagicMock()
+        ai_repo.save_embeddings = AsyncMock(return_value=2)
+        service = AsyncEmbeddingService(openai_client=openai, ai_repo=ai_repo, embedding_cache=cache)
+
+        await service.generate_for_expenses_batch([expense(2, "bensin"), expense(3, "parkir")])
+
+        # "bensin" dari disk, hanya "parkir" yang dikirim
+        assert openai.embeddings.create.await_args.kwargs["input"] == ["expense 25000 makanan parkir"]
+        assert cache.stats.disk_hits == 1
@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from app.services.embedding_queue import EmbeddingQueue
+
+pytestmark = pytest.mark.unit
+
+
+def make_expense(i: int, description: str = "kopi") -> dict:
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "amount": 1000 + i,
+        "type": "expense",
+        "description": description,
+        "category": "minuman",
+        "subcategory": None,
+        "payment_method": None,
+    }
+
+
+class FakeEmbeddingService:
+    """Mencatat setiap batch; bisa gagal N kali dulu atau tidur per batch."""
+
+    def __init__(self, fail_times: int = 0, delay: float = 0.0):
+        self.batches: list[list[dict]] = []
+        self.fail_times = fail_times
+        self.delay = delay
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def generate_for_expenses_batch(self, expenses: list[dict]) -> int:
+        with self._lock:
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("openai 503")
+            self.batches.append(list(expenses))
+            return len(expenses)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def make_queue():
+    queues = []
+
+    def factory(service, **options):
+        options = {"max_wait": 0.05, "retry_backoff": 0.01, **options}
+        queue = EmbeddingQueue(service, **options)
+        queues.append(queue)
+        return queue
+
+    yield factory
+    for queue in queues:
+        queue.stop(timeout=5)
+
+
+class TestEmbeddingQueue:
+    """
+    Antrian embedding di background: coalescing, batching, retry, backlog.
+    File referensi: app/services/embedding_queue.py
+    """
+
+    def test_banyak_write_digabung_jadi_satu_batch(self, make_queue):
+        service = FakeEmbeddingService()
+        queue = make_queue(service, batch_size=100, concurrency=1)
+
+        for i in range(30):
+            queue.enqueue(make_expense(i))
+
+        assert queue.flush(timeout=5)
+        assert [len(batch) for batch in service.batches] == [30]
+        assert queue.snapshot()["embedded"] == 30 and queue.snapshot()["backlog"] == 0
+
+    def test_batch_dipotong_per_batch_size(self, make_queue):
+        service = FakeEmbeddingService()
+        queue = make_queue(service, batch_size=10, concurrency=1)
+
+        queue.enqueue_many([make_expense(i) for i in range(25)])
+
+        assert queue.flush(timeout=5)
+        assert sorted(len(batch) for batch in service.batches) == [5, 10, 10]
+
+    def test_edit_berulang_satu_expense_hanya_teks_terakhir(self, make_queue):
+        service = FakeEmbeddingService()
+        queue = make_queue(service, max_wait=0.2)
+
+        for description in ("kopi", "kopi susu", "kopi susu gula aren"):
+            queue.enqueue(make_expense(1, description))
+
+        assert queue.flush(timeout=5)
+        assert [[row["description"] for row in batch] for batch in service.batches] == [["kopi susu gula aren"]]
+        assert queue.stats.coalesced == 2
+
+    def test_gagal_sementara_diulang_sampai_berhasil(self, make_queue):
+        service = FakeEmbeddingService(fail_times=2)
+        queue = make_queue(service, max_retries=3)
+
+        queue.enqueue(make_expense(1))
+
+        assert queue.flush(timeout=5)
+        assert len(service.batches) == 1
+        assert (queue.stats.retries, queue.stats.failed) == (2, 0)
+
+    def test_gagal_terus_dihitung_failed_dan_antrian_tetap_jalan(self, make_queue):
+        service = FakeEmbeddingService(fail_times=3)
+        queue = make_queue(service, max_retries=2, concurrency=1)
+
+        queue.enqueue(make_expense(1))
+        assert queue.flush(timeout=5)
+        queue.enqueue(make_expense(2))
+        assert queue.flush(timeout=5)
+
+        assert queue.stats.failed == 1 and queue.stats.embedded == 1
+        assert [batch[0]["id"] for batch in service.batches] == [make_expense(2)["id"]]
+
+    def test_konkurensi_dibatasi_jumlah_worker(self, make_queue):
+        service = FakeEmbeddingService(delay=0.05)
+        queue = make_queue(service, batch_size=1, max_wait=0, concurrency=3)
+
+        queue.enqueue_many([make_expense(i) for i in range(12)])
+
+        assert queue.flush(timeout=5)
+        assert service.peak_active == 3
+
+    def test_backlog_penuh_row_baru_dibuang(self, make_queue):
+        service = FakeEmbeddingService()
+        queue = make_queue(service, max_backlog=3, max_wait=10)
+
+        queue.enqueue_many([make_expense(i) for i in range(5)])
+        snapshot = queue.snapshot()
+
+        assert (snapshot["pending"], snapshot["dropped"]) == (3, 2)
+
+    def test_stop_mengosongkan_antrian_tanpa_menunggu_batch_penuh(self, make_queue):
+        service = FakeEmbeddingService()
+        queue = make_queue(service, batch_size=100, max_wait=60)
+
+        queue.enqueue_many([make_expense(i) for i in range(3)])
+        started = time.monotonic()
+
+        assert queue.stop(timeout=5)
+        assert time.monotonic() - started < 2
+        assert sum(len(batch) for batch in service.batches) == 3
+        assert queue.snapshot()["workers"] == 0
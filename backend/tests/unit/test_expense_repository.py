@@ -0,0 +1,929 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.repositories.expense_repository import ExpenseRepository
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def mock_client():
+    """Mock Supabase Client — rpc(...).execute() bisa dikonfigurasi per test."""
+    return MagicMock()
+
+
+def set_rpc_rows(mock_client, rows: list[dict]):
+    """Helper: atur data yang dikembalikan oleh client.rpc(...).execute()."""
+    mock_client.rpc.return_value.execute.return_value = MagicMock(data=rows)
+
+
+# =============================================================================
+# SUMMARY — agregasi di Postgres via rpc
+# =============================================================================
+
+class TestExpenseRepositorySummary:
+    """
+    Menguji bahwa summary dihitung oleh database, bukan dengan menjumlah
+    semua row di Python.
+    - bulan / tahun / all-time → rpc("get_expense_summary_from_rollups")
+    - tanggal tertentu          → rpc("get_expense_summary")
+    File referensi: app/repositories/expense_repository.py
+    """
+
+    def test_summary_all_time_membaca_rollup_tanpa_batas_bulan(self, mock_client):
+        set_rpc_rows(mock_client, [
+            {"type": "income", "total": 500000},
+            {"type": "expense", "total": 125000.5},
+        ])
+        repo = ExpenseRepository(client=mock_client)
+
+        result = repo.get_summary_all_time("user-1")
+
+        mock_client.rpc.assert_called_once_with(
+            "get_expense_summary_from_rollups",
+            {"user_id_param": "user-1", "month_from_param": None, "month_to_param": None},
+        )
+        # Tidak boleh ada SELECT amount, type ke tabel/view
+        mock_client.table.assert_not_called()
+        assert result == {
+            "total_income": 500000.0,
+            "total_expense": 125000.5,
+            "net_balance": 374999.5,
+        }
+
+    @pytest.mark.parametrize("month,year,expected_month", [
+        (2, 2024, "2024-02-01"),
+        (12, 2025, "2025-12-01"),
+    ])
+    def test_summary_by_month_membaca_satu_bucket_rollup(
+        self, mock_client, month, year, expected_month
+    ):
+        set_rpc_rows(mock_client, [])
+        repo = ExpenseRepository(client=mock_client)
+
+        repo.get_summary_by_month("user-1", month, year)
+
+        name, params = mock_client.rpc.call_args.args
+        assert name == "get_expense_summary_from_rollups"
+        assert params["month_from_param"] == params["month_to_param"] == expected_month
+
+    def test_summary_by_year_membaca_maksimal_12_bulan_rollup(self, mock_client):
+        set_rpc_rows(mock_client, [])
+        repo = ExpenseRepository(client=mock_client)
+
+        repo.get_summary_by_year("user-1", 2024)
+
+        name, params = mock_client.rpc.call_args.args
+        assert name == "get_expense_summary_from_rollups"
+        assert params["month_from_param"] == "2024-01-01"
+        assert params["month_to_param"] == "2024-12-01"
+
+    def test_summary_by_date_memakai_agregasi_raw(self, mock_client):
+        """Rollup per bulan tidak bisa menjawab per tanggal — pakai get_expense_summary."""
+        set_rpc_rows(mock_client, [{"type": "expense", "total": 20000}])
+        repo = ExpenseRepository(client=mock_client)
+
+        result = repo.get_summary_by_date("user-1", "2024-06-15")
+
+        name, params = mock_client.rpc.call_args.args
+        assert name == "get_expense_summary"
+        assert params["date_from_param"] == params["date_to_param"] == "2024-06-15"
+        assert result["total_income"] == 0.0
+        assert result["net_balance"] == -20000.0
+
+    def test_summary_tanpa_transaksi_mengembalikan_nol(self, mock_client):
+        """Jika user belum punya transaksi, rpc mengembalikan list kosong."""
+        set_rpc_rows(mock_client, [])
+        repo = ExpenseRepository(client=mock_client)
+
+        result = repo.get_summary_all_time("user-1")
+
+        assert result == {"total_income": 0.0, "total_expense": 0.0, "net_balance": 0.0}
+
+
+# =============================================================================
+# ROLLUP MAINTENANCE — verify / rebuild + manage_rollups.py
+# =============================================================================
+
+class TestExpenseBreakdown:
+    """
+    Breakdown per category / subcategory / payment method → satu rpc GROUP BY.
+    File referensi: app/repositories/expense_repository.py → get_breakdown()
+    """
+
+    def test_breakdown_category_satu_rpc_dengan_semua_filter(self, mock_client):
+        set_rpc_rows(mock_client, [
+            {"category": "makanan", "subcategory": None, "payment_method": None, "total": "150000.50", "count": 3},
+        ])
+        repo = ExpenseRepository(client=mock_client)
+
+        result = repo.get_breakdown(
+            "user-1", "category", expense_type="expense", date_from="2024-06-01", date_to="2024-06-30"
+        )
+
+        mock_client.rpc.assert_called_once_with(
+            "get_expense_breakdown",
+            {
+                "user_id_param": "user-1",
+                "group_by_param": "category",
+                "type_param": "expense",
+                "date_from_param": "2024-06-01",
+                "date_to_param": "2024-06-30",
+            },
+        )
+        mock_client.table.assert_not_called()
+        assert result == [
+            {"category": "makanan", "subcategory": None, "payment_method": None, "total": 150000.5, "count": 3},
+        ]
+
+    def test_group_by_tidak_dikenal_ditolak_sebelum_query(self, mock_client):
+        from app.core.exceptions import ValidationError
+
+        repo = ExpenseRepository(client=mock_client)
+
+        with pytest.raises(ValidationError):
+            repo.get_breakdown("user-1", "description")
+        mock_client.rpc.assert_not_called()
+
+
+class TestExpenseTimeseries:
+    """
+    File referensi: app/repositories/expense_repository.py → get_timeseries()
+    """
+
+    def test_timeseries_satu_rpc_dan_net_balance_dihitung(self, mock_client):
+        set_rpc_rows(mock_client, [
+            {"period": "2024-01-01", "total_income": 0, "total_expense": "150.00"},
+            {"period": "2024-02-01", "total_income": 0, "total_expense": 0},
+            {"period": "2024-03-01", "total_income": "1000.00", "total_expense": 0},
+        ])
+        repo = ExpenseRepository(client=mock_client)
+
+        result = repo.get_timeseries("user-1", "month", "2024-01-15", "2024-03-02")
+
+        mock_client.rpc.assert_called_once_with(
+            "get_expense_timeseries",
+            {
+                "user_id_param": "user-1",
+                "granularity_param": "month",
+                "date_from_param": "2024-01-15",
+                "date_to_param": "2024-03-02",
+            },
+        )
+        assert [b["period"] for b in result] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+        assert result[0]["net_balance"] == -150.0
+        assert result[1] == {"period": "2024-02-01", "total_income": 0.0, "total_expense": 0.0, "net_balance": 0.0}
+        assert result[2]["net_balance"] == 1000.0
+
+    def test_granularity_tidak_dikenal_ditolak(self, mock_client):
+        from app.core.exceptions import ValidationError
+
+        repo = ExpenseRepository(client=mock_client)
+
+        with pytest.raises(ValidationError):
+            repo.get_timeseries("user-1", "hour", "2024-01-01", "2024-01-02")
+        mock_client.rpc.assert_not_called()
+
+
+class TestExpenseSearch:
+    """
+    Keyword search lewat index GIN search_vector → rpc("search_expenses").
+    File referensi: app/repositories/expense_repository.py → search()
+    """
+
+    def test_search_satu_rpc_dan_total_dari_window_count(self, mock_client):
+        set_rpc_rows(mock_client, [
+            {"id": "a", "description": "kopi susu", "rank": 1.4, "total_count": 7},
+            {"id": "b", "description": "beli kopi", "rank": 0.4, "total_count": 7},
+        ])
+        repo = ExpenseRepository(client=mock_client)
+
+        rows, total = repo.search("user-1", "kopi", limit=2, category="  Makanan ")
+
+        mock_client.rpc.assert_called_once_with(
+            "search_expenses",
+            {
+                "user_id_param": "user-1",
+                "query_param": "kopi",
+                "type_param": None,
+                "category_param": "makanan",
+                "date_from_param": None,
+                "date_to_param": None,
+                "limit_param": 2,
+                "offset_param": 0,
+            },
+        )
+        mock_client.table.assert_not_called()
+        assert total == 7
+        assert [r["id"] for r in rows] == ["a", "b"]
+        assert all("total_count" not in r for r in rows)
+
+    def test_search_tanpa_hasil_total_nol(self, mock_client):
+        set_rpc_rows(mock_client, [])
+        repo = ExpenseRepository(client=mock_client)
+
+        assert repo.search("user-1", "tidakada") == ([], 0)
+
+
+class TestRollupMaintenance:
+
+    def test_verify_rollups_mengembalikan_bucket_yang_selisih(self, mock_client):
+        mismatch = {
+            "user_id": "user-1", "month": "2024-01-01", "type": "expense", "category": "food",
+            "rollup_total": 100, "actual_total": 120, "rollup_count": 1, "actual_count": 2,
+        }
+        set_rpc_rows(mock_client, [mismatch])
+        repo = ExpenseRepository(client=mock_client)
+
+        assert repo.verify_rollups(user_id="user-1") == [mismatch]
+        mock_client.rpc.assert_called_once_with(
+            "verify_expense_monthly_rollups", {"user_id_param": "user-1"}
+        )
+
+    def test_rebuild_rollups_mengembalikan_jumlah_bucket(self, mock_client):
+        mock_client.rpc.return_value.execute.return_value = MagicMock(data=42)
+        repo = ExpenseRepository(client=mock_client)
+
+        assert repo.rebuild_rollups() == 42
+        mock_client.rpc.assert_called_once_with(
+            "rebuild_expense_monthly_rollups", {"user_id_param": None}
+        )
+
+    def test_command_verify_exit_code_1_jika_ada_selisih(self):
+        from manage_rollups import main
+
+        repo = MagicMock()
+        repo.verify_rollups.return_value = [{
+            "user_id": "u", "month": "2024-01-01", "type": "expense", "category": "food",
+            "rollup_total": 1, "actual_total": 2, "rollup_count": 1, "actual_count": 1,
+        }]
+
+        assert main(["verify"], repo=repo) == 1
+        repo.verify_rollups.assert_called_once_with(user_id=None)
+
+    def test_command_rebuild_lalu_verify(self):
+        from manage_rollups import main
+
+        repo = MagicMock()
+        repo.rebuild_rollups.return_value = 10
+        repo.verify_rollups.return_value = []
+
+        assert main(["rebuild", "--user-id", "user-1", "--verify"], repo=repo) == 0
+        repo.rebuild_rollups.assert_called_once_with(user_id="user-1")
+        repo.verify_rollups.assert_called_once_with(user_id="user-1")
+
+
+# =============================================================================
+# KEYSET CURSOR — find_all(cursor=...)
+# =============================================================================
+
+EXPENSE_ID = "7b0f4c2e-1d3a-4a51-9a57-0c1b2d3e4f50"
+
+
+@pytest.fixture
+def postgrest_query():
+    """Query builder PostgREST asli (tanpa network) untuk memeriksa parameter URL."""
+    from postgrest import SyncPostgrestClient
+    return SyncPostgrestClient("http://localhost:3000").table("active_expenses").select("*")
+
+
+class TestKeysetCursor:
+    """
+    Cursor = posisi (nilai kolom sort, id) row terakhir di halaman.
+    File referensi: app/repositories/expense_repository.py → encode_cursor / decode_cursor
+    """
+
+    @pytest.mark.parametrize("sort_by,row", [
+        ("created_at", {"id": EXPENSE_ID, "created_at": "2024-06-15T10:00:00.123456+00:00"}),
+        ("transaction_date", {"id": EXPENSE_ID, "transaction_date": "2024-06-15"}),
+        ("transaction_date", {"id": EXPENSE_ID, "transaction_date": None}),
+        ("amount", {"id": EXPENSE_ID, "amount": 150000.5}),
+    ])
+    def test_encode_decode_bolak_balik(self, sort_by, row):
+        cursor = ExpenseRepository.encode_cursor(row, sort_by, "desc")
+
+        decoded = ExpenseRepository.decode_cursor(cursor, sort_by, "desc")
+
+        assert decoded == {"value": row[sort_by], "id": EXPENSE_ID}
+
+    def test_cursor_untuk_sort_lain_ditolak(self):
+        from app.core.exceptions import ValidationError
+
+        cursor = ExpenseRepository.encode_cursor({"id": EXPENSE_ID, "amount": 10}, "amount", "desc")
+
+        with pytest.raises(ValidationError):
+            ExpenseRepository.decode_cursor(cursor, "created_at", "desc")
+        with pytest.raises(ValidationError):
+            ExpenseRepository.decode_cursor(cursor, "amount", "asc")
+
+    @pytest.mark.parametrize("payload", [
+        "bukan-base64!!",
+        # Nilai yang mencoba menyisipkan filter PostgREST
+        '{"c":"amount","o":"desc","v":"1),user_id.neq.x","id":"' + EXPENSE_ID + '"}',
+        '{"c":"created_at","o":"desc","v":"2024-01-01","id":"1,user_id.neq.x"}',
+        '{"c":"created_at","o":"desc","v":null,"id":"' + EXPENSE_ID + '"}',
+    ])
+    def test_cursor_rusak_atau_berbahaya_ditolak(self, payload):
+        import base64
+        from app.core.exceptions import ValidationError
+
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode() if payload.startswith("{") else payload
+        sort_by = "amount" if '"amount"' in payload else "created_at"
+
+        with pytest.raises(ValidationError):
+            ExpenseRepository.decode_cursor(cursor, sort_by, "desc")
+
+    def test_seek_desc_pada_kolom_not_null(self, postgrest_query):
+        repo = ExpenseRepository(client=MagicMock())
+        cursor = repo.encode_cursor({"id": EXPENSE_ID, "amount": 5000}, "amount", "desc")
+
+        query = repo._order_and_seek(postgrest_query, "amount", "desc", cursor)
+
+        assert query.request.params.get_list("or") == [
+            f'(amount.lt."5000",and(amount.eq."5000",id.lt.{EXPENSE_ID}))'
+        ]
+        assert query.request.params["order"] == "amount.desc,id.desc"
+
+    def test_seek_desc_pada_kolom_nullable_menyertakan_null(self, postgrest_query):
+        repo = ExpenseRepository(client=MagicMock())
+        cursor = repo.encode_cursor(
+            {"id": EXPENSE_ID, "transaction_date": "2024-06-15"}, "transaction_date", "desc"
+        )
+
+        query = repo._order_and_seek(postgrest_query, "transaction_date", "desc", cursor)
+
+        assert query.request.params.get_list("or") == [
+            f'(transaction_date.lt."2024-06-15",'
+            f'and(transaction_date.eq."2024-06-15",id.lt.{EXPENSE_ID}),'
+            f'transaction_date.is.null)'
+        ]
+        assert query.request.params["order"] == "transaction_date.desc.nullslast,id.desc"
+
+    def test_seek_asc_pada_kolom_nullable_null_sudah_lewat(self, postgrest_query):
+        """Asc = NULLS FIRST (kebalikan persis index DESC NULLS LAST) → setelah tanggal, NULL sudah lewat."""
+        repo = ExpenseRepository(client=MagicMock())
+        cursor = repo.encode_cursor(
+            {"id": EXPENSE_ID, "transaction_date": "2024-06-15"}, "transaction_date", "asc"
+        )
+
+        query = repo._order_and_seek(postgrest_query, "transaction_date", "asc", cursor)
+
+        assert query.request.params.get_list("or") == [
+            f'(transaction_date.gt."2024-06-15",'
+            f'and(transaction_date.eq."2024-06-15",id.gt.{EXPENSE_ID}))'
+        ]
+        assert query.request.params["order"] == "transaction_date.asc.nullsfirst,id.asc"
+
+    def test_seek_asc_setelah_row_dengan_nilai_null_lanjut_ke_row_bertanggal(self, postgrest_query):
+        repo = ExpenseRepository(client=MagicMock())
+        cursor = repo.encode_cursor({"id": EXPENSE_ID, "transaction_date": None}, "transaction_date", "asc")
+
+        query = repo._order_and_seek(postgrest_query, "transaction_date", "asc", cursor)
+
+        assert query.request.params.get_list("or") == [
+            f"(and(transaction_date.is.null,id.gt.{EXPENSE_ID}),transaction_date.not.is.null)"
+        ]
+
+    def test_seek_setelah_row_dengan_nilai_null(self, postgrest_query):
+        repo = ExpenseRepository(client=MagicMock())
+        cursor = repo.encode_cursor({"id": EXPENSE_ID, "transaction_date": None}, "transaction_date", "desc")
+
+        query = repo._order_and_seek(postgrest_query, "transaction_date", "desc", cursor)
+
+        assert query.request.params.get_list("or") == [
+            f"(and(transaction_date.is.null,id.lt.{EXPENSE_ID}))"
+        ]
+
+    def test_tanpa_cursor_tetap_urut_dengan_id_sebagai_tiebreaker(self, postgrest_query):
+        repo = ExpenseRepository(client=MagicMock())
+
+        query = repo._order_and_seek(postgrest_query, "created_at", "desc")
+
+        assert "or" not in query.request.params
+        assert query.request.params["order"] == "created_at.desc,id.desc"
+
+
+# =============================================================================
+# FIND PAGE — rows + count dalam satu request
+# =============================================================================
+
+class TestFindPage:
+
+    def _mock_select(self, mock_client):
+        """Helper: client.table().select() mengembalikan builder PostgREST asli."""
+        from postgrest import SyncPostgrestClient
+
+        real = SyncPostgrestClient("http://localhost:3000").table("active_expenses")
+        captured = {}
+
+        def select(*columns, count=None):
+            captured["builder"] = real.select(*columns, count=count)
+            return captured["builder"]
+
+        mock_client.table.return_value.select.side_effect = select
+        return captured
+
+    @pytest.mark.parametrize("count_mode", ["exact", "planned", "estimated"])
+    def test_count_dikirim_lewat_header_prefer(self, mock_client, count_mode):
+        captured = self._mock_select(mock_client)
+        repo = ExpenseRepository(client=mock_client)
+
+        with pytest.MonkeyPatch.context() as mp:
+            from postgrest._sync.request_builder import SyncSelectRequestBuilder
+            mp.setattr(
+                SyncSelectRequestBuilder, "execute",
+                lambda self: MagicMock(data=[{"id": EXPENSE_ID}], count=42),
+            )
+            rows, total = repo.find_page("user-1", limit=10, count_mode=count_mode)
+
+        assert captured["builder"].request.headers["Prefer"] == f"count={count_mode}"
+        assert rows == [{"id": EXPENSE_ID}]
+        assert total == 42
+
+    def test_count_mode_none_tidak_menghitung(self, mock_client):
+        captured = self._mock_select(mock_client)
+        repo = ExpenseRepository(client=mock_client)
+
+        with pytest.MonkeyPatch.context() as mp:
+            from postgrest._sync.request_builder import SyncSelectRequestBuilder
+            mp.setattr(SyncSelectRequestBuilder, "execute", lambda self: MagicMock(data=[], count=None))
+            rows, total = repo.find_page("user-1", count_mode="none")
+
+        assert "Prefer" not in captured["builder"].request.headers
+        assert total is None
+
+    def test_count_mode_tidak_dikenal_ditolak(self, mock_client):
+        from app.core.exceptions import ValidationError
+
+        repo = ExpenseRepository(client=mock_client)
+
+        with pytest.raises(ValidationError):
+            repo.find_page("user-1", count_mode="fast")
+
+
+# =============================================================================
+# COLUMN PROJECTION — embedding / search_vector tidak pernah ikut terkirim
+# =============================================================================
+
+class TestColumnProjection:
+    """
+    File referensi: app/repositories/expense_repository.py → select_columns(), _returning()
+    """
+
+    def test_default_memilih_kolom_eksplisit_tanpa_embedding(self):
+        columns = ExpenseRepository.select_columns().split(",")
+
+        assert "*" not in columns
+        assert "embedding" not in columns
+        assert "search_vector" not in columns
+        assert columns == list(ExpenseRepository.COLUMNS)
+
+    def test_sparse_fieldset_selalu_menyertakan_id_dan_kolom_sort(self):
+        columns = ExpenseRepository.select_columns(["category", "amount"], sort_by="transaction_date")
+
+        assert columns == "id,amount,category,transaction_date"
+
+    def test_field_tidak_dikenal_ditolak(self):
+        from app.core.exceptions import ValidationError
+
+        with pytest.raises(ValidationError, match="embedding"):
+            ExpenseRepository.select_columns(["amount", "embedding"])
+
+    def test_find_page_mengirim_select_terproyeksi(self, mock_client):
+        repo = ExpenseRepository(client=mock_client)
+
+        repo.find_page("user-1", fields=["amount"])
+
+        columns = mock_client.table.return_value.select.call_args.args[0]
+        assert columns == "id,amount,created_at"
+
+    @pytest.mark.parametrize("operation", ["create", "update"])
+    def test_insert_update_mengembalikan_kolom_terproyeksi(self, operation):
+        from postgrest import SyncPostgrestClient
+
+        real = SyncPostgrestClient("http://localhost:3000")
+        client = MagicMock()
+        client.table.side_effect = real.table
+        repo = ExpenseRepository(client=client)
+        captured = {}
+
+        def fake_execute(builder):
+            captured["params"] = builder.request.params
+            return MagicMock(data=[{"id": EXPENSE_ID}])
+
+        with pytest.MonkeyPatch.context() as mp:
+            from postgrest._sync import request_builder
+            mp.setattr(request_builder.SyncQueryRequestBuilder, "execute", fake_execute)
+            mp.setattr(request_builder.SyncFilterRequestBuilder, "execute", fake_execute)
+            if operation == "create":
+                repo.create({"amount": 1})
+            else:
+                repo.update(EXPENSE_ID, "user-1", {"amount": 1})
+
+        assert captured["params"]["select"] == ExpenseRepository.select_columns()
+
+
+class TestCreateMany:
+    """
+    File referensi: app/repositories/expense_repository.py → create_many()
+    """
+
+    def test_satu_insert_multi_row_dengan_default_kolom(self):
+        from postgrest import SyncPostgrestClient
+
+        real = SyncPostgrestClient("http://localhost:3000")
+        client = MagicMock()
+        client.table.side_effect = real.table
+        repo = ExpenseRepository(client=client)
+        captured = []
+
+        def fake_execute(builder):
+            captured.append(builder.request)
+            return MagicMock(data=[{"id": "a"}, {"id": "b"}])
+
+        rows = [
+            {"amount": 1, "category": "makanan", "transaction_date": "2024-06-01"},
+            {"amount": 2, "category": "transport"},
+        ]
+        with pytest.MonkeyPatch.context() as mp:
+            from postgrest._sync import request_builder
+            mp.setattr(request_builder.SyncQueryRequestBuilder, "execute", fake_execute)
+            created = repo.create_many(rows)
+
+        assert created == [{"id": "a"}, {"id": "b"}]
+        assert len(captured) == 1
+        request = captured[0]
+        assert request.json == rows
+        assert request.params["select"] == ExpenseRepository.select_columns()
+        # Kolom yang tidak dikirim (transaction_date) memakai DEFAULT, bukan NULL
+        assert "missing=default" in request.headers["prefer"]
+
+    def test_list_kosong_tidak_query(self, mock_client):
+        repo = ExpenseRepository(client=mock_client)
+
+        assert repo.create_many([]) == []
+        mock_client.table.assert_not_called()
+
+    def test_jumlah_row_kembali_tidak_sama_raise(self, mock_client):
+        mock_client.table.return_value.insert.return_value.execute.return_value = MagicMock(data=[{"id": "a"}])
+        repo = ExpenseRepository(client=mock_client)
+
+        with pytest.raises(RuntimeError):
+            repo.create_many([{"amount": 1}, {"amount": 2}])
+
+
+class TestBulkByFilter:
+    """
+    File referensi: app/repositories/expense_repository.py
+    → update_by_filter(), soft_delete_by_filter()
+    """
+
+    @staticmethod
+    def capture_request(repo_call):
+        from postgrest import SyncPostgrestClient
+
+        real = SyncPostgrestClient("http://localhost:3000")
+        client = MagicMock()
+        client.table.side_effect = real.table
+        captured = []
+
+        def fake_execute(builder):
+            captured.append(builder.request)
+            return MagicMock(data=[{"id": "a"}, {"id": "b"}])
+
+        with pytest.MonkeyPatch.context() as mp:
+            from postgrest._sync import request_builder
+            mp.setattr(request_builder.SyncFilterRequestBuilder, "execute", fake_execute)
+            result = repo_call(ExpenseRepository(client=client))
+        return result, captured
+
+    def test_update_by_filter_satu_update_dengan_filter_list(self):
+        result, captured = self.capture_request(lambda repo: repo.update_by_filter(
+            "user-1", {"category": "transport"}, category="Gojek", date_from="2024-01-01",
+        ))
+
+        assert result == [{"id": "a"}, {"id": "b"}]
+        assert len(captured) == 1
+        params = captured[0].params
+        assert captured[0].http_method == "PATCH"
+        assert params["user_id"] == "eq.user-1"
+        assert params["category"] == "ilike.%gojek%"
+        assert params["transaction_date"] == "gte.2024-01-01"
+        assert params["deleted_at"] == "is.null"
+        assert params["select"] == ExpenseRepository.select_columns()
+
+    def test_soft_delete_by_filter_mengembalikan_id(self):
+        result, captured = self.capture_request(lambda repo: repo.soft_delete_by_filter(
+            "user-1", expense_type="expense", q="salah import",
+        ))
+
+        assert result == ["a", "b"]
+        assert len(captured) == 1
+        params = captured[0].params
+        assert "deleted_at" in captured[0].json
+        assert params["type"] == "eq.expense"
+        assert params["or"].startswith("(description.ilike.%salah import%")
+        assert params["select"] == "id"
+
+
+class TestConditionalWrite:
+    """
+    delete = satu UPDATE ... RETURNING id (tanpa find_by_id lebih dulu);
+    update/delete dengan expected_updated_at → filter updated_at (If-Match).
+    File referensi: app/repositories/expense_repository.py → update(), delete()
+    """
+
+    UPDATED_AT = "2024-06-15T10:00:00.123456+00:00"
+
+    @staticmethod
+    def run(repo_call, data, find_by_id=None):
+        from postgrest import SyncPostgrestClient
+
+        real = SyncPostgrestClient("http://localhost:3000")
+        client = MagicMock()
+        client.table.side_effect = real.table
+        repo = ExpenseRepository(client=client)
+        repo.find_by_id = MagicMock(side_effect=find_by_id)
+        captured = []
+
+        def fake_execute(builder):
+            captured.append(builder.request)
+            return MagicMock(data=data)
+
+        with pytest.MonkeyPatch.context() as mp:
+            from postgrest._sync import request_builder
+            mp.setattr(request_builder.SyncFilterRequestBuilder, "execute", fake_execute)
+            try:
+                return repo_call(repo), captured, repo
+            except Exception as exc:
+                return exc, captured, repo
+
+    def test_delete_satu_request_tanpa_find_by_id(self):
+        result, captured, repo = self.run(lambda repo: repo.delete(EXPENSE_ID, "user-1"), [{"id": EXPENSE_ID}])
+
+        assert result is None
+        assert len(captured) == 1
+        assert captured[0].params["select"] == "id"
+        assert captured[0].params["deleted_at"] == "is.null"
+        assert "updated_at" not in captured[0].params
+        repo.find_by_id.assert_not_called()
+
+    def test_delete_tidak_ada_row_not_found(self):
+        from app.core.exceptions import NotFoundError
+
+        result, _, repo = self.run(lambda repo: repo.delete(EXPENSE_ID, "user-1"), [])
+
+        assert isinstance(result, NotFoundError)
+        repo.find_by_id.assert_not_called()
+
+    @pytest.mark.parametrize("operation", ["update", "delete"])
+    def test_if_match_menjadi_filter_updated_at(self, operation):
+        def call(repo):
+            if operation == "update":
+                return repo.update(EXPENSE_ID, "user-1", {"amount": 1}, expected_updated_at=self.UPDATED_AT)
+            return repo.delete(EXPENSE_ID, "user-1", expected_updated_at=self.UPDATED_AT)
+
+        _, captured, _ = self.run(call, [{"id": EXPENSE_ID}])
+
+        assert len(captured) == 1
+        assert captured[0].params["updated_at"] == f"eq.{self.UPDATED_AT}"
+
+    @pytest.mark.parametrize("operation", ["update", "delete"])
+    def test_versi_basi_412_row_hilang_404(self, operation):
+        from app.core.exceptions import NotFoundError, PreconditionFailedError
+
+        def call(repo):
+            if operation == "update":
+                return repo.update(EXPENSE_ID, "user-1", {"amount": 1}, expected_updated_at=self.UPDATED_AT)
+            return repo.delete(EXPENSE_ID, "user-1", expected_updated_at=self.UPDATED_AT)
+
+        stale, _, _ = self.run(call, [], find_by_id=lambda *args: {"id": EXPENSE_ID})
+        gone, _, _ = self.run(call, [], find_by_id=NotFoundError("gone"))
+
+        assert isinstance(stale, PreconditionFailedError)
+        assert isinstance(gone, NotFoundError)
+
+    def test_versi_bukan_timestamp_ditolak_sebelum_query(self):
+        from app.core.exceptions import PreconditionFailedError
+
+        result, captured, _ = self.run(
+            lambda repo: repo.delete(EXPENSE_ID, "user-1", expected_updated_at="x),or=(id.neq.0"), [],
+        )
+
+        assert isinstance(result, PreconditionFailedError)
+        assert captured == []
+
+
+class TestDataVersion:
+    """
+    File referensi: app/repositories/expense_repository.py → get_data_version()
+    """
+
+    def test_membaca_tabel_versi_bukan_expenses(self, mock_client):
+        chain = mock_client.table.return_value.select.return_value.eq.return_value.maybe_single.return_value
+        chain.execute.return_value = MagicMock(data={"version": 7})
+        repo = ExpenseRepository(client=mock_client)
+
+        assert repo.get_data_version("user-1") == 7
+        mock_client.table.assert_called_once_with("expense_data_versions")
+
+    def test_user_tanpa_transaksi_versi_nol(self, mock_client):
+        chain = mock_client.table.return_value.select.return_value.eq.return_value.maybe_single.return_value
+        chain.execute.return_value = None
+        repo = ExpenseRepository(client=mock_client)
+
+        assert repo.get_data_version("user-1") == 0
+
+
+class TestAsyncExpenseRepository:
+    """
+    AsyncExpenseRepository memakai query builder yang sama dengan versi sync,
+    hanya execute() yang di-await.
+    File referensi: app/repositories/expense_repository.py → AsyncExpenseRepository
+    """
+
+    @staticmethod
+    def captured_request(monkeypatch, repo_call_sync, repo_call_async):
+        """Jalankan panggilan yang sama lewat client sync & async, kembalikan request keduanya."""
+        import asyncio
+        from postgrest import AsyncPostgrestClient, SyncPostgrestClient
+        from postgrest._async import request_builder as async_builder
+        from postgrest._sync import request_builder as sync_builder
+        from app.repositories.expense_repository import AsyncExpenseRepository
+
+        captured = {}
+
+        def fake_execute(builder):
+            captured["sync"] = builder.request
+            return MagicMock(data=[], count=0)
+
+        async def fake_execute_async(builder):
+            captured["async"] = builder.request
+            return MagicMock(data=[], count=0)
+
+        monkeypatch.setattr(sync_builder.SyncSelectRequestBuilder, "execute", fake_execute)
+        monkeypatch.setattr(async_builder.AsyncSelectRequestBuilder, "execute", fake_execute_async)
+
+        sync_client = MagicMock()
+        sync_client.table.side_effect = SyncPostgrestClient("http://localhost:3000").table
+        async_client = MagicMock()
+        async_client.table.side_effect = AsyncPostgrestClient("http://localhost:3000").table
+
+        repo_call_sync(ExpenseRepository(client=sync_client))
+        asyncio.run(repo_call_async(AsyncExpenseRepository(client=async_client)))
+        return captured["sync"], captured["async"]
+
+    def test_find_page_request_sama_dengan_versi_sync(self, monkeypatch):
+        cursor = ExpenseRepository.encode_cursor(
+            {"id": EXPENSE_ID, "transaction_date": "2024-06-15"}, "transaction_date", "desc",
+        )
+        kwargs = dict(
+            limit=21, expense_type="expense", category="makanan", q="kopi", date_from="2024-01-01",
+            sort_by="transaction_date", cursor=cursor, count_mode="none", fields=["amount"],
+        )
+
+        sync_request, async_request = self.captured_request(
+            monkeypatch,
+            lambda repo: repo.find_page("user-1", **kwargs),
+            lambda repo: repo.find_page("user-1", **kwargs),
+        )
+
+        assert sync_request.params["order"] == "transaction_date.desc.nullslast,id.desc"
+        assert str(async_request.params) == str(sync_request.params)
+        assert async_request.headers.get("prefer") == sync_request.headers.get("prefer")
+
+    async def test_update_versi_basi_412_lewat_find_by_id_async(self):
+        from unittest.mock import AsyncMock
+        from app.core.exceptions import PreconditionFailedError
+        from app.repositories.expense_repository import AsyncExpenseRepository
+
+        client = MagicMock()
+        query = client.table.return_value.update.return_value.eq.return_value.eq.return_value.is_.return_value
+        query.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+        repo = AsyncExpenseRepository(client=client)
+        repo.find_by_id = AsyncMock(return_value={"id": EXPENSE_ID})
+
+        with pytest.raises(PreconditionFailedError):
+            await repo.update(
+                EXPENSE_ID, "user-1", {"amount": 1}, expected_updated_at="2024-06-15T10:00:00+00:00",
+            )
+        repo.find_by_id.assert_awaited_once_with(EXPENSE_ID, "user-1")
+
+    async def test_summary_dan_versi_di_await(self):
+        from unittest.mock import AsyncMock
+        from app.repositories.expense_repository import AsyncExpenseRepository
+
+        client = MagicMock()
+        client.rpc.return_value.execute = AsyncMock(return_value=MagicMock(data=[{"type": "income", "total": 10}]))
+        version_query = client.table.return_value.select.return_value.eq.return_value.maybe_single.return_value
+        version_query.execute = AsyncMock(return_value=MagicMock(data={"version": 3}))
+        repo = AsyncExpenseRepository(client=client)
+
+        assert await repo.get_summary_by_year("user-1", 2024) == {
+            "total_income": 10.0, "total_expense": 0.0, "net_balance": 10.0,
+        }
+        assert await repo.get_data_version("user-1") == 3
+
+
+class RecordingPostgresClient:
+    """PostgresClient palsu: mencatat (sql, params, prepared) setiap statement."""
+
+    def __init__(self, rows: list[dict] | None = None):
+        self.rows = rows or []
+        self.statements = []
+
+    def fetch_all(self, sql, params=(), prepared=False):
+        self.statements.append((sql, list(params), prepared))
+        return self.rows
+
+    def fetch_one(self, sql, params=(), prepared=False):
+        rows = self.fetch_all(sql, params, prepared)
+        return rows[0] if rows else None
+
+    def session(self):
+        from contextlib import nullcontext
+
+        session = MagicMock()
+        session.execute.side_effect = lambda sql, params=(), prepared=False: (
+            self.statements.append((sql, list(params), prepared)) or [{"count": 7}]
+        )
+        return nullcontext(session)
+
+
+class TestPostgresExpenseRepository:
+    """
+    PostgresExpenseRepository menulis SQL yang setara dengan request PostgREST.
+    Koneksinya tidak kena RLS, jadi user_id harus selalu ada di WHERE.
+    File referensi: app/repositories/expense_repository.py → PostgresExpenseRepository
+    """
+
+    def test_find_page_keyset_sql_dan_count_di_koneksi_yang_sama(self):
+        from app.repositories.expense_repository import PostgresExpenseRepository
+
+        client = RecordingPostgresClient()
+        cursor = ExpenseRepository.encode_cursor(
+            {"id": EXPENSE_ID, "transaction_date": "2024-06-15"}, "transaction_date", "desc",
+        )
+        repo = PostgresExpenseRepository(client)
+
+        rows, total = repo.find_page(
+            "user-1", limit=21, expense_type="expense", sort_by="transaction_date", cursor=cursor,
+        )
+
+        (page_sql, page_params, page_prepared), (count_sql, count_params, _) = client.statements
+        assert total == 7 and page_prepared
+        assert page_sql == (
+            "SELECT id,amount,type,description,category,subcategory,payment_method,transaction_date,"
+            "created_at,updated_at FROM active_expenses "
+            "WHERE user_id = $1 AND type = $2 AND (transaction_date < $4 OR (transaction_date = $4 "
+            "AND id < $3) OR transaction_date IS NULL) "
+            "ORDER BY transaction_date DESC NULLS LAST, id DESC LIMIT $5"
+        )
+        assert page_params == ["user-1", "expense", EXPENSE_ID, "2024-06-15", 21]
+        # Count memakai filter + posisi cursor yang sama, tanpa LIMIT
+        assert count_sql.endswith("WHERE " + page_sql.split("WHERE ")[1].split(" ORDER BY")[0])
+        assert count_params == page_params[:-1]
+
+
+    def test_find_page_asc_nullable_nulls_first_seperti_postgrest(self):
+        from app.repositories.expense_repository import PostgresExpenseRepository
+
+        client = RecordingPostgresClient()
+        cursor = ExpenseRepository.encode_cursor(
+            {"id": EXPENSE_ID, "transaction_date": None}, "transaction_date", "asc",
+        )
+
+        PostgresExpenseRepository(client).find_page(
+            "user-1", limit=21, sort_by="transaction_date", sort_order="asc", cursor=cursor, count_mode="none",
+        )
+
+        page_sql = client.statements[0][0]
+        assert page_sql.endswith(
+            "WHERE user_id = $1 AND ((transaction_date IS NULL AND id > $2) OR transaction_date IS NOT NULL) "
+            "ORDER BY transaction_date ASC NULLS FIRST, id ASC LIMIT $3"
+        )
+    def test_update_dan_delete_selalu_dibatasi_user_dan_row_aktif(self):
+        from app.repositories.expense_repository import PostgresExpenseRepository
+
+        client = RecordingPostgresClient(rows=[{"id": EXPENSE_ID}])
+        repo = PostgresExpenseRepository(client)
+
+        repo.update(EXPENSE_ID, "user-1", {"amount": 10}, expected_updated_at="2024-06-15T10:00:00+00:00")
+        repo.delete(EXPENSE_ID, "user-1")
+
+        (update_sql, update_params, _), (delete_sql, _, delete_prepared) = client.statements
+        assert "WHERE id = $1 AND user_id = $2 AND updated_at = $3 AND deleted_at IS NULL" in update_sql
+        assert update_sql.startswith("UPDATE expenses SET amount = $4 ")
+        assert update_params == [EXPENSE_ID, "user-1", "2024-06-15T10:00:00+00:00", 10]
+        assert delete_sql.endswith("WHERE id = $1 AND user_id = $2 AND deleted_at IS NULL RETURNING id")
+        assert delete_prepared
+
+    def test_kolom_tulis_di_luar_whitelist_ditolak_sebelum_query(self):
+        from app.repositories.expense_repository import PostgresExpenseRepository
+
+        client = RecordingPostgresClient()
+        repo = PostgresExpenseRepository(client)
+
+        with pytest.raises(ValueError):
+            repo.update(EXPENSE_ID, "user-1", {"amount = 0 --": 1})
+        assert client.statements == []
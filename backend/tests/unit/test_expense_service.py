@@ -0,0 +1,815 @@
+import pytest
+from unittest.mock import MagicMock
+
+from app.repositories.expense_repository import ExpenseRepository
+from app.services.expense_service import ExpenseService
+
+pytestmark = pytest.mark.unit
+
+
+def make_row(i: int) -> dict:
+    """Helper: satu row expense seperti yang dikembalikan PostgREST."""
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}",
+        "amount": 1000 + i,
+        "type": "expense",
+        "description": None,
+        "category": "makanan",
+        "subcategory": None,
+        "payment_method": None,
+        "transaction_date": "2024-06-15",
+        "created_at": f"2024-06-15T10:00:{i % 60:02d}+00:00",
+        "updated_at": f"2024-06-15T10:00:{i % 60:02d}+00:00",
+    }
+
+
+@pytest.fixture
+def mock_expense_repo():
+    """Mock ExpenseRepository; encode_cursor memakai implementasi asli."""
+    repo = MagicMock()
+    repo.encode_cursor.side_effect = ExpenseRepository.encode_cursor
+    return repo
+
+
+class TestGetAllExpensesPagination:
+    """
+    File referensi: app/services/expense_service.py → get_all_expenses()
+    """
+
+    def test_next_cursor_diisi_jika_masih_ada_halaman_berikutnya(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([make_row(i) for i in range(3)], 10)  # limit + 1
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", limit=2, sort_by="amount", sort_order="asc")
+
+        assert [e.id for e in result.expenses] == [make_row(0)["id"], make_row(1)["id"]]
+        assert mock_expense_repo.find_page.call_args.kwargs["limit"] == 3
+        decoded = ExpenseRepository.decode_cursor(result.next_cursor, "amount", "asc")
+        assert decoded == {"value": make_row(1)["amount"], "id": make_row(1)["id"]}
+
+    def test_next_cursor_none_di_halaman_terakhir(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([make_row(0)], 1)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", limit=2)
+
+        assert result.next_cursor is None
+        assert result.total == 1
+
+    def test_cursor_diteruskan_ke_repository(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([], None)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        service.get_all_expenses("user-1", limit=20, cursor="abc", count_mode="none")
+
+        assert mock_expense_repo.find_page.call_args.kwargs["cursor"] == "abc"
+
+
+class TestGetAllExpensesCount:
+    """
+    List + total harus satu round trip (find_page), bukan find_all + count_all.
+    """
+
+    def test_list_dan_total_dalam_satu_panggilan_repository(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([make_row(0)], 57)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", limit=20, category="makanan")
+
+        mock_expense_repo.find_page.assert_called_once()
+        mock_expense_repo.find_all.assert_not_called()
+        mock_expense_repo.count_all.assert_not_called()
+        assert mock_expense_repo.find_page.call_args.kwargs["count_mode"] == "exact"
+        assert mock_expense_repo.find_page.call_args.kwargs["category"] == "makanan"
+        assert result.total == 57
+
+    @pytest.mark.parametrize("count_mode", ["planned", "estimated"])
+    def test_count_mode_estimasi_diteruskan(self, mock_expense_repo, count_mode):
+        mock_expense_repo.find_page.return_value = ([], 1000)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        service.get_all_expenses("user-1", count_mode=count_mode)
+
+        assert mock_expense_repo.find_page.call_args.kwargs["count_mode"] == count_mode
+
+    def test_count_mode_none_total_none(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([make_row(0)], None)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", count_mode="none")
+
+        assert result.total is None
+        mock_expense_repo.count_all.assert_not_called()
+
+    def test_dengan_cursor_total_dihitung_dari_semua_filter(self, mock_expense_repo):
+        """Count inline dengan cursor hanya menghitung sisa row — pakai count_all terpisah."""
+        mock_expense_repo.find_page.return_value = ([make_row(0)], None)
+        mock_expense_repo.count_all.return_value = 99
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", cursor="abc", q="gojek")
+
+        assert mock_expense_repo.find_page.call_args.kwargs["count_mode"] == "none"
+        mock_expense_repo.count_all.assert_called_once()
+        assert mock_expense_repo.count_all.call_args.kwargs["q"] == "gojek"
+        assert result.total == 99
+
+
+class TestExportExpensesFormats:
+    """
+    File referensi: app/services/expense_service.py → export_expenses()
+                    app/services/expense_export.py
+    """
+
+    @pytest.fixture
+    def service(self, mock_expense_repo):
+        # 2 halaman: 1000 row penuh lalu 5 row → iterasi berhenti tanpa query ketiga
+        mock_expense_repo.find_all.side_effect = [
+            [make_row(i) for i in range(1000)],
+            [make_row(i) for i in range(1000, 1005)],
+        ]
+        return ExpenseService(expense_repo=mock_expense_repo)
+
+    def test_ndjson_satu_object_per_baris_dengan_amount_numerik(self, service):
+        import json
+
+        chunks = list(service.export_expenses(user_id="user-1", export_format="ndjson"))
+
+        assert len(chunks) == 2
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        assert len(lines) == 1005
+        first = json.loads(lines[0])
+        assert first["amount"] == 1000
+        assert first["transaction_date"] == "2024-06-15"
+
+    def test_arrow_stream_menjaga_tipe_kolom(self, service):
+        import pyarrow as pa
+        from decimal import Decimal
+        from datetime import date
+
+        data = b"".join(service.export_expenses(user_id="user-1", export_format="arrow"))
+        table = pa.ipc.open_stream(data).read_all()
+
+        assert table.num_rows == 1005
+        assert table.schema.field("amount").type == pa.decimal128(15, 2)
+        assert table.schema.field("transaction_date").type == pa.date32()
+        assert table.schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+        assert table.column("amount")[0].as_py() == Decimal("1000.00")
+        assert table.column("transaction_date")[0].as_py() == date(2024, 6, 15)
+
+    def test_parquet_bisa_dibaca_ulang_dengan_tipe_yang_sama(self, service):
+        import io
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        data = b"".join(service.export_expenses(user_id="user-1", export_format="parquet"))
+        table = pq.read_table(io.BytesIO(data))
+
+        assert table.num_rows == 1005
+        assert table.schema.field("amount").type == pa.decimal128(15, 2)
+        assert table.column("id")[1004].as_py() == make_row(1004)["id"]
+
+    def test_export_kosong_tetap_menghasilkan_file_valid(self, mock_expense_repo):
+        import io
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        mock_expense_repo.find_all.return_value = []
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        arrow_data = b"".join(service.export_expenses(user_id="user-1", export_format="arrow"))
+        parquet_data = b"".join(service.export_expenses(user_id="user-1", export_format="parquet"))
+
+        assert pa.ipc.open_stream(arrow_data).read_all().num_rows == 0
+        assert pq.read_table(io.BytesIO(parquet_data)).num_rows == 0
+
+    def test_format_tidak_dikenal_ditolak(self, mock_expense_repo):
+        from app.core.exceptions import ValidationError
+
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        with pytest.raises(ValidationError):
+            service.export_expenses(user_id="user-1", export_format="xlsx")
+        mock_expense_repo.find_all.assert_not_called()
+
+
+class TestExpenseBreakdown:
+    """
+    File referensi: app/services/expense_service.py → get_expense_summary_by_*()
+    """
+
+    def test_breakdown_category_memetakan_row_ke_response_model(self, mock_expense_repo):
+        mock_expense_repo.get_breakdown.return_value = [
+            {"category": "transportasi", "subcategory": None, "payment_method": None, "total": 300.0, "count": 1},
+            {"category": "makanan", "subcategory": None, "payment_method": None, "total": 150.0, "count": 2},
+        ]
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_expense_summary_by_category("user-1", expense_type="expense", date_from="2024-06-01")
+
+        mock_expense_repo.get_breakdown.assert_called_once_with("user-1", "category", "expense", "2024-06-01", None)
+        assert [(r.category, r.total_amount) for r in result] == [("transportasi", 300.0), ("makanan", 150.0)]
+
+    def test_breakdown_subcategory_dan_payment_method_boleh_null(self, mock_expense_repo):
+        mock_expense_repo.get_breakdown.return_value = [
+            {"category": "makanan", "subcategory": None, "payment_method": None, "total": 50.0, "count": 1},
+        ]
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        by_sub = service.get_expense_summary_by_subcategory("user-1")
+        by_method = service.get_expense_summary_by_payment_method("user-1")
+
+        assert by_sub[0].category == "makanan" and by_sub[0].subcategory is None
+        assert by_method[0].payment_method is None
+        groups = [c.args[1] for c in mock_expense_repo.get_breakdown.call_args_list]
+        assert groups == ["subcategory", "payment_method"]
+
+
+class TestExpenseTimeseries:
+    """
+    File referensi: app/services/expense_service.py → get_expense_timeseries()
+    """
+
+    def test_timeseries_memetakan_bucket_ke_response_model(self, mock_expense_repo):
+        mock_expense_repo.get_timeseries.return_value = [
+            {"period": "2024-01-01", "total_income": 0.0, "total_expense": 150.0, "net_balance": -150.0},
+            {"period": "2024-02-01", "total_income": 0.0, "total_expense": 0.0, "net_balance": 0.0},
+        ]
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_expense_timeseries("user-1", "month", "2024-01-01", "2024-02-29")
+
+        mock_expense_repo.get_timeseries.assert_called_once_with("user-1", "month", "2024-01-01", "2024-02-29")
+        assert [b.period for b in result] == ["2024-01-01", "2024-02-01"]
+        assert result[0].net_balance == -150.0
+
+    @pytest.mark.parametrize("date_from,date_to", [
+        ("2024-03-01", "2024-01-01"),   # terbalik
+        ("2024-02-30", "2024-03-01"),   # tanggal tidak valid
+    ])
+    def test_rentang_tidak_valid_ditolak(self, mock_expense_repo, date_from, date_to):
+        from app.core.exceptions import ValidationError
+
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        with pytest.raises(ValidationError):
+            service.get_expense_timeseries("user-1", "day", date_from, date_to)
+        mock_expense_repo.get_timeseries.assert_not_called()
+
+    def test_terlalu_banyak_bucket_ditolak(self, mock_expense_repo):
+        from app.core.exceptions import ValidationError
+
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        with pytest.raises(ValidationError):
+            service.get_expense_timeseries("user-1", "day", "2000-01-01", "2024-12-31")
+        # Rentang yang sama per bulan masih diizinkan
+        service.get_expense_timeseries("user-1", "month", "2000-01-01", "2024-12-31")
+
+    @pytest.mark.parametrize("granularity,date_from,date_to,expected", [
+        ("day", "2024-01-02", "2024-01-04", 3),
+        ("week", "2024-01-01", "2024-01-20", 3),      # Senin 1, 8, 15
+        ("week", "2024-01-07", "2024-01-08", 2),      # Minggu → Senin berikutnya
+        ("month", "2024-01-15", "2024-04-02", 4),
+        ("year", "2023-06-01", "2024-06-01", 2),
+    ])
+    def test_jumlah_bucket_sama_dengan_date_trunc_postgres(self, granularity, date_from, date_to, expected):
+        from datetime import date
+
+        count = ExpenseService._count_buckets(
+            granularity, date.fromisoformat(date_from), date.fromisoformat(date_to)
+        )
+
+        assert count == expected
+
+
+class TestGetAllExpensesSearch:
+    """
+    File referensi: app/services/expense_service.py → get_all_expenses(search_mode=...)
+    """
+
+    def test_ranked_memakai_full_text_search(self, mock_expense_repo):
+        mock_expense_repo.search.return_value = ([make_row(1), make_row(2)], 12)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", limit=2, offset=4, q="kopi", search_mode="ranked")
+
+        mock_expense_repo.search.assert_called_once_with(
+            "user-1", "kopi", limit=2, offset=4,
+            expense_type=None, category=None, date_from=None, date_to=None,
+        )
+        mock_expense_repo.find_page.assert_not_called()
+        assert result.total == 12
+        assert result.next_cursor is None
+        assert len(result.expenses) == 2
+
+    def test_ranked_tanpa_hasil_fallback_ke_ilike(self, mock_expense_repo):
+        """SKENARIO: 'pi' tidak cocok sebagai prefix kata, tapi ILIKE menemukan 'kopi'."""
+        mock_expense_repo.search.return_value = ([], 0)
+        mock_expense_repo.find_page.return_value = ([make_row(1)], 1)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", q="pi", search_mode="ranked")
+
+        assert mock_expense_repo.find_page.call_args.kwargs["q"] == "pi"
+        assert result.total == 1
+
+    def test_ranked_offset_lewat_hasil_terakhir_halaman_kosong_bukan_ilike(self, mock_expense_repo):
+        """SKENARIO: 12 hasil ranked, client minta offset 20 → halaman kosong, total tetap 12."""
+        mock_expense_repo.search.side_effect = [([], 0), ([make_row(1)], 12)]
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", limit=10, offset=20, q="kopi", search_mode="ranked")
+
+        assert (result.expenses, result.total, result.next_cursor) == ([], 12, None)
+        assert mock_expense_repo.search.call_args.kwargs["offset"] == 0
+        mock_expense_repo.find_page.assert_not_called()
+
+    def test_ranked_tanpa_hasil_sama_sekali_offset_lanjut_tetap_ilike(self, mock_expense_repo):
+        """Halaman pertama sudah fallback ke ILIKE → halaman berikutnya juga ILIKE."""
+        mock_expense_repo.search.side_effect = [([], 0), ([], 0)]
+        mock_expense_repo.find_page.return_value = ([make_row(1)], 11)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", limit=10, offset=10, q="pi", search_mode="ranked")
+
+        assert mock_expense_repo.find_page.call_args.kwargs["offset"] == 10
+        assert result.total == 11
+
+    async def test_async_ranked_offset_lewat_hasil_terakhir(self, async_expense_repo):
+        from app.services.expense_service import AsyncExpenseService
+
+        async_expense_repo.search.side_effect = [([], 0), ([make_row(1)], 12)]
+
+        result = await AsyncExpenseService(async_expense_repo).get_all_expenses(
+            "user-1", limit=10, offset=20, q="kopi", search_mode="ranked",
+        )
+
+        assert (result.expenses, result.total) == ([], 12)
+        async_expense_repo.find_page.assert_not_called()
+
+    def test_ilike_default_tidak_memanggil_search(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([make_row(1)], 1)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        service.get_all_expenses("user-1", q="kopi")
+
+        mock_expense_repo.search.assert_not_called()
+
+    def test_ranked_dengan_cursor_tetap_keyset_ilike(self, mock_expense_repo):
+        mock_expense_repo.find_page.return_value = ([make_row(1)], None)
+        mock_expense_repo.count_all.return_value = 1
+        service = ExpenseService(expense_repo=mock_expense_repo)
+        cursor = ExpenseRepository.encode_cursor(make_row(0))
+
+        service.get_all_expenses("user-1", q="kopi", cursor=cursor, search_mode="ranked")
+
+        mock_expense_repo.search.assert_not_called()
+        mock_expense_repo.find_page.assert_called_once()
+
+
+class TestGetAllExpensesFields:
+    """
+    File referensi: app/services/expense_service.py → get_all_expenses(fields=...)
+    """
+
+    def test_fields_diteruskan_dan_hanya_field_diminta_yang_di_set(self, mock_expense_repo):
+        mock_expense_repo.select_columns.side_effect = ExpenseRepository.select_columns
+        row = make_row(1)
+        mock_expense_repo.find_page.return_value = ([
+            {"id": row["id"], "amount": row["amount"], "created_at": row["created_at"]},
+        ], 1)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.get_all_expenses("user-1", fields=["amount"])
+
+        assert mock_expense_repo.find_page.call_args.kwargs["fields"] == ["amount"]
+        dumped = result.model_dump(exclude_unset=True)
+        assert dumped["expenses"] == [{"id": row["id"], "amount": row["amount"]}]
+        assert "next_cursor" in dumped
+
+    def test_field_tidak_dikenal_ditolak_sebelum_query(self, mock_expense_repo):
+        from app.core.exceptions import ValidationError
+
+        mock_expense_repo.select_columns.side_effect = ExpenseRepository.select_columns
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        with pytest.raises(ValidationError):
+            service.get_all_expenses("user-1", fields=["embedding"])
+        mock_expense_repo.find_page.assert_not_called()
+
+
+class TestCreateExpensesBulk:
+    """
+    File referensi: app/services/expense_service.py → create_expenses()
+    """
+
+    @staticmethod
+    def echo_insert(rows):
+        return [{**make_row(i), **row} for i, row in enumerate(rows)]
+
+    def test_item_valid_dibuat_dan_item_tidak_valid_dilaporkan(self, mock_expense_repo):
+        mock_expense_repo.create_many.side_effect = self.echo_insert
+        embedding_service = MagicMock()
+        service = ExpenseService(expense_repo=mock_expense_repo, embedding_service=embedding_service)
+
+        result = service.create_expenses("user-1", [
+            {"amount": 10, "category": " Makanan "},
+            {"amount": -5, "category": "makanan"},
+            {"amount": 20, "category": "transport", "transaction_date": "2024-06-01"},
+        ])
+
+        assert (result.created, result.failed) == (2, 1)
+        assert [r.success for r in result.results] == [True, False, True]
+        assert "amount" in result.results[1].error
+        inserted = mock_expense_repo.create_many.call_args.args[0]
+        assert inserted[0] == {
+            "user_id": "user-1", "amount": 10, "type": "expense", "description": None,
+            "category": "makanan", "subcategory": None, "payment_method": None,
+        }
+        assert inserted[1]["transaction_date"] == "2024-06-01"
+        embedding_service.generate_for_expenses_batch_safe.assert_called_once()
+        embedding_service.generate_for_expenses_safe.assert_not_called()
+
+    def test_insert_dan_embedding_per_chunk(self, mock_expense_repo, monkeypatch):
+        from app.services import expense_service
+
+        monkeypatch.setattr(expense_service, "BULK_INSERT_CHUNK_SIZE", 2)
+        mock_expense_repo.create_many.side_effect = self.echo_insert
+        embedding_service = MagicMock()
+        service = ExpenseService(expense_repo=mock_expense_repo, embedding_service=embedding_service)
+
+        result = service.create_expenses("user-1", [{"amount": i + 1, "category": "x"} for i in range(5)])
+
+        assert result.created == 5
+        assert [len(c.args[0]) for c in mock_expense_repo.create_many.call_args_list] == [2, 2, 1]
+        assert [len(c.args[0]) for c in embedding_service.generate_for_expenses_batch_safe.call_args_list] == [2, 2, 1]
+
+    def test_chunk_gagal_tidak_menggagalkan_chunk_lain(self, mock_expense_repo, monkeypatch, caplog):
+        from app.services import expense_service
+
+        monkeypatch.setattr(expense_service, "BULK_INSERT_CHUNK_SIZE", 2)
+        mock_expense_repo.create_many.side_effect = [
+            RuntimeError('violates check constraint "expenses_amount_check"'), self.echo_insert([{}]),
+        ]
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.create_expenses("user-1", [{"amount": i + 1, "category": "x"} for i in range(3)])
+
+        assert [r.success for r in result.results] == [False, False, True]
+        # Detail DB (nama constraint) hanya di log, client dapat pesan tetap
+        assert result.results[0].error == expense_service.CHUNK_INSERT_ERROR
+        assert "expenses_amount_check" in caplog.text
+        assert [r.index for r in result.results] == [0, 1, 2]
+
+    def test_chunk_gagal_karena_app_error_memakai_pesannya(self, mock_expense_repo):
+        from app.core.exceptions import ValidationError
+
+        mock_expense_repo.create_many.side_effect = ValidationError("Too many rows")
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.create_expenses("user-1", [{"amount": 1, "category": "x"}])
+
+        assert result.results[0].error == "Too many rows"
+
+
+class TestImportExpensesCsv:
+    """
+    File referensi: app/services/expense_service.py → import_expenses_csv()
+    """
+
+    @staticmethod
+    def csv_bytes(text: str):
+        import io
+
+        return io.BytesIO(text.encode("utf-8"))
+
+    def test_hasil_export_bisa_diimport_kembali(self, mock_expense_repo):
+        rows = [make_row(1), {**make_row(2), "description": "kopi, susu", "subcategory": "minuman"}]
+        mock_expense_repo.find_all.side_effect = [rows, []]
+        mock_expense_repo.create_many.side_effect = lambda data: data
+        service = ExpenseService(expense_repo=mock_expense_repo)
+        exported = "".join(service.export_expenses_csv("user-1")).encode("utf-8")
+
+        import io
+        report = service.import_expenses_csv("user-2", io.BytesIO(exported))
+
+        assert (report.imported, report.failed, report.errors) == (2, 0, [])
+        inserted = mock_expense_repo.create_many.call_args.args[0]
+        assert inserted[1] == {
+            "user_id": "user-2", "amount": 1002.0, "type": "expense", "description": "kopi, susu",
+            "category": "makanan", "subcategory": "minuman", "payment_method": None,
+            "transaction_date": "2024-06-15",
+        }
+        # id / created_at / updated_at dari export tidak ikut diinsert
+        assert "id" not in inserted[0]
+
+    def test_error_dilaporkan_per_nomor_baris(self, mock_expense_repo):
+        mock_expense_repo.create_many.side_effect = lambda data: data
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        report = service.import_expenses_csv("user-1", self.csv_bytes(
+            "amount,category,transaction_date\n"
+            "10,makanan,2024-06-01\n"
+            "-5,makanan,2024-06-01\n"
+            "abc,makanan,\n"
+            "20,,2024-06-01\n"
+            "30,makanan,01/06/2024\n"
+            "40,makanan,2024-06-01,extra\n"
+            "50,transport,\n"
+        ))
+
+        assert (report.imported, report.failed) == (2, 5)
+        assert [e.line for e in report.errors] == [3, 4, 5, 6, 7]
+        assert "greater than zero" in report.errors[0].error
+        assert report.errors[2].error.startswith("category")
+        assert "YYYY-MM-DD" in report.errors[3].error
+
+    def test_insert_per_chunk_dan_chunk_gagal_dilaporkan(self, mock_expense_repo, monkeypatch):
+        from app.services import expense_service
+
+        monkeypatch.setattr(expense_service, "BULK_INSERT_CHUNK_SIZE", 2)
+        mock_expense_repo.create_many.side_effect = [RuntimeError("db down"), [{}, {}], [{}]]
+        embedding_service = MagicMock()
+        service = ExpenseService(expense_repo=mock_expense_repo, embedding_service=embedding_service)
+        body = "amount,category\n" + "".join(f"{i + 1},makanan\n" for i in range(5))
+
+        report = service.import_expenses_csv("user-1", self.csv_bytes(body))
+
+        assert (report.imported, report.failed) == (3, 2)
+        assert [(e.line, e.error) for e in report.errors] == [
+            (2, expense_service.CHUNK_INSERT_ERROR), (3, expense_service.CHUNK_INSERT_ERROR),
+        ]
+        assert mock_expense_repo.create_many.call_count == 3
+        assert embedding_service.generate_for_expenses_batch_safe.call_count == 2
+
+    def test_laporan_error_dibatasi(self, mock_expense_repo, monkeypatch):
+        from app.services import expense_service
+
+        monkeypatch.setattr(expense_service, "MAX_IMPORT_ERRORS", 3)
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        report = service.import_expenses_csv("user-1", self.csv_bytes("amount,category\n" + "-1,x\n" * 10))
+
+        assert report.failed == 10
+        assert len(report.errors) == 3
+        assert report.errors_truncated is True
+
+    @pytest.mark.parametrize("header, message", [
+        ("amount,type\n", "Missing CSV columns: category"),
+        ("amount,category,embedding\n", "Unknown CSV columns: embedding"),
+    ])
+    def test_header_tidak_sesuai_ditolak(self, mock_expense_repo, header, message):
+        from app.core.exceptions import ValidationError
+
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        with pytest.raises(ValidationError, match=message):
+            service.import_expenses_csv("user-1", self.csv_bytes(header + "1,x,y\n"))
+        mock_expense_repo.create_many.assert_not_called()
+
+
+class TestBulkByFilter:
+    """
+    File referensi: app/services/expense_service.py
+    → bulk_update_expenses(), bulk_delete_expenses()
+    """
+
+    def test_bulk_update_satu_query_dan_embedding_dijadwalkan_per_batch(self, mock_expense_repo, monkeypatch):
+        from app.models.expense import UpdateExpenseRequest
+        from app.services import expense_service
+
+        monkeypatch.setattr(expense_service, "EMBEDDING_BATCH_SIZE", 2)
+        mock_expense_repo.update_by_filter.return_value = [make_row(i) for i in range(5)]
+        embedding_service = MagicMock()
+        scheduled = []
+        service = ExpenseService(
+            expense_repo=mock_expense_repo,
+            embedding_service=embedding_service,
+            schedule_task=lambda func, *args: scheduled.append((func, args)),
+        )
+
+        result = service.bulk_update_expenses(
+            "user-1", UpdateExpenseRequest(category=" Transport "), category="gojek",
+        )
+
+        assert result.affected == 5
+        assert result.ids == [make_row(i)["id"] for i in range(5)]
+        mock_expense_repo.update_by_filter.assert_called_once_with(
+            "user-1", {"category": "transport"},
+            expense_type=None, category="gojek", q=None, date_from=None, date_to=None,
+        )
+        # Tidak dijalankan inline, tapi dijadwalkan dalam batch 2 + 2 + 1
+        embedding_service.generate_for_expenses_batch_safe.assert_not_called()
+        assert [len(args[0]) for _, args in scheduled] == [2, 2, 1]
+        assert all(func == embedding_service.generate_for_expenses_batch_safe for func, _ in scheduled)
+
+    def test_bulk_update_tanggal_saja_tidak_refresh_embedding(self, mock_expense_repo):
+        from app.models.expense import UpdateExpenseRequest
+
+        mock_expense_repo.update_by_filter.return_value = [make_row(1)]
+        embedding_service = MagicMock()
+        service = ExpenseService(expense_repo=mock_expense_repo, embedding_service=embedding_service)
+
+        service.bulk_update_expenses(
+            "user-1", UpdateExpenseRequest(transaction_date="2024-06-01"), date_to="2024-05-31",
+        )
+
+        embedding_service.generate_for_expenses_batch_safe.assert_not_called()
+
+    def test_bulk_delete_mengembalikan_id_yang_dihapus(self, mock_expense_repo):
+        mock_expense_repo.soft_delete_by_filter.return_value = ["a", "b"]
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        result = service.bulk_delete_expenses("user-1", date_from="2024-06-01", date_to="2024-06-01")
+
+        assert (result.affected, result.ids) == (2, ["a", "b"])
+
+    @pytest.mark.parametrize("operation", ["update", "delete"])
+    def test_tanpa_filter_ditolak(self, mock_expense_repo, operation):
+        from app.core.exceptions import ValidationError
+        from app.models.expense import UpdateExpenseRequest
+
+        service = ExpenseService(expense_repo=mock_expense_repo)
+
+        with pytest.raises(ValidationError, match="at least one filter"):
+            if operation == "update":
+                service.bulk_update_expenses("user-1", UpdateExpenseRequest(amount=1), q="  ")
+            else:
+                service.bulk_delete_expenses("user-1")
+        mock_expense_repo.update_by_filter.assert_not_called()
+        mock_expense_repo.soft_delete_by_filter.assert_not_called()
+
+
+@pytest.fixture
+def async_expense_repo():
+    """Mock AsyncExpenseRepository: method async jadi AsyncMock, helper sync tetap asli."""
+    from app.repositories.expense_repository import AsyncExpenseRepository
+
+    repo = MagicMock(spec=AsyncExpenseRepository)
+    repo.encode_cursor.side_effect = AsyncExpenseRepository.encode_cursor
+    repo.select_columns.side_effect = AsyncExpenseRepository.select_columns
+    return repo
+
+
+class TestAsyncExpenseService:
+    """
+    AsyncExpenseService: use case yang sama dengan ExpenseService, semua
+    round trip repository / embedding di-await.
+    File referensi: app/services/expense_service.py → AsyncExpenseService
+    """
+
+    async def test_halaman_cursor_sama_dengan_versi_sync(self, async_expense_repo):
+        from app.services.expense_service import AsyncExpenseService
+
+        rows = [make_row(i) for i in range(4)]
+        async_expense_repo.find_page.return_value = (rows, None)
+        async_expense_repo.count_all.return_value = 40
+        sync_repo = MagicMock()
+        sync_repo.encode_cursor.side_effect = ExpenseRepository.encode_cursor
+        sync_repo.find_page.return_value = (rows, None)
+        sync_repo.count_all.return_value = 40
+        cursor = ExpenseRepository.encode_cursor(make_row(9))
+
+        result = await AsyncExpenseService(async_expense_repo).get_all_expenses("user-1", limit=3, cursor=cursor)
+        expected = ExpenseService(sync_repo).get_all_expenses("user-1", limit=3, cursor=cursor)
+
+        assert result == expected
+        assert result.total == 40 and result.next_cursor is not None
+        assert async_expense_repo.find_page.await_args.kwargs["count_mode"] == "none"
+
+    async def test_bulk_create_sama_dengan_versi_sync(self, async_expense_repo, monkeypatch):
+        from app.services import expense_service
+        from app.services.expense_service import AsyncExpenseService
+
+        monkeypatch.setattr(expense_service, "BULK_INSERT_CHUNK_SIZE", 2)
+        items = [{"amount": 1, "category": "x"}, {"amount": -1, "category": "x"}, {"amount": 2}, {"amount": 3, "category": "x"}]
+        async_expense_repo.create_many.side_effect = [[make_row(1), make_row(3)]]
+        sync_repo = MagicMock()
+        sync_repo.create_many.side_effect = [[make_row(1), make_row(3)]]
+
+        result = await AsyncExpenseService(async_expense_repo).create_expenses("user-1", items)
+        expected = ExpenseService(sync_repo).create_expenses("user-1", items)
+
+        assert result == expected
+        assert (result.created, result.failed) == (2, 2)
+        # Saudara, bukan subclass: method async tidak menimpa method sync
+        assert not issubclass(AsyncExpenseService, ExpenseService)
+
+    def test_base_tanpa_fetch_page_tidak_bisa_dibuat(self, mock_expense_repo):
+        from app.services.expense_service import ExpenseServiceBase
+
+        # Setiap service wajib menentukan cara export membaca satu halaman
+        assert ExpenseServiceBase.__abstractmethods__ == {"_fetch_page"}
+        with pytest.raises(TypeError):
+            ExpenseServiceBase(mock_expense_repo)
+
+    async def test_create_menunggu_embedding_lalu_mengembalikan_expense(self, async_expense_repo):
+        from unittest.mock import AsyncMock
+        from app.models.expense import CreateExpenseRequest
+        from app.services.expense_service import AsyncExpenseService
+
+        async_expense_repo.create.return_value = make_row(1)
+        embedding_service = MagicMock()
+        embedding_service.generate_for_expenses_safe = AsyncMock(return_value=True)
+        service = AsyncExpenseService(async_expense_repo, embedding_service=embedding_service)
+
+        result = await service.create_expense("user-1", CreateExpenseRequest(amount=1001, category="makanan"))
+
+        assert str(result.id) == make_row(1)["id"]
+        embedding_service.generate_for_expenses_safe.assert_awaited_once()
+        assert embedding_service.generate_for_expenses_safe.await_args.kwargs["expense_id"] == make_row(1)["id"]
+
+    async def test_bulk_update_tanpa_scheduler_embedding_di_await_inline(self, async_expense_repo):
+        from unittest.mock import AsyncMock
+        from app.models.expense import UpdateExpenseRequest
+        from app.services.expense_service import AsyncExpenseService
+
+        async_expense_repo.update_by_filter.return_value = [make_row(1), make_row(2)]
+        embedding_service = MagicMock()
+        embedding_service.generate_for_expenses_batch_safe = AsyncMock(return_value=True)
+        service = AsyncExpenseService(async_expense_repo, embedding_service=embedding_service)
+
+        result = await service.bulk_update_expenses("user-1", UpdateExpenseRequest(amount=5), category="kopi")
+
+        assert result.affected == 2
+        embedding_service.generate_for_expenses_batch_safe.assert_awaited_once()
+
+    async def test_import_csv_parse_di_thread_insert_di_await(self, async_expense_repo, monkeypatch):
+        import io
+        from app.services import expense_service
+        from app.services.expense_service import AsyncExpenseService
+
+        monkeypatch.setattr(expense_service, "BULK_INSERT_CHUNK_SIZE", 2)
+        async_expense_repo.create_many.side_effect = lambda data: data
+        service = AsyncExpenseService(async_expense_repo)
+
+        report = await service.import_expenses_csv("user-1", io.BytesIO(
+            b"amount,category\n10,makanan\n-1,makanan\n20,transport\n30,makanan\n"
+        ))
+
+        assert (report.imported, report.failed) == (3, 1)
+        assert report.errors[0].line == 3
+        assert [len(call.args[0]) for call in async_expense_repo.create_many.await_args_list] == [2, 1]
+
+    async def test_export_dari_worker_thread_mengambil_halaman_lewat_event_loop(self, async_expense_repo):
+        import anyio
+        from app.services.expense_service import AsyncExpenseService
+
+        async_expense_repo.find_all.side_effect = [[make_row(1), make_row(2)], []]
+        service = AsyncExpenseService(async_expense_repo)
+        chunks = service.export_expenses("user-1", export_format="csv", category="makanan")
+
+        # StreamingResponse mengiterasi iterator sync di worker thread
+        body = await anyio.to_thread.run_sync(lambda: b"".join(chunks))
+
+        assert body.decode().splitlines()[0].startswith("id,amount,type")
+        assert len(body.decode().splitlines()) == 3
+        assert async_expense_repo.find_all.await_args_list[0].kwargs["category"] == "makanan"
+
+
+class TestEmbeddingQueueWiring:
+    """
+    Dengan embedding_queue, write hanya mengantrikan row — tidak ada panggilan OpenAI inline.
+    File referensi: app/services/expense_service.py
+    """
+
+    def test_create_dan_update_mengantrikan_row(self, mock_expense_repo):
+        from app.models.expense import CreateExpenseRequest, UpdateExpenseRequest
+
+        mock_expense_repo.create.return_value = make_row(1)
+        mock_expense_repo.update.return_value = {**make_row(1), "category": "transport"}
+        embedding_service, queue = MagicMock(), MagicMock()
+        service = ExpenseService(
+            expense_repo=mock_expense_repo, embedding_service=embedding_service, embedding_queue=queue,
+        )
+
+        service.create_expense("user-1", CreateExpenseRequest(amount=1001, category="makanan"))
+        service.update_expense("user-1", make_row(1)["id"], UpdateExpenseRequest(category="transport"))
+
+        queued = [c.args[0] for c in queue.enqueue.call_args_list]
+        assert [(row["id"], row["category"]) for row in queued] == [
+            (make_row(1)["id"], "makanan"), (make_row(1)["id"], "transport"),
+        ]
+        embedding_service.generate_for_expenses_safe.assert_not_called()
+
+    def test_bulk_create_dan_bulk_update_mengantrikan_semua_row(self, mock_expense_repo):
+        from app.models.expense import UpdateExpenseRequest
+
+        mock_expense_repo.create_many.side_effect = lambda rows: [make_row(i) for i in range(len(rows))]
+        mock_expense_repo.update_by_filter.return_value = [make_row(i) for i in range(3)]
+        embedding_service, queue = MagicMock(), MagicMock()
+        scheduled = []
+        service = ExpenseService(
+            expense_repo=mock_expense_repo,
+            embedding_service=embedding_service,
+            schedule_task=lambda func, *args: scheduled.append(func),
+            embedding_queue=queue,
+        )
+
+        service.create_expenses("user-1", [{"amount": 1000, "category": "makanan"}] * 2)
+        service.bulk_update_expenses("user-1", UpdateExpenseRequest(category="transport"), category="makanan")
+
+        assert [len(c.args[0]) for c in queue.enqueue_many.call_args_list] == [2, 3]
+        assert scheduled == []
+        embedding_service.generate_for_expenses_batch_safe.assert_not_called()
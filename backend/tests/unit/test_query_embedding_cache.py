@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.query_embedding_cache import QueryEmbeddingCache
+from app.services.embedding_services import AsyncEmbeddingService, EmbeddingService
+
+pytestmark = pytest.mark.unit
+
+MODEL = "text-embedding-3-small"
+
+
+def embedding_response(value: float = 0.5):
+    return SimpleNamespace(data=[SimpleNamespace(index=0, embedding=[value, value])])
+
+
+class TestQueryEmbeddingCache:
+    """
+    Cache embedding query: TTL + LRU, single flight untuk query yang sama.
+    File referensi: app/core/query_embedding_cache.py
+    """
+
+    def test_entry_kedaluwarsa_setelah_ttl(self):
+        now = [0.0]
+        cache = QueryEmbeddingCache(ttl=60, clock=lambda: now[0])
+        cache.put("makan", [0.5])
+
+        now[0] = 59
+        assert cache.get("makan") == [0.5]
+        now[0] = 60
+        assert cache.get("makan") is None
+        assert cache.stats.expirations == 1
+
+    def test_ukuran_dibatasi_lru(self):
+        cache = QueryEmbeddingCache(max_size=2)
+        cache.put("makan", [0.5])
+        cache.put("bensin", [0.25])
+        cache.get("makan")
+        cache.put("gaji", [0.125])
+
+        assert cache.get("bensin") is None
+        assert cache.get("makan") == [0.5] and cache.get("gaji") == [0.125]
+        assert cache.stats.evictions == 1
+
+    def test_thread_bersamaan_hanya_satu_panggilan(self):
+        cache = QueryEmbeddingCache()
+        calls = []
+        start = threading.Barrier(8)
+
+        def create():
+            calls.append(1)
+            time.sleep(0.05)
+            return [0.5]
+
+        def lookup(results):
+            start.wait()
+            results.append(cache.get_or_create("makan", create))
+
+        results: list = []
+        threads = [threading.Thread(target=lookup, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [[0.5]] * 8
+        assert cache.stats.misses == 1 and cache.stats.coalesced == 7
+
+    def test_gagal_tidak_disimpan_lalu_dicoba_lagi(self):
+        cache = QueryEmbeddingCache()
+
+        def failing():
+            raise RuntimeError("openai 500")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_create("makan", failing)
+        assert cache.get_or_create("makan", lambda: [0.5]) == [0.5]
+
+    async def test_coroutine_bersamaan_hanya_satu_panggilan(self):
+        cache = QueryEmbeddingCache()
+        calls = []
+
+        async def create():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return [0.5]
+
+        results = await asyncio.gather(*(cache.aget_or_create("bensin", create) for _ in range(10)))
+
+        assert len(calls) == 1
+        assert results == [[0.5]] * 10
+        assert await cache.aget_or_create("bensin", create) == [0.5]
+        assert cache.snapshot()["hit_rate"] == round(10 / 11, 4)
+
+    async def test_caller_dibatalkan_tidak_membatalkan_yang_lain(self):
+        cache = QueryEmbeddingCache()
+
+        async def create():
+            await asyncio.sleep(0.05)
+            return [0.5]
+
+        first = asyncio.create_task(cache.aget_or_create("gaji", create))
+        second = asyncio.create_task(cache.aget_or_create("gaji", create))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == [0.5]
+        assert cache.get("gaji") == [0.5]
+
+    async def test_error_diteruskan_ke_semua_yang_menunggu(self):
+        cache = QueryEmbeddingCache()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("openai 429")
+
+        results = await asyncio.gather(
+            *(cache.aget_or_create("gaji", failing) for _ in range(3)), return_exceptions=True,
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(cache) == 0
+
+
+class TestGenerateForQueryCache:
+    """
+    File referensi: app/services/embedding_services.py → generate_for_query()
+    """
+
+    def test_query_ternormalisasi_memakai_vector_yang_sama(self):
+        openai = MagicMock()
+        openai.embeddings.create.return_value = embedding_response()
+        service = EmbeddingService(openai_client=openai, ai_repo=MagicMock(), query_cache=QueryEmbeddingCache())
+
+        assert service.generate_for_query("Makan") == [0.5, 0.5]
+        assert service.generate_for_query("  makan ") == [0.5, 0.5]
+
+        openai.embeddings.create.assert_called_once_with(model=MODEL, input="Makan")
+
+    async def test_async_search_bersamaan_satu_panggilan_openai(self):
+        openai = MagicMock()
+
+        async def create(model, input):
+            await asyncio.sleep(0.02)
+            return embedding_response()
+
+        openai.embeddings.create = AsyncMock(side_effect=create)
+        service = AsyncEmbeddingService(openai_client=openai, ai_repo=MagicMock(), query_cache=QueryEmbeddingCache())
+
+        results = await asyncio.gather(*(service.generate_for_query("bensin") for _ in range(5)))
+
+        assert results == [[0.5, 0.5]] * 5
+        assert openai.embeddings.create.await_count == 1
@@ -0,0 +1,87 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.infrastructure.supabase_client import SupabaseClientManager
+
+pytestmark = pytest.mark.unit
+
+URL = "https://project.supabase.co"
+
+
+def make_manager(handler=None, async_handler=None) -> SupabaseClientManager:
+    """Manager dengan transport palsu — tidak ada koneksi jaringan."""
+    handler = handler or (lambda request: httpx.Response(200, json=[]))
+    return SupabaseClientManager(
+        url=URL,
+        anon_key="anon-key",
+        service_role_key="service-key",
+        transport=httpx.MockTransport(handler),
+        async_transport_factory=lambda: httpx.MockTransport(async_handler or handler),
+    )
+
+
+class TestSupabaseClientManager:
+    """
+    Satu transport HTTP per proses; client per-token hanya beda header.
+    File referensi: app/infrastructure/supabase_client.py
+    """
+
+    def test_admin_dipakai_ulang_dan_anon_baru_tapi_transport_sama(self):
+        manager = make_manager()
+
+        assert manager.admin() is manager.admin()
+        first, second = manager.anon(), manager.anon()
+        # Session login disimpan di client anon → tidak boleh dibagi antar request
+        assert first is not second
+        assert first.options.httpx_client is second.options.httpx_client is manager.http()
+        assert manager.admin().options.httpx_client is manager.http()
+
+    def test_user_view_membawa_jwt_masing_masing_di_session_yang_sama(self):
+        seen = []
+        manager = make_manager(lambda request: seen.append(request.headers["authorization"]) or httpx.Response(200, json=[]))
+
+        alice, bob = manager.user_view("token-alice"), manager.user_view("token-bob")
+        alice.table("expenses").select("id").execute()
+        bob.table("expenses").select("id").execute()
+
+        assert seen == ["Bearer token-alice", "Bearer token-bob"]
+        assert alice.session is bob.session is manager.http()
+
+    def test_metrics_menghitung_request_dan_view(self):
+        manager = make_manager()
+
+        for token in ("a", "b", "c"):
+            manager.user_view(token).rpc("get_expense_summary", {}).execute()
+        stats = manager.pool_stats()
+
+        assert stats["requests_total"] == 3
+        assert stats["user_views"] == 3
+        assert stats["in_flight"] == 0 and stats["peak_in_flight"] == 1
+
+    def test_request_gagal_tetap_mengurangi_in_flight(self):
+        def boom(request):
+            raise httpx.ConnectError("down")
+
+        manager = make_manager(boom)
+
+        with pytest.raises(httpx.ConnectError):
+            manager.http().get(f"{URL}/rest/v1/expenses")
+        assert manager.pool_stats()["in_flight"] == 0
+
+    def test_client_async_satu_per_event_loop(self):
+        manager = make_manager()
+
+        async def views():
+            first = manager.async_user_view("token")
+            await first.table("expenses").select("id").execute()
+            return first.session, manager.async_admin_view().session
+
+        user_session, admin_session = asyncio.run(views())
+        other_loop_session, _ = asyncio.run(views())
+
+        assert user_session is admin_session
+        # Koneksi httpcore terikat ke event loop yang membukanya
+        assert other_loop_session is not user_session
+        assert manager.pool_stats()["requests_total"] == 2
@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+
+import jwt
+import pytest
+from unittest.mock import MagicMock
+from supabase import AuthApiError
+
+from app.core import dependencies
+from app.core.config import get_settings
+from app.core.dependencies import forget_token, get_current_user
+from app.core.exceptions import InvalidTokenError
+from app.core.token_cache import TokenCache, get_token_cache
+from app.models.auth import UserOut
+
+pytestmark = pytest.mark.unit
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def make_token(sub: str = USER_ID, expires_in: int = 3600, **claims) -> str:
+    payload = {
+        "sub": sub,
+        "email": "budi@test.com",
+        "aud": "authenticated",
+        "exp": int(time.time()) + expires_in,
+        **claims,
+    }
+    return jwt.encode(payload, get_settings().SUPABASE_JWT_SECRET, algorithm="HS256")
+
+
+def make_user(user_id: str = USER_ID) -> UserOut:
+    return UserOut(id=user_id, email="budi@test.com", created_at="")
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def local_mode(monkeypatch):
+    """AUTH_VERIFICATION_MODE=local dengan cache yang bersih."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "AUTH_VERIFICATION_MODE", "local")
+    monkeypatch.setattr(settings, "AUTH_REVOCATION_CHECK_INTERVAL", 0.0)
+    get_token_cache.cache_clear()
+    yield settings
+    get_token_cache.cache_clear()
+
+
+@pytest.fixture
+def remote_mode(monkeypatch):
+    """AUTH_VERIFICATION_MODE=remote (default): setiap request bertanya ke Supabase Auth."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "AUTH_VERIFICATION_MODE", "remote")
+    return settings
+
+
+class TestTokenCache:
+    """
+    Cache TTL + LRU untuk token yang sudah diverifikasi.
+    File referensi: app/core/token_cache.py
+    """
+
+    def test_ttl_tidak_melewati_exp_token(self):
+        clock = FakeClock()
+        cache = TokenCache(ttl=300, clock=clock)
+
+        cache.put("token-a", make_user(), token_exp=clock.now + 60)
+        clock.now += 59
+        assert cache.get("token-a").user.id == USER_ID
+
+        # exp token (60 detik) lebih dulu dari TTL cache (300 detik)
+        clock.now += 1
+        assert cache.get("token-a") is None
+
+    def test_kunci_hash_bukan_token_mentah(self):
+        cache = TokenCache()
+        cache.put("rahasia.jwt.token", make_user(), token_exp=time.time() + 60)
+
+        assert "rahasia.jwt.token" not in cache._entries
+        assert TokenCache.key("rahasia.jwt.token") in cache._entries
+
+    def test_lru_membuang_entry_paling_lama_tidak_dipakai(self):
+        cache = TokenCache(max_size=2)
+        exp = time.time() + 60
+        cache.put("a", make_user(), exp)
+        cache.put("b", make_user(), exp)
+        cache.get("a")
+        cache.put("c", make_user(), exp)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert len(cache) == 2 and cache.stats.evictions == 1
+
+    def test_revoke_ditolak_sampai_exp_walau_ttl_lewat(self):
+        clock = FakeClock()
+        cache = TokenCache(ttl=10, clock=clock)
+
+        cache.revoke("token-a", token_exp=clock.now + 100)
+        clock.now += 50
+        assert cache.get("token-a").revoked
+        clock.now += 50
+        assert cache.get("token-a") is None
+
+
+class TestGetCurrentUserLocal:
+    """
+    get_current_user dengan AUTH_VERIFICATION_MODE=local.
+    File referensi: app/core/dependencies.py
+    """
+
+    async def test_tidak_memanggil_supabase_dan_request_kedua_dari_cache(self, local_mode):
+        admin = MagicMock()
+        token = make_token()
+
+        first = await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+        second = await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+
+        assert first.id == second.id == USER_ID
+        admin.auth.get_user.assert_not_called()
+        assert get_token_cache().stats.hits == 1
+
+    async def test_token_expired_atau_signature_salah_ditolak_dan_tidak_dicache(self, local_mode):
+        forged = jwt.encode(
+            {"sub": USER_ID, "aud": "authenticated", "exp": int(time.time()) + 60},
+            "x" * 40,
+            algorithm="HS256",
+        )
+
+        with pytest.raises(InvalidTokenError):
+            await get_current_user(authorization=f"Bearer {make_token(expires_in=-10)}", admin_supabase=MagicMock())
+        with pytest.raises(InvalidTokenError):
+            await get_current_user(authorization=f"Bearer {forged}", admin_supabase=MagicMock())
+        assert len(get_token_cache()) == 0
+
+    async def test_token_logout_ditolak_walau_signature_masih_valid(self, local_mode):
+        token = make_token()
+        await get_current_user(authorization=f"Bearer {token}", admin_supabase=MagicMock())
+
+        forget_token(token)
+
+        with pytest.raises(InvalidTokenError):
+            await get_current_user(authorization=f"Bearer {token}", admin_supabase=MagicMock())
+
+    async def test_cek_revokasi_di_background_menolak_request_berikutnya(self, local_mode, monkeypatch):
+        monkeypatch.setattr(local_mode, "AUTH_REVOCATION_CHECK_INTERVAL", 60.0)
+        admin = MagicMock()
+        admin.auth.get_user.side_effect = AuthApiError("invalid JWT: session not found", 403, None)
+        token = make_token()
+
+        # Request pertama tetap dilayani dari verifikasi lokal; cek jalan di background
+        user = await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+        assert user.id == USER_ID
+        await asyncio.gather(*dependencies._revocation_checks)
+
+        admin.auth.get_user.assert_called_once_with(token)
+        with pytest.raises(InvalidTokenError):
+            await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+
+    async def test_cek_revokasi_paling_sering_sekali_per_interval(self, local_mode, monkeypatch):
+        monkeypatch.setattr(local_mode, "AUTH_REVOCATION_CHECK_INTERVAL", 60.0)
+        admin = MagicMock()
+        token = make_token()
+
+        for _ in range(5):
+            await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+        await asyncio.gather(*dependencies._revocation_checks)
+
+        admin.auth.get_user.assert_called_once_with(token)
+
+    async def test_supabase_tidak_terjangkau_token_tetap_diterima(self, local_mode, monkeypatch):
+        monkeypatch.setattr(local_mode, "AUTH_REVOCATION_CHECK_INTERVAL", 60.0)
+        admin = MagicMock()
+        admin.auth.get_user.side_effect = ConnectionError("down")
+        token = make_token()
+
+        await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+        await asyncio.gather(*dependencies._revocation_checks)
+
+        user = await get_current_user(authorization=f"Bearer {token}", admin_supabase=admin)
+        assert user.id == USER_ID
+
+
+class TestGetCurrentUserRemote:
+    """
+    get_current_user dengan AUTH_VERIFICATION_MODE=remote.
+    File referensi: app/core/dependencies.py
+    """
+
+    async def test_panggilan_supabase_tidak_menahan_event_loop(self, remote_mode):
+        threads = []
+
+        def get_user(token):
+            threads.append(threading.current_thread())
+            time.sleep(0.05)
+            return MagicMock(user=make_user())
+
+        admin = MagicMock()
+        admin.auth.get_user.side_effect = get_user
+
+        started = time.perf_counter()
+        users = await asyncio.gather(*(
+            get_current_user(authorization=f"Bearer {make_token()}", admin_supabase=admin) for _ in range(5)
+        ))
+        elapsed = time.perf_counter() - started
+
+        assert [user.id for user in users] == [USER_ID] * 5
+        assert threading.main_thread() not in threads
+        # Berurutan di event loop = 5 x 50 ms; di worker thread saling tumpang tindih
+        assert elapsed < 0.15
+
+    async def test_supabase_tidak_terjangkau_pakai_verifikasi_lokal(self, remote_mode):
+        admin = MagicMock()
+        admin.auth.get_user.side_effect = ConnectionError("down")
+
+        user = await get_current_user(authorization=f"Bearer {make_token()}", admin_supabase=admin)
+
+        assert user.id == USER_ID